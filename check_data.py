@@ -1,39 +1,43 @@
 #!/usr/bin/env python3
-import sqlite3
 import os
+from sqlalchemy import create_engine, text
+from src.services.maintenance_service import MaintenanceService
 
-# Check both databases
-dbs = ['monman.db', 'finance_bot.db']
-for db_name in dbs:
-    if os.path.exists(db_name):
-        print(f'\n=== {db_name} ===')
-        conn = sqlite3.connect(db_name)
-        cursor = conn.cursor()
-        
-        # Get table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        print(f'Tables: {[t[0] for t in tables]}')
+def check_database(label, engine):
+    print(f'\n=== {label} ===')
+    maintenance = MaintenanceService(engine)
+    tables = maintenance.table_names()
+    print(f'Tables: {tables}')
+    
+    counts = maintenance.table_counts()
+    # Check if we have users
+    if 'users' in counts:
+        print(f"Users count: {counts['users']}")
         
-        # Check if we have users
-        if 'users' in [t[0] for t in tables]:
-            cursor.execute('SELECT COUNT(*) FROM users')
-            user_count = cursor.fetchone()[0]
-            print(f'Users count: {user_count}')
-            
-        # Check if we have assets
-        if 'assets' in [t[0] for t in tables]:
-            cursor.execute('SELECT COUNT(*) FROM assets WHERE is_active = 1')
-            asset_count = cursor.fetchone()[0]
+    # Check if we have assets
+    if 'assets' in tables:
+        with engine.connect() as conn:
+            asset_count = conn.execute(text('SELECT COUNT(*) FROM assets WHERE is_active = :active'), {'active': True}).scalar()
             print(f'Active assets count: {asset_count}')
             
             if asset_count > 0:
-                cursor.execute('SELECT id, name, symbol, asset_type, quantity, buy_price FROM assets WHERE is_active = 1 LIMIT 5')
-                assets = cursor.fetchall()
+                assets = conn.execute(text(
+                    'SELECT id, name, symbol, asset_type, quantity, buy_price FROM assets WHERE is_active = :active LIMIT 5'
+                ), {'active': True}).fetchall()
                 print('Sample assets:')
                 for asset in assets:
                     print(f'  ID: {asset[0]}, Name: {asset[1]}, Symbol: {asset[2]}, Type: {asset[3]}, Qty: {asset[4]}, Price: {asset[5]}')
-                    
-        conn.close()
+    engine.dispose()
+
+# Check both databases
+dbs = ['monman.db', 'finance_bot.db']
+for db_name in dbs:
+    if os.path.exists(db_name):
+        check_database(db_name, create_engine(f'sqlite:///{db_name}'))
     else:
         print(f'{db_name} not found')
+
+# Server database configured via DATABASE_URL (PostgreSQL)
+from src.models.database import engine, DB_BACKEND
+if DB_BACKEND != 'sqlite':
+    check_database(engine.url.render_as_string(hide_password=True), engine)
@@ -9,7 +9,19 @@ from src.handlers.wallet_handler import register_wallet_handlers
 from src.handlers.transaction_handler import register_transaction_handlers  
 from src.handlers.report_handler import register_report_handlers
 from src.handlers.asset_handler import register_asset_handlers
+from src.handlers.history_handler import register_history_handlers
+from src.handlers.search_handler import register_search_handlers
+from src.handlers.chart_handler import register_chart_handlers
 from src.services.scheduler_service import SchedulerService
+from src.services.write_queue_service import write_queue_enabled, get_write_queue, shutdown_write_queue
+from src.services.optimistic_lock_service import get_conflict_metrics
+from src.services.slow_query_service import install_slow_query_log, get_slow_query_metrics
+from src.services.outbox_service import get_outbox_dispatcher, start_outbox_dispatcher, shutdown_outbox_dispatcher
+from src.services.wallet_resolver_service import subscribe_wallet_names
+from src.services.report_cache_service import shutdown_report_cache, get_report_cache_metrics
+from src.services.chart_service import shutdown_chart_service, get_chart_metrics
+from src.services.telegram_file_service import shutdown_telegram_file_cache, get_telegram_file_metrics
+from src.models.database import engine, read_engine
 from migrations.init_db_enhanced import init_database
 from scripts.auto_backup import AutoBackupIntegration
 
@@ -45,6 +57,18 @@ class EnhancedFinanceBotApp:
         # Create database tables and initialize default data
         init_database()
         
+        # Opt-in slow-query log (SLOW_QUERY_MS > 0); after init so migrations stay out of it
+        install_slow_query_log(engine, read_engine)
+        
+        # Opt-in single-writer queue (DB_WRITE_QUEUE=true, SQLite only)
+        if write_queue_enabled():
+            get_write_queue()
+        
+        # Change events from the outbox table to in-process subscribers: the
+        # wallet-name cache is invalidated by wallet events
+        subscribe_wallet_names(get_outbox_dispatcher())
+        start_outbox_dispatcher()
+        
         # Register handlers
         self._register_handlers()
         
@@ -59,7 +83,10 @@ class EnhancedFinanceBotApp:
         register_wallet_handlers(self.bot)
         register_transaction_handlers(self.bot)
         register_report_handlers(self.bot)
+        register_history_handlers(self.bot)
+        register_search_handlers(self.bot)
         register_asset_handlers(self.bot)
+        register_chart_handlers(self.bot)
     
     def start_polling(self):
         """Start the bot with polling"""
@@ -84,10 +111,25 @@ class EnhancedFinanceBotApp:
         
         self.scheduler.stop()
         self.bot.stop_polling()
+        shutdown_write_queue()
+        shutdown_outbox_dispatcher()
+        shutdown_report_cache()
+        shutdown_chart_service()
+        shutdown_telegram_file_cache()
     
     def _cleanup_on_exit(self):
         """Cleanup function called on exit"""
         logger.info("Bot shutting down - creating final backup...")
+        shutdown_write_queue()
+        shutdown_outbox_dispatcher()
+        shutdown_report_cache()
+        shutdown_chart_service()
+        shutdown_telegram_file_cache()
+        logger.info(f"Optimistic lock conflicts: {get_conflict_metrics()}")
+        logger.info(f"Slow queries: {get_slow_query_metrics()}")
+        logger.info(f"Report cache: {get_report_cache_metrics()}")
+        logger.info(f"Charts: {get_chart_metrics()}")
+        logger.info(f"Telegram file reuse: {get_telegram_file_metrics()}")
         try:
             self.auto_backup.backup_before_bot_restart()
         except Exception as e:
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Migration: create the postings journal and wallet_balance_checkpoints, then
+journal every existing transaction that has no legs yet
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import sessionmaker
+from src.models.database import Posting, WalletCheckpoint, engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_ledger_journal(engine=None):
+    """Create the journal tables (with their indexes) and backfill postings. Idempotent."""
+    from src.services.ledger_service import LedgerService
+
+    engine = engine or default_engine
+    inspector = inspect(engine)
+    if 'transactions' not in inspector.get_table_names():
+        return []
+
+    changes = []
+    existing_tables = set(inspector.get_table_names())
+    for table in (Posting.__table__, WalletCheckpoint.__table__):
+        if table.name not in existing_tables:
+            table.create(engine, checkfirst=True)
+            changes.append(f"created {table.name}")
+
+    db = sessionmaker(bind=engine)()
+    try:
+        journaled = LedgerService(db).backfill_postings()
+    finally:
+        db.close()
+    if journaled:
+        changes.append(f"journaled {journaled} existing transactions")
+
+    for change in changes:
+        logger.info(f"[LEDGER] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_ledger_journal()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Ledger journal already up to date")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Migration: replace `is_active` composite indexes on users, wallets, categories
+and assets with partial indexes (WHERE is_active = 1) declared on the models
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from src.models.database import User, Wallet, Category, Asset, engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes that carried inactive rows and `is_active` as a key column
+LEGACY_ACTIVE_INDEXES = {
+    'users': ['ix_users_is_active', 'idx_user_telegram_active', 'idx_user_activity'],
+    'wallets': ['ix_wallets_is_active', 'idx_wallet_user_active', 'idx_wallet_user_type', 'idx_wallet_balance'],
+    'categories': ['ix_categories_is_active', 'idx_category_type_active', 'idx_category_system_active'],
+    'assets': ['ix_assets_is_active', 'idx_asset_user_active', 'idx_asset_wallet_active', 'idx_asset_user_type'],
+}
+
+PARTIAL_INDEX_MODELS = [User, Wallet, Category, Asset]
+
+def upgrade_partial_indexes(engine=None):
+    """Drop legacy is_active indexes and create the partial ones. Idempotent."""
+    engine = engine or default_engine
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    changes = []
+
+    with engine.begin() as conn:
+        for model in PARTIAL_INDEX_MODELS:
+            table = model.__table__
+            if table.name not in tables:
+                continue
+            existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+
+            for name in LEGACY_ACTIVE_INDEXES.get(table.name, []):
+                if name in existing:
+                    conn.execute(text(f"DROP INDEX {name}"))
+                    changes.append(f"dropped {name}")
+
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    changes.append(f"created {index.name}")
+
+        if changes and engine.dialect.name == 'sqlite':
+            conn.execute(text("ANALYZE"))
+
+    for change in changes:
+        logger.info(f"[INDEX] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_partial_indexes()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Partial indexes already up to date")
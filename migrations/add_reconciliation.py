@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Migration: create reconciliation_checkpoints and reconciliation_issues
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from src.models.database import ReconciliationCheckpoint, ReconciliationIssue, engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_reconciliation(engine=None):
+    """Create the reconciliation tables with their indexes. Idempotent."""
+    engine = engine or default_engine
+    existing_tables = set(inspect(engine).get_table_names())
+
+    changes = []
+    for table in (ReconciliationCheckpoint.__table__, ReconciliationIssue.__table__):
+        if table.name not in existing_tables:
+            table.create(engine, checkfirst=True)
+            changes.append(f"created {table.name}")
+
+    for change in changes:
+        logger.info(f"[RECONCILE] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_reconciliation()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Reconciliation tables already exist")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Migration: create transaction_archives (the yearly archive manifest) and
+archived_transaction_summaries
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from src.models.database import TransactionArchive, ArchivedMonthlySummary, engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_transaction_archive(engine=None):
+    """Create the archive manifest and summary tables with their indexes. Idempotent."""
+    engine = engine or default_engine
+    existing_tables = set(inspect(engine).get_table_names())
+
+    changes = []
+    for table in (TransactionArchive.__table__, ArchivedMonthlySummary.__table__):
+        if table.name not in existing_tables:
+            table.create(engine, checkfirst=True)
+            changes.append(f"created {table.name}")
+
+    for change in changes:
+        logger.info(f"[ARCHIVE] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_transaction_archive()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Archive tables already exist")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Migration: make sure every category code of the transaction keyboard has a
+categories row and give income/expense transactions saved without a category
+(all of them, before category_id was persisted) their type's 'other' category
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from src.models.database import engine as default_engine
+from src.services.category_service import CategoryService
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_transaction_categories(engine=None):
+    """Create missing keyboard categories and backfill transactions.category_id. Idempotent."""
+    engine = engine or default_engine
+    tables = inspect(engine).get_table_names()
+    if 'transactions' not in tables or 'categories' not in tables:
+        return []
+
+    changes = []
+    db = Session(bind=engine)
+    try:
+        service = CategoryService(db)
+        created = service.ensure_code_categories()
+        if created:
+            changes.append(f"created categories {', '.join(created)}")
+        backfilled = service.backfill_transaction_categories()
+        if backfilled:
+            changes.append(f"backfilled category_id on {backfilled} transactions")
+    finally:
+        db.close()
+
+    for change in changes:
+        logger.info(f"[CATEGORY] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_transaction_categories()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Keyboard categories present and every transaction categorized")
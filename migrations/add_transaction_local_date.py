@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Migration: add transactions.local_date (the transaction's calendar day in the
+user's timezone) and backfill it. Runs before the index migration, which
+extends idx_transaction_user_date with the new column
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from src.models.database import engine as default_engine
+from src.services.time_bucket_service import TimeBucketService
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_transaction_local_date(engine=None):
+    """Add transactions.local_date if missing and fill rows without it. Idempotent."""
+    engine = engine or default_engine
+    inspector = inspect(engine)
+    changes = []
+    if 'transactions' not in inspector.get_table_names():
+        return changes
+
+    columns = {column['name'] for column in inspector.get_columns('transactions')}
+    if 'local_date' not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE transactions ADD COLUMN local_date DATE"))
+        changes.append("added transactions.local_date")
+
+    db = Session(bind=engine)
+    try:
+        backfilled = TimeBucketService(db).backfill_local_dates()
+    finally:
+        db.close()
+    if backfilled:
+        changes.append(f"backfilled local_date on {backfilled} transactions")
+
+    for change in changes:
+        logger.info(f"[LOCAL_DATE] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_transaction_local_date()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] transactions.local_date already present and filled")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Migration: FTS5 full-text index over transactions.description and notes.
+
+transactions_fts is an external-content table (the text lives only in
+`transactions`, FTS5 keeps just the index) kept in sync by insert/update/delete
+triggers. SQLite only; other backends search with ILIKE.
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from src.models.database import engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'transactions_fts'
+
+FTS_TABLE_DDL = f"""
+CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+    description, notes,
+    content='transactions', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+)
+"""
+
+FTS_TRIGGERS = {
+    'transactions_fts_ai': f"""
+CREATE TRIGGER transactions_fts_ai AFTER INSERT ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, description, notes) VALUES (new.id, new.description, new.notes);
+END
+""",
+    'transactions_fts_ad': f"""
+CREATE TRIGGER transactions_fts_ad AFTER DELETE ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, notes) VALUES ('delete', old.id, old.description, old.notes);
+END
+""",
+    'transactions_fts_au': f"""
+CREATE TRIGGER transactions_fts_au AFTER UPDATE OF description, notes ON transactions BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, notes) VALUES ('delete', old.id, old.description, old.notes);
+    INSERT INTO {FTS_TABLE}(rowid, description, notes) VALUES (new.id, new.description, new.notes);
+END
+""",
+}
+
+def upgrade_transaction_search(engine=None):
+    """Create the FTS5 table and its triggers, indexing existing rows. Idempotent."""
+    engine = engine or default_engine
+    if engine.dialect.name != 'sqlite':
+        return []
+
+    changes = []
+    with engine.begin() as conn:
+        existing = {row[0] for row in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')"
+        ))}
+        if 'transactions' not in existing:
+            return []
+
+        if FTS_TABLE not in existing:
+            try:
+                conn.execute(text(FTS_TABLE_DDL))
+            except Exception as e:
+                # SQLite built without FTS5: search keeps working through LIKE
+                logger.warning(f"[FTS] FTS5 unavailable, /cari falls back to LIKE: {e}")
+                return []
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            changes.append(f"created {FTS_TABLE} and indexed existing transactions")
+
+        for name, ddl in FTS_TRIGGERS.items():
+            if name not in existing:
+                conn.execute(text(ddl))
+                changes.append(f"created trigger {name}")
+
+    for change in changes:
+        logger.info(f"[FTS] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_transaction_search()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Transaction search index already up to date")
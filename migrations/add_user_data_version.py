@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Migration: add users.data_version, the per-user counter that report cache
+keys are built from (bumped with every wallet, transaction or asset write)
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from src.models.database import engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_user_data_version(engine=None):
+    """Add users.data_version (NOT NULL DEFAULT 0) if missing. Idempotent."""
+    engine = engine or default_engine
+    inspector = inspect(engine)
+    changes = []
+    if 'users' not in inspector.get_table_names():
+        return changes
+
+    columns = {column['name'] for column in inspector.get_columns('users')}
+    if 'data_version' not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE users ADD COLUMN data_version INTEGER NOT NULL DEFAULT 0"))
+        changes.append("added users.data_version")
+
+    for change in changes:
+        logger.info(f"[DATA_VERSION] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_user_data_version()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] users.data_version already present")
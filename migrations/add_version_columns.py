@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Migration: add the optimistic-concurrency version_id column to wallets and
+assets (SQLAlchemy version_id_col)
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from src.models.database import engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSIONED_TABLES = ['wallets', 'assets']
+
+def upgrade_version_columns(engine=None):
+    """Add version_id (NOT NULL DEFAULT 1) where missing. Idempotent."""
+    engine = engine or default_engine
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    changes = []
+
+    with engine.begin() as conn:
+        for table in VERSIONED_TABLES:
+            if table not in tables:
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table)}
+            if 'version_id' not in columns:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version_id INTEGER NOT NULL DEFAULT 1"))
+                changes.append(f"added {table}.version_id")
+
+    for change in changes:
+        logger.info(f"[VERSION] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_version_columns()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Version columns already present")
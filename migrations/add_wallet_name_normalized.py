@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Migration: add wallets.name_normalized (normalize_name(name)), backfill it
+and create idx_wallet_active_user_name_norm
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from src.models.database import Wallet, normalize_name, engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_wallet_name_normalized(engine=None):
+    """Add the column, fill rows where it is missing and create its index. Idempotent."""
+    engine = engine or default_engine
+    inspector = inspect(engine)
+    if 'wallets' not in inspector.get_table_names():
+        return []
+
+    changes = []
+    columns = {column['name'] for column in inspector.get_columns('wallets')}
+    existing_indexes = {ix['name'] for ix in inspector.get_indexes('wallets')}
+
+    with engine.begin() as conn:
+        if 'name_normalized' not in columns:
+            conn.execute(text("ALTER TABLE wallets ADD COLUMN name_normalized VARCHAR(100)"))
+            changes.append("added wallets.name_normalized")
+
+        # Normalization (accent stripping) happens in Python, not SQL
+        rows = conn.execute(text(
+            "SELECT id, name FROM wallets WHERE name_normalized IS NULL"
+        )).all()
+        if rows:
+            conn.execute(
+                text("UPDATE wallets SET name_normalized = :normalized WHERE id = :id"),
+                [{'id': row.id, 'normalized': normalize_name(row.name)} for row in rows]
+            )
+            changes.append(f"backfilled name_normalized for {len(rows)} wallets")
+
+        for index in Wallet.__table__.indexes:
+            if index.name == 'idx_wallet_active_user_name_norm' and index.name not in existing_indexes:
+                index.create(conn)
+                changes.append(f"created {index.name}")
+
+    for change in changes:
+        logger.info(f"[WALLET] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_wallet_name_normalized()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Wallet name lookup column already up to date")
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Migration: switch an existing SQLite file to auto_vacuum=INCREMENTAL. The
+switch needs a full VACUUM, so bot startup only reports it as pending; the
+daily maintenance window (or this script) performs it
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.models.database import engine as default_engine
+from src.services.maintenance_service import MaintenanceService
+import logging
+
+logger = logging.getLogger(__name__)
+
+def upgrade_incremental_vacuum(engine=None, convert=False):
+    """
+    Check auto_vacuum on a file created without it. With convert=True the file
+    is rebuilt now; otherwise the pending conversion is only logged
+    """
+    engine = engine or default_engine
+    service = MaintenanceService(engine)
+    status = service.wal_status()
+    if status is None or status['auto_vacuum'] == 2:
+        return []
+
+    changes = []
+    if convert:
+        if service.enable_incremental_vacuum():
+            changes.append("auto_vacuum set to INCREMENTAL")
+    else:
+        logger.info("[VACUUM] auto_vacuum=INCREMENTAL pending: converted in the maintenance window "
+                    "or by scripts/sqlite_maintenance.py convert")
+
+    for change in changes:
+        logger.info(f"[VACUUM] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_incremental_vacuum(convert=True)
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] auto_vacuum already INCREMENTAL (or not enough free disk space)")
@@ -8,6 +8,19 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.models.database import SessionLocal, Category, create_tables, engine
+from migrations.redesign_transaction_indexes import upgrade_transaction_indexes
+from migrations.add_partial_active_indexes import upgrade_partial_indexes
+from migrations.add_transaction_search import upgrade_transaction_search
+from migrations.add_wallet_name_normalized import upgrade_wallet_name_normalized
+from migrations.add_version_columns import upgrade_version_columns
+from migrations.add_ledger_journal import upgrade_ledger_journal
+from migrations.add_transaction_archive import upgrade_transaction_archive
+from migrations.add_reconciliation import upgrade_reconciliation
+from migrations.add_outbox import upgrade_outbox
+from migrations.add_user_data_version import upgrade_user_data_version
+from migrations.add_transaction_local_date import upgrade_transaction_local_date
+from migrations.add_transaction_categories import upgrade_transaction_categories
+from migrations.enable_incremental_vacuum import upgrade_incremental_vacuum
 from sqlalchemy import text
 import logging
 
@@ -18,6 +31,22 @@ def init_database():
     print("[INIT] Creating database tables with optimizations...")
     create_tables()
     
+    # The local_date backfill bumps data_version; idx_transaction_user_date covers local_date
+    upgrade_user_data_version(engine)
+    upgrade_transaction_local_date(engine)
+    print("[INDEX] Checking transaction index set...")
+    upgrade_transaction_indexes(engine)
+    # Before the partial indexes: one of them covers the column it adds
+    upgrade_wallet_name_normalized(engine)
+    upgrade_partial_indexes(engine)
+    upgrade_transaction_search(engine)
+    upgrade_version_columns(engine)
+    upgrade_ledger_journal(engine)
+    upgrade_transaction_archive(engine)
+    upgrade_reconciliation(engine)
+    upgrade_outbox(engine)
+    upgrade_incremental_vacuum(engine)
+    
     # Enable SQLite optimizations
     if 'sqlite' in str(engine.url):
         print("[PERF] Applying SQLite performance optimizations...")
@@ -31,6 +60,8 @@ def init_database():
     
     print("[DATA] Creating default categories...")
     create_default_categories()
+    # After the defaults: keyboard codes reuse them where the names match
+    upgrade_transaction_categories(engine)
     
     print("[OK] Enhanced database initialization completed!")
 
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Migration: replace the legacy transaction indexes with the covering-index set
+declared on the Transaction model (see scripts/index_audit.py for the analysis)
+"""
+import os
+import sys
+
+# Add the parent directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from src.models.database import Transaction, engine as default_engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Indexes created by the previous Transaction model that no query path needs
+LEGACY_TRANSACTION_INDEXES = [
+    'ix_transactions_user_id',
+    'ix_transactions_type',
+    'ix_transactions_amount',
+    'ix_transactions_category_id',
+    'ix_transactions_transaction_date',
+    'ix_transactions_created_at',
+    'idx_transaction_user_type',
+    'idx_transaction_user_amount',
+    'idx_transaction_date_type',
+    'idx_transaction_wallets',
+    'idx_transaction_category',
+]
+
+def upgrade_transaction_indexes(engine=None):
+    """Drop legacy transaction indexes and (re)create the model's index set. Idempotent."""
+    engine = engine or default_engine
+    inspector = inspect(engine)
+    if 'transactions' not in inspector.get_table_names():
+        return []
+
+    existing = {ix['name']: ix['column_names'] for ix in inspector.get_indexes('transactions')}
+    changes = []
+
+    with engine.begin() as conn:
+        for name in LEGACY_TRANSACTION_INDEXES:
+            if name in existing:
+                conn.execute(text(f"DROP INDEX {name}"))
+                changes.append(f"dropped {name}")
+
+        for index in Transaction.__table__.indexes:
+            wanted = [col.name for col in index.columns]
+            current = existing.get(index.name)
+            if current == wanted:
+                continue
+            if current is not None:
+                index.drop(conn)
+                changes.append(f"dropped {index.name} {current}")
+            index.create(conn)
+            changes.append(f"created {index.name} {wanted}")
+
+        if changes and engine.dialect.name == 'sqlite':
+            conn.execute(text("ANALYZE transactions"))
+
+    for change in changes:
+        logger.info(f"[INDEX] {change}")
+    return changes
+
+if __name__ == "__main__":
+    applied = upgrade_transaction_indexes()
+    if applied:
+        for change in applied:
+            print(f"[OK] {change}")
+    else:
+        print("[SKIP] Transaction indexes already up to date")
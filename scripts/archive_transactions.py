@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Arsip transaksi per tahun: pindahkan tahun yang sudah lewat ke file SQLite
+tersendiri (archive/transactions_<tahun>.db) atau kembalikan ke database utama.
+Ringkasan bulanan tetap di database utama, laporan tetap membaca arsip.
+
+Usage: python scripts/archive_transactions.py list
+       python scripts/archive_transactions.py archive <tahun> [<tahun> ...] [--batch 5000]
+       python scripts/archive_transactions.py unarchive <tahun> [<tahun> ...]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.database import SessionLocal, TransactionArchive
+from src.services.archive_service import ArchiveService
+
+def list_archives(db):
+    archives = db.query(TransactionArchive).order_by(TransactionArchive.year).all()
+    if not archives:
+        print("[INFO] Belum ada tahun yang diarsipkan")
+        return 0
+    print(f"{'tahun':<8}{'transaksi':>12}{'ukuran':>12}  file")
+    for archive in archives:
+        size = os.path.getsize(archive.path) / (1024 * 1024) if os.path.exists(archive.path) else None
+        size_text = f"{size:.1f} MB" if size is not None else "HILANG"
+        print(f"{archive.year:<8}{archive.row_count:>12,}{size_text:>12}  {archive.path}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Arsip transaksi per tahun ke file SQLite terpisah")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Tampilkan tahun yang sudah diarsipkan")
+    archive_parser = subparsers.add_parser('archive', help="Pindahkan tahun yang sudah lewat ke arsip")
+    archive_parser.add_argument('years', type=int, nargs='+')
+    archive_parser.add_argument('--batch', type=int, default=None, help="Baris yang disalin per batch")
+    unarchive_parser = subparsers.add_parser('unarchive', help="Kembalikan tahun dari arsip ke database utama")
+    unarchive_parser.add_argument('years', type=int, nargs='+')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == 'list':
+            return list_archives(db)
+
+        archive = ArchiveService(db)
+        failed = 0
+        for year in args.years:
+            try:
+                if args.command == 'archive':
+                    result = archive.archive_year(year, args.batch)
+                    if result['moved']:
+                        print(f"[OK] {year}: {result['moved']:,} transaksi dipindah ke {result['path']}")
+                    else:
+                        print(f"[SKIP] {year}: tidak ada transaksi untuk diarsipkan")
+                else:
+                    restored = archive.unarchive_year(year)
+                    print(f"[OK] {year}: {restored:,} transaksi dikembalikan ke database utama")
+            except ValueError as e:
+                db.rollback()
+                print(f"[FAIL] {year}: {e}")
+                failed += 1
+        if args.command == 'archive' and failed < len(args.years):
+            print("[INFO] Ruang kosong di database utama dipakai ulang; jalankan VACUUM untuk mengecilkan file")
+        return 1 if failed else 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
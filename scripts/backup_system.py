@@ -4,7 +4,7 @@ Sistema Backup Otomatis untuk Finance Bot
 Melindungi data saat ada perubahan mayor pada database atau kode
 """
 import os
-import sqlite3
+import sys
 import shutil
 import json
 import zipfile
@@ -12,6 +12,12 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine
+from src.services.maintenance_service import MaintenanceService
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -49,11 +55,15 @@ class BackupManager:
                 logger.error(f"Database {db_name} corrupt, backup dibatalkan")
                 return False
                 
-            # Backup database
+            # Backup database (online backup API, consistent even with WAL)
             backup_path = self.backup_dir / backup_name / f"{db_name}.backup"
             backup_path.parent.mkdir(exist_ok=True)
             
-            shutil.copy2(db_name, backup_path)
+            maintenance = self._file_maintenance(db_name)
+            try:
+                maintenance.backup(backup_path)
+            finally:
+                maintenance.engine.dispose()
             
             # Backup metadata
             metadata = self.get_database_metadata(db_name)
@@ -69,75 +79,55 @@ class BackupManager:
             logger.error(f"❌ Error backup database {db_name}: {e}")
             return False
     
+    def _file_maintenance(self, db_name):
+        """Maintenance hooks for one SQLite database file"""
+        return MaintenanceService(create_engine(f"sqlite:///{db_name}"))
+    
     def validate_database(self, db_name):
         """Validasi integritas database"""
+        maintenance = self._file_maintenance(db_name)
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            # Check integrity
-            cursor.execute("PRAGMA integrity_check")
-            result = cursor.fetchone()[0]
-            
-            if result != "ok":
-                logger.error(f"Database {db_name} integrity check failed: {result}")
-                return False
-                
-            # Check if critical tables exist
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            required_tables = ['users', 'wallets', 'transactions', 'assets']
-            missing_tables = [table for table in required_tables if table not in tables]
-            
-            if missing_tables:
-                logger.warning(f"Missing tables in {db_name}: {missing_tables}")
-                
-            conn.close()
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error validating database {db_name}: {e}")
-            return False
+            ok, detail = maintenance.integrity_check()
+            if not ok:
+                logger.error(f"Database {db_name} integrity check failed: {detail}")
+            return ok
+        finally:
+            maintenance.engine.dispose()
     
     def get_database_metadata(self, db_name):
         """Ambil metadata database untuk backup"""
+        maintenance = self._file_maintenance(db_name)
         try:
-            conn = sqlite3.connect(db_name)
-            cursor = conn.cursor()
-            
-            metadata = {
-                "backup_time": datetime.now().isoformat(),
-                "database_name": db_name,
-                "file_size": os.path.getsize(db_name),
-                "tables": {},
-                "record_counts": {}
-            }
-            
-            # Get table info
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cursor.fetchall()]
-            
-            for table in tables:
-                # Table structure
-                cursor.execute(f"PRAGMA table_info({table})")
-                columns = cursor.fetchall()
-                metadata["tables"][table] = [
-                    {"name": col[1], "type": col[2], "not_null": col[3], "primary_key": col[5]} 
-                    for col in columns
-                ]
-                
-                # Record count
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
-                metadata["record_counts"][table] = count
-            
-            conn.close()
+            metadata = maintenance.metadata()
+            metadata["database_name"] = db_name
             return metadata
-            
         except Exception as e:
             logger.error(f"Error getting metadata for {db_name}: {e}")
             return {"error": str(e)}
+        finally:
+            maintenance.engine.dispose()
+    
+    def backup_server_database(self, backup_name):
+        """Backup database server (PostgreSQL) dari DATABASE_URL lewat pg_dump"""
+        from src.models.database import DB_BACKEND
+        
+        if DB_BACKEND == 'sqlite':
+            return None
+        try:
+            maintenance = MaintenanceService()
+            dump_path = self.backup_dir / backup_name / f"{DB_BACKEND}.dump"
+            maintenance.backup(dump_path)
+            
+            metadata_path = self.backup_dir / backup_name / f"{DB_BACKEND}.metadata.json"
+            with open(metadata_path, 'w') as f:
+                json.dump(maintenance.metadata(), f, indent=2, default=str)
+                
+            logger.info(f"✅ Database {DB_BACKEND} berhasil dibackup ke {dump_path}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Error backup database {DB_BACKEND}: {e}")
+            return False
     
     def backup_code_files(self, backup_name):
         """Backup file kode penting"""
@@ -195,6 +185,12 @@ class BackupManager:
             backup_info["databases"][db_name] = db_success
             if not db_success:
                 success = False
+        
+        server_success = self.backup_server_database(backup_name)
+        if server_success is not None:
+            backup_info["databases"]["DATABASE_URL"] = server_success
+            if not server_success:
+                success = False
                 
         # Backup code files
         code_success = self.backup_code_files(backup_name)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark arsip tahunan: laporan sebelum arsip, sesudah arsip dan sesudah
+unarchive harus sama persis; catat ukuran tabel utama dan waktu laporan.
+
+Usage: python scripts/benchmark_archive.py [jumlah_transaksi]
+"""
+import os
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit
+from src.models.database import Transaction
+from src.services.archive_service import ArchiveService
+from src.services.report_query_service import ReportQueryService
+
+def report_cases(now):
+    """(label, callable(service, user_id)) pairs covering every archive-aware query"""
+    last_year = now.year - 1
+    two_years_ago = now.year - 2
+    cases = [
+        ('totals this year', lambda s, u: s.get_period_totals(u, datetime(now.year, 1, 1), now)),
+        (f'totals {last_year}', lambda s, u: s.get_period_totals(u, datetime(last_year, 1, 1), datetime(now.year, 1, 1) - timedelta(microseconds=1))),
+        ('totals 18 months', lambda s, u: s.get_period_totals(u, now - timedelta(days=540), now)),
+        (f'totals mid-month {two_years_ago}', lambda s, u: s.get_period_totals(u, datetime(two_years_ago, 3, 10, 12), datetime(two_years_ago, 7, 20, 8))),
+        (f'daily buckets {last_year}-06', lambda s, u: s.get_daily_buckets(u, datetime(last_year, 6, 1), datetime(last_year, 7, 1) - timedelta(microseconds=1))),
+        (f'category buckets {two_years_ago}-{last_year}', lambda s, u: s.get_category_buckets(u, datetime(two_years_ago, 1, 1), datetime(now.year, 1, 1) - timedelta(microseconds=1))),
+        ('comparison across new year', lambda s, u: s.get_comparison_totals(
+            u, (datetime(now.year, 1, 1), datetime(now.year, 1, 31, 23, 59, 59)),
+            (datetime(last_year, 12, 1), datetime(last_year, 12, 31, 23, 59, 59)))),
+        ('period reports across new year', lambda s, u: s.get_period_reports(u, now=datetime(now.year, 1, 5, 12))),
+        (f'latest {last_year}', lambda s, u: [tuple(r[:3]) for r in s.get_latest_transactions(u, datetime(last_year, 1, 1), datetime(last_year, 12, 31, 23, 59, 59), 5)]),
+        ('export', lambda s, u: [(r.id, r.amount, r.category_name) for r in s.iter_export_rows(u)]),
+    ]
+    return cases
+
+def normalize(value):
+    """Round floats so summary sums and row sums compare equal"""
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {k: normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(normalize(v) for v in value)
+    return value
+
+def run_reports(Session, user_id, cases):
+    results, timings = {}, {}
+    db = Session()
+    try:
+        service = ReportQueryService(db)
+        for label, func in cases:
+            timings[label], value = timeit(lambda: func(service, user_id), repeat=3)
+            results[label] = normalize(value)
+    finally:
+        db.close()
+    return results, timings
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    workdir = tempfile.mkdtemp(prefix='monman_archive_')
+    engine, Session, path = create_bench_engine(os.path.join(workdir, 'bench.db'))
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id = user.id
+        print(f"Seeding {count} transactions over ~3 years...")
+        seed_transactions(db, user, wallets, count, days=1100)
+        db.close()
+
+        now = datetime.now()
+        cases = report_cases(now)
+        before, before_ms = run_reports(Session, user_id, cases)
+
+        db = Session()
+        hot_before = db.query(Transaction).count()
+        years = sorted({row[0].year for row in db.query(Transaction.transaction_date).distinct() if row[0].year < now.year})
+        archive = ArchiveService(db)
+        for year in years:
+            result = archive.archive_year(year)
+            print(f"  archived {year}: {result['moved']:,} rows")
+        hot_after = db.query(Transaction).count()
+        db.close()
+        print(f"  main transactions table: {hot_before:,} -> {hot_after:,} rows\n")
+
+        after, after_ms = run_reports(Session, user_id, cases)
+
+        db = Session()
+        archive = ArchiveService(db)
+        for year in years:
+            archive.unarchive_year(year)
+        restored = db.query(Transaction).count()
+        db.close()
+        unarchived, _ = run_reports(Session, user_id, cases)
+
+        print(f"{'report':<32}{'hot':>10}{'archived':>10}  same")
+        failed = 0
+        for label, _ in cases:
+            same = before[label] == after[label] == unarchived[label]
+            failed += not same
+            print(f"{label:<32}{before_ms[label]:>8.1f}ms{after_ms[label]:>8.1f}ms  {same}")
+        print(f"\n[{'OK' if restored == hot_before else 'FAIL'}] unarchive restored {restored:,} of {hot_before:,} rows")
+        print(f"[{'OK' if not failed else 'FAIL'}] {len(cases) - failed}/{len(cases)} reports identical across archive/unarchive")
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Cek grafik analisis: tombol trend, kategori dan kekayaan bersih mengirim foto
+PNG yang digambar di process pool (matplotlib tidak pernah diimpor proses
+bot), ketukan berulang dengan data yang sama dilayani dari cache gambar,
+permintaan identik yang bersamaan berbagi satu render, data baru memicu
+render baru, cache disk terbaca oleh instance baru, pool yang workernya
+mati diganti pada render berikutnya, serta waktu tunggu handler saat miss
+vs hit.
+
+Usage: python scripts/benchmark_charts.py [jumlah_transaksi]
+"""
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+WORKDIR = tempfile.mkdtemp(prefix='monman_charts_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+os.environ.pop('DB_WRITE_QUEUE', None)
+os.environ.pop('CHART_CACHE_DIR', None)
+os.environ['TELEGRAM_FILE_CACHE_PATH'] = ''
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+# Log files the services open relative to the working directory land in the temp dir
+os.chdir(WORKDIR)
+logging.getLogger().addHandler(logging.NullHandler())
+
+from scripts.benchmark_common import seed_user, seed_transactions
+from migrations.init_db_enhanced import init_database
+from src.models.database import SessionLocal, Asset, Wallet, engine, read_engine
+from src.handlers.chart_handler import send_chart, CHART_SCREENS
+from src.services.chart_service import ChartService, ChartMetrics, get_chart_service, shutdown_chart_service, get_chart_metrics
+from src.services.asset_service import AssetService
+from src.services.report_service import ReportService
+from src.services.user_service import UserService
+
+TELEGRAM_ID = 616161
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+class RecordingBot:
+    """Stands in for telebot: keeps what would have been sent (file_ids resolved to their bytes)"""
+
+    def __init__(self):
+        self.sent = []
+        self.files = {}
+
+    def send_photo(self, chat_id, photo, caption=None, **kwargs):
+        if isinstance(photo, str):
+            content = self.files[photo]
+        else:
+            content = photo.getvalue()
+            photo = f"photo-{len(self.files)}"
+            self.files[photo] = content
+        self.sent.append(('photo', content, caption))
+        return SimpleNamespace(photo=[SimpleNamespace(file_id=photo)])
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.sent.append(('text', None, text))
+
+def check(ok, message):
+    print(f"[{'OK' if ok else 'FAIL'}] {message}")
+    return ok
+
+def tap(bot, screen):
+    """One button press: (kind sent, png, ms)"""
+    start = time.perf_counter()
+    send_chart(bot, TELEGRAM_ID, TELEGRAM_ID, screen)
+    sent_kind, png, _ = bot.sent[-1]
+    return sent_kind, png, (time.perf_counter() - start) * 1000
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    results = []
+    try:
+        init_database()
+        db = SessionLocal()
+        user, wallets = seed_user(db, telegram_id=TELEGRAM_ID)
+        seed_transactions(db, user, wallets, count, days=200)
+        user_id, wallet_id = user.id, wallets[0].id
+        db.close()
+
+        bot = RecordingBot()
+        timings = {}
+        for screen in CHART_SCREENS:
+            renders = get_chart_metrics()['renders']
+            sent_kind, png, miss_ms = tap(bot, screen)
+            repeats = [tap(bot, screen) for _ in range(10)]
+            hit_ms = sorted(ms for _, _, ms in repeats)[len(repeats) // 2]
+            timings[screen] = (miss_ms, hit_ms)
+            results.append(check(
+                sent_kind == 'photo' and png.startswith(PNG_SIGNATURE)
+                and all(kind == 'photo' and again == png for kind, again, _ in repeats)
+                and get_chart_metrics()['renders'] == renders + 1,
+                f"{screen}: {len(png) // 1024}KB PNG, 10 repeated taps reuse the same image (1 render)"))
+
+        results.append(check('matplotlib' not in sys.modules and 'src.utils.chart_renderer' not in sys.modules,
+                             "matplotlib and the renderer were never imported by the bot process"))
+
+        # New data -> new key -> new render
+        # (the bytes may still match when the change is below one pixel of the axis)
+        tap(bot, 'analysis_trend')
+        before = bot.sent[-1][2]
+        db = SessionLocal()
+        UserService(db).create_transaction(user_id, 'expense', 987654.0, 'grafik baru', from_wallet_id=wallet_id)
+        db.close()
+        renders = get_chart_metrics()['renders']
+        tap(bot, 'analysis_trend')
+        after = bot.sent[-1][2]
+        results.append(check(after != before and get_chart_metrics()['renders'] == renders + 1,
+                             "a new expense changes the trend data and renders the chart again"))
+
+        # Net worth counts saham in lots of 100 shares and unsynced assets at their buy price
+        db = SessionLocal()
+        assets = AssetService(db)
+        assets.add_asset(user_id, wallet_id, 'Bank Grafik', 'saham', 'BGRF', 2, 1000.0)
+        coin = assets.add_asset(user_id, wallet_id, 'Koin Grafik', 'kripto', 'KGRF', 0.5, 40000.0)
+        db.query(Asset).filter(Asset.id == coin.id).update({Asset.last_price: None}, synchronize_session=False)
+        db.commit()
+        wallet_total = sum(balance for (balance,) in db.query(Wallet.balance).filter(
+            Wallet.user_id == user_id, Wallet.is_active == True))
+        net_worth = ReportService(db).get_net_worth_history(user_id, days=7)[-1]['net_worth']
+        db.close()
+        expected = wallet_total + 2 * 100 * 1000.0 + 0.5 * 40000.0
+        results.append(check(abs(net_worth - expected) < 0.01,
+                             f"net worth today {net_worth:,.0f} = wallets + 2 lots saham + unsynced kripto ({expected:,.0f})"))
+
+        # Concurrent identical requests share one render
+        service = get_chart_service()
+        data = {'dates': [f"{day:02d}/01" for day in range(1, 31)], 'values': [float(day * 1000) for day in range(30)]}
+        renders, coalesced = get_chart_metrics()['renders'], get_chart_metrics()['coalesced']
+        images = []
+        threads = [threading.Thread(target=lambda: images.append(service.render('net_worth', 'Bersamaan', data)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        metrics = get_chart_metrics()
+        results.append(check(len(set(images)) == 1 and len(images) == 8 and metrics['renders'] == renders + 1,
+                             f"8 concurrent identical requests: 1 render, {metrics['coalesced'] - coalesced} waited on it"))
+
+        # Disk cache survives a new service instance (a restart)
+        cache_dir = os.path.join(WORKDIR, 'charts')
+        first_metrics, second_metrics = ChartMetrics(), ChartMetrics()
+        first = ChartService(workers=1, cache_dir=cache_dir, metrics=first_metrics)
+        png = first.render('category_pie', 'Disk', {'labels': ['A', 'B', 'C'], 'values': [3.0, 2.0, 1.0]})
+        first.close()
+        second = ChartService(workers=1, cache_dir=cache_dir, metrics=second_metrics)
+        again = second.render('category_pie', 'Disk', {'labels': ['A', 'B', 'C'], 'values': [3.0, 2.0, 1.0]})
+        second.close()
+        results.append(check(again == png and second_metrics.snapshot()['disk_hits'] == 1
+                             and second_metrics.snapshot()['renders'] == 0,
+                             f"restarted service reads the image from disk ({len(os.listdir(cache_dir))} file)"))
+
+        # A dead worker breaks the pool: the next render starts a new one
+        recovering_metrics = ChartMetrics()
+        recovering = ChartService(workers=1, metrics=recovering_metrics)
+        recovering.render('net_worth', 'Sebelum', data)
+        for pid in list(recovering._pool._processes):
+            os.kill(pid, signal.SIGKILL)
+        time.sleep(0.5)
+        png = recovering.render('net_worth', 'Sesudah', data)
+        results.append(check(png.startswith(PNG_SIGNATURE) and recovering_metrics.snapshot()['pool_restarts'] == 1,
+                             "a killed chart worker is replaced and the next render succeeds"))
+        recovering.close()
+
+        # Small slices join an existing 'Lainnya' entry instead of adding a second wedge
+        # (imported here, after the check that the bot process never loads the renderer)
+        from src.utils.chart_renderer import _category_pie
+        pie = {}
+        stub_ax = SimpleNamespace(pie=lambda values, labels, **kwargs: pie.update(zip(labels, values)),
+                                  axis=lambda *args: None)
+        _category_pie(stub_ax, {'labels': ['Makanan', 'Lainnya', 'Transport', 'Hobi', 'Donasi'],
+                                'values': [600.0, 300.0, 80.0, 10.0, 10.0]})
+        results.append(check(list(pie) == ['Makanan', 'Lainnya', 'Transport'] and pie['Lainnya'] == 320.0,
+                             "pie merges slices under 3% into the existing 'Lainnya' wedge"))
+
+        # Bounded memory cache
+        small = ChartService(workers=1, cache_size=2, metrics=ChartMetrics())
+        for day in range(4):
+            small.render('net_worth', f"LRU {day}", data)
+        results.append(check(len(small._images) == 2, f"LRU keeps {len(small._images)} of 4 images"))
+        small.close()
+
+        print()
+        for screen, (miss_ms, hit_ms) in timings.items():
+            print(f"  {screen:<18} miss {miss_ms:8.1f}ms   hit {hit_ms:6.2f}ms   ({miss_ms / hit_ms:.0f}x)")
+        print(f"  chart metrics: {get_chart_metrics()}")
+    finally:
+        shutdown_chart_service()
+        engine.dispose()
+        read_engine.dispose()
+        os.chdir(str(Path(__file__).resolve().parent.parent))
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    print(f"\n[{'OK' if all(results) else 'FAIL'}] {sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
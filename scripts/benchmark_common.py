@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the benchmark scripts: temporary SQLite database and seed data
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.models.database import Base, User, Wallet, Category, Transaction
+from src.utils.time_buckets import local_day
+
+def create_bench_engine(db_path=None):
+    """Create a file-backed SQLite engine with the same pragmas as the bot"""
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='monman_bench_', suffix='.db')
+        os.close(fd)
+        os.remove(db_path)
+
+    engine = create_engine(
+        f"sqlite:///{db_path}",
+        echo=False,
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=10000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine), db_path
+
+def seed_user(db, telegram_id=1000, wallet_count=3):
+    """Create one user with a few wallets and the default categories"""
+    user = User(telegram_id=telegram_id, username=f"bench{telegram_id}", first_name="Bench")
+    db.add(user)
+    db.flush()
+
+    wallets = []
+    for i in range(wallet_count):
+        wallet = Wallet(user_id=user.id, name=f"Kantong {i + 1}", type='bank', balance=0.0, initial_balance=0.0)
+        db.add(wallet)
+        wallets.append(wallet)
+
+    if not db.query(Category).count():
+        for name in ('Makanan', 'Transportasi', 'Belanja', 'Hiburan'):
+            db.add(Category(name=name, type='expense', is_system=True))
+        for name in ('Gaji', 'Bonus'):
+            db.add(Category(name=name, type='income', is_system=True))
+
+    db.commit()
+    return user, wallets
+
+def seed_transactions(db, user, wallets, count, days=400, seed=42):
+    """Bulk insert `count` random transactions spread over the last `days` days"""
+    rng = random.Random(seed)
+    category_ids = [c.id for c in db.query(Category).all()]
+    # transaction_date is naive UTC; local_date is set here because Core inserts skip the ORM listeners
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        trans_type = rng.choices(['expense', 'income', 'transfer'], weights=[7, 2, 1])[0]
+        wallet = rng.choice(wallets)
+        row = {
+            'user_id': user.id,
+            'type': trans_type,
+            'amount': float(rng.randint(1, 500) * 1000),
+            'description': rng.choice(['makan siang', 'bensin', 'gaji', 'belanja', 'kopi', 'parkir']),
+            'category_id': rng.choice(category_ids) if trans_type != 'transfer' else None,
+            'from_wallet_id': wallet.id if trans_type in ('expense', 'transfer') else None,
+            'to_wallet_id': wallet.id if trans_type == 'income' else (wallets[0].id if trans_type == 'transfer' else None),
+            'transaction_date': now - timedelta(seconds=rng.randint(0, days * 86400)),
+            'created_at': now,
+        }
+        row['local_date'] = local_day(row['transaction_date'], user.timezone)
+        rows.append(row)
+        if len(rows) >= 10000:
+            db.execute(Transaction.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.execute(Transaction.__table__.insert(), rows)
+    db.commit()
+
+class QueryCounter:
+    """Context manager that records every SQL statement executed on an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._before_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_execute)
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+def timeit(func, repeat=5):
+    """Return the best wall-clock time (ms) of `repeat` runs and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
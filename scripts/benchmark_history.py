@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Benchmark riwayat transaksi: OFFSET/LIMIT vs keyset (transaction_date, id)
+
+Usage: python scripts/benchmark_history.py [jumlah_transaksi]
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit
+from src.services.user_service import UserService
+
+PAGE_SIZE = 10
+
+def run(size):
+    engine, Session, db_path = create_bench_engine()
+    db = Session()
+    try:
+        user, wallets = seed_user(db)
+        seed_transactions(db, user, wallets, size)
+        user_id = user.id
+        service = UserService(db)
+
+        # Walk to each depth with keyset once, remembering the cursor per page
+        cursors = {0: None}
+        cursor = None
+        depths = [p for p in (1, 10, 100, 1000, 5000) if p * PAGE_SIZE < size]
+        for page_number in range(1, max(depths) + 1):
+            page = service.get_transaction_page(user_id, limit=PAGE_SIZE, cursor=cursor)
+            cursor = page['next_cursor']
+            cursors[page_number] = cursor
+
+        print(f"{'page':>6} {'offset ms':>10} {'keyset ms':>10}")
+        for page_number in depths:
+            offset_ms, offset_rows = timeit(lambda: service.get_user_transactions(
+                user_id, limit=PAGE_SIZE, offset=page_number * PAGE_SIZE))
+            keyset_ms, page = timeit(lambda: service.get_transaction_page(
+                user_id, limit=PAGE_SIZE, cursor=cursors[page_number]))
+            assert [t.id for t in offset_rows] == [t.id for t in page['items']]
+            print(f"{page_number:>6} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+    finally:
+        db.close()
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
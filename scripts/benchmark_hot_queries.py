@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark query panas: ORM Query yang dibangun ulang tiap panggilan vs
+statement pre-built di src/models/queries.py. Juga mengukur biaya konstruksi
+dan kompilasi statement saja (tanpa eksekusi).
+
+Usage: python scripts/benchmark_hot_queries.py [iterasi]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import and_, func
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions
+from src.models.database import User, Wallet, Transaction
+from src.models import queries
+
+def per_call_us(func_, iterations):
+    func_()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func_()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+def legacy_queries(db, telegram_id, user_id, wallet_id, start, end):
+    """The ORM Query forms these lookups used before the pre-built statements"""
+    return {
+        'user_by_telegram_id': lambda: db.query(User).filter(
+            User.telegram_id == telegram_id, User.is_active == True
+        ).first(),
+        'active_wallets': lambda: db.query(Wallet).filter(
+            Wallet.user_id == user_id, Wallet.is_active == True
+        ).order_by(Wallet.name).all(),
+        'wallet_by_id': lambda: db.query(Wallet).filter(
+            and_(Wallet.id == wallet_id, Wallet.user_id == user_id, Wallet.is_active == True)
+        ).first(),
+        'period_totals': lambda: db.query(
+            Transaction.type, func.sum(Transaction.amount), func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.transaction_date >= start,
+            Transaction.transaction_date <= end
+        ).group_by(Transaction.type).all(),
+    }
+
+def prebuilt_queries(db, telegram_id, user_id, wallet_id, start, end):
+    return {
+        'user_by_telegram_id': lambda: queries.fetch_user_by_telegram_id(db, telegram_id),
+        'active_wallets': lambda: queries.fetch_active_wallets(db, user_id),
+        'wallet_by_id': lambda: queries.fetch_active_wallet(db, user_id, wallet_id),
+        'period_totals': lambda: queries.fetch_period_totals_by_type(db, user_id, start, end),
+    }
+
+def construction_cost(engine, telegram_id, iterations):
+    """Statement build + compile only, the part pre-built statements skip"""
+    dialect = engine.dialect
+
+    def build_and_compile():
+        stmt = User.__table__.select().where(User.telegram_id == telegram_id, User.is_active == True).limit(1)
+        stmt.compile(dialect=dialect)
+
+    return per_call_us(build_and_compile, iterations)
+
+def run(iterations):
+    engine, Session, db_path = create_bench_engine()
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        seed_transactions(db, user, wallets, 20000, days=120)
+        telegram_id, user_id, wallet_id = user.telegram_id, user.id, wallets[0].id
+        db.close()
+
+        end = datetime.now()
+        start = end - timedelta(days=30)
+        db = Session()
+        legacy = legacy_queries(db, telegram_id, user_id, wallet_id, start, end)
+        prebuilt = prebuilt_queries(db, telegram_id, user_id, wallet_id, start, end)
+
+        print(f"{iterations} calls each, best of 3 (us per call)")
+        print(f"{'query':<22} {'ORM Query':>10} {'pre-built':>10} {'saved':>8}")
+        for name in legacy:
+            before = min(per_call_us(legacy[name], iterations) for _ in range(3))
+            after = min(per_call_us(prebuilt[name], iterations) for _ in range(3))
+            print(f"{name:<22} {before:>10.1f} {after:>10.1f} {before - after:>8.1f}")
+        db.close()
+
+        print(f"\nBuild + compile a select() without executing: {construction_cost(engine, telegram_id, iterations):.1f} us")
+        print(f"Compiled cache entries: {len(engine._compiled_cache) if engine._compiled_cache is not None else 'n/a'}")
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark index transaksi: set index lama (8 single + 6 composite) vs set
+covering index baru. Mengukur throughput insert dan latensi query laporan.
+
+Usage: python scripts/benchmark_indexes.py [jumlah_transaksi]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit
+from migrations.redesign_transaction_indexes import LEGACY_TRANSACTION_INDEXES
+from src.models.database import Transaction
+from src.services.report_query_service import ReportQueryService
+from src.utils.helpers import get_date_range
+
+LEGACY_INDEX_DDL = [
+    "CREATE INDEX ix_transactions_user_id ON transactions (user_id)",
+    "CREATE INDEX ix_transactions_type ON transactions (type)",
+    "CREATE INDEX ix_transactions_amount ON transactions (amount)",
+    "CREATE INDEX ix_transactions_category_id ON transactions (category_id)",
+    "CREATE INDEX ix_transactions_transaction_date ON transactions (transaction_date)",
+    "CREATE INDEX ix_transactions_created_at ON transactions (created_at)",
+    "CREATE INDEX idx_transaction_user_type ON transactions (user_id, type)",
+    "CREATE INDEX idx_transaction_user_amount ON transactions (user_id, amount)",
+    "CREATE INDEX idx_transaction_date_type ON transactions (transaction_date, type)",
+    "CREATE INDEX idx_transaction_wallets ON transactions (from_wallet_id, to_wallet_id)",
+    "CREATE INDEX idx_transaction_category ON transactions (user_id, category_id)",
+]
+
+def apply_legacy_indexes(engine):
+    """Turn a fresh model schema into the pre-redesign index layout"""
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX idx_transaction_user_date")
+        conn.exec_driver_sql("CREATE INDEX idx_transaction_user_date ON transactions (user_id, transaction_date)")
+        for ddl in LEGACY_INDEX_DDL:
+            conn.exec_driver_sql(ddl)
+
+def count_transaction_indexes(engine):
+    with engine.connect() as conn:
+        return conn.exec_driver_sql(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND tbl_name='transactions' AND sql IS NOT NULL"
+        ).scalar()
+
+def measure(layout, size, single_inserts):
+    engine, Session, db_path = create_bench_engine()
+    if layout == 'legacy':
+        apply_legacy_indexes(engine)
+    db = Session()
+    try:
+        user, wallets = seed_user(db)
+        user_id, wallet_id = user.id, wallets[0].id
+
+        start = time.perf_counter()
+        seed_transactions(db, user, wallets, size)
+        bulk_seconds = time.perf_counter() - start
+
+        # One commit per insert, like the bot's handlers
+        start = time.perf_counter()
+        for i in range(single_inserts):
+            db.add(Transaction(user_id=user_id, type='expense', amount=1000.0 + i,
+                               description='bench', from_wallet_id=wallet_id))
+            db.commit()
+        single_seconds = time.perf_counter() - start
+
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        service = ReportQueryService(db)
+        month = get_date_range('month')
+        last_month = get_date_range('last_month')
+        report_ms, _ = timeit(lambda: service.get_category_buckets(user_id, *month))
+        compare_ms, _ = timeit(lambda: service.get_comparison_totals(user_id, month, last_month))
+        size_mb = os.path.getsize(db_path) / 1024 / 1024
+
+        return {
+            'indexes': count_transaction_indexes(engine),
+            'bulk_rows_s': size / bulk_seconds,
+            'single_rows_s': single_inserts / single_seconds,
+            'report_ms': report_ms,
+            'compare_ms': compare_ms,
+            'size_mb': size_mb,
+        }
+    finally:
+        db.close()
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+def run(size, single_inserts=2000):
+    assert len(LEGACY_INDEX_DDL) == len(LEGACY_TRANSACTION_INDEXES)
+    print(f"{'layout':<8} {'indexes':>7} {'bulk rows/s':>12} {'single rows/s':>14} {'month ms':>9} {'mom ms':>8} {'db MB':>7}")
+    for layout in ('legacy', 'covering'):
+        r = measure(layout, size, single_inserts)
+        print(f"{layout:<8} {r['indexes']:>7} {r['bulk_rows_s']:>12.0f} {r['single_rows_s']:>14.0f} "
+              f"{r['report_ms']:>9.2f} {r['compare_ms']:>8.2f} {r['size_mb']:>7.1f}")
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
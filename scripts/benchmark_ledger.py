@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark saldo kantong pada tanggal tertentu: checkpoint + delta posting
+vs jumlahkan seluruh jurnal vs jumlahkan seluruh transaksi. Juga memeriksa
+bahwa transaksi mundur (backdated), edit dan hapus tetap konsisten.
+
+Usage: python scripts/benchmark_ledger.py [jumlah_transaksi]
+"""
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, case, event
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit
+from src.models.database import Transaction, Posting
+from src.services.ledger_service import LedgerService
+
+def journal_scan_balance(db, wallet_id, at):
+    """Balance without checkpoints: every leg of the wallet up to `at`"""
+    return float(db.query(func.coalesce(func.sum(Posting.amount), 0.0)).filter(
+        Posting.wallet_id == wallet_id, Posting.posted_at <= at
+    ).scalar())
+
+def transaction_scan_balance(db, wallet_id, at):
+    """Balance the pre-journal way: signed sum over the transactions table"""
+    signed = case(
+        # A transfer into the same wallet nets to zero
+        ((Transaction.to_wallet_id == wallet_id) & (Transaction.from_wallet_id == wallet_id), 0.0),
+        (Transaction.to_wallet_id == wallet_id, Transaction.amount),
+        else_=-Transaction.amount
+    )
+    return float(db.query(func.coalesce(func.sum(signed), 0.0)).filter(
+        (Transaction.from_wallet_id == wallet_id) | (Transaction.to_wallet_id == wallet_id),
+        Transaction.transaction_date <= at
+    ).scalar())
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    engine, Session, path = create_bench_engine()
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        print(f"Seeding {count} transactions...")
+        seed_transactions(db, user, wallets, count)
+        ledger = LedgerService(db)
+        journaled = ledger.backfill_postings()
+        print(f"  journaled {journaled} transactions, {db.query(Posting).count()} postings")
+
+        # Daily checkpoints for the whole seeded range, oldest first
+        today = datetime.combine(datetime.now().date(), datetime.min.time())
+        start = datetime.now()
+        for days_ago in range(400, -1, -1):
+            ledger.create_checkpoints(today - timedelta(days=days_ago))
+        print(f"  created daily checkpoints in {(datetime.now() - start).total_seconds():.1f}s\n")
+
+        rng = random.Random(7)
+        probes = [datetime.now() - timedelta(seconds=rng.randint(0, 400 * 86400)) for _ in range(20)]
+        wallet_id = wallets[0].id
+
+        def run(balance_func):
+            return [round(balance_func(db, wallet_id, at), 2) for at in probes]
+
+        rows = [
+            ('checkpoint + delta', lambda: run(lambda d, w, at: ledger.balance_at(w, at))),
+            ('full journal scan', lambda: run(journal_scan_balance)),
+            ('full transaction scan', lambda: run(transaction_scan_balance)),
+        ]
+        results = {}
+        print(f"{'method':<24}{'20 lookups':>12}{'per lookup':>12}")
+        for name, func_ in rows:
+            elapsed, values = timeit(func_, repeat=3)
+            results[name] = values
+            print(f"{name:<24}{elapsed:>10.1f}ms{elapsed / len(probes):>10.2f}ms")
+
+        ok = results['checkpoint + delta'] == results['full journal scan'] == results['full transaction scan']
+        print(f"\n[{'OK' if ok else 'FAIL'}] all methods agree on {len(probes)} dates")
+
+        # Backdated insert into an already checkpointed range, then edit and delete it
+        backdated = Transaction(
+            user_id=user.id, type='expense', amount=123000.0, description='late',
+            from_wallet_id=wallet_id, transaction_date=today - timedelta(days=200)
+        )
+        db.add(backdated)
+        db.commit()
+        at = today - timedelta(days=100)
+        checks = [('backdated insert', ledger.balance_at(wallet_id, at), journal_scan_balance(db, wallet_id, at))]
+
+        backdated.amount = 50000.0
+        backdated.transaction_date = today - timedelta(days=150)
+        db.commit()
+        checks.append(('edit amount + date', ledger.balance_at(wallet_id, at), journal_scan_balance(db, wallet_id, at)))
+
+        db.delete(backdated)
+        db.commit()
+        checks.append(('delete', ledger.balance_at(wallet_id, at), transaction_scan_balance(db, wallet_id, at)))
+
+        for name, via_checkpoint, expected in checks:
+            status = 'OK' if abs(via_checkpoint - expected) < 0.01 else 'FAIL'
+            print(f"[{status}] {name}: {via_checkpoint:,.0f} vs {expected:,.0f}")
+
+        # A leg committed right after the posting cap is read must not end up both
+        # in the checkpoint balance and past its last_posting_id
+        as_of = today + timedelta(hours=1)
+        writer = Session()
+        fired = []
+
+        def commit_mid_checkpoint(conn, cursor, statement, parameters, context, executemany):
+            if not fired and 'max(postings.id)' in statement.lower():
+                fired.append(True)
+                writer.add(Transaction(user_id=user.id, type='expense', amount=8765.0, description='mid-checkpoint',
+                                       from_wallet_id=wallet_id, transaction_date=today + timedelta(minutes=30)))
+                writer.commit()
+
+        event.listen(engine, 'after_cursor_execute', commit_mid_checkpoint)
+        try:
+            ledger.create_checkpoints(as_of, wallet_ids=[wallet_id])
+        finally:
+            event.remove(engine, 'after_cursor_execute', commit_mid_checkpoint)
+        writer.close()
+        via_checkpoint, expected = ledger.balance_at(wallet_id, as_of), journal_scan_balance(db, wallet_id, as_of)
+        status = 'OK' if fired and abs(via_checkpoint - expected) < 0.01 else 'FAIL'
+        print(f"[{status}] write committed while checkpointing: {via_checkpoint:,.0f} vs {expected:,.0f}")
+
+        unbalanced = ledger.unbalanced_transactions()
+        print(f"[{'OK' if not unbalanced else 'FAIL'}] unbalanced transactions: {len(unbalanced)}")
+        db.close()
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Pemeriksaan outbox: event ikut transaksi yang sama (rollback = tanpa event),
+urutan terjaga, subscriber durable melanjutkan setelah restart tanpa duplikat,
+replay dari offset, handler yang gagal diulang, cache nama wallet yang
+diperbarui lewat event wallet, serta biaya tulis tambahan.
+
+Usage: python scripts/benchmark_outbox.py [jumlah_transaksi]
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func
+
+from scripts.benchmark_common import create_bench_engine, seed_user, QueryCounter
+from src.models.database import OutboxEvent, OutboxCursor, Transaction, Wallet
+from src.services.asset_service import AssetService
+from src.services.outbox_service import OutboxDispatcher, prune_outbox
+from src.services.user_service import UserService
+from src.services.wallet_resolver_service import WalletNameResolver, subscribe_wallet_names, _wallet_names
+
+def check(ok, message):
+    print(f"[{'OK' if ok else 'FAIL'}] {message}")
+    return ok
+
+def write_transactions(Session, user_id, wallet_id, count):
+    db = Session()
+    try:
+        users = UserService(db)
+        start = time.perf_counter()
+        for i in range(count):
+            users.create_transaction(user_id, 'expense', 1000.0 + i, f"outbox {i}", from_wallet_id=wallet_id)
+        return (time.perf_counter() - start) * 1000 / count
+    finally:
+        db.close()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    engine, Session, path = create_bench_engine()
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id, wallet_id, spare_wallet_id = user.id, wallets[0].id, wallets[2].id
+        db.close()
+
+        # Mapper events write the outbox row on the flush connection: a rollback drops both
+        db = Session()
+        before = db.query(OutboxEvent).count()
+        db.add(Transaction(user_id=user_id, type='expense', amount=5.0, description='rolled back', from_wallet_id=wallet_id))
+        db.flush()
+        pending = db.query(OutboxEvent).count()
+        db.rollback()
+        after = db.query(OutboxEvent).count()
+        check(pending == before + 1 and after == before, f"rollback discards the event with the write ({before} -> {pending} -> {after})")
+        db.close()
+
+        received = {'cache': [], 'wallets': []}
+        flaky = {'left': 2}
+
+        def cache_handler(change):
+            received['cache'].append(change.id)
+
+        def wallet_handler(change):
+            if flaky['left']:
+                flaky['left'] -= 1
+                raise RuntimeError("transient")
+            received['wallets'].append(change.id)
+
+        dispatcher = OutboxDispatcher(Session, batch_size=200)
+        dispatcher.subscribe('cache', cache_handler)
+        dispatcher.subscribe('wallets', wallet_handler, aggregate_types=['wallet'])
+
+        per_write_ms = write_transactions(Session, user_id, wallet_id, count)
+        db = Session()
+        asset = AssetService(db).add_asset(user_id, wallet_id, 'Bank Central Asia', 'saham', 'BBCA', 10, 9000.0)
+        AssetService(db).update_asset_price(asset, 9500.0)
+        UserService(db).delete_wallet(user_id, spare_wallet_id)
+        db.close()
+
+        # Two rounds fail on the first wallet event, the third delivers it
+        for _ in range(3):
+            dispatcher.dispatch_once()
+        db = Session()
+        all_ids = [row.id for row in db.query(OutboxEvent.id).order_by(OutboxEvent.id)]
+        wallet_ids = [row.id for row in db.query(OutboxEvent.id).filter(OutboxEvent.aggregate_type == 'wallet').order_by(OutboxEvent.id)]
+        kinds = {(row.aggregate_type, row.event_type) for row in db.query(OutboxEvent.aggregate_type, OutboxEvent.event_type)}
+        db.close()
+        new_ids = [i for i in all_ids if i > after]
+        check(received['cache'] == new_ids, f"cache got all {len(new_ids):,} events in id order")
+        check(received['wallets'] == [i for i in wallet_ids if i > after],
+              f"wallet subscriber got only wallet events, after 2 failed attempts ({len(received['wallets'])} events)")
+        check({('transaction', 'created'), ('wallet', 'updated'), ('asset', 'created'), ('asset', 'updated')} <= kinds,
+              f"event kinds: {sorted(kinds)}")
+
+        # Restart: a new dispatcher resumes from the stored offset, no duplicates
+        write_transactions(Session, user_id, wallet_id, 50)
+        restarted = {'ids': []}
+        dispatcher = OutboxDispatcher(Session, batch_size=200)
+        dispatcher.subscribe('cache', lambda change: restarted['ids'].append(change.id))
+        dispatcher.dispatch_once()
+        check(len(restarted['ids']) == 100 and restarted['ids'][0] == new_ids[-1] + 1,
+              f"after restart {len(restarted['ids'])} new events, starting at #{restarted['ids'][0]}")
+
+        replayed = []
+        dispatcher.subscribe('cache', lambda change: replayed.append(change.id))
+        dispatcher.replay('cache', after_id=new_ids[-1] - 10)
+        dispatcher.dispatch_once()
+        check(len(replayed) == 110 and replayed[0] == new_ids[-1] - 9, f"replay from offset re-delivered {len(replayed)} events")
+
+        write_transactions(Session, user_id, wallet_id, 5)
+        lag = dispatcher.metrics()['subscribers']['cache']
+        check(lag['events_behind'] == 10, f"lag before dispatch: {lag['events_behind']} events, {lag['seconds_behind']}s")
+
+        # Without subscribers a started dispatcher stays idle: no polls, no queries
+        idle = OutboxDispatcher(Session, poll_ms=10)
+        with QueryCounter(engine) as counter:
+            idle.start()
+            write_transactions(Session, user_id, wallet_id, 1)
+            time.sleep(0.2)
+        polled = [st for st in counter.statements if st.lstrip().upper().startswith('SELECT') and 'outbox' in st]
+        woken = []
+        idle.subscribe('late', lambda change: woken.append(change.id), durable=False, from_start=True)
+        deadline = time.time() + 5
+        while not woken and time.time() < deadline:
+            time.sleep(0.005)
+        idle.stop()
+        check(not polled and idle.polls >= 1 and woken,
+              f"idle without subscribers: {len(polled)} outbox reads in 200ms, subscribe() starts polling")
+
+        # Threaded mode: a commit wakes the dispatcher long before its poll interval
+        live = []
+        dispatcher = OutboxDispatcher(Session, poll_ms=60000)
+        dispatcher.subscribe('live', lambda change: live.append(time.perf_counter()), durable=False)
+        dispatcher.start()
+        time.sleep(0.2)
+        committed = time.perf_counter()
+        write_transactions(Session, user_id, wallet_id, 1)
+        deadline = time.time() + 5
+        while len(live) < 2 and time.time() < deadline:
+            time.sleep(0.005)
+        dispatcher.stop()
+        check(len(live) == 2, f"commit wakes the dispatcher: delivered {(live[-1] - committed) * 1000 if live else -1:.1f}ms after the write started")
+
+        # The wallet-name cache is kept current by its outbox subscriber
+        names = OutboxDispatcher(Session, batch_size=200)
+        subscribe_wallet_names(names)
+        db = Session()
+        resolver = WalletNameResolver(db)
+        resolver.resolve(user_id, 'kantong 1')
+        write_transactions(Session, user_id, wallet_id, 3)
+        names.dispatch_once()
+        kept = user_id in _wallet_names
+        db.get(Wallet, wallet_id).name = 'Dompet Harian'
+        db.commit()
+        stale = resolver.resolve(user_id, 'dompet harian')['match'] != 'exact'
+        names.dispatch_once()
+        fresh = resolver.resolve(user_id, 'dompet harian')
+        db.close()
+        check(kept and stale and fresh['wallet_id'] == wallet_id and fresh['match'] == 'exact',
+              "wallet-name cache survives balance events, a rename event reloads it")
+
+        # Pruning never removes what the slowest durable subscriber has not handled
+        db = Session()
+        slowest = min(offset for (offset,) in db.query(OutboxCursor.last_event_id))
+        removed = prune_outbox(db, retention_days=0)
+        oldest_left = db.query(func.min(OutboxEvent.id)).scalar()
+        check(oldest_left == slowest + 1, f"prune removed {removed:,} events, kept everything after offset {slowest:,}")
+
+        with QueryCounter(engine) as counter:
+            write_transactions(Session, user_id, wallet_id, 1)
+        outbox_inserts = sum(1 for statement in counter.statements if 'INSERT INTO outbox_events' in statement)
+        db.close()
+        print(f"\n  write + outbox: {per_write_ms:.2f}ms per transaction ({count:,} writes), "
+              f"{outbox_inserts} of {counter.count} statements per write are outbox inserts")
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark partial index (WHERE is_active = 1) vs index lama dengan kolom
+is_active, untuk user yang punya banyak kantong dan aset yang sudah dihapus (soft delete).
+
+Usage: python scripts/benchmark_partial_indexes.py [kantong_terhapus] [aset_terhapus]
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_common import create_bench_engine, seed_user, timeit
+from migrations.add_partial_active_indexes import LEGACY_ACTIVE_INDEXES, PARTIAL_INDEX_MODELS
+from src.models.database import Wallet, Asset
+from src.services.user_service import UserService
+from src.services.report_service import ReportService
+from src.services.asset_service import AssetService
+
+LEGACY_ACTIVE_INDEX_DDL = [
+    "CREATE INDEX ix_users_is_active ON users (is_active)",
+    "CREATE INDEX idx_user_telegram_active ON users (telegram_id, is_active)",
+    "CREATE INDEX idx_user_activity ON users (last_activity, is_active)",
+    "CREATE INDEX ix_wallets_is_active ON wallets (is_active)",
+    "CREATE INDEX idx_wallet_user_active ON wallets (user_id, is_active)",
+    "CREATE INDEX idx_wallet_user_type ON wallets (user_id, type, is_active)",
+    "CREATE INDEX idx_wallet_balance ON wallets (user_id, balance, is_active)",
+    "CREATE INDEX ix_categories_is_active ON categories (is_active)",
+    "CREATE INDEX idx_category_type_active ON categories (type, is_active)",
+    "CREATE INDEX idx_category_system_active ON categories (is_system, is_active)",
+    "CREATE INDEX ix_assets_is_active ON assets (is_active)",
+    "CREATE INDEX idx_asset_user_active ON assets (user_id, is_active)",
+    "CREATE INDEX idx_asset_wallet_active ON assets (wallet_id, is_active)",
+    "CREATE INDEX idx_asset_user_type ON assets (user_id, asset_type, is_active)",
+]
+
+def apply_legacy_indexes(engine):
+    """Swap the partial indexes for the pre-migration is_active indexes"""
+    with engine.begin() as conn:
+        for model in PARTIAL_INDEX_MODELS:
+            for index in model.__table__.indexes:
+                if index.dialect_options['sqlite'].get('where') is not None:
+                    index.drop(conn)
+        for ddl in LEGACY_ACTIVE_INDEX_DDL:
+            conn.exec_driver_sql(ddl)
+
+def seed_soft_deleted(db, user, wallets, deleted_wallets, deleted_assets, active_assets=30):
+    """Add many inactive wallets/assets (and a few active assets) for one user"""
+    wallet_rows = [
+        {'user_id': user.id, 'name': f"Lama {i}", 'type': 'bank', 'balance': float(i), 'is_active': False}
+        for i in range(deleted_wallets)
+    ]
+    db.execute(Wallet.__table__.insert(), wallet_rows)
+    asset_rows = []
+    for i in range(deleted_assets + active_assets):
+        asset_rows.append({
+            'user_id': user.id, 'wallet_id': wallets[i % len(wallets)].id,
+            'asset_type': 'saham' if i % 2 else 'kripto', 'symbol': f"S{i}", 'name': f"Aset {i:05d}",
+            'quantity': 1.0, 'buy_price': 1000.0, 'is_active': i < active_assets
+        })
+    db.execute(Asset.__table__.insert(), asset_rows)
+    db.commit()
+
+def index_pages(engine):
+    """Total b-tree pages used by non-transaction indexes (needs dbstat)"""
+    with engine.connect() as conn:
+        try:
+            return conn.exec_driver_sql(
+                "SELECT COUNT(*) FROM dbstat WHERE name IN "
+                "(SELECT name FROM sqlite_master WHERE type='index' AND tbl_name IN ('users','wallets','assets','categories'))"
+            ).scalar()
+        except Exception:
+            return None
+
+def measure(layout, deleted_wallets, deleted_assets):
+    engine, Session, db_path = create_bench_engine()
+    if layout == 'legacy':
+        apply_legacy_indexes(engine)
+    db = Session()
+    try:
+        user, wallets = seed_user(db, wallet_count=10)
+        # Other users with their own soft-deleted rows share the same indexes
+        for other in range(50):
+            other_user, other_wallets = seed_user(db, telegram_id=2000 + other, wallet_count=3)
+            seed_soft_deleted(db, other_user, other_wallets, deleted_wallets // 10, deleted_assets // 10)
+        seed_soft_deleted(db, user, wallets, deleted_wallets, deleted_assets)
+        user_id = user.id
+        with engine.connect() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
+        users, reports, assets = UserService(db), ReportService(db), AssetService(db)
+        results = {
+            'wallet_list': timeit(lambda: users.get_user_wallets(user_id), repeat=20)[0],
+            'breakdown': timeit(lambda: reports.get_wallet_breakdown(user_id), repeat=20)[0],
+            'summary': timeit(lambda: users.get_user_summary(user_id), repeat=20)[0],
+            'asset_list': timeit(lambda: assets.get_user_assets(user_id), repeat=20)[0],
+            'asset_type': timeit(lambda: assets.get_user_assets_by_type(user_id, 'saham'), repeat=20)[0],
+            'index_pages': index_pages(engine),
+        }
+        return results
+    finally:
+        db.close()
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+def run(deleted_wallets, deleted_assets):
+    assert sum(len(names) for names in LEGACY_ACTIVE_INDEXES.values()) == len(LEGACY_ACTIVE_INDEX_DDL)
+    print(f"soft-deleted per user: {deleted_wallets} kantong, {deleted_assets} aset")
+    columns = ['wallet_list', 'breakdown', 'summary', 'asset_list', 'asset_type', 'index_pages']
+    print(f"{'layout':<8} " + " ".join(f"{c:>11}" for c in columns))
+    for layout in ('legacy', 'partial'):
+        r = measure(layout, deleted_wallets, deleted_assets)
+        print(f"{layout:<8} " + " ".join(
+            f"{r[c]:>11.3f}" if isinstance(r[c], float) else f"{str(r[c]):>11}" for c in columns))
+    print("(times in ms, best of 20)")
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 2000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    )
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark beban campuran: thread pembaca (laporan bulanan + riwayat) dan thread
+penulis (create_transaction, commit per baris) pada satu engine bersama vs
+engine tulis + engine baca read-only terpisah.
+
+Usage: python scripts/benchmark_read_write_pools.py [detik] [pembaca] [penulis]
+"""
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy.orm import sessionmaker
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions
+from src.models.database import PoolMetrics, create_sqlite_read_engine
+from src.services.report_query_service import ReportQueryService
+from src.services.user_service import UserService
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+def run_load(WriteSession, ReadSession, user_id, wallet_id, duration, readers, writers):
+    """Run reader and writer threads for `duration` seconds; returns op counts and latencies"""
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'reads': 0, 'writes': 0, 'errors': 0, 'read_ms': [], 'write_ms': []}
+
+    def reader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = ReadSession()
+            try:
+                queries = ReportQueryService(db)
+                end = datetime.now()
+                queries.get_daily_buckets(user_id, end - timedelta(days=30), end)
+                queries.get_category_buckets(user_id, end - timedelta(days=30), end)
+                UserService(db).get_transaction_page(user_id, limit=10)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    stats['reads'] += 1
+                    stats['read_ms'].append(elapsed)
+            except Exception:
+                with lock:
+                    stats['errors'] += 1
+            finally:
+                db.close()
+
+    def writer():
+        while not stop.is_set():
+            started = time.perf_counter()
+            db = WriteSession()
+            try:
+                UserService(db).create_transaction(user_id, 'expense', 1000.0, 'bench', from_wallet_id=wallet_id)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    stats['writes'] += 1
+                    stats['write_ms'].append(elapsed)
+            except Exception:
+                db.rollback()
+                with lock:
+                    stats['errors'] += 1
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return stats
+
+def measure(layout, duration, readers, writers):
+    engine, WriteSession, db_path = create_bench_engine()
+    read_engine = None
+    try:
+        db = WriteSession()
+        user, wallets = seed_user(db)
+        seed_transactions(db, user, wallets, 50000, days=365)
+        user_id, wallet_id = user.id, wallets[0].id
+        db.close()
+
+        if layout == 'split':
+            read_engine = create_sqlite_read_engine(engine.url)
+            ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+        else:
+            ReadSession = WriteSession
+
+        metrics = {'write': PoolMetrics('write', engine)}
+        if read_engine is not None:
+            metrics['read'] = PoolMetrics('read', read_engine)
+
+        stats = run_load(WriteSession, ReadSession, user_id, wallet_id, duration, readers, writers)
+        stats['pools'] = {name: m.snapshot() for name, m in metrics.items()}
+        return stats
+    finally:
+        if read_engine is not None:
+            read_engine.dispose()
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+def run(duration, readers, writers):
+    print(f"{duration}s mixed load, {readers} reader / {writers} writer threads, 50k seeded transactions")
+    print(f"{'layout':<8} {'reads/s':>9} {'writes/s':>9} {'total/s':>9} {'read p95':>9} {'write p95':>10} {'errors':>7}")
+    results = {}
+    for layout in ('single', 'split'):
+        stats = measure(layout, duration, readers, writers)
+        results[layout] = stats
+        print(f"{layout:<8} {stats['reads'] / duration:>9.1f} {stats['writes'] / duration:>9.1f} "
+              f"{(stats['reads'] + stats['writes']) / duration:>9.1f} {percentile(stats['read_ms'], 95):>8.1f}ms {percentile(stats['write_ms'], 95):>8.1f}ms "
+              f"{stats['errors']:>7}")
+    print("\nPool metrics:")
+    for layout, stats in results.items():
+        for name, snapshot in stats['pools'].items():
+            print(f"  {layout:<7} {name:<6} connects={snapshot['connects']} checkouts={snapshot['checkouts']} "
+                  f"peak_checked_out={snapshot['peak_checked_out']}")
+
+if __name__ == "__main__":
+    run(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 10,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 16,
+        int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    )
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Cek jumlah query ReportService.get_recent_transactions: harus tetap 1 query
+berapapun ukuran halamannya (tanpa lazy-load N+1 kategori/kantong)
+
+Usage: python scripts/benchmark_recent_transactions.py
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit, QueryCounter
+from src.services.report_service import ReportService
+
+EXPECTED_QUERIES = 1
+
+def run(page_sizes=(1, 10, 50, 200)):
+    engine, Session, db_path = create_bench_engine()
+    db = Session()
+    failures = 0
+    try:
+        user, wallets = seed_user(db)
+        seed_transactions(db, user, wallets, 5000)
+        user_id = user.id
+        service = ReportService(db)
+
+        print(f"{'limit':>6} {'queries':>8} {'ms':>8}")
+        for limit in page_sizes:
+            db.expunge_all()
+            with QueryCounter(engine) as counter:
+                rows = service.get_recent_transactions(user_id, limit=limit)
+            elapsed, _ = timeit(lambda: service.get_recent_transactions(user_id, limit=limit))
+            status = "OK" if counter.count == EXPECTED_QUERIES else "FAIL"
+            if status == "FAIL":
+                failures += 1
+            assert len(rows) == limit
+            print(f"{limit:>6} {counter.count:>8} {elapsed:>8.2f} {status}")
+    finally:
+        db.close()
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    return failures
+
+if __name__ == "__main__":
+    sys.exit(1 if run() else 0)
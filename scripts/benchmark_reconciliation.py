@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark rekonsiliasi saldo: pemeriksaan penuh (scan semua transaksi) vs
+rekonsiliasi inkremental per jam, plus injeksi selisih untuk memastikan
+selisih ditandai dengan rentang transaksi yang benar.
+
+Usage: python scripts/benchmark_reconciliation.py [jumlah_transaksi] [kantong]
+"""
+import os
+import sys
+import random
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func, case, update, event
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit
+from src.models.database import Wallet, Transaction, Posting
+from src.services.ledger_service import LedgerService
+from src.services.reconciliation_service import ReconciliationService
+from src.services.user_service import UserService
+
+def full_scan_drift(db):
+    """The pre-checkpoint check: every wallet against a signed sum over all its transactions"""
+    drift = {}
+    for wallet in db.query(Wallet.id, Wallet.balance, Wallet.initial_balance).all():
+        signed = case(
+            ((Transaction.to_wallet_id == wallet.id) & (Transaction.from_wallet_id == wallet.id), 0.0),
+            (Transaction.to_wallet_id == wallet.id, Transaction.amount),
+            else_=-Transaction.amount
+        )
+        total = db.query(func.coalesce(func.sum(signed), 0.0)).filter(
+            (Transaction.from_wallet_id == wallet.id) | (Transaction.to_wallet_id == wallet.id)
+        ).scalar()
+        drift[wallet.id] = round(wallet.balance - (wallet.initial_balance + total), 2)
+    return drift
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    wallet_count = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    engine, Session, path = create_bench_engine()
+    try:
+        db = Session()
+        user, wallets = seed_user(db, wallet_count=wallet_count)
+        user_id, wallet_ids = user.id, [w.id for w in wallets]
+        print(f"Seeding {count} transactions over {wallet_count} wallets...")
+        seed_transactions(db, user, wallets, count)
+        LedgerService(db).backfill_postings()
+        # Core-seeded rows left balances at 0: make them agree with the journal
+        for wallet_id, total in db.query(Posting.wallet_id, func.sum(Posting.amount)).filter(
+                Posting.wallet_id.isnot(None)).group_by(Posting.wallet_id).all():
+            db.execute(update(Wallet).where(Wallet.id == wallet_id).values(balance=total))
+        db.commit()
+
+        service = ReconciliationService(db)
+        full_ms, _ = timeit(lambda: full_scan_drift(db), repeat=1)
+        first_ms, first = timeit(service.reconcile, repeat=1)
+        print(f"  full transaction scan:        {full_ms:8.1f}ms")
+        print(f"  first reconcile (baseline):   {first_ms:8.1f}ms, {first['postings_read']:,} postings read, "
+              f"{len(first['issues'])} issues")
+
+        # An hour of normal activity
+        users = UserService(db)
+        rng = random.Random(3)
+        for _ in range(200):
+            users.create_transaction(user_id, 'expense', float(rng.randint(1, 100) * 1000), 'hourly',
+                                     from_wallet_id=rng.choice(wallet_ids))
+        hourly_ms, hourly = timeit(service.reconcile, repeat=1)
+        print(f"  hourly reconcile (200 new):   {hourly_ms:8.1f}ms, {hourly['postings_read']:,} postings read, "
+              f"{len(hourly['issues'])} issues")
+        idle_ms, _ = timeit(service.reconcile, repeat=3)
+        print(f"  reconcile with nothing new:   {idle_ms:8.1f}ms\n")
+
+        # A transaction committing mid-pass (right after the postings cap is read)
+        # belongs wholly to the next pass: no drift now, no reverse drift later
+        writer = Session()
+        fired = []
+
+        def commit_mid_pass(conn, cursor, statement, parameters, context, executemany):
+            if not fired and 'max(postings.id)' in statement.lower() and 'reconciliation' not in statement.lower():
+                fired.append(True)
+                UserService(writer).create_transaction(user_id, 'expense', 4321.0, 'mid-pass',
+                                                       from_wallet_id=wallet_ids[0])
+
+        event.listen(engine, 'after_cursor_execute', commit_mid_pass)
+        try:
+            during = service.reconcile()
+        finally:
+            event.remove(engine, 'after_cursor_execute', commit_mid_pass)
+        writer.close()
+        after = service.reconcile()
+        print(f"[{'OK' if fired and not during['issues'] and not after['issues'] else 'FAIL'}] "
+              f"write committed mid-pass: {len(during['issues'])} issues in that pass, "
+              f"{len(after['issues'])} in the next ({after['postings_read']} new postings read)")
+
+        # Drift 1: a transaction saved without touching the wallet balance (Core insert)
+        victim = wallet_ids[1]
+        db.execute(Transaction.__table__.insert(), [{
+            'user_id': user_id, 'type': 'expense', 'amount': 77000.0, 'description': 'lost update',
+            'from_wallet_id': victim, 'transaction_date': datetime.now(), 'created_at': datetime.now()
+        }])
+        db.commit()
+        lost_id = db.query(func.max(Transaction.id)).scalar()
+        users.create_transaction(user_id, 'income', 5000.0, 'after', to_wallet_id=victim)
+        after_id = db.query(func.max(Transaction.id)).scalar()
+
+        # Drift 2: a balance edited by hand, no transaction at all
+        other = wallet_ids[2]
+        db.execute(update(Wallet).where(Wallet.id == other).values(balance=Wallet.balance + 1234.0))
+        db.commit()
+
+        result = service.reconcile()
+        flagged = {issue.wallet_id: issue for issue in result['issues']}
+        lost = flagged.get(victim)
+        ok_lost = lost is not None and round(lost.drift_change, 2) == 77000.0 \
+            and lost.first_transaction_id <= lost_id <= lost.last_transaction_id <= after_id
+        manual = flagged.get(other)
+        ok_manual = manual is not None and round(manual.drift_change, 2) == 1234.0 and manual.first_transaction_id is None
+        print(f"[{'OK' if ok_lost else 'FAIL'}] unapplied transaction flagged on wallet {victim}: "
+              f"{lost.drift_change if lost else None:+,.0f} in transactions {lost.first_transaction_id if lost else '-'}"
+              f"..{lost.last_transaction_id if lost else '-'} (expected to include {lost_id})")
+        print(f"[{'OK' if ok_manual else 'FAIL'}] manual balance edit flagged on wallet {other}: "
+              f"{manual.drift_change if manual else None:+,.0f}, no transaction in range")
+        print(f"[{'OK' if len(flagged) == 2 else 'FAIL'}] {len(flagged)} wallets flagged")
+
+        again = service.reconcile()
+        print(f"[{'OK' if not again['issues'] else 'FAIL'}] known drift is not re-flagged on the next run")
+
+        full = {wallet_id: drift for wallet_id, drift in full_scan_drift(db).items() if drift}
+        incremental = {wallet_id: round(drift, 2) for wallet_id, drift in service.open_drift()}
+        print(f"[{'OK' if full == incremental else 'FAIL'}] open drift matches a full scan: {incremental}")
+        db.close()
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    main()
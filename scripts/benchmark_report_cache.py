@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Cek cache laporan: ketukan berulang report_monthly / analysis_mom dilayani dari
+cache tanpa menyentuh tabel transactions, setiap tulis transaksi, dompet atau
+aset menaikkan users.data_version sekali (rollback tidak), LRU tetap terbatas,
+entri yang tergusur dan entri setelah restart dibaca dari spill SQLite, serta
+waktu miss vs hit dan hit rate.
+
+Usage: python scripts/benchmark_report_cache.py [jumlah_transaksi]
+"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORKDIR = tempfile.mkdtemp(prefix='monman_report_cache_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+os.environ.pop('DB_WRITE_QUEUE', None)
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+# Log files the services open relative to the working directory land in the temp dir
+os.chdir(WORKDIR)
+logging.getLogger().addHandler(logging.NullHandler())
+
+from scripts.benchmark_common import seed_user, seed_transactions, QueryCounter
+from migrations.init_db_enhanced import init_database
+from src.models.database import SessionLocal, User, Transaction, engine, read_engine
+from src.handlers import report_handler
+from src.services.asset_service import AssetService
+from src.services.report_cache_service import ReportCache, ReportCacheKey, ReportCacheMetrics, get_report_cache_metrics
+from src.services.user_service import UserService
+
+TELEGRAM_ID = 515151
+
+def check(ok, message):
+    print(f"[{'OK' if ok else 'FAIL'}] {message}")
+    return ok
+
+def data_version(user_id):
+    db = SessionLocal()
+    try:
+        return db.query(User.data_version).filter(User.id == user_id).scalar()
+    finally:
+        db.close()
+
+def tap(generate):
+    """One button press: (text, statements run, ms)"""
+    engines = [engine] if read_engine is engine else [engine, read_engine]
+    counters = [QueryCounter(e) for e in engines]
+    for counter in counters:
+        counter.__enter__()
+    start = time.perf_counter()
+    try:
+        text = generate(TELEGRAM_ID)
+    finally:
+        for counter in counters:
+            counter.__exit__(None, None, None)
+    return text, [s for counter in counters for s in counter.statements], (time.perf_counter() - start) * 1000
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    try:
+        init_database()
+        db = SessionLocal()
+        user, wallets = seed_user(db, telegram_id=TELEGRAM_ID)
+        seed_transactions(db, user, wallets, count)
+        user_id, wallet_id, spare_wallet_id = user.id, wallets[0].id, wallets[2].id
+        db.close()
+
+        screens = [('report_monthly', report_handler.generate_monthly_report),
+                   ('analysis_mom', report_handler.generate_mom_analysis)]
+        timings, rendered = {}, {}
+        for kind, generate in screens:
+            first, first_statements, miss_ms = tap(generate)
+            repeats = [tap(generate) for _ in range(20)]
+            touched = [s for _, statements, _ in repeats for s in statements if 'transactions' in s]
+            per_tap = max(len(statements) for _, statements, _ in repeats)
+            hit_ms = sorted(ms for _, _, ms in repeats)[len(repeats) // 2]
+            timings[kind] = (miss_ms, hit_ms)
+            rendered[kind] = first
+            check(all(text == first for text, _, _ in repeats) and not touched and per_tap == 1,
+                  f"{kind}: 20 repeated taps, same text, {per_tap} statement per tap (user lookup), "
+                  f"transactions touched {len(touched)}x (first tap ran {len(first_statements)})")
+
+        # Every kind of write bumps the version once, in the same transaction
+        db = SessionLocal()
+        before = data_version(user_id)
+        UserService(db).create_transaction(user_id, 'expense', 777000.0, 'cache test', from_wallet_id=wallet_id)
+        after_transaction = data_version(user_id)
+        asset = AssetService(db).add_asset(user_id, wallet_id, 'Bank Cache', 'saham', 'BCCH', 10, 1000.0)
+        after_asset = data_version(user_id)
+        AssetService(db).update_asset_price(asset, 1200.0)
+        after_price = data_version(user_id)
+        UserService(db).delete_wallet(user_id, spare_wallet_id)
+        after_wallet = data_version(user_id)
+        db.add(Transaction(user_id=user_id, type='expense', amount=1.0, description='rolled back', from_wallet_id=wallet_id))
+        db.flush()
+        db.rollback()
+        after_rollback = data_version(user_id)
+        db.close()
+        check(after_transaction == before + 1, f"expense (transaction + wallet balance) bumps once: {before} -> {after_transaction}")
+        check(after_asset > after_transaction and after_price > after_asset and after_wallet > after_price,
+              f"asset add, price update and wallet delete bump: {after_asset}, {after_price}, {after_wallet}")
+        check(after_rollback == after_wallet, f"rolled-back write leaves the version at {after_rollback}")
+
+        for kind, generate in screens:
+            text, statements, _ = tap(generate)
+            check(any('transactions' in s for s in statements) and text != rendered[kind],
+                  f"{kind}: after the writes the screen is re-rendered with the new figures")
+
+        # LRU bound, spill on eviction, spill across restart, stale version in spill
+        spill_path = os.path.join(WORKDIR, 'spill', 'report_cache.db')
+        metrics = ReportCacheMetrics()
+        cache = ReportCache(max_entries=3, spill_path=spill_path, metrics=metrics)
+        keys = [ReportCacheKey(1, 'report_monthly', f"2024-01-{day:02d}", 'id', 1) for day in range(1, 11)]
+        for key in keys:
+            cache.put(key, f"text {key.period}")
+        check(len(cache) == 3, f"LRU holds {len(cache)} of {len(keys)} entries")
+        check(cache.get(keys[0]) == "text 2024-01-01", "evicted entry is read back from the spill")
+        check(cache.get(keys[0]._replace(version=2)) is None, "newer data version misses an older spilled entry")
+        cache.close()
+        restarted = ReportCache(max_entries=3, spill_path=spill_path, metrics=metrics)
+        check(restarted.get(keys[-1]) == f"text {keys[-1].period}", "entries in memory at shutdown survive a restart")
+        restarted.close()
+        print(f"  isolated cache metrics: {metrics.snapshot()}")
+
+        print()
+        for kind, (miss_ms, hit_ms) in timings.items():
+            print(f"  {kind:<16} miss {miss_ms:7.2f}ms   hit {hit_ms:6.2f}ms   ({miss_ms / hit_ms:.0f}x)")
+        print(f"  bot cache metrics: {get_report_cache_metrics()}")
+    finally:
+        engine.dispose()
+        read_engine.dispose()
+        os.chdir(str(Path(__file__).resolve().parent.parent))
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
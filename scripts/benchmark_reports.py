@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark laporan: ORM rows + Python sum (lama) vs grouped SQL (ReportQueryService)
+
+Usage: python scripts/benchmark_reports.py [jumlah_transaksi ...]
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit
+from src.models.database import Transaction
+from src.services.report_query_service import ReportQueryService
+from src.utils.helpers import get_date_range
+
+def legacy_totals(db, user_id, start_date, end_date):
+    """Old report path: load every Transaction in range and sum in Python"""
+    transactions = db.query(Transaction).filter(
+        Transaction.user_id == user_id,
+        Transaction.transaction_date.between(start_date, end_date)
+    ).all()
+    return (
+        sum(t.amount for t in transactions if t.type == 'income'),
+        sum(t.amount for t in transactions if t.type == 'expense'),
+        len(transactions)
+    )
+
+def run(sizes):
+    print(f"{'rows':>8} {'report':<8} {'legacy ms':>10} {'sql ms':>8} {'speedup':>8}")
+    for size in sizes:
+        engine, Session, db_path = create_bench_engine()
+        db = Session()
+        try:
+            user, wallets = seed_user(db)
+            seed_transactions(db, user, wallets, size)
+            user_id = user.id
+            service = ReportQueryService(db)
+
+            cases = {
+                'daily': ('today', lambda s, e: service.get_period_totals(user_id, s, e)),
+                'weekly': ('week', lambda s, e: service.get_daily_buckets(user_id, s, e)),
+                'monthly': ('month', lambda s, e: service.get_category_buckets(user_id, s, e)),
+            }
+            for name, (period, new_func) in cases.items():
+                start, end = get_date_range(period)
+                legacy_ms, legacy = timeit(lambda: (db.expunge_all(), legacy_totals(db, user_id, start, end))[1])
+                sql_ms, totals = timeit(lambda: new_func(start, end))
+                assert abs(legacy[0] - totals['income']) < 0.01 and abs(legacy[1] - totals['expense']) < 0.01
+                print(f"{size:>8} {name:<8} {legacy_ms:>10.2f} {sql_ms:>8.2f} {legacy_ms / sql_ms:>7.1f}x")
+
+            # WoW / MoM: two legacy loads vs one comparison query
+            for name, current, previous in (('wow', 'week', 'last_week'), ('mom', 'month', 'last_month')):
+                cur, prev = get_date_range(current), get_date_range(previous)
+                legacy_ms, _ = timeit(lambda: (db.expunge_all(), legacy_totals(db, user_id, *cur), legacy_totals(db, user_id, *prev)))
+                sql_ms, _ = timeit(lambda: service.get_comparison_totals(user_id, cur, prev))
+                print(f"{size:>8} {name:<8} {legacy_ms:>10.2f} {sql_ms:>8.2f} {legacy_ms / sql_ms:>7.1f}x")
+        finally:
+            db.close()
+            engine.dispose()
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    run(sizes)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark pencarian transaksi (/cari): indeks FTS5 external-content vs scan
+LIKE '%kata%' atas description/notes. Mengukur halaman pertama + total,
+halaman berikutnya, dan biaya trigger sinkronisasi saat insert.
+
+Usage: python scripts/benchmark_search.py [jumlah_transaksi]
+"""
+import os
+import sys
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from scripts.benchmark_common import create_bench_engine, seed_user, timeit
+from migrations.add_transaction_search import upgrade_transaction_search
+from src.models.database import Category, Transaction
+from src.services.search_service import TransactionSearchService
+
+# (term, period): from common to absent in the seeded descriptions
+SEARCH_TERMS = [
+    ('makan', None),
+    ('bensin', None),
+    ('bensin', 'year'),
+    ('parkir mall', None),
+    ('servis', None),
+    ('zzzz', None),
+]
+
+COMMON_WORDS = ['makan', 'siang', 'malam', 'kopi', 'belanja', 'bulanan', 'gaji', 'transfer',
+                'pulsa', 'listrik', 'air', 'internet', 'sewa', 'kos', 'obat', 'buku', 'tiket']
+RARE_WORDS = [('bensin', 0.02), ('parkir', 0.04), ('mall', 0.05), ('servis', 0.003)]
+
+class LikeSearchService(TransactionSearchService):
+    """Same search with the FTS index ignored: LIKE scan over the user's rows"""
+
+    def fts_available(self) -> bool:
+        return False
+
+def random_description(rng):
+    words = rng.sample(COMMON_WORDS, rng.randint(1, 3))
+    for word, rate in RARE_WORDS:
+        if rng.random() < rate:
+            words.insert(rng.randint(0, len(words)), word)
+    words.append(f"toko{rng.randint(1, 5000)}")
+    return ' '.join(words)
+
+def seed_search_rows(db, user, wallets, count, seed=7):
+    """Bulk insert transactions with varied descriptions (and some notes)"""
+    rng = random.Random(seed)
+    category_ids = [c.id for c in db.query(Category).all()]
+    now = datetime.now()
+    rows = []
+    for _ in range(count):
+        rows.append({
+            'user_id': user.id,
+            'type': rng.choices(['expense', 'income'], weights=[8, 2])[0],
+            'amount': float(rng.randint(1, 500) * 1000),
+            'description': random_description(rng),
+            'notes': random_description(rng) if rng.random() < 0.1 else None,
+            'category_id': rng.choice(category_ids),
+            'from_wallet_id': rng.choice(wallets).id,
+            'transaction_date': now - timedelta(seconds=rng.randint(0, 3 * 365 * 86400)),
+            'created_at': now,
+        })
+        if len(rows) >= 20000:
+            db.execute(Transaction.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.execute(Transaction.__table__.insert(), rows)
+    db.commit()
+
+def insert_cost_us(Session, user_id, wallet_id, count=2000):
+    """Per-row cost of single-row inserts (one transaction, like the bot's saves)"""
+    db = Session()
+    try:
+        started = time.perf_counter()
+        for i in range(count):
+            db.add(Transaction(user_id=user_id, type='expense', amount=1000.0,
+                               description=f"bench insert bensin {i}", from_wallet_id=wallet_id))
+            db.flush()
+        elapsed = time.perf_counter() - started
+        db.rollback()
+        return elapsed / count * 1e6
+    finally:
+        db.close()
+
+def run(count):
+    engine, Session, db_path = create_bench_engine()
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id, wallet_id = user.id, wallets[0].id
+        print(f"Seeding {count} transactions...")
+        started = time.perf_counter()
+        seed_search_rows(db, user, wallets, count)
+        print(f"  seeded in {time.perf_counter() - started:.1f}s")
+        db.close()
+
+        insert_before = insert_cost_us(Session, user_id, wallet_id)
+        started = time.perf_counter()
+        upgrade_transaction_search(engine)
+        print(f"  FTS5 index built (rebuild) in {time.perf_counter() - started:.1f}s")
+        insert_after = insert_cost_us(Session, user_id, wallet_id)
+        print(f"  single-row insert: {insert_before:.0f} us without triggers, {insert_after:.0f} us with FTS triggers")
+
+        year_start = datetime(datetime.now().year, 1, 1)
+        print(f"\n{'search':<22} {'matches':>8} {'LIKE p1':>10} {'FTS p1':>10} {'LIKE p2':>10} {'FTS p2':>10} {'same':>5}")
+        for term, period in SEARCH_TERMS:
+            start_date = year_start if period == 'year' else None
+            results = {}
+            for name, service_class in (('like', LikeSearchService), ('fts', TransactionSearchService)):
+                db = Session()
+                service = service_class(db)
+                first_ms, page = timeit(lambda: service.search(user_id, term, start_date=start_date), repeat=3)
+                next_ms = 0.0
+                if page['next_cursor']:
+                    next_ms, _ = timeit(lambda: service.search(user_id, term, start_date=start_date,
+                                                               cursor=page['next_cursor']), repeat=3)
+                results[name] = (first_ms, next_ms, page)
+                db.close()
+
+            like_page, fts_page = results['like'][2], results['fts'][2]
+            # FTS matches whole tokens (prefix), LIKE matches substrings; on these words they agree
+            same = ([t.id for t in like_page['items']] == [t.id for t in fts_page['items']]
+                    and like_page['totals'] == fts_page['totals'])
+            label = term + (' (tahun ini)' if period else '')
+            print(f"{label:<22} {fts_page['totals']['count']:>8} {results['like'][0]:>8.1f}ms {results['fts'][0]:>8.1f}ms "
+                  f"{results['like'][1]:>8.1f}ms {results['fts'][1]:>8.1f}ms {str(same):>5}")
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark perawatan SQLite: pertumbuhan WAL saat ada pembaca lama, latensi
+baca sebelum/sesudah checkpoint TRUNCATE, PRAGMA optimize, dan halaman kosong
+yang dikembalikan oleh incremental vacuum setelah penghapusan massal, serta
+konversi auto_vacuum file lama yang ditunda dari startup ke jendela perawatan.
+
+Usage: python scripts/benchmark_sqlite_maintenance.py [jumlah_transaksi]
+"""
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import create_engine, func
+
+from migrations.enable_incremental_vacuum import upgrade_incremental_vacuum
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit
+from src.models.database import Transaction
+from src.services.maintenance_service import MaintenanceService, get_maintenance_metrics
+
+def report_query(Session, user_id):
+    """A 90-day per-type total, the shape of the bot's summary reports"""
+    db = Session()
+    try:
+        since = datetime.now() - timedelta(days=90)
+        return db.query(Transaction.type, func.sum(Transaction.amount)).filter(
+            Transaction.user_id == user_id, Transaction.transaction_date >= since
+        ).group_by(Transaction.type).all()
+    finally:
+        db.close()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    engine, Session, path = create_bench_engine()
+    try:
+        service = MaintenanceService(engine)
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id = user.id
+        print(f"Seeding {count // 2} transactions...")
+        seed_transactions(db, user, wallets, count // 2)
+        service.checkpoint('TRUNCATE')
+        print(f"[{'OK' if service.wal_status()['auto_vacuum'] == 2 else 'FAIL'}] new file created with auto_vacuum=INCREMENTAL")
+
+        # A reader that never finishes pins the WAL: auto-checkpoints cannot wrap it
+        reader = sqlite3.connect(path)
+        reader.execute("BEGIN")
+        reader.execute("SELECT count(*) FROM transactions").fetchone()
+        print(f"Writing {count // 2} more transactions under a long-running reader...")
+        seed_transactions(db, user, wallets, count // 2)
+        pinned = service.wal_status()['wal_bytes']
+        print(f"  WAL with reader open:         {pinned / 1024 / 1024:8.1f} MB")
+        passive = service.checkpoint('PASSIVE')
+        lag = passive['log_frames'] - passive['checkpointed_frames']
+        print(f"[{'OK' if lag > 0 else 'FAIL'}] PASSIVE under the reader leaves {lag:,} of {passive['log_frames']:,} frames")
+
+        # Warm run first, then the best of five against the big WAL
+        report_query(Session, user_id)
+        big_wal_ms, before = timeit(lambda: report_query(Session, user_id), repeat=5)
+        reader.rollback()
+        reader.close()
+
+        truncate = service.checkpoint('TRUNCATE')
+        after_bytes = truncate['wal_bytes_after']
+        print(f"[{'OK' if not truncate['busy'] and after_bytes == 0 else 'FAIL'}] TRUNCATE after the reader left: "
+              f"{pinned / 1024 / 1024:.1f} MB -> {after_bytes / 1024:.0f} KB")
+        report_query(Session, user_id)
+        small_wal_ms, after = timeit(lambda: report_query(Session, user_id), repeat=5)
+        print(f"  90-day report, large WAL:     {big_wal_ms:8.2f}ms")
+        print(f"  90-day report, after TRUNCATE:{small_wal_ms:8.2f}ms")
+        print(f"[{'OK' if before == after else 'FAIL'}] report unchanged by the checkpoint")
+
+        first = service.optimize()
+        second = service.optimize()
+        print(f"[{'OK' if (first, second) == ('ANALYZE', 'PRAGMA optimize') else 'FAIL'}] "
+              f"first run {first}, later runs {second}")
+
+        # Bulk delete (an archived year, a purged user) leaves free pages inside the file
+        oldest = db.query(Transaction.id).order_by(Transaction.id).offset(count // 2).limit(1).scalar()
+        db.query(Transaction).filter(Transaction.id < oldest).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+        service.checkpoint('TRUNCATE')
+        status = service.wal_status()
+        size_before = os.path.getsize(path)
+        freed_ms, freed = timeit(service.incremental_vacuum, repeat=1)
+        service.checkpoint('TRUNCATE')
+        size_after = os.path.getsize(path)
+        print(f"  free pages after delete:      {status['free_pages']:8,}")
+        print(f"  incremental vacuum:           {freed_ms:8.1f}ms")
+        print(f"[{'OK' if freed == status['free_pages'] and size_after < size_before else 'FAIL'}] "
+              f"vacuum freed {freed:,} pages, file {size_before / 1024 / 1024:.1f} MB -> {size_after / 1024 / 1024:.1f} MB")
+
+        # An older file without auto_vacuum: startup only reports it, the quiet window converts it
+        legacy_path = path + '.legacy'
+        legacy = sqlite3.connect(legacy_path)
+        legacy.execute("PRAGMA auto_vacuum=NONE")
+        legacy.execute("CREATE TABLE filler (payload TEXT)")
+        legacy.executemany("INSERT INTO filler VALUES (?)", [('x' * 500,)] * 2000)
+        legacy.commit()
+        legacy.close()
+        legacy_engine = create_engine(f"sqlite:///{legacy_path}")
+        try:
+            legacy_service = MaintenanceService(legacy_engine)
+            pending = upgrade_incremental_vacuum(legacy_engine)
+            untouched = legacy_service.wal_status()['auto_vacuum'] == 0
+            result = legacy_service.run_scheduled_maintenance()
+            converted = legacy_service.wal_status()['auto_vacuum'] == 2
+        finally:
+            legacy_engine.dispose()
+            os.remove(legacy_path)
+        print(f"[{'OK' if pending == [] and untouched and result.get('auto_vacuum_converted') and converted else 'FAIL'}] "
+              f"startup leaves an auto_vacuum=NONE file as is, the maintenance window converts it")
+
+        metrics = get_maintenance_metrics()
+        print(f"\n[INFO] metrics: peak WAL {metrics['peak_wal_bytes'] / 1024 / 1024:.1f} MB, "
+              f"checkpoints {metrics['checkpoints']}, {metrics['pages_vacuumed']:,} pages vacuumed")
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Cek pemakaian ulang file_id Telegram: grafik dan export yang sama dikirim
+ulang lewat file_id tanpa upload (juga setelah restart, dari file SQLite),
+foto dan dokumen disimpan terpisah, file_id yang ditolak Telegram dilupakan
+lalu diupload ulang, error lain tidak memicu upload, serta byte dan waktu
+upload yang dihemat. Bot tiruan mensimulasikan upload lambat (latensi +
+bandwidth) dan kirim file_id yang cepat.
+
+Usage: python scripts/benchmark_telegram_files.py [jumlah_transaksi]
+"""
+import itertools
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+WORKDIR = tempfile.mkdtemp(prefix='monman_telegram_files_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(WORKDIR, 'bench.db')}"
+os.environ['TELEGRAM_FILE_CACHE_PATH'] = os.path.join(WORKDIR, 'telegram_files.db')
+os.environ.pop('DB_WRITE_QUEUE', None)
+os.environ.pop('CHART_CACHE_DIR', None)
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+# Log files the services open relative to the working directory land in the temp dir
+os.chdir(WORKDIR)
+logging.getLogger().addHandler(logging.NullHandler())
+
+from telebot.apihelper import ApiTelegramException
+
+from scripts.benchmark_common import seed_user, seed_transactions
+from migrations.init_db_enhanced import init_database
+from src.models.database import SessionLocal, engine, read_engine
+from src.handlers.chart_handler import send_chart
+from src.services.chart_service import shutdown_chart_service
+from src.services.export_service import ExportService
+from src.services.telegram_file_service import (
+    TelegramFileCache, TelegramFileMetrics, send_cached_file,
+    shutdown_telegram_file_cache, get_telegram_file_metrics
+)
+from src.services.user_service import UserService
+
+TELEGRAM_ID = 717171
+# Simulated Telegram: fixed round trip plus upload bandwidth
+ROUND_TRIP_MS = 40
+UPLOAD_BYTES_PER_MS = 250  # ~2 Mbit/s
+
+def bad_request(description):
+    return ApiTelegramException('send', None, {'error_code': 400, 'description': f"Bad Request: {description}"})
+
+class FakeTelegram:
+    """Stands in for telebot: assigns file_ids to uploads and only accepts file_ids it issued"""
+
+    def __init__(self):
+        self.known = {}
+        self.uploaded_bytes = 0
+        self.uploads = 0
+        self.by_file_id = 0
+        self.fail_next = None
+        self._ids = itertools.count(1)
+
+    def _send(self, media, chat_id, payload, **kwargs):
+        if self.fail_next:
+            error, self.fail_next = self.fail_next, None
+            raise error
+        if isinstance(payload, str):
+            if payload not in self.known:
+                raise bad_request("wrong file identifier/HTTP URL specified")
+            time.sleep(ROUND_TRIP_MS / 1000)
+            self.by_file_id += 1
+            file_id = payload
+        else:
+            content = payload.getvalue()
+            time.sleep((ROUND_TRIP_MS + len(content) / UPLOAD_BYTES_PER_MS) / 1000)
+            self.uploaded_bytes += len(content)
+            self.uploads += 1
+            file_id = f"{media}-{next(self._ids)}"
+            self.known[file_id] = content
+        if media == 'photo':
+            sizes = [SimpleNamespace(file_id=f"{file_id}-thumb"), SimpleNamespace(file_id=file_id)]
+            return SimpleNamespace(photo=sizes, document=None, caption=kwargs.get('caption'))
+        return SimpleNamespace(photo=None, document=SimpleNamespace(file_id=file_id), caption=kwargs.get('caption'))
+
+    def send_photo(self, chat_id, photo, **kwargs):
+        return self._send('photo', chat_id, photo, **kwargs)
+
+    def send_document(self, chat_id, document, **kwargs):
+        return self._send('document', chat_id, document, **kwargs)
+
+    def send_message(self, chat_id, text, **kwargs):
+        raise AssertionError(f"unexpected text fallback: {text}")
+
+def check(ok, message):
+    print(f"[{'OK' if ok else 'FAIL'}] {message}")
+    return ok
+
+def export_bytes(user_id):
+    db = SessionLocal()
+    try:
+        return ExportService(db).transactions_csv(user_id)[0]
+    finally:
+        db.close()
+
+def timed(send):
+    start = time.perf_counter()
+    send()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    results = []
+    try:
+        init_database()
+        db = SessionLocal()
+        user, wallets = seed_user(db, telegram_id=TELEGRAM_ID)
+        seed_transactions(db, user, wallets, count, days=200)
+        user_id, wallet_id = user.id, wallets[0].id
+        db.close()
+        telegram = FakeTelegram()
+
+        # Charts through the real handler path
+        first_ms = timed(lambda: send_chart(telegram, TELEGRAM_ID, TELEGRAM_ID, 'analysis_networth'))
+        chart_bytes = telegram.uploaded_bytes
+        repeat_ms = sorted(timed(lambda: send_chart(telegram, TELEGRAM_ID, TELEGRAM_ID, 'analysis_networth'))
+                           for _ in range(5))[2]
+        results.append(check(telegram.uploads == 1 and telegram.by_file_id == 5 and telegram.uploaded_bytes == chart_bytes,
+                             f"net worth chart: 1 upload ({chart_bytes // 1024}KB), 5 repeats sent by file_id"))
+
+        # Export: unchanged history -> same bytes -> file_id; new transaction -> new upload
+        content = export_bytes(user_id)
+        uploads = telegram.uploads
+        upload_ms = timed(lambda: send_cached_file(telegram, TELEGRAM_ID, content, 'export.csv', 'document'))
+        reuse_ms = timed(lambda: send_cached_file(telegram, TELEGRAM_ID, export_bytes(user_id), 'export.csv', 'document'))
+        reused = telegram.uploads == uploads + 1
+        db = SessionLocal()
+        UserService(db).create_transaction(user_id, 'expense', 12345.0, 'export baru', from_wallet_id=wallet_id)
+        db.close()
+        send_cached_file(telegram, TELEGRAM_ID, export_bytes(user_id), 'export.csv', 'document')
+        results.append(check(reused and telegram.uploads == uploads + 2,
+                             f"export of {len(content) // 1024}KB: resent by file_id until a new transaction changes it"))
+
+        # Photo and document slots are separate
+        uploads = telegram.uploads
+        send_cached_file(telegram, TELEGRAM_ID, content, 'export.png', 'photo')
+        results.append(check(telegram.uploads == uploads + 1, "same bytes as a photo are uploaded once more (own file_id)"))
+
+        # Restart: mapping read back from SQLite
+        shutdown_telegram_file_cache()
+        by_file_id, uploads = telegram.by_file_id, telegram.uploads
+        send_cached_file(telegram, TELEGRAM_ID, content, 'export.csv', 'document')
+        results.append(check(telegram.by_file_id == by_file_id + 1 and telegram.uploads == uploads,
+                             "after a restart the export is still sent by file_id"))
+
+        # Rejected file_id (another bot token): forgotten and uploaded again
+        replaced = FakeTelegram()
+        stale = get_telegram_file_metrics()['stale']
+        send_cached_file(replaced, TELEGRAM_ID, content, 'export.csv', 'document')
+        send_cached_file(replaced, TELEGRAM_ID, content, 'export.csv', 'document')
+        results.append(check(replaced.uploads == 1 and replaced.by_file_id == 1
+                             and get_telegram_file_metrics()['stale'] == stale + 1,
+                             "file_id rejected by a new bot is replaced by one upload"))
+
+        # Other errors surface without an upload
+        replaced.fail_next = bad_request("can't parse entities: unclosed bold")
+        uploads = replaced.uploads
+        try:
+            send_cached_file(replaced, TELEGRAM_ID, content, 'export.csv', 'document', parse_mode='Markdown')
+            raised = False
+        except ApiTelegramException:
+            raised = True
+        results.append(check(raised and replaced.uploads == uploads, "a caption error is raised, no upload attempted"))
+
+        # Memory-only mode and the row limit
+        memory = TelegramFileCache(path='', metrics=TelegramFileMetrics())
+        memory.put('a' * 64, 'photo', 'photo-x', 10)
+        trimmed = TelegramFileCache(path=os.path.join(WORKDIR, 'trim.db'), max_entries=5, max_rows=10,
+                                    metrics=TelegramFileMetrics())
+        trimmed.TRIM_EVERY = 20
+        for i in range(40):
+            trimmed.put(f"{i:064d}", 'photo', f"photo-{i}", 10)
+        rows = trimmed._db_execute("SELECT count(*) FROM telegram_files")[0]
+        results.append(check(memory.get('a' * 64, 'photo') == 'photo-x' and rows <= 30 and len(trimmed._entries) == 5
+                             and trimmed.get(f"{39:064d}", 'photo') == 'photo-39',
+                             f"memory-only cache works; bounded cache keeps {len(trimmed._entries)} in memory, {rows} rows"))
+        trimmed.close()
+
+        print()
+        print(f"  chart  upload {first_ms:7.1f}ms (render included)   by file_id {repeat_ms:6.1f}ms")
+        print(f"  export upload {upload_ms:7.1f}ms                    by file_id {reuse_ms:6.1f}ms (CSV build included)")
+        print(f"  file reuse metrics: {get_telegram_file_metrics()}")
+    finally:
+        shutdown_chart_service()
+        shutdown_telegram_file_cache()
+        engine.dispose()
+        read_engine.dispose()
+        os.chdir(str(Path(__file__).resolve().parent.parent))
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    print(f"\n[{'OK' if all(results) else 'FAIL'}] {sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
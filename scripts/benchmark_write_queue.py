@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark penulisan kecil dari banyak thread: commit langsung per thread vs
+single-writer queue dengan group commit. Tiap operasi = simpan transaksi
+(insert + update saldo) atau update last_activity.
+
+Usage: python scripts/benchmark_write_queue.py [thread] [operasi_per_thread]
+"""
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func
+
+from scripts.benchmark_common import create_bench_engine, seed_user
+from scripts.benchmark_read_write_pools import percentile
+from src.handlers.transaction_handler import _save_transaction_job
+from src.services.write_queue_service import WriteQueue, _touch_user_job
+from src.services.optimistic_lock_service import run_with_retry
+from src.models.database import Wallet, Transaction
+
+def write_op(db, i, user_id, wallet_id):
+    if i % 3 == 2:
+        return _touch_user_job(db, user_id, {'last_activity': None})
+    state = {'type': 'expense', 'amount': 1000.0, 'description': f"bench {i}", 'from_wallet_id': wallet_id}
+    return _save_transaction_job(db, user_id, state)
+
+def committed_write_op(db, i, user_id, wallet_id):
+    result = write_op(db, i, user_id, wallet_id)
+    db.commit()
+    return result
+
+def run_threads(threads, ops, worker):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def loop(thread_index):
+        for i in range(ops):
+            started = time.perf_counter()
+            try:
+                worker(thread_index * ops + i)
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e).splitlines()[0])
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=loop, args=(t,)) for t in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - started, latencies, errors
+
+def measure(mode, threads, ops):
+    engine, Session, db_path = create_bench_engine()
+    writer = None
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id, wallet_id = user.id, wallets[0].id
+        db.close()
+
+        if mode == 'direct':
+            def worker(i):
+                db = Session()
+                try:
+                    # Same retry-on-version-conflict wrapping as the handlers' direct path
+                    run_with_retry(db, 'bench_write', committed_write_op, i, user_id, wallet_id)
+                except Exception:
+                    db.rollback()
+                    raise
+                finally:
+                    db.close()
+        else:
+            writer = WriteQueue(engine).start()
+
+            def worker(i):
+                writer.submit(write_op, i, user_id, wallet_id).result(30)
+
+        elapsed, latencies, errors = run_threads(threads, ops, worker)
+        db = Session()
+        balance = db.get(Wallet, wallet_id).balance
+        # What the stored transactions say the balance must be (a lost update breaks this)
+        recorded = db.query(func.coalesce(func.sum(Transaction.amount), 0.0)).scalar()
+        db.close()
+        return {
+            'elapsed': elapsed, 'latencies': latencies, 'errors': errors, 'balance': balance, 'recorded': recorded,
+            'metrics': writer.metrics() if writer else None
+        }
+    finally:
+        if writer:
+            writer.stop()
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+def run(threads, ops):
+    total = threads * ops
+    expected_writes = sum(1 for i in range(total) if i % 3 != 2)
+    print(f"{threads} threads x {ops} writes ({expected_writes} transactions, {total - expected_writes} activity updates)")
+    print(f"{'mode':<8} {'writes/s':>9} {'p50':>8} {'p95':>9} {'errors':>7} {'balance ok':>11}")
+    for mode in ('direct', 'queue'):
+        result = measure(mode, threads, ops)
+        ok = abs(result['balance'] + result['recorded']) < 0.01
+        print(f"{mode:<8} {len(result['latencies']) / result['elapsed']:>9.0f} "
+              f"{percentile(result['latencies'], 50):>6.1f}ms {percentile(result['latencies'], 95):>7.1f}ms "
+              f"{len(result['errors']):>7} {str(ok):>11}")
+        if result['errors']:
+            print(f"         first error: {result['errors'][0]}")
+        if result['metrics']:
+            metrics = result['metrics']
+            print(f"         batches={metrics['batches']} avg_batch={metrics['avg_batch_size']} "
+                  f"max_batch={metrics['max_batch_size']} peak_queue_depth={metrics['peak_queue_depth']} "
+                  f"batch_sizes={metrics['batch_sizes']}")
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 16,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    )
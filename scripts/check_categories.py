@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Cek kategori end to end: kode keyboard dipetakan ke baris categories lewat
+cache (tanpa query saat cache hangat, dimuat ulang setelah kategori berubah
+dan data_version user naik agar laporan tersimpan tidak basi),
+category_id tersimpan pada transaksi dari keyboard dan dari /in /out,
+backfill baris lama tanpa kategori, serta rincian kategori laporan bulanan
+(handler dan ReportService) cocok dengan query join lama.
+
+Usage: python scripts/check_categories.py [jumlah_transaksi]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit, QueryCounter
+from src.handlers.report_handler import _render_monthly_report
+from src.handlers.transaction_handler import _save_transaction_job
+from src.models.database import Category, Transaction, User
+from src.services.category_service import CategoryService, CATEGORY_CODES, invalidate_category_cache
+from src.services.report_query_service import ReportQueryService
+from src.services.report_service import ReportService
+from src.utils.helpers import get_category_name
+
+def check(ok, message):
+    print(f"[{'OK' if ok else 'FAIL'}] {message}")
+    return ok
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engine, Session, path = create_bench_engine()
+    results = []
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id, wallet_id = user.id, wallets[0].id
+        # Legacy rows: saved before category_id was persisted
+        seed_transactions(db, user, wallets, count, days=60)
+        db.query(Transaction).update({Transaction.category_id: None}, synchronize_session=False)
+        db.commit()
+        invalidate_category_cache()
+
+        service = CategoryService(db)
+        created = service.ensure_code_categories()
+        ids = {code: service.category_id(code) for code in CATEGORY_CODES}
+        rows = {row.id: row for row in db.query(Category)}
+        results.append(check(
+            all(ids.values()) and all(rows[ids[code]].type == trans_type for code, (trans_type, _, _) in CATEGORY_CODES.items())
+            and ids['food'] == db.query(Category.id).filter(Category.name == 'Makanan').scalar(),
+            f"{len(ids)} keyboard codes mapped ({len(created)} categories created, existing 'Makanan' reused for food)"))
+
+        with QueryCounter(engine) as counter:
+            for _ in range(1000):
+                service.category_id_for('expense', 'transport')
+        cached_ms, _ = timeit(lambda: CategoryService(db).category_id('health'), repeat=50)
+        results.append(check(counter.count == 0, f"1000 warm lookups ran {counter.count} queries ({cached_ms * 1000:.1f}us each)"))
+
+        # Keyboard flow, then /in and /out (no category chosen)
+        state = {'type': 'expense', 'amount': 75000.0, 'description': 'makan malam', 'from_wallet_id': wallet_id,
+                 'category': 'food', 'category_id': service.category_id_for('expense', 'food')}
+        _save_transaction_job(db, user_id, state)
+        quick = {'type': 'income', 'amount': 10000.0, 'description': 'cashback', 'to_wallet_id': wallet_id,
+                 'category_id': service.category_id_for('income')}
+        _save_transaction_job(db, user_id, quick)
+        saved = db.query(Transaction.description, Transaction.category_id).filter(
+            Transaction.description.in_(['makan malam', 'cashback'])).all()
+        results.append(check(dict(saved) == {'makan malam': ids['food'], 'cashback': ids['other_income']},
+                             "keyboard entry stored 'food', quick income stored 'other_income'"))
+
+        # Renaming a category reloads the cache after the commit and invalidates cached reports
+        version = db.query(User.data_version).filter(User.id == user_id).scalar()
+        food = db.get(Category, ids['food'])
+        food.name = 'Makan & Minum'
+        db.commit()
+        new_version = db.query(User.data_version).filter(User.id == user_id).scalar()
+        results.append(check(service.names([ids['food']])[ids['food']].name == 'Makan & Minum' and new_version > version,
+                             f"renamed category is reloaded after commit, data_version {version} -> {new_version}"))
+
+        # Backfill: legacy income/expense rows get their type's 'other' category
+        version = db.query(User.data_version).filter(User.id == user_id).scalar()
+        start = time.perf_counter()
+        backfilled = service.backfill_transaction_categories(batch_size=5000)
+        backfill_ms = (time.perf_counter() - start) * 1000
+        missing = db.query(func.count(Transaction.id)).filter(
+            Transaction.category_id.is_(None), Transaction.type != 'transfer').scalar()
+        new_version = db.query(User.data_version).filter(User.id == user_id).scalar()
+        results.append(check(backfilled > 0 and missing == 0 and new_version > version,
+                             f"backfill categorized {backfilled} rows in {backfill_ms:.0f}ms, "
+                             f"{missing} left, data_version {version} -> {new_version}"))
+        results.append(check(service.backfill_transaction_categories() == 0, "second backfill finds nothing"))
+
+        # Spread some expenses over real categories for this month
+        month_start = datetime.utcnow() - timedelta(days=datetime.utcnow().day - 1)
+        for i, code in enumerate(('food', 'transport', 'shopping', 'health', 'food')):
+            db.add(Transaction(user_id=user_id, type='expense', amount=100000.0 * (i + 1), description=code,
+                               from_wallet_id=wallet_id, category_id=ids[code], transaction_date=month_start))
+        db.commit()
+
+        month = ReportQueryService(db).get_period_reports(user_id, ('month',))['month']
+        joined = {name: round(amount, 2) for name, amount in db.query(Category.name, func.sum(Transaction.amount)).join(
+            Transaction, Transaction.category_id == Category.id
+        ).filter(
+            Transaction.user_id == user_id, Transaction.type == 'expense',
+            Transaction.transaction_date >= month['utc_start'], Transaction.transaction_date <= month['utc_end']
+        ).group_by(Category.id, Category.name)}
+        monthly = ReportService(db).get_monthly_report(user_id)
+        top = {c['name']: round(c['amount'], 2) for c in monthly['category_breakdown']}
+        results.append(check(top == dict(sorted(joined.items(), key=lambda item: item[1], reverse=True)[:10]),
+                             f"ReportService breakdown matches the join query ({len(top)} categories)"))
+
+        user = db.get(User, user_id)
+        with QueryCounter(engine) as counter:
+            text = _render_monthly_report(db, user)
+        lines = [line for line in text.splitlines() if line.startswith('• ')]
+        results.append(check(
+            'Makan & Minum' in text and get_category_name('other_expense') in text and len(lines) == len(joined)
+            and 'Lainnya' not in [line[2:].split(':')[0] for line in lines],
+            f"monthly report lists {len(lines)} categories by name from {counter.count} queries"))
+        print()
+        print('\n'.join(lines))
+        db.close()
+    finally:
+        engine.dispose()
+        invalidate_category_cache()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    print(f"\n[{'OK' if all(results) else 'FAIL'}] {sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Cek mesin laporan multi-periode (ReportQueryService.get_period_reports) terhadap
+implementasi lama: query SUM terpisah per periode milik ReportService lama dan
+query per layar (get_period_totals / get_daily_buckets / get_category_buckets /
+get_comparison_totals) yang dulu dipakai report_handler. Dicek pada beberapa
+titik waktu (awal bulan, Senin, Minggu malam, tahun baru) dan dua zona waktu
+(Asia/Jakarta dan UTC): rentang lama memakai batas UTC periode, hari lokal
+dicek terhadap transaction_date yang dikonversi di Python. Lalu dibandingkan
+jumlah query dan waktunya.
+
+Usage: python scripts/check_report_engine.py [jumlah_transaksi]
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import and_, func
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, timeit, QueryCounter
+from src.models.database import Category, Transaction
+from src.services.report_query_service import ReportQueryService, REPORT_PERIODS
+from src.services.report_service import ReportService
+from src.services.time_bucket_service import TimeBucketService
+from src.utils.time_buckets import local_day, user_timezone
+
+def legacy_sum(db, user_id, start, end, trans_type=None):
+    """Old ReportService: one SUM (or COUNT) per figure over [start, end)"""
+    conditions = [Transaction.user_id == user_id, Transaction.transaction_date >= start, Transaction.transaction_date < end]
+    if trans_type is None:
+        return db.query(func.count(Transaction.id)).filter(and_(*conditions)).scalar() or 0
+    conditions.append(Transaction.type == trans_type)
+    return db.query(func.sum(Transaction.amount)).filter(and_(*conditions)).scalar() or 0.0
+
+def legacy_categories(db, user_id, start, end):
+    """Old ReportService monthly breakdown: expense per category joined to categories"""
+    rows = db.query(Category.name, func.sum(Transaction.amount)).join(
+        Transaction, Transaction.category_id == Category.id
+    ).filter(
+        Transaction.user_id == user_id, Transaction.type == 'expense',
+        Transaction.transaction_date >= start, Transaction.transaction_date < end
+    ).group_by(Category.id, Category.name).all()
+    return {name: round(amount, 2) for name, amount in rows}
+
+def local_days(db, user_id, start, end, zone_name):
+    """Expense per local day, converting each transaction_date in Python"""
+    days = {}
+    for moment, amount in db.query(Transaction.transaction_date, Transaction.amount).filter(
+        Transaction.user_id == user_id, Transaction.type == 'expense',
+        Transaction.transaction_date >= start, Transaction.transaction_date <= end
+    ):
+        day = local_day(moment, zone_name)
+        days[day] = days.get(day, 0.0) + amount
+    return {day: round(amount, 2) for day, amount in days.items()}
+
+def close(a, b):
+    return abs(a - b) < 0.01
+
+def check_instant(db, user_id, now):
+    """Compare every period and every old code path at one instant; returns a list of mismatches"""
+    queries = ReportQueryService(db)
+    reports = queries.get_period_reports(user_id, now=now)
+    errors = []
+
+    for period, report in reports.items():
+        start, end = report['utc_start'], report['utc_end']
+        # Old per-period SUM queries (exclusive end)
+        stop = end + timedelta(microseconds=1)
+        for trans_type in ('income', 'expense', 'transfer'):
+            if not close(report[trans_type], legacy_sum(db, user_id, start, stop, trans_type)):
+                errors.append(f"{period} {trans_type} vs SUM query")
+        if report['count'] != legacy_sum(db, user_id, start, stop):
+            errors.append(f"{period} count vs COUNT query")
+
+        # Local-day buckets, then the old per-screen grouped queries
+        if local_days(db, user_id, start, end, user_timezone(db, user_id)) != \
+                {d: round(b['expense'], 2) for d, b in report['days'].items() if b['expense']}:
+            errors.append(f"{period} days vs transaction_date in local time")
+        categories = queries.get_category_buckets(user_id, start, end)
+        if {c: (round(b['expense'], 2), b['count']) for c, b in categories['categories'].items()} != \
+                {c: (round(b['expense'], 2), b['count']) for c, b in report['categories'].items()}:
+            errors.append(f"{period} categories vs get_category_buckets")
+
+    for current, previous in (('week', 'last_week'), ('month', 'last_month')):
+        old = queries.get_comparison_totals(
+            user_id, (reports[current]['utc_start'], reports[current]['utc_end']),
+            (reports[previous]['utc_start'], reports[previous]['utc_end'])
+        )
+        for side, period in (('current', current), ('previous', previous)):
+            if not all(close(old[side][key], reports[period][key]) for key in ('income', 'expense', 'transfer')):
+                errors.append(f"{period} vs get_comparison_totals")
+
+    service = ReportService(db)
+    monthly = service.get_monthly_report(user_id, now)
+    month = reports['month']
+    if {c['name']: round(c['amount'], 2) for c in monthly['category_breakdown']} != \
+            legacy_categories(db, user_id, month['utc_start'], month['utc_end'] + timedelta(microseconds=1)):
+        errors.append("ReportService.get_monthly_report categories vs join query")
+    weekly = service.get_weekly_report(user_id, now)
+    if not close(weekly['prev_weekly_expense'], reports['last_week']['expense']):
+        errors.append("ReportService.get_weekly_report previous week")
+    return errors
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    engine, Session, path = create_bench_engine()
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id = user.id
+        seed_transactions(db, user, wallets, count, days=400)
+
+        now = datetime.utcnow()
+        this_monday = (now - timedelta(days=now.weekday())).replace(hour=9, minute=0, second=0, microsecond=0)
+        instants = {
+            'now': now,
+            'first of month': now.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+            'monday': this_monday,
+            'sunday 23:59:59': this_monday - timedelta(seconds=9 * 3600 + 1),
+            'new year': datetime(now.year, 1, 1, 0, 0, 1),
+            'march 1': datetime(now.year, 3, 1, 12) if datetime(now.year, 3, 1) < now else datetime(now.year - 1, 3, 1, 12),
+        }
+        failed = 0
+        for zone_name in ('Asia/Jakarta', 'UTC'):
+            if zone_name != user_timezone(db, user_id):
+                TimeBucketService(db).set_user_timezone(user_id, zone_name)
+            for label, instant in instants.items():
+                errors = check_instant(db, user_id, instant)
+                failed += bool(errors)
+                print(f"[{'FAIL' if errors else 'OK'}] {zone_name} {label} ({instant:%Y-%m-%d %H:%M} UTC): "
+                      f"{'; '.join(errors) if errors else 'all periods match the old queries'}")
+
+        # Cost: the five screens' old queries vs one engine call for all periods
+        ranges = {period: (bounds.utc_start, bounds.utc_end)
+                  for period, bounds in ReportQueryService.period_ranges().items()}
+
+        def old_screens():
+            queries = ReportQueryService(db)
+            queries.get_period_totals(user_id, *ranges['today'])
+            queries.get_daily_buckets(user_id, *ranges['week'])
+            queries.get_category_buckets(user_id, *ranges['month'])
+            queries.get_comparison_totals(user_id, ranges['week'], ranges['last_week'])
+            queries.get_comparison_totals(user_id, ranges['month'], ranges['last_month'])
+
+        def engine_call():
+            return ReportQueryService(db).get_period_reports(user_id)
+
+        with QueryCounter(engine) as old_counter:
+            old_screens()
+        with QueryCounter(engine) as new_counter:
+            engine_call()
+        old_ms, _ = timeit(old_screens)
+        new_ms, _ = timeit(engine_call)
+        print(f"\n  five report screens, old queries: {old_counter.count} queries, {old_ms:.2f}ms")
+        print(f"  get_period_reports({', '.join(REPORT_PERIODS)}): {new_counter.count} query, {new_ms:.2f}ms")
+        for period in ('today', 'month'):
+            single_ms, _ = timeit(lambda: ReportQueryService(db).get_period_reports(user_id, (period,)))
+            print(f"  get_period_reports(('{period}',)): {single_ms:.2f}ms")
+        db.close()
+        print(f"\n[{'OK' if not failed else 'FAIL'}] {2 * len(instants) - failed}/{2 * len(instants)} instants match the old implementations")
+        return 1 if failed else 0
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Cek pembagian waktu per zona user: batas hari Asia/Jakarta vs UTC, periode
+yang melewati pergantian DST (America/New_York), cache batas periode, isi
+local_date saat tulis lewat ORM, backfill baris Core insert, ganti zona waktu
+(local_date dihitung ulang, data_version naik), arsip tahun lama lalu
+dikembalikan, dan query laporan tetap memakai covering index.
+
+Usage: python scripts/check_time_buckets.py [jumlah_transaksi]
+"""
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import func
+
+from scripts.benchmark_common import create_bench_engine, seed_user, seed_transactions, QueryCounter
+from src.models.database import Transaction, User
+from src.services.archive_service import ArchiveService, invalidate_archive_manifest
+from src.services.report_query_service import ReportQueryService
+from src.services.time_bucket_service import TimeBucketService
+from src.utils.time_buckets import period_bounds, period_cache_info, local_day
+
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+def check(ok, message):
+    print(f"[{'OK' if ok else 'FAIL'}] {message}")
+    return ok
+
+def check_bounds():
+    results = []
+    # 00:30 in Jakarta (UTC+7) is still the previous day in UTC
+    utc_now = datetime(2026, 10, 18, 17, 30)
+    jakarta = period_bounds('Asia/Jakarta', 'today', utc_now)
+    results.append(check(
+        jakarta.first_day == date(2026, 10, 19) and jakarta.utc_start == datetime(2026, 10, 18, 17)
+        and jakarta.utc_end == datetime(2026, 10, 19, 17) - ONE_MICROSECOND,
+        f"Asia/Jakarta today at {utc_now} UTC: {jakarta.first_day}, UTC {jakarta.utc_start} - {jakarta.utc_end}"))
+    utc = period_bounds('UTC', 'today', utc_now)
+    results.append(check(utc.first_day == date(2026, 10, 18) and utc.utc_start == datetime(2026, 10, 18),
+                         f"UTC today at the same instant: {utc.first_day}"))
+    week = period_bounds('Asia/Jakarta', 'week', datetime(2026, 10, 18, 17, 30))
+    results.append(check(week.first_day == date(2026, 10, 19) and week.utc_start == datetime(2026, 10, 18, 17),
+                         f"Asia/Jakarta week starts Monday {week.first_day} at {week.utc_start} UTC"))
+
+    # DST starts 2026-03-08 in New York: that local day is 23 hours long
+    spring = period_bounds('America/New_York', 'today', datetime(2026, 3, 8, 15))
+    results.append(check(
+        spring.utc_start == datetime(2026, 3, 8, 5) and spring.utc_end == datetime(2026, 3, 9, 4) - ONE_MICROSECOND,
+        f"America/New_York DST start day: UTC {spring.utc_start} - {spring.utc_end}"))
+    # ...and ends 2026-11-01: November starts at UTC-4 and ends at UTC-5
+    november = period_bounds('America/New_York', 'month', datetime(2026, 11, 15, 12))
+    results.append(check(
+        november.utc_start == datetime(2026, 11, 1, 4) and november.utc_end == datetime(2026, 12, 1, 5) - ONE_MICROSECOND,
+        f"America/New_York November across DST end: UTC {november.utc_start} - {november.utc_end}"))
+
+    before = period_cache_info()
+    start = time.perf_counter()
+    calls = 0
+    for minute in range(0, 24 * 60, 5):
+        moment = datetime(2026, 10, 19) + timedelta(minutes=minute)
+        for zone_name in ('Asia/Jakarta', 'UTC', 'America/New_York'):
+            for period in ('today', 'week', 'last_week', 'month', 'last_month'):
+                period_bounds(zone_name, period, moment)
+                calls += 1
+    elapsed_us = (time.perf_counter() - start) * 1e6 / calls
+    after = period_cache_info()
+    misses = after.misses - before.misses
+    results.append(check(misses <= 3 * 5 * 2,
+                         f"{calls} period lookups over one UTC day: {misses} conversions, {elapsed_us:.1f}us per lookup"))
+    return results
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    engine, Session, path = create_bench_engine()
+    archive_dir = Path(path).parent / 'archive'
+    results = check_bounds()
+    try:
+        db = Session()
+        user, wallets = seed_user(db)
+        user_id, wallet_id = user.id, wallets[0].id
+        seed_transactions(db, user, wallets, count, days=400)
+        queries = ReportQueryService(db)
+
+        # ORM writes get local_date from the user's timezone (Asia/Jakarta by default)
+        late = datetime.utcnow().replace(hour=17, minute=30, second=0, microsecond=0) - timedelta(days=1)
+        transaction = Transaction(user_id=user_id, type='expense', amount=123456.0, description='tengah malam',
+                                  from_wallet_id=wallet_id, transaction_date=late)
+        db.add(transaction)
+        db.commit()
+        results.append(check(transaction.local_date == late.date() + timedelta(days=1),
+                             f"ORM insert at {late} UTC keyed to local day {transaction.local_date}"))
+        report = queries.get_period_reports(user_id, ('today',), now=late + timedelta(minutes=30))['today']
+        results.append(check(report['days'].get(late.date() + timedelta(days=1), {}).get('expense', 0) >= 123456.0,
+                             "today's Jakarta report at 01:00 local includes the 00:30 expense"))
+
+        # Core inserts skip the listeners; the backfill fills them in
+        db.execute(Transaction.__table__.insert(), [{
+            'user_id': user_id, 'type': 'income', 'amount': 1000.0, 'description': 'core',
+            'to_wallet_id': wallet_id, 'transaction_date': late
+        }])
+        db.commit()
+        backfilled = TimeBucketService(db).backfill_local_dates()
+        missing = db.query(func.count(Transaction.id)).filter(Transaction.local_date.is_(None)).scalar()
+        results.append(check(backfilled == 1 and missing == 0, f"backfill filled {backfilled} row, {missing} left empty"))
+
+        # Changing the timezone re-derives every key and invalidates cached reports
+        version = db.query(User.data_version).filter(User.id == user_id).scalar()
+        start = time.perf_counter()
+        rekeyed = TimeBucketService(db).set_user_timezone(user_id, 'UTC', batch_size=5000)
+        rekey_ms = (time.perf_counter() - start) * 1000
+        db.refresh(transaction)
+        wrong = sum(1 for moment, day in db.query(Transaction.transaction_date, Transaction.local_date)
+                    .filter(Transaction.user_id == user_id) if local_day(moment, 'UTC') != day)
+        new_version = db.query(User.data_version).filter(User.id == user_id).scalar()
+        results.append(check(transaction.local_date == late.date() and wrong == 0 and new_version > version,
+                             f"set_user_timezone UTC: {rekeyed} rows rekeyed in {rekey_ms:.0f}ms, "
+                             f"{wrong} wrong, data_version {version} -> {new_version}"))
+        try:
+            TimeBucketService(db).set_user_timezone(user_id, 'Mars/Olympus')
+            results.append(check(False, "unknown timezone rejected"))
+        except ValueError as e:
+            db.rollback()
+            results.append(check(True, f"unknown timezone rejected: {e}"))
+
+        # Archive files carry no local_date: archived days are derived per zone
+        # (fixed offset in SQL, per minute across a DST change) and restored rows get it back
+        year = datetime.utcnow().year - 1
+        cases = [('Asia/Jakarta', 'last_month', datetime(year + 1, 1, 1, 3), 'December'),
+                 ('America/New_York', 'month', datetime(year, 11, 20, 12), 'November (DST end)')]
+        for zone_name, period, moment, label in cases:
+            TimeBucketService(db).set_user_timezone(user_id, zone_name)
+            before = ReportQueryService(db).get_period_reports(user_id, (period,), now=moment)[period]
+            archive = ArchiveService(db)
+            moved = archive.archive_year(year)['moved']
+            invalidate_archive_manifest()
+            during = ReportQueryService(db).get_period_reports(user_id, (period,), now=moment)[period]
+            results.append(check(
+                moved and during['count'] == before['count'] and
+                {d: round(b['expense'], 2) for d, b in during['days'].items()} ==
+                {d: round(b['expense'], 2) for d, b in before['days'].items()},
+                f"{moved} rows of {year} archived: {label} in {zone_name} days match ({during['count']} transactions)"))
+            restored = archive.unarchive_year(year)
+            invalidate_archive_manifest()
+            missing = db.query(func.count(Transaction.id)).filter(Transaction.local_date.is_(None)).scalar()
+            results.append(check(restored == moved and missing == 0, f"{restored} rows restored with local_date set"))
+        TimeBucketService(db).set_user_timezone(user_id, 'Asia/Jakarta')
+
+        # The grouped report query stays on the covering index
+        with QueryCounter(engine) as counter:
+            ReportQueryService(db).get_period_reports(user_id)
+        statement = next(s for s in counter.statements if 'FROM transactions' in s)
+        with engine.connect() as conn:
+            plan = [row[-1] for row in conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}",
+                (user_id, datetime(2026, 1, 1).isoformat(' '), datetime(2026, 12, 31).isoformat(' '))
+            )]
+        results.append(check(any('COVERING INDEX idx_transaction_user_date' in line for line in plan),
+                             f"report query plan: {'; '.join(plan)}"))
+        db.close()
+    finally:
+        engine.dispose()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        if archive_dir.exists():
+            for archive_file in archive_dir.glob("transactions_*.db*"):
+                archive_file.unlink()
+
+    print(f"\n[{'OK' if all(results) else 'FAIL'}] {sum(results)}/{len(results)} checks passed")
+    return 0 if all(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
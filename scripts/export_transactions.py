@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Export seluruh transaksi user ke CSV. Baris di-stream dalam batch (server-side
+cursor di PostgreSQL), jadi memori tetap kecil walau riwayatnya panjang.
+
+Usage: python scripts/export_transactions.py <telegram_id> [output.csv] [--batch 1000]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.database import SessionLocal, get_user_by_telegram_id
+from src.services.export_service import ExportService
+
+def export_transactions(telegram_id, output, batch_size=1000):
+    """Write the user's transactions to `output`; returns the row count or None if the user is unknown"""
+    db = SessionLocal()
+    try:
+        user = get_user_by_telegram_id(db, telegram_id)
+        if not user:
+            return None
+
+        with open(output, 'w', newline='', encoding='utf-8') as f:
+            return ExportService(db).write_transactions_csv(user.id, f, batch_size)
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Export transaksi user ke CSV")
+    parser.add_argument('telegram_id', type=int)
+    parser.add_argument('output', nargs='?', help="Default: transactions_<telegram_id>.csv")
+    parser.add_argument('--batch', type=int, default=1000, help="Rows fetched per round trip")
+    args = parser.parse_args()
+
+    output = args.output or f"transactions_{args.telegram_id}.csv"
+    count = export_transactions(args.telegram_id, output, args.batch)
+    if count is None:
+        print(f"[ERROR] User {args.telegram_id} tidak ditemukan")
+        return 1
+    print(f"[OK] {count} transaksi diekspor ke {output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Index audit: jalankan query yang benar-benar dipakai ReportService, UserService
+dan handler, ambil EXPLAIN QUERY PLAN tiap statement, lalu tandai index yang
+tidak pernah dipakai atau redundan dan usulkan set index sesuai model.
+
+Usage:
+    python scripts/index_audit.py                 # audit DB sementara dengan data seed
+    python scripts/index_audit.py --db monman.db  # audit salinan DB yang ada
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+
+AUDIT_DIR = tempfile.mkdtemp(prefix='monman_audit_')
+AUDIT_DB = os.path.join(AUDIT_DIR, 'audit.db')
+
+def _prepare_environment(source_db=None):
+    """Point DATABASE_URL at the audit DB before any src module creates its engine"""
+    if source_db:
+        shutil.copy2(source_db, AUDIT_DB)
+    os.environ['DATABASE_URL'] = f"sqlite:///{AUDIT_DB}"
+    sys.path.append(str(Path(__file__).parent.parent))
+
+INDEX_PATTERN = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+
+def list_indexes(conn):
+    """Return {index_name: (table, [columns], where_clause)} for all non-unique user indexes"""
+    indexes = {}
+    rows = conn.exec_driver_sql(
+        "SELECT name, tbl_name, sql FROM sqlite_master WHERE type='index' AND name NOT LIKE 'sqlite_%'"
+    ).fetchall()
+    for name, table, sql in rows:
+        if sql and sql.upper().startswith('CREATE UNIQUE'):
+            # Unique indexes enforce constraints; never candidates for removal
+            continue
+        columns = [row[2] for row in conn.exec_driver_sql(f"PRAGMA index_info('{name}')").fetchall()]
+        where = None
+        if sql and ' WHERE ' in sql.upper():
+            where = sql[sql.upper().index(' WHERE ') + 7:].strip()
+        indexes[name] = (table, columns, where)
+    return indexes
+
+def find_redundant(indexes):
+    """Index A is redundant when its columns are a leading prefix of index B on the same table"""
+    redundant = {}
+    for name, (table, columns, where) in indexes.items():
+        for other, (other_table, other_columns, other_where) in indexes.items():
+            if other == name or other_table != table or where != other_where:
+                continue
+            if len(columns) < len(other_columns) and other_columns[:len(columns)] == columns:
+                redundant[name] = other
+                break
+            if columns == other_columns and name > other:
+                redundant[name] = other
+                break
+    return redundant
+
+def capture_statements(engines, flows):
+    """Run each (label, callable) flow and record the SQL statements it issues on any of `engines`"""
+    from sqlalchemy import event
+
+    captured = []
+    current = {'label': None}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((current['label'], statement, parameters))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for label, flow in flows:
+            current['label'] = label
+            try:
+                flow()
+            except Exception as e:
+                print(f"[WARN] Flow {label} failed: {e}")
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+def explain(engine, statement, parameters):
+    """EXPLAIN QUERY PLAN detail lines for one statement"""
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters or ())).fetchall()
+    return [row[-1] for row in rows]
+
+def build_flows(telegram_id, user_id):
+    """The read paths the bot actually runs, grouped by caller"""
+    from datetime import datetime
+    from src.models.database import SessionLocal
+    from src.services.report_service import ReportService
+    from src.services.user_service import UserService
+    from src.services.report_query_service import ReportQueryService
+    from src.services.asset_service import AssetService
+    from src.handlers import report_handler
+    from src.handlers.history_handler import build_history_page
+    from src.utils.helpers import get_date_range
+
+    def with_session(func):
+        def run():
+            db = SessionLocal()
+            try:
+                func(db)
+            finally:
+                db.close()
+        return run
+
+    month_start, month_end = get_date_range('month')
+    return [
+        ('handler.generate_daily_report', lambda: report_handler.generate_daily_report(telegram_id)),
+        ('handler.generate_weekly_report', lambda: report_handler.generate_weekly_report(telegram_id)),
+        ('handler.generate_monthly_report', lambda: report_handler.generate_monthly_report(telegram_id)),
+        ('handler.generate_wow_analysis', lambda: report_handler.generate_wow_analysis(telegram_id)),
+        ('handler.generate_mom_analysis', lambda: report_handler.generate_mom_analysis(telegram_id)),
+        ('handler.history_page', lambda: build_history_page(telegram_id)),
+        ('handler.history_page_expense', lambda: build_history_page(telegram_id, 'e')),
+        ('ReportService.get_daily_report', with_session(lambda db: ReportService(db).get_daily_report(user_id))),
+        ('ReportService.get_weekly_report', with_session(lambda db: ReportService(db).get_weekly_report(user_id))),
+        ('ReportService.get_monthly_report', with_session(lambda db: ReportService(db).get_monthly_report(user_id))),
+        ('ReportService.get_spending_trends', with_session(lambda db: ReportService(db).get_spending_trends(user_id))),
+        ('ReportService.get_wallet_breakdown', with_session(lambda db: ReportService(db).get_wallet_breakdown(user_id))),
+        ('ReportService.get_recent_transactions', with_session(lambda db: ReportService(db).get_recent_transactions(user_id))),
+        ('UserService.get_user_wallets', with_session(lambda db: UserService(db).get_user_wallets(user_id))),
+        ('UserService.get_user_transactions', with_session(lambda db: UserService(db).get_user_transactions(user_id, transaction_type='expense'))),
+        ('UserService.get_user_summary', with_session(lambda db: UserService(db).get_user_summary(user_id))),
+        ('UserService.get_spending_by_category', with_session(lambda db: UserService(db).get_spending_by_category(user_id, month_start, month_end))),
+        ('AssetService.get_user_assets', with_session(lambda db: AssetService(db).get_user_assets(user_id))),
+        ('AssetService.get_user_assets_by_type', with_session(lambda db: AssetService(db).get_user_assets_by_type(user_id, 'saham'))),
+        ('ReportQueryService.get_category_buckets', with_session(lambda db: ReportQueryService(db).get_category_buckets(user_id, month_start, datetime.now()))),
+    ]
+
+def proposed_changes(indexes):
+    """DDL that moves the current index set to the one declared on the models"""
+    from src.models.database import Base
+
+    declared = {}
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.unique:
+                continue
+            declared[index.name] = (table.name, [col.name for col in index.columns])
+
+    statements = []
+    for name, (table, columns, where) in sorted(indexes.items()):
+        if table in Base.metadata.tables and name not in declared:
+            statements.append(f"DROP INDEX {name};")
+    for name, (table, columns) in sorted(declared.items()):
+        if name not in indexes:
+            statements.append(f"CREATE INDEX {name} ON {table} ({', '.join(columns)});")
+        elif indexes[name][1] != columns:
+            statements.append(f"DROP INDEX {name};")
+            statements.append(f"CREATE INDEX {name} ON {table} ({', '.join(columns)});")
+    return statements
+
+def run_audit(source_db=None, seed_size=20000, verbose=False):
+    _prepare_environment(source_db)
+
+    from sqlalchemy import func
+    from src.models.database import SessionLocal, engine, read_engine, create_tables, User, Transaction
+
+    if not source_db:
+        from scripts.benchmark_common import seed_user, seed_transactions
+        create_tables()
+        db = SessionLocal()
+        user, wallets = seed_user(db)
+        seed_transactions(db, user, wallets, seed_size)
+        db.close()
+
+    db = SessionLocal()
+    try:
+        busiest = db.query(Transaction.user_id, func.count(Transaction.id)).group_by(
+            Transaction.user_id
+        ).order_by(func.count(Transaction.id).desc()).first()
+        user = db.query(User).filter(User.id == busiest[0]).first() if busiest else db.query(User).first()
+        if not user:
+            print("[ERROR] Tidak ada user untuk diaudit")
+            return 1
+        telegram_id, user_id = user.telegram_id, user.id
+    finally:
+        db.close()
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+        indexes = list_indexes(conn)
+
+    # Report and listing handlers read through the read-only pool
+    engines = [engine] if read_engine is engine else [engine, read_engine]
+    captured = capture_statements(engines, build_flows(telegram_id, user_id))
+
+    usage = defaultdict(set)
+    full_scans = []
+    seen = set()
+    print("=" * 70)
+    print("QUERY PLANS")
+    print("=" * 70)
+    for label, statement, parameters in captured:
+        plan = explain(engine, statement, parameters)
+        for line in plan:
+            match = INDEX_PATTERN.search(line)
+            if match:
+                usage[match.group(1)].add(label)
+            elif line.startswith('SCAN ') and 'CONSTANT' not in line:
+                full_scans.append((label, line))
+        key = (label, statement)
+        if key in seen:
+            continue
+        seen.add(key)
+        print(f"\n[{label}]")
+        if verbose:
+            print("  " + " ".join(statement.split())[:300])
+        for line in plan:
+            print(f"  -> {line}")
+
+    redundant = find_redundant(indexes)
+
+    print("\n" + "=" * 70)
+    print("INDEX USAGE")
+    print("=" * 70)
+    for name, (table, columns, where) in sorted(indexes.items(), key=lambda item: (item[1][0], item[0])):
+        callers = usage.get(name)
+        if callers:
+            status = f"used by {len(callers)} flow(s)"
+        else:
+            status = "UNUSED"
+        if name in redundant:
+            status += f", REDUNDANT (prefix of {redundant[name]})"
+        partial = f" WHERE {where}" if where else ""
+        print(f"{table:<14} {name:<40} ({', '.join(columns)}){partial}  {status}")
+
+    if full_scans:
+        print("\nFull table scans:")
+        for label, line in full_scans:
+            print(f"  [{label}] {line}")
+
+    print("\n" + "=" * 70)
+    print("PROPOSED CHANGES (towards the index set declared on the models)")
+    print("=" * 70)
+    statements = proposed_changes(indexes)
+    if statements:
+        for statement in statements:
+            print(f"  {statement}")
+        print("\nApply with: python migrations/redesign_transaction_indexes.py && python migrations/add_partial_active_indexes.py")
+    else:
+        print("  Index set already matches the models")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit index usage with EXPLAIN QUERY PLAN")
+    parser.add_argument('--db', help="SQLite database to audit (a copy is used)")
+    parser.add_argument('--seed', type=int, default=20000, help="Transactions to seed when no --db is given")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Print the SQL of every statement")
+    args = parser.parse_args()
+    try:
+        return run_audit(args.db, args.seed, args.verbose)
+    finally:
+        shutil.rmtree(AUDIT_DIR, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Outbox perubahan: lihat posisi tiap subscriber dan ketertinggalannya, tampilkan
+event terakhir, putar ulang subscriber dari offset tertentu, atau pangkas event
+lama yang sudah diproses semua subscriber.
+
+Usage: python scripts/outbox.py status
+       python scripts/outbox.py tail [--after 0] [--limit 20] [--type wallet|transaction|asset]
+       python scripts/outbox.py replay <subscriber> --from <event_id>
+       python scripts/outbox.py prune [--days 7]
+"""
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.database import SessionLocal, OutboxCursor, OutboxEvent
+from src.services.outbox_service import OUTBOX_RETENTION_DAYS, head_event_id, iter_events, prune_outbox
+
+def show_status(db):
+    head = head_event_id(db)
+    total = db.query(OutboxEvent).count()
+    print(f"[INFO] Event terakhir #{head:,}, {total:,} event tersimpan")
+    cursors = db.query(OutboxCursor).order_by(OutboxCursor.subscriber).all()
+    if not cursors:
+        print("[INFO] Belum ada subscriber durable")
+        return 0
+    print(f"{'subscriber':<28}{'offset':>10}{'tertinggal':>12}{'detik':>10}  diperbarui")
+    for cursor in cursors:
+        oldest = db.query(OutboxEvent.created_at).filter(
+            OutboxEvent.id > cursor.last_event_id
+        ).order_by(OutboxEvent.id).limit(1).scalar()
+        seconds = (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0
+        print(f"{cursor.subscriber:<28}{cursor.last_event_id:>10,}{head - cursor.last_event_id:>12,}"
+              f"{seconds:>10.0f}  {cursor.updated_at:%Y-%m-%d %H:%M:%S}")
+    return 0
+
+def show_tail(db, after, limit, aggregate_type):
+    if after is None:
+        after = max(head_event_id(db) - limit, 0)
+    changes = list(iter_events(db, after, limit, [aggregate_type] if aggregate_type else None))
+    if not changes:
+        print(f"[INFO] Tidak ada event setelah #{after}")
+    for change in changes:
+        print(f"#{change.id:<8} {change.created_at:%Y-%m-%d %H:%M:%S}  {change.aggregate_type:<12}"
+              f"{change.aggregate_id:>8}  {change.event_type:<8} user={change.user_id}  {change.payload}")
+    return 0
+
+def replay(db, subscriber, from_id):
+    cursor = db.query(OutboxCursor).filter(OutboxCursor.subscriber == subscriber).first()
+    if cursor is None:
+        print(f"[FAIL] Subscriber {subscriber} tidak dikenal")
+        return 1
+    old = cursor.last_event_id
+    # Offsets are "last handled", so replaying from event N means offset N - 1
+    cursor.last_event_id = max(from_id - 1, 0)
+    cursor.updated_at = datetime.utcnow()
+    db.commit()
+    print(f"[OK] {subscriber}: offset {old:,} -> {cursor.last_event_id:,}; bot yang berjalan memutar ulang pada poll berikutnya")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Status, isi dan pemutaran ulang outbox perubahan")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="Posisi dan ketertinggalan tiap subscriber")
+    tail_parser = subparsers.add_parser('tail', help="Tampilkan event")
+    tail_parser.add_argument('--after', type=int, default=None, help="Mulai setelah event ini (default: terakhir)")
+    tail_parser.add_argument('--limit', type=int, default=20)
+    tail_parser.add_argument('--type', choices=['wallet', 'transaction', 'asset'])
+    replay_parser = subparsers.add_parser('replay', help="Putar ulang subscriber durable mulai event tertentu")
+    replay_parser.add_argument('subscriber')
+    replay_parser.add_argument('--from', dest='from_id', type=int, required=True)
+    prune_parser = subparsers.add_parser('prune', help="Hapus event lama yang sudah diproses semua subscriber")
+    prune_parser.add_argument('--days', type=int, default=OUTBOX_RETENTION_DAYS)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == 'status':
+            return show_status(db)
+        if args.command == 'tail':
+            return show_tail(db, args.after, args.limit, args.type)
+        if args.command == 'replay':
+            return replay(db, args.subscriber, args.from_id)
+        removed = prune_outbox(db, args.days)
+        print(f"[OK] {removed:,} event dihapus (lebih tua dari {args.days} hari)")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
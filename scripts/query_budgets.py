@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Anggaran query per alur handler: jalankan alur bot (menu, daftar aset, riwayat,
+laporan, catat pengeluaran, ...) lewat bot tiruan terhadap DB SQLite berisi data
+seed, lalu gagal bila jumlah statement SQL atau waktu melewati anggaran di
+scripts/query_budgets.json. Kegagalan menampilkan diff query yang dijalankan
+terhadap query yang tercatat, sehingga N+1 baru terlihat saat review.
+
+Usage:
+    python scripts/query_budgets.py                  # periksa semua alur
+    python scripts/query_budgets.py --flow asset_list --verbose
+    python scripts/query_budgets.py --update         # catat ulang query dan anggaran
+"""
+import argparse
+import contextlib
+import difflib
+import io
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+BUDGET_DIR = tempfile.mkdtemp(prefix='monman_budget_')
+BUDGET_DB = os.path.join(BUDGET_DIR, 'budget.db')
+BUDGET_FILE = Path(__file__).resolve().with_suffix('.json')
+
+TELEGRAM_ID = 424242
+TRANSACTIONS = 5000
+ASSETS = 25
+WALLETS = 4
+
+def _prepare_environment():
+    """Point DATABASE_URL at the budget DB before any src module creates its engine"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{BUDGET_DB}"
+    for name in ('DB_WRITE_QUEUE', 'SLOW_QUERY_MS'):
+        os.environ.pop(name, None)
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    # Log files the services open relative to the working directory land in the temp dir
+    os.chdir(BUDGET_DIR)
+    # Handler errors still reach ErrorCollector; nothing is printed
+    logging.getLogger().addHandler(logging.NullHandler())
+
+class FakeBot:
+    """
+    Stands in for telebot.TeleBot: collects the handlers the register_* functions
+    declare, dispatches messages and callbacks the way telebot does (first
+    matching handler in registration order) and records every outgoing call
+    """
+
+    def __init__(self):
+        self.message_handlers = []
+        self.callback_handlers = []
+        self.outbox = []
+        self._next_id = 1000
+
+    def message_handler(self, commands=None, func=None, content_types=None, **kwargs):
+        def decorator(handler):
+            self.message_handlers.append((commands, func, content_types or ['text'], handler))
+            return handler
+        return decorator
+
+    def callback_query_handler(self, func=None, **kwargs):
+        def decorator(handler):
+            self.callback_handlers.append((func, handler))
+            return handler
+        return decorator
+
+    def __getattr__(self, name):
+        # send_message, edit_message_text, answer_callback_query, reply_to, ...
+        def record(*args, **kwargs):
+            self._next_id += 1
+            self.outbox.append((name, args, kwargs))
+            return SimpleNamespace(message_id=self._next_id, chat=SimpleNamespace(id=TELEGRAM_ID))
+        return record
+
+    def _user(self):
+        return SimpleNamespace(id=TELEGRAM_ID, username='budget', first_name='Budget', last_name=None,
+                               language_code='id', is_bot=False)
+
+    def _message(self, text):
+        self._next_id += 1
+        return SimpleNamespace(message_id=self._next_id, chat=SimpleNamespace(id=TELEGRAM_ID, type='private'),
+                               from_user=self._user(), text=text, content_type='text', reply_to_message=None)
+
+    def send_text(self, text):
+        message = self._message(text)
+        command = text[1:].split()[0].split('@')[0] if text.startswith('/') else None
+        for commands, func, content_types, handler in self.message_handlers:
+            if message.content_type not in content_types:
+                continue
+            if commands is not None and command not in commands:
+                continue
+            if func is not None and not func(message):
+                continue
+            return handler(message)
+        raise LookupError(f"No message handler for {text!r}")
+
+    def press(self, data):
+        self._next_id += 1
+        call = SimpleNamespace(id=str(self._next_id), data=data, from_user=self._user(),
+                               message=self._message(None))
+        for func, handler in self.callback_handlers:
+            if func is None or func(call):
+                return handler(call)
+        raise LookupError(f"No callback handler for {data!r}")
+
+    def button(self, prefix):
+        """callback_data of the first button starting with prefix in the latest keyboard sent"""
+        for name, args, kwargs in reversed(self.outbox):
+            markup = kwargs.get('reply_markup')
+            if markup is None:
+                continue
+            for row in markup.keyboard:
+                for button in row:
+                    if (button.callback_data or '').startswith(prefix):
+                        return button.callback_data
+            break
+        raise LookupError(f"No button starting with {prefix!r} in the last keyboard")
+
+def seed():
+    """Tables, indexes and defaults exactly as the bot creates them, plus one busy user"""
+    from migrations.init_db_enhanced import init_database
+    from scripts.benchmark_common import seed_user, seed_transactions
+    from src.models.database import SessionLocal, Asset
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        init_database()
+    db = SessionLocal()
+    try:
+        user, wallets = seed_user(db, telegram_id=TELEGRAM_ID, wallet_count=WALLETS)
+        seed_transactions(db, user, wallets, TRANSACTIONS)
+        for i in range(ASSETS):
+            db.add(Asset(
+                user_id=user.id, wallet_id=wallets[i % len(wallets)].id,
+                asset_type='saham' if i % 2 else 'kripto', symbol=f"SYM{i}", name=f"Aset {i}",
+                quantity=10.0 + i, buy_price=1000.0 * (i + 1), last_price=1100.0 * (i + 1)
+            ))
+        db.commit()
+        return {'user_id': user.id, 'wallet_id': wallets[0].id}
+    finally:
+        db.close()
+
+def build_flows(ids):
+    """(name, steps) pairs: each step is a callable taking the fake bot"""
+    from src.models.database import ReadSessionLocal
+    from src.services.report_service import ReportService
+
+    def recent_transactions(bot):
+        db = ReadSessionLocal()
+        try:
+            ReportService(db).get_recent_transactions(ids['user_id'])
+        finally:
+            db.close()
+
+    wallet_id = ids['wallet_id']
+    return [
+        ('start', [lambda bot: bot.send_text('/start')]),
+        ('main_menu', [lambda bot: bot.press('main_menu')]),
+        ('status', [lambda bot: bot.send_text('/status')]),
+        ('wallet_list', [lambda bot: bot.press('wallet_list')]),
+        ('wallet_detail', [lambda bot: bot.press(f'wallet_detail_{wallet_id}')]),
+        ('asset_list', [lambda bot: bot.press('asset_list')]),
+        ('asset_portfolio', [lambda bot: bot.press('asset_portfolio')]),
+        ('asset_command', [lambda bot: bot.send_text('/aset')]),
+        ('history_first_page', [lambda bot: bot.press('transaction_history')]),
+        ('history_next_page', [
+            lambda bot: bot.press('transaction_history'),
+            lambda bot: bot.press(bot.button('hist_n_')),
+        ]),
+        ('history_wallet', [lambda bot: bot.press(f'wallet_transactions_{wallet_id}')]),
+        ('search', [lambda bot: bot.send_text('/cari bensin')]),
+        ('report_daily', [lambda bot: bot.press('report_daily')]),
+        ('report_weekly', [lambda bot: bot.press('report_weekly')]),
+        ('report_monthly', [lambda bot: bot.press('report_monthly')]),
+        ('analysis_wow', [lambda bot: bot.press('analysis_wow')]),
+        ('analysis_mom', [lambda bot: bot.press('analysis_mom')]),
+        ('recent_transactions', [recent_transactions]),
+        ('save_expense', [
+            lambda bot: bot.press('transaction_expense'),
+            lambda bot: bot.press(f'expense_wallet_{wallet_id}'),
+            lambda bot: bot.send_text('25000 makan siang'),
+            lambda bot: bot.press(bot.button('category_')),
+            lambda bot: bot.press('confirm_save_transaction'),
+        ]),
+        ('quick_expense', [lambda bot: bot.send_text('/out 15000 parkir dari Kantong 1')]),
+    ]
+
+class ErrorCollector(logging.Handler):
+    """Handlers swallow their exceptions and log them; a flow that logged an error failed"""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record.getMessage())
+
+def run_flow(bot, engines, steps, normalize):
+    """Run one flow once; returns (statements, elapsed_ms, errors)"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(normalize(statement))
+
+    errors = ErrorCollector()
+    logging.getLogger().addHandler(errors)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    sent_before = len(bot.outbox)
+    start = time.perf_counter()
+    try:
+        for step in steps:
+            step(bot)
+    except Exception as e:
+        errors.records.append(f"{type(e).__name__}: {e}")
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        for target in engines:
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+        logging.getLogger().removeHandler(errors)
+    replies = bot.outbox[sent_before:]
+    if any('Terjadi kesalahan' in str(args) for _, args, _ in replies):
+        errors.records.append("handler replied with an error message")
+    return statements, elapsed, errors.records
+
+def measure(flows, repeat):
+    """{flow: {'queries': [...], 'count', 'ms', 'errors'}}: worst statement count, median time"""
+    from src.handlers.start_handler import register_start_handlers
+    from src.handlers.wallet_handler import register_wallet_handlers
+    from src.handlers.transaction_handler import register_transaction_handlers
+    from src.handlers.report_handler import register_report_handlers
+    from src.handlers.history_handler import register_history_handlers
+    from src.handlers.search_handler import register_search_handlers
+    from src.handlers.asset_handler import register_asset_handlers
+    from src.models.database import engine, read_engine
+    from src.services.slow_query_service import normalize_sql
+
+    bot = FakeBot()
+    # Same order as EnhancedFinanceBotApp._register_handlers: dispatch depends on it
+    for register in (register_start_handlers, register_wallet_handlers, register_transaction_handlers,
+                     register_report_handlers, register_history_handlers, register_search_handlers,
+                     register_asset_handlers):
+        register(bot)
+    engines = [engine] if read_engine is engine else [engine, read_engine]
+
+    results = {}
+    for name, steps in flows:
+        runs = [run_flow(bot, engines, steps, normalize_sql) for _ in range(repeat)]
+        worst = max(runs, key=lambda run: len(run[0]))
+        results[name] = {
+            'queries': worst[0],
+            'count': len(worst[0]),
+            'ms': statistics.median(run[1] for run in runs),
+            'errors': sorted({error for run in runs for error in run[2]}),
+        }
+    return results
+
+def load_budgets():
+    if not BUDGET_FILE.exists():
+        return {}
+    with open(BUDGET_FILE, encoding='utf-8') as handle:
+        return json.load(handle)
+
+def write_budgets(results, previous, time_headroom=3):
+    """Record current queries and counts; flows not in results keep their old entry"""
+    budgets = dict(previous)
+    for name, result in results.items():
+        old = previous.get(name, {})
+        budgets[name] = {
+            'max_queries': result['count'],
+            # Keep a hand-tuned time budget unless the flow now needs more
+            'max_ms': max(old.get('max_ms', 0), round(max(result['ms'] * time_headroom, 25))),
+            'queries': result['queries'],
+        }
+    with open(BUDGET_FILE, 'w', encoding='utf-8') as handle:
+        json.dump(budgets, handle, indent=2, ensure_ascii=False)
+        handle.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description="Anggaran jumlah query dan waktu per alur handler")
+    parser.add_argument('--flow', action='append', help="Hanya alur ini (boleh berulang)")
+    parser.add_argument('--repeat', type=int, default=3, help="Jalankan tiap alur sebanyak ini")
+    parser.add_argument('--time-factor', type=float, default=float(os.getenv('QUERY_BUDGET_TIME_FACTOR', '1')),
+                        help="Pengali anggaran waktu untuk mesin yang lebih lambat (CI)")
+    parser.add_argument('--update', action='store_true', help="Tulis ulang query_budgets.json dari hasil sekarang")
+    parser.add_argument('--verbose', action='store_true', help="Tampilkan semua query tiap alur")
+    args = parser.parse_args()
+
+    _prepare_environment()
+    try:
+        flows = build_flows(seed())
+        if args.flow:
+            unknown = set(args.flow) - {name for name, _ in flows}
+            if unknown:
+                print(f"[FAIL] Alur tidak dikenal: {', '.join(sorted(unknown))}")
+                return 1
+            flows = [(name, steps) for name, steps in flows if name in args.flow]
+        results = measure(flows, args.repeat)
+    finally:
+        from src.models.database import engine, read_engine
+        read_engine.dispose()
+        engine.dispose()
+        os.chdir(Path(__file__).resolve().parent.parent)
+        shutil.rmtree(BUDGET_DIR, ignore_errors=True)
+
+    broken = [name for name, result in results.items() if result['errors']]
+    for name in broken:
+        print(f"[FAIL] {name}: {'; '.join(results[name]['errors'])}")
+
+    if args.update:
+        if broken:
+            print("[FAIL] Anggaran tidak ditulis: perbaiki alur yang gagal dulu")
+            return 1
+        write_budgets(results, load_budgets())
+        print(f"[OK] {len(results)} alur dicatat ke {BUDGET_FILE}")
+        return 0
+
+    budgets = load_budgets()
+    print(f"{'alur':<22}{'query':>7}{'batas':>7}{'waktu':>10}{'batas':>9}")
+    failed = len(broken)
+    for name, result in results.items():
+        budget = budgets.get(name)
+        if budget is None:
+            print(f"{name:<22}{result['count']:>7}{'-':>7}{result['ms']:>8.1f}ms{'-':>9}  [WARN] belum ada anggaran")
+            continue
+        max_ms = budget['max_ms'] * args.time_factor
+        over_count = result['count'] > budget['max_queries']
+        over_time = result['ms'] > max_ms
+        status = 'FAIL' if over_count or over_time else 'OK'
+        print(f"{name:<22}{result['count']:>7}{budget['max_queries']:>7}{result['ms']:>8.1f}ms{max_ms:>7.0f}ms  [{status}]")
+        if over_count or args.verbose:
+            diff = list(difflib.unified_diff(budget['queries'], result['queries'],
+                                             fromfile=f"{name} (tercatat)", tofile=f"{name} (sekarang)", lineterm='', n=1))
+            for line in diff or [f"  {query}" for query in result['queries']]:
+                print(f"    {line}")
+        failed += status == 'FAIL'
+
+    if failed:
+        print(f"\n[FAIL] {failed} alur melewati anggaran atau gagal; jika kenaikan disengaja, jalankan --update")
+        return 1
+    print(f"\n[OK] {len(results)} alur dalam anggaran")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rekonsiliasi saldo kantong terhadap jurnal posting. Hanya membaca posting
+sejak checkpoint terakhir; --full menghapus checkpoint dan memeriksa semuanya.
+
+Usage: python scripts/reconcile_balances.py [--full] [--issues 20]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.database import SessionLocal
+from src.services.reconciliation_service import ReconciliationService
+
+def main():
+    parser = argparse.ArgumentParser(description="Rekonsiliasi saldo kantong secara inkremental")
+    parser.add_argument('--full', action='store_true', help="Abaikan checkpoint, periksa seluruh jurnal")
+    parser.add_argument('--issues', type=int, default=20, help="Jumlah temuan terakhir yang ditampilkan")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        service = ReconciliationService(db)
+        if args.full:
+            service.reset()
+        result = service.reconcile()
+        print(f"[INFO] {result['wallets']} kantong, {result['postings_read']} posting dibaca, "
+              f"{result['journaled']} transaksi baru dijurnal")
+        for issue in result['issues']:
+            print(f"[FAIL] kantong {issue.wallet_id}: selisih berubah {issue.drift_change:+,.2f} "
+                  f"(sekarang {issue.drift:+,.2f}), transaksi {issue.first_transaction_id}..{issue.last_transaction_id}, "
+                  f"posting ({issue.first_posting_id}, {issue.last_posting_id}]")
+
+        open_drift = service.open_drift()
+        for wallet_id, drift in open_drift:
+            print(f"[WARN] kantong {wallet_id} masih selisih {drift:+,.2f}")
+        if not open_drift:
+            print("[OK] Semua saldo cocok dengan jurnal")
+
+        if args.issues:
+            recent = service.recent_issues(args.issues)
+            if recent:
+                print(f"\nTemuan terakhir ({len(recent)}):")
+                for issue in recent:
+                    print(f"  {issue.detected_at:%Y-%m-%d %H:%M} kantong {issue.wallet_id}: {issue.drift_change:+,.2f} "
+                          f"transaksi {issue.first_transaction_id}..{issue.last_transaction_id}")
+        return 1 if result['issues'] else 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Ringkasan slow-query log: kelompokkan query lambat per bentuk SQL, urutkan
+menurut total waktu, dan tampilkan pemanggil serta query plan yang terekam.
+
+Usage: python scripts/slow_queries.py [--limit 20] [--since 2024-01-31] [--handler asset] [--path logs/slow_queries.jsonl]
+       python scripts/slow_queries.py show <fingerprint>
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.services.slow_query_service import SLOW_QUERY_LOG_PATH, iter_slow_queries, rank_slow_queries
+
+def filtered_entries(args):
+    for entry in iter_slow_queries(args.path):
+        if args.since and entry['at'] < args.since:
+            continue
+        if args.handler and args.handler not in (entry.get('handler') or entry.get('caller') or ''):
+            continue
+        yield entry
+
+def print_ranking(groups):
+    print(f"{'fingerprint':<14}{'count':>7}{'total':>11}{'avg':>10}{'max':>10}  sql")
+    for group in groups:
+        sql = group['sql'] if len(group['sql']) <= 90 else group['sql'][:87] + '...'
+        print(f"{group['fingerprint']:<14}{group['count']:>7}{group['total_ms']:>9.0f}ms"
+              f"{group['avg_ms']:>8.1f}ms{group['max_ms']:>8.1f}ms  {sql}")
+        caller, calls = max(group['callers'].items(), key=lambda item: item[1])
+        others = len(group['callers']) - 1
+        print(f"{'':<14}dipanggil dari {caller} ({calls}x{f', +{others} lainnya' if others else ''})")
+        plan = group['slowest'].get('plan')
+        scans = [line for line in plan or [] if line.startswith('SCAN')]
+        if scans:
+            print(f"{'':<14}[WARN] {'; '.join(scans)}")
+
+def print_detail(group):
+    print(f"[INFO] {group['fingerprint']}: {group['count']}x, total {group['total_ms']:.0f}ms, "
+          f"rata-rata {group['avg_ms']:.1f}ms, maks {group['max_ms']:.1f}ms")
+    print(f"\n{group['sql']}\n")
+    slowest = group['slowest']
+    print(f"Terlambat: {slowest['duration_ms']:.1f}ms pada {slowest['at']}, parameter {slowest['params']}")
+    print("Pemanggil:")
+    for caller, count in sorted(group['callers'].items(), key=lambda item: item[1], reverse=True):
+        print(f"  {count:>5}x  {caller}")
+    if slowest.get('plan'):
+        print("Query plan:")
+        for line in slowest['plan']:
+            print(f"  {line}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Peringkat query lambat menurut total waktu")
+    parser.add_argument('command', nargs='?', default='top', choices=['top', 'show'])
+    parser.add_argument('fingerprint', nargs='?')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--since', help="Hanya entri sejak tanggal/waktu ISO ini")
+    parser.add_argument('--handler', help="Hanya entri yang pemanggilnya memuat teks ini")
+    parser.add_argument('--path', default=SLOW_QUERY_LOG_PATH)
+    args = parser.parse_args()
+
+    groups = rank_slow_queries(filtered_entries(args), limit=None if args.command == 'show' else args.limit)
+    if not groups:
+        print(f"[INFO] Belum ada query lambat di {args.path} (aktifkan dengan SLOW_QUERY_MS)")
+        return 0
+
+    if args.command == 'show':
+        matches = [group for group in groups if group['fingerprint'].startswith(args.fingerprint or '')]
+        if not args.fingerprint or not matches:
+            print(f"[FAIL] Fingerprint {args.fingerprint} tidak ditemukan")
+            return 1
+        print_detail(matches[0])
+        return 0
+
+    print_ranking(groups)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
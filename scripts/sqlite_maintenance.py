@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Perawatan SQLite: lihat ukuran WAL, halaman kosong dan metrik checkpoint, atau
+jalankan checkpoint / PRAGMA optimize / incremental vacuum secara manual,
+termasuk konversi sekali jalan ke auto_vacuum=INCREMENTAL (VACUUM penuh).
+
+Usage: python scripts/sqlite_maintenance.py status
+       python scripts/sqlite_maintenance.py checkpoint [--mode PASSIVE|FULL|RESTART|TRUNCATE]
+       python scripts/sqlite_maintenance.py run
+       python scripts/sqlite_maintenance.py convert
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.services.maintenance_service import (
+    MaintenanceService, SQLITE_WAL_PASSIVE_BYTES, SQLITE_WAL_TRUNCATE_BYTES,
+    SQLITE_MAINTENANCE_WINDOW, in_maintenance_window
+)
+
+AUTO_VACUUM_MODES = {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}
+
+def print_status(service):
+    status = service.wal_status()
+    page_size = status['page_size']
+    print(f"[INFO] WAL: {status['wal_bytes'] / 1024:,.0f} KB "
+          f"(PASSIVE di atas {SQLITE_WAL_PASSIVE_BYTES / 1024:,.0f} KB, "
+          f"TRUNCATE di atas {SQLITE_WAL_TRUNCATE_BYTES / 1024:,.0f} KB)")
+    print(f"[INFO] Halaman kosong: {status['free_pages']:,} ({status['free_pages'] * page_size / 1024:,.0f} KB), "
+          f"auto_vacuum={AUTO_VACUUM_MODES.get(status['auto_vacuum'], status['auto_vacuum'])}")
+    window = 'sedang berlangsung' if in_maintenance_window() else 'di luar jendela'
+    print(f"[INFO] Jendela perawatan {SQLITE_MAINTENANCE_WINDOW} ({window})")
+    if status['auto_vacuum'] != 2:
+        print("[WARN] auto_vacuum bukan INCREMENTAL; dikonversi pada jendela perawatan "
+              "atau jalankan: python scripts/sqlite_maintenance.py convert")
+
+def main():
+    parser = argparse.ArgumentParser(description="Perawatan WAL, statistik dan ruang kosong SQLite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="Ukuran WAL dan halaman kosong")
+    checkpoint_parser = subparsers.add_parser('checkpoint', help="Jalankan wal_checkpoint")
+    checkpoint_parser.add_argument('--mode', default='PASSIVE', choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'])
+    subparsers.add_parser('run', help="Checkpoint TRUNCATE, optimize dan incremental vacuum sekarang")
+    subparsers.add_parser('convert', help="Ubah ke auto_vacuum=INCREMENTAL sekarang (VACUUM penuh, butuh 2x ukuran file)")
+    args = parser.parse_args()
+
+    service = MaintenanceService()
+    if service.wal_status() is None:
+        print(f"[SKIP] Backend {service.backend}: perawatan WAL hanya untuk file SQLite")
+        return 0
+
+    if args.command == 'status':
+        print_status(service)
+        return 0
+
+    if args.command == 'checkpoint':
+        result = service.checkpoint(args.mode)
+        label = 'WARN' if result['busy'] else 'OK'
+        print(f"[{label}] {result['mode']}: {result['checkpointed_frames']:,}/{result['log_frames']:,} frame, "
+              f"WAL sekarang {result['wal_bytes_after'] / 1024:,.0f} KB")
+        return 0
+
+    if args.command == 'convert':
+        if service.wal_status()['auto_vacuum'] == 2:
+            print("[SKIP] auto_vacuum sudah INCREMENTAL")
+        elif service.enable_incremental_vacuum():
+            print("[OK] auto_vacuum sekarang INCREMENTAL")
+        else:
+            print("[WARN] Ruang disk tidak cukup untuk VACUUM; konversi ditunda")
+        print_status(service)
+        return 0
+
+    result = service.run_scheduled_maintenance()
+    checkpoint = result['checkpoint']
+    print(f"[{'WARN' if checkpoint['busy'] else 'OK'}] checkpoint TRUNCATE: "
+          f"{checkpoint['checkpointed_frames']:,}/{checkpoint['log_frames']:,} frame")
+    print(f"[OK] {result['optimize']}")
+    if result.get('auto_vacuum_converted'):
+        print("[OK] auto_vacuum dikonversi ke INCREMENTAL")
+    if 'vacuumed_pages' in result:
+        print(f"[OK] incremental vacuum: {result['vacuumed_pages']:,} halaman dikembalikan")
+    print_status(service)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
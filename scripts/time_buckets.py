@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Zona waktu per user dan kunci hari lokal (transactions.local_date): isi
+local_date yang masih kosong, ganti zona waktu user (semua local_date-nya
+dihitung ulang), atau tampilkan batas periode lokal beserta rentang UTC-nya.
+
+Usage: python scripts/time_buckets.py backfill [--batch 5000]
+       python scripts/time_buckets.py set-timezone <telegram_id> <zona> [--batch 5000]
+       python scripts/time_buckets.py bounds <zona> [periode ...]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.models.database import SessionLocal, get_user_by_telegram_id
+from src.services.report_query_service import REPORT_PERIODS
+from src.services.time_bucket_service import TimeBucketService
+from src.utils.time_buckets import period_bounds
+
+def show_bounds(zone_name, periods):
+    print(f"{'periode':<12}{'lokal':<44}utc")
+    for period in periods:
+        bounds = period_bounds(zone_name, period)
+        print(f"{period:<12}{bounds.start:%Y-%m-%d %H:%M} - {bounds.end:%Y-%m-%d %H:%M:%S.%f}   "
+              f"{bounds.utc_start:%Y-%m-%d %H:%M} - {bounds.utc_end:%Y-%m-%d %H:%M:%S.%f}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Zona waktu user dan kunci hari lokal transaksi")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subparsers.add_parser('backfill', help="Isi local_date yang masih kosong")
+    backfill_parser.add_argument('--batch', type=int, default=5000, help="Baris per batch")
+    timezone_parser = subparsers.add_parser('set-timezone', help="Ganti zona waktu user")
+    timezone_parser.add_argument('telegram_id', type=int)
+    timezone_parser.add_argument('zone')
+    timezone_parser.add_argument('--batch', type=int, default=5000, help="Baris per batch")
+    bounds_parser = subparsers.add_parser('bounds', help="Batas periode lokal dan rentang UTC-nya")
+    bounds_parser.add_argument('zone')
+    bounds_parser.add_argument('periods', nargs='*', default=list(REPORT_PERIODS))
+    args = parser.parse_args()
+
+    if args.command == 'bounds':
+        return show_bounds(args.zone, args.periods)
+
+    db = SessionLocal()
+    try:
+        service = TimeBucketService(db)
+        if args.command == 'backfill':
+            updated = service.backfill_local_dates(args.batch)
+            print(f"[OK] local_date diisi pada {updated:,} transaksi" if updated else "[SKIP] Semua transaksi sudah punya local_date")
+            return 0
+
+        user = get_user_by_telegram_id(db, args.telegram_id)
+        if not user:
+            print(f"[FAIL] User {args.telegram_id} tidak ditemukan")
+            return 1
+        try:
+            updated = service.set_user_timezone(user.id, args.zone, args.batch)
+        except ValueError as e:
+            db.rollback()
+            print(f"[FAIL] {e}")
+            return 1
+        print(f"[OK] Zona waktu {args.telegram_id} sekarang {args.zone}, {updated:,} local_date dihitung ulang")
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
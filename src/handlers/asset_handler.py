@@ -1,7 +1,7 @@
 import telebot
 from telebot import types
 from sqlalchemy.orm import sessionmaker
-from src.models.database import SessionLocal, User, Wallet, Asset
+from src.models.database import SessionLocal, ReadSessionLocal, Wallet, Asset, get_user_by_telegram_id
 from src.services.asset_service import AssetService
 from src.utils.keyboards import create_wallet_selection_keyboard
 from src.utils.helpers import format_currency_idr
@@ -15,9 +15,9 @@ def register_asset_handlers(bot):
     @bot.message_handler(commands=['aset', 'asset'])
     def asset_command(message):
         user_id = message.from_user.id
-        db = SessionLocal()
+        db = ReadSessionLocal()
         try:
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             if not user:
                 bot.send_message(message.chat.id, "❌ User tidak ditemukan.")
                 return
@@ -61,7 +61,7 @@ def register_asset_handlers(bot):
         db = SessionLocal()
         try:
             # Cari user terlebih dahulu
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             if not user:
                 bot.answer_callback_query(call.id, "❌ User tidak ditemukan.")
                 return
@@ -86,7 +86,7 @@ def register_asset_handlers(bot):
         db = SessionLocal()
         try:
             # Cari user terlebih dahulu
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             if not user:
                 bot.answer_callback_query(call.id, "❌ User tidak ditemukan.", show_alert=True)
                 return
@@ -171,7 +171,7 @@ def register_asset_handlers(bot):
         user_id = message.from_user.id
         db = SessionLocal()
         try:
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             wallets = db.query(Wallet).filter(Wallet.user_id == user.id, Wallet.is_active == True).all()
             if not wallets:
                 bot.send_message(message.chat.id, "❌ Anda harus punya minimal 1 kantong untuk menyimpan aset.")
@@ -259,7 +259,7 @@ def register_asset_handlers(bot):
             # Ambil daftar wallet user
             db = SessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     bot.send_message(message.chat.id, "❌ User tidak ditemukan. Silakan mulai ulang dengan /start")
                     asset_states.pop(user_id, None)
@@ -350,7 +350,7 @@ Apakah data sudah benar?"""
         
         db = SessionLocal()
         try:
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             if not user:
                 bot.answer_callback_query(call.id, "[ERROR] User tidak ditemukan.")
                 return
@@ -391,9 +391,9 @@ Apakah data sudah benar?"""
         """Handle asset list callback"""
         try:
             user_id = call.from_user.id
-            db = SessionLocal()
+            db = ReadSessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     bot.answer_callback_query(call.id, "❌ User tidak ditemukan.")
                     return
@@ -519,7 +519,7 @@ Apakah data sudah benar?"""
         
         db = SessionLocal()
         try:
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             if not user:
                 bot.answer_callback_query(call.id, "User tidak ditemukan.", show_alert=True)
                 return
@@ -593,7 +593,7 @@ Untuk menambah aset kembali, silakan pilih tombol "Tambah Aset" atau gunakan com
             
             db = SessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     bot.answer_callback_query(call.id, "[ERROR] User tidak ditemukan.")
                     return
@@ -679,9 +679,9 @@ Untuk menambah aset kembali, silakan pilih tombol "Tambah Aset" atau gunakan com
         """Handle asset portfolio callback"""
         try:
             user_id = call.from_user.id
-            db = SessionLocal()
+            db = ReadSessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     bot.answer_callback_query(call.id, "❌ User tidak ditemukan.")
                     return
@@ -754,9 +754,9 @@ Untuk menambah aset kembali, silakan pilih tombol "Tambah Aset" atau gunakan com
         """Handle stock assets callback"""
         try:
             user_id = call.from_user.id
-            db = SessionLocal()
+            db = ReadSessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     bot.answer_callback_query(call.id, "❌ User tidak ditemukan.")
                     return
@@ -808,9 +808,9 @@ Untuk menambah aset kembali, silakan pilih tombol "Tambah Aset" atau gunakan com
         """Handle crypto assets callback"""
         try:
             user_id = call.from_user.id
-            db = SessionLocal()
+            db = ReadSessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     bot.answer_callback_query(call.id, "❌ User tidak ditemukan.")
                     return
@@ -0,0 +1,120 @@
+from src.models.database import ReadSessionLocal, get_user_by_telegram_id
+from src.services.report_query_service import ReportQueryService
+from src.services.report_service import ReportService
+from src.services.category_service import CategoryService
+from src.services.chart_service import get_chart_service, charts_available
+from src.services.telegram_file_service import send_cached_file
+from src.utils.keyboards import create_back_button
+from src.utils.helpers import format_currency_idr, format_date, safe_answer_callback_query
+import logging
+
+logger = logging.getLogger(__name__)
+
+TREND_MONTHS = 6
+NET_WORTH_DAYS = 30
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'Mei', 'Jun', 'Jul', 'Agu', 'Sep', 'Okt', 'Nov', 'Des']
+
+def register_chart_handlers(bot):
+    """Register chart handlers (trend, category and net worth charts of the analysis menu)"""
+
+    @bot.callback_query_handler(func=lambda call: call.data in CHART_SCREENS)
+    def chart_callback(call):
+        """Render one chart and send it as a photo"""
+        try:
+            safe_answer_callback_query(bot, call.id)
+            bot.send_chat_action(call.message.chat.id, 'upload_photo')
+            send_chart(bot, call.message.chat.id, call.from_user.id, call.data)
+        except Exception as e:
+            logger.error(f"Error in chart {call.data}: {e}")
+            bot.send_message(call.message.chat.id, "❌ Terjadi kesalahan saat membuat grafik")
+
+def send_chart(bot, chat_id: int, telegram_id: int, screen: str):
+    """
+    Build the chart's data from the database, render it in the chart pool
+    (or take it from the image cache) and send it, by file_id when the same
+    image was uploaded before; the caption alone is sent when charts are
+    unavailable or rendering fails
+    """
+    db = ReadSessionLocal()
+    try:
+        user = get_user_by_telegram_id(db, telegram_id)
+        if not user:
+            bot.send_message(chat_id, "❌ User tidak ditemukan")
+            return
+        kind, title, data, caption = CHART_SCREENS[screen](db, user)
+    finally:
+        db.close()
+
+    markup = create_back_button('analysis_menu')
+    if data is None:
+        bot.send_message(chat_id, caption, reply_markup=markup, parse_mode='Markdown')
+        return
+    png = None
+    if charts_available():
+        try:
+            png = get_chart_service().render(kind, title, data)
+        except Exception as e:
+            logger.error(f"Chart {kind} not rendered: {e}")
+    if png is None:
+        bot.send_message(chat_id, caption, reply_markup=markup, parse_mode='Markdown')
+        return
+    send_cached_file(bot, chat_id, png, f"{kind}.png", 'photo', caption=caption, reply_markup=markup, parse_mode='Markdown')
+
+def _month_label(period: str) -> str:
+    year, month = period.split('-')
+    return f"{MONTH_NAMES[int(month) - 1]} {year[2:]}"
+
+def _trend_chart(db, user):
+    """Income and expense per month for the last TREND_MONTHS months"""
+    trends = ReportService(db).get_spending_trends(user.id, months=TREND_MONTHS)
+    caption = f"📉 *Trend {TREND_MONTHS} Bulan*\n\n"
+    for month in trends:
+        caption += f"• {_month_label(month['period'])}: 💰 {format_currency_idr(month['income'])} / 💸 {format_currency_idr(month['amount'])}\n"
+    data = {
+        'periods': [_month_label(month['period']) for month in trends],
+        'income': [round(month['income'], 2) for month in trends],
+        'expense': [round(month['amount'], 2) for month in trends],
+    }
+    if not any(data['income']) and not any(data['expense']):
+        return 'spending_trend', '', None, caption + "\n📝 Belum ada transaksi"
+    return 'spending_trend', 'Pemasukan vs Pengeluaran', data, caption
+
+def _category_chart(db, user):
+    """This month's expenses per category"""
+    month = ReportQueryService(db).get_period_reports(user.id, ('month',), timezone=user.timezone)['month']
+    names = CategoryService(db).names(month['categories'])
+    expenses = {}
+    for category_id, bucket in month['categories'].items():
+        if bucket['expense']:
+            name = names[category_id].name if category_id in names else 'Lainnya'
+            expenses[name] = expenses.get(name, 0.0) + bucket['expense']
+    ranked = sorted(expenses.items(), key=lambda item: item[1], reverse=True)
+    caption = f"🏷️ *Pengeluaran per Kategori*\n📅 {format_date(month['start'], 'long')} - {format_date(month['end'], 'long')}\n\n"
+    if not ranked:
+        return 'category_pie', '', None, caption + "📝 Belum ada pengeluaran bulan ini"
+    for name, amount in ranked[:8]:
+        caption += f"• {name}: {format_currency_idr(amount)} ({amount / month['expense'] * 100:.1f}%)\n"
+    data = {'labels': [name for name, _ in ranked], 'values': [round(amount, 2) for _, amount in ranked]}
+    return 'category_pie', f"Pengeluaran {month['start']:%m/%Y}", data, caption
+
+def _net_worth_chart(db, user):
+    """Wallets plus assets at the end of each of the last NET_WORTH_DAYS days"""
+    history = ReportService(db).get_net_worth_history(user.id, days=NET_WORTH_DAYS)
+    first, last = history[0]['net_worth'], history[-1]['net_worth']
+    caption = f"💎 *Kekayaan Bersih {NET_WORTH_DAYS} Hari*\n\n"
+    caption += f"• Sekarang: {format_currency_idr(last)}\n"
+    caption += f"• {NET_WORTH_DAYS} hari lalu: {format_currency_idr(first)}\n"
+    caption += f"• Perubahan: {format_currency_idr(last - first)}\n"
+    data = {
+        'dates': [point['date'].strftime('%d/%m') for point in history],
+        'values': [round(point['net_worth'], 2) for point in history],
+    }
+    return 'net_worth', 'Kekayaan Bersih', data, caption
+
+# Callback data -> builder returning (chart kind, title, data or None, caption)
+CHART_SCREENS = {
+    'analysis_trend': _trend_chart,
+    'analysis_category': _category_chart,
+    'analysis_networth': _net_worth_chart,
+}
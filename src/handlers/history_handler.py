@@ -0,0 +1,144 @@
+from src.models.database import ReadSessionLocal, get_user_by_telegram_id
+from src.services.user_service import UserService
+from src.utils.keyboards import create_history_keyboard
+from src.utils.helpers import (
+    format_currency_idr, format_date, truncate_text, escape_markdown_legacy,
+    encode_history_cursor, decode_history_cursor,
+    safe_answer_callback_query
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 10
+
+# Callback type codes -> Transaction.type
+HISTORY_TYPE_CODES = {
+    'a': None,
+    'i': 'income',
+    'e': 'expense',
+    't': 'transfer'
+}
+
+HISTORY_TYPE_LABELS = {
+    'a': 'Semua',
+    'i': 'Pemasukan',
+    'e': 'Pengeluaran',
+    't': 'Transfer'
+}
+
+def register_history_handlers(bot):
+    """Register transaction history handlers"""
+    
+    @bot.message_handler(commands=['history', 'riwayat'])
+    def history_command(message):
+        """Handle /history command"""
+        try:
+            text, markup = build_history_page(message.from_user.id)
+            bot.send_message(message.chat.id, text, reply_markup=markup, parse_mode='Markdown')
+        except Exception as e:
+            logger.error(f"Error in history command: {e}")
+            bot.send_message(message.chat.id, "❌ Terjadi kesalahan")
+    
+    @bot.callback_query_handler(func=lambda call: call.data == 'transaction_history')
+    def transaction_history_callback(call):
+        """Show first history page from transaction menu"""
+        _edit_history(bot, call, 'a', None, None, 'next')
+    
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('wallet_transactions_'))
+    def wallet_transactions_callback(call):
+        """Show history filtered to one wallet"""
+        try:
+            wallet_id = int(call.data.replace('wallet_transactions_', ''))
+        except ValueError:
+            safe_answer_callback_query(bot, call.id, "❌ Kantong tidak valid")
+            return
+        _edit_history(bot, call, 'a', wallet_id, None, 'next')
+    
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('hist_'))
+    def history_page_callback(call):
+        """Handle history filter and paging buttons: hist_<f|n|p>_<type>_<wallet>_<cursor>"""
+        try:
+            _, action, type_code, wallet_part, token = call.data.split('_', 4)
+            wallet_id = int(wallet_part) or None
+        except ValueError:
+            safe_answer_callback_query(bot, call.id, "❌ Data tidak valid")
+            return
+        
+        cursor = decode_history_cursor(token) if action in ('n', 'p') else None
+        direction = 'prev' if action == 'p' else 'next'
+        _edit_history(bot, call, type_code, wallet_id, cursor, direction)
+
+def _edit_history(bot, call, type_code, wallet_id, cursor, direction):
+    """Render a history page into the callback's message"""
+    try:
+        text, markup = build_history_page(call.from_user.id, type_code, wallet_id, cursor, direction)
+        bot.edit_message_text(
+            text,
+            call.message.chat.id,
+            call.message.message_id,
+            reply_markup=markup,
+            parse_mode='Markdown'
+        )
+        safe_answer_callback_query(bot, call.id)
+    except Exception as e:
+        logger.error(f"Error in transaction history: {e}")
+        safe_answer_callback_query(bot, call.id, "❌ Terjadi kesalahan")
+
+def build_history_page(telegram_id: int, type_code: str = 'a', wallet_id: int = None,
+                       cursor=None, direction: str = 'next'):
+    """Build history text and keyboard for one keyset page"""
+    if type_code not in HISTORY_TYPE_CODES:
+        type_code = 'a'
+    
+    db = ReadSessionLocal()
+    try:
+        user = get_user_by_telegram_id(db, telegram_id)
+        if not user:
+            return "❌ User tidak ditemukan", None
+        
+        page = UserService(db).get_transaction_page(
+            user.id,
+            limit=HISTORY_PAGE_SIZE,
+            cursor=cursor,
+            direction=direction,
+            transaction_type=HISTORY_TYPE_CODES[type_code],
+            wallet_id=wallet_id
+        )
+    finally:
+        db.close()
+    
+    text = "📝 *Riwayat Transaksi*\n"
+    text += f"🔎 Filter: {HISTORY_TYPE_LABELS[type_code]}\n\n"
+    
+    if not page['items']:
+        text += "📭 Belum ada transaksi"
+    
+    text += format_transaction_lines(page['items'])
+    
+    markup = create_history_keyboard(
+        type_code,
+        wallet_id,
+        prev_token=encode_history_cursor(page['prev_cursor']),
+        next_token=encode_history_cursor(page['next_cursor'])
+    )
+    return text, markup
+
+def format_transaction_lines(items) -> str:
+    """Markdown lines for transaction_listing_query rows (history and search)"""
+    text = ""
+    for t in items:
+        if t.type == 'income':
+            emoji = "💰"
+            wallet_text = t.to_wallet_name or '-'
+        elif t.type == 'expense':
+            emoji = "💸"
+            wallet_text = t.from_wallet_name or '-'
+        else:
+            emoji = "🔄"
+            wallet_text = f"{t.from_wallet_name or '-'} → {t.to_wallet_name or '-'}"
+        
+        description = escape_markdown_legacy(truncate_text(t.description or '-'))
+        text += f"{emoji} {format_currency_idr(t.amount)} - {description}\n"
+        text += f"   🏦 {escape_markdown_legacy(wallet_text)} • {format_date(t.transaction_date, 'datetime')}\n"
+    return text
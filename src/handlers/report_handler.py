@@ -3,10 +3,16 @@ from telebot import types
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import func, and_, or_
 from datetime import datetime, timedelta
-from src.models.database import SessionLocal, User, Wallet, Transaction
+from src.models.database import ReadSessionLocal, Wallet, Transaction, get_user_by_telegram_id
+from src.services.report_query_service import ReportQueryService
+from src.services.report_cache_service import get_report_cache, report_cache_key
+from src.services.category_service import CategoryService
+from src.services.export_service import ExportService
+from src.services.telegram_file_service import send_cached_file
+from src.utils.time_buckets import local_now
 from src.utils.keyboards import create_report_menu, create_analysis_menu, create_back_button
 from src.utils.helpers import (
-    format_currency_idr, get_date_range, format_date,
+    format_currency_idr, format_date,
     calculate_percentage_change, get_category_name,
     safe_answer_callback_query
 )
@@ -163,330 +169,296 @@ def register_report_handlers(bot):
         except Exception as e:
             logger.error(f"Error in report command: {e}")
             bot.send_message(message.chat.id, "❌ Terjadi kesalahan")
+    
+    @bot.message_handler(commands=['export'])
+    def export_command(message):
+        """Handle /export command: all transactions as a CSV document"""
+        try:
+            bot.send_chat_action(message.chat.id, 'upload_document')
+            db = ReadSessionLocal()
+            try:
+                user = get_user_by_telegram_id(db, message.from_user.id)
+                if not user:
+                    bot.send_message(message.chat.id, "❌ User tidak ditemukan")
+                    return
+                content, count = ExportService(db).transactions_csv(user.id)
+            finally:
+                db.close()
+            
+            if not count:
+                bot.send_message(message.chat.id, "📝 Belum ada transaksi untuk diekspor")
+                return
+            # Unchanged history -> identical bytes -> resent by file_id
+            send_cached_file(
+                bot, message.chat.id, content, f"transaksi_{message.from_user.id}.csv", 'document',
+                caption=f"📤 Export {count} transaksi"
+            )
+        except Exception as e:
+            logger.error(f"Error in export command: {e}")
+            bot.send_message(message.chat.id, "❌ Terjadi kesalahan saat export data")
 
-def generate_daily_report(user_id: int) -> str:
-    """Generate daily financial report"""
+def _cached_report(telegram_id: int, kind: str, render, error_text: str) -> str:
+    """
+    Render one report screen through the report cache. The user row carries
+    data_version, so a cache hit costs only the user lookup
+    """
+    db = ReadSessionLocal()
     try:
-        db = SessionLocal()
-        
-        user = db.query(User).filter(User.telegram_id == user_id).first()
+        user = get_user_by_telegram_id(db, telegram_id)
         if not user:
             return "❌ User tidak ditemukan"
-        
-        # Get today's date range
-        start_date, end_date = get_date_range('today')
-        
-        # Get today's transactions
-        transactions = db.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date.between(start_date, end_date)
-        ).all()
-        
-        # Calculate totals
-        total_income = sum(t.amount for t in transactions if t.type == 'income')
-        total_expense = sum(t.amount for t in transactions if t.type == 'expense')
-        net_flow = total_income - total_expense
-        
-        # Get wallet balances
-        wallets = db.query(Wallet).filter(
-            Wallet.user_id == user.id,
-            Wallet.is_active == True
-        ).all()
-        total_balance = sum(w.balance for w in wallets)
-        
-        report = f"📅 *Laporan Harian*\n"
-        report += f"🗓️ {format_date(datetime.now(), 'long')}\n\n"
-        
-        report += f"💰 *Pemasukan:* {format_currency_idr(total_income)}\n"
-        report += f"💸 *Pengeluaran:* {format_currency_idr(total_expense)}\n"
-        report += f"📊 *Net Flow:* {format_currency_idr(net_flow)}\n"
-        report += f"💯 *Total Saldo:* {format_currency_idr(total_balance)}\n\n"
-        
-        if transactions:
-            report += f"📝 *Transaksi Hari Ini ({len(transactions)}):*\n"
-            for t in transactions[-5:]:  # Show last 5 transactions
-                emoji = "💰" if t.type == 'income' else "💸"
-                report += f"{emoji} {format_currency_idr(t.amount)} - {t.description}\n"
-            
-            if len(transactions) > 5:
-                report += f"... dan {len(transactions) - 5} transaksi lainnya\n"
-        else:
-            report += "📝 *Tidak ada transaksi hari ini*\n"
-        
-        db.close()
-        return report
-        
+        return get_report_cache().get_or_render(report_cache_key(user, kind), lambda: render(db, user))
     except Exception as e:
-        logger.error(f"Error generating daily report: {e}")
-        return "❌ Terjadi kesalahan saat membuat laporan"
+        logger.error(f"Error generating {kind}: {e}")
+        return error_text
+    finally:
+        db.close()
+
+def generate_daily_report(user_id: int) -> str:
+    """Generate daily financial report"""
+    return _cached_report(user_id, 'report_daily', _render_daily_report, "❌ Terjadi kesalahan saat membuat laporan")
+
+def _render_daily_report(db, user) -> str:
+    """Daily report text for an already loaded user"""
+    # Aggregate today's transactions in SQL
+    query_service = ReportQueryService(db)
+    totals = query_service.get_period_reports(user.id, ('today',), timezone=user.timezone)['today']
+    start_date, end_date = totals['utc_start'], totals['utc_end']
+    
+    # Calculate totals
+    total_income = totals['income']
+    total_expense = totals['expense']
+    transaction_count = totals['count']
+    net_flow = total_income - total_expense
+    
+    # Get wallet balances
+    total_balance = query_service.get_total_balance(user.id)
+    
+    report = f"📅 *Laporan Harian*\n"
+    report += f"🗓️ {format_date(local_now(user.timezone), 'long')}\n\n"
+    
+    report += f"💰 *Pemasukan:* {format_currency_idr(total_income)}\n"
+    report += f"💸 *Pengeluaran:* {format_currency_idr(total_expense)}\n"
+    report += f"📊 *Net Flow:* {format_currency_idr(net_flow)}\n"
+    report += f"💯 *Total Saldo:* {format_currency_idr(total_balance)}\n\n"
+    
+    if transaction_count:
+        report += f"📝 *Transaksi Hari Ini ({transaction_count}):*\n"
+        latest = query_service.get_latest_transactions(user.id, start_date, end_date, limit=5)
+        for t in latest:  # Show last 5 transactions
+            emoji = "💰" if t.type == 'income' else "💸"
+            report += f"{emoji} {format_currency_idr(t.amount)} - {t.description}\n"
+        
+        if transaction_count > 5:
+            report += f"... dan {transaction_count - 5} transaksi lainnya\n"
+    else:
+        report += "📝 *Tidak ada transaksi hari ini*\n"
+    return report
 
 def generate_weekly_report(user_id: int) -> str:
     """Generate weekly financial report"""
-    try:
-        db = SessionLocal()
-        
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
-            return "❌ User tidak ditemukan"
-        
-        # Get this week's date range
-        start_date, end_date = get_date_range('week')
-        
-        # Get this week's transactions
-        transactions = db.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date.between(start_date, end_date)
-        ).all()
-        
-        # Calculate totals
-        total_income = sum(t.amount for t in transactions if t.type == 'income')
-        total_expense = sum(t.amount for t in transactions if t.type == 'expense')
-        net_flow = total_income - total_expense
-        
-        # Get daily breakdown
-        daily_expenses = {}
-        for t in transactions:
-            if t.type == 'expense':
-                day = t.transaction_date.strftime('%A')
-                daily_expenses[day] = daily_expenses.get(day, 0) + t.amount
-        
-        report = f"📆 *Laporan Mingguan*\n"
-        report += f"🗓️ {format_date(start_date)} - {format_date(end_date)}\n\n"
-        
-        report += f"💰 *Total Pemasukan:* {format_currency_idr(total_income)}\n"
-        report += f"💸 *Total Pengeluaran:* {format_currency_idr(total_expense)}\n"
-        report += f"📊 *Net Flow:* {format_currency_idr(net_flow)}\n"
-        report += f"📝 *Jumlah Transaksi:* {len(transactions)}\n\n"
-        
-        if daily_expenses:
-            report += f"📊 *Pengeluaran per Hari:*\n"
-            for day, amount in sorted(daily_expenses.items()):
-                report += f"• {day}: {format_currency_idr(amount)}\n"
-        
-        # Average daily expense
-        avg_daily = total_expense / 7 if total_expense > 0 else 0
-        report += f"\n📈 *Rata-rata Pengeluaran Harian:* {format_currency_idr(avg_daily)}"
-        
-        db.close()
-        return report
-        
-    except Exception as e:
-        logger.error(f"Error generating weekly report: {e}")
-        return "❌ Terjadi kesalahan saat membuat laporan"
+    return _cached_report(user_id, 'report_weekly', _render_weekly_report, "❌ Terjadi kesalahan saat membuat laporan")
+
+def _render_weekly_report(db, user) -> str:
+    """Weekly report text for an already loaded user"""
+    # Totals and per-day buckets in one grouped query
+    buckets = ReportQueryService(db).get_period_reports(user.id, ('week',), timezone=user.timezone)['week']
+    start_date, end_date = buckets['start'], buckets['end']
+    
+    # Calculate totals
+    total_income = buckets['income']
+    total_expense = buckets['expense']
+    transaction_count = buckets['count']
+    net_flow = total_income - total_expense
+    
+    # Get daily breakdown
+    daily_expenses = {}
+    for day, bucket in buckets['days'].items():
+        if bucket['expense']:
+            day_name = day.strftime('%A')
+            daily_expenses[day_name] = daily_expenses.get(day_name, 0) + bucket['expense']
+    
+    report = f"📆 *Laporan Mingguan*\n"
+    report += f"🗓️ {format_date(start_date)} - {format_date(end_date)}\n\n"
+    
+    report += f"💰 *Total Pemasukan:* {format_currency_idr(total_income)}\n"
+    report += f"💸 *Total Pengeluaran:* {format_currency_idr(total_expense)}\n"
+    report += f"📊 *Net Flow:* {format_currency_idr(net_flow)}\n"
+    report += f"📝 *Jumlah Transaksi:* {transaction_count}\n\n"
+    
+    if daily_expenses:
+        report += f"📊 *Pengeluaran per Hari:*\n"
+        for day, amount in sorted(daily_expenses.items()):
+            report += f"• {day}: {format_currency_idr(amount)}\n"
+    
+    # Average daily expense
+    avg_daily = total_expense / 7 if total_expense > 0 else 0
+    report += f"\n📈 *Rata-rata Pengeluaran Harian:* {format_currency_idr(avg_daily)}"
+    return report
 
 def generate_monthly_report(user_id: int) -> str:
     """Generate monthly financial report"""
-    try:
-        db = SessionLocal()
-        
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
-            return "❌ User tidak ditemukan"
-        
-        # Get this month's date range
-        start_date, end_date = get_date_range('month')
-        
-        # Get this month's transactions
-        transactions = db.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date.between(start_date, end_date)
-        ).all()
-        
-        # Calculate totals
-        total_income = sum(t.amount for t in transactions if t.type == 'income')
-        total_expense = sum(t.amount for t in transactions if t.type == 'expense')
-        net_flow = total_income - total_expense
-        
-        # Get category breakdown for expenses
-        category_expenses = {}
-        for t in transactions:
-            if t.type == 'expense' and t.category_id:
-                # This would need category lookup - simplified for now
-                category_expenses['Lainnya'] = category_expenses.get('Lainnya', 0) + t.amount
-        
-        report = f"🗓️ *Laporan Bulanan*\n"
-        report += f"📅 {format_date(start_date, 'long')} - {format_date(end_date, 'long')}\n\n"
-        
-        report += f"💰 *Total Pemasukan:* {format_currency_idr(total_income)}\n"
-        report += f"💸 *Total Pengeluaran:* {format_currency_idr(total_expense)}\n"
-        report += f"📊 *Net Flow:* {format_currency_idr(net_flow)}\n"
-        report += f"📝 *Jumlah Transaksi:* {len(transactions)}\n\n"
-        
-        # Savings rate
-        if total_income > 0:
-            savings_rate = (net_flow / total_income) * 100
-            report += f"💳 *Tingkat Tabungan:* {savings_rate:.1f}%\n\n"
-        
-        # Average daily expense
-        days_in_month = (end_date - start_date).days + 1
-        avg_daily = total_expense / days_in_month if total_expense > 0 else 0
-        report += f"📈 *Rata-rata Pengeluaran Harian:* {format_currency_idr(avg_daily)}\n"
-        
-        # Spending projection
-        days_passed = (datetime.now() - start_date).days + 1
-        if days_passed > 0 and total_expense > 0:
-            projected_monthly = (total_expense / days_passed) * days_in_month
-            report += f"🔮 *Proyeksi Pengeluaran Bulanan:* {format_currency_idr(projected_monthly)}"
-        
-        db.close()
-        return report
-        
-    except Exception as e:
-        logger.error(f"Error generating monthly report: {e}")
-        return "❌ Terjadi kesalahan saat membuat laporan"
+    return _cached_report(user_id, 'report_monthly', _render_monthly_report, "❌ Terjadi kesalahan saat membuat laporan")
+
+def _render_monthly_report(db, user) -> str:
+    """Monthly report text for an already loaded user"""
+    # Totals and per-category buckets in one grouped query
+    buckets = ReportQueryService(db).get_period_reports(user.id, ('month',), timezone=user.timezone)['month']
+    start_date, end_date = buckets['start'], buckets['end']
+    
+    # Calculate totals
+    total_income = buckets['income']
+    total_expense = buckets['expense']
+    transaction_count = buckets['count']
+    net_flow = total_income - total_expense
+    
+    # Category breakdown for expenses: buckets from the grouped query, names from the category cache
+    names = CategoryService(db).names(buckets['categories'])
+    category_expenses = {}
+    for category_id, bucket in buckets['categories'].items():
+        if bucket['expense']:
+            name = names[category_id].name if category_id in names else 'Lainnya'
+            category_expenses[name] = category_expenses.get(name, 0) + bucket['expense']
+    
+    report = f"🗓️ *Laporan Bulanan*\n"
+    report += f"📅 {format_date(start_date, 'long')} - {format_date(end_date, 'long')}\n\n"
+    
+    report += f"💰 *Total Pemasukan:* {format_currency_idr(total_income)}\n"
+    report += f"💸 *Total Pengeluaran:* {format_currency_idr(total_expense)}\n"
+    report += f"📊 *Net Flow:* {format_currency_idr(net_flow)}\n"
+    report += f"📝 *Jumlah Transaksi:* {transaction_count}\n\n"
+    
+    if category_expenses:
+        report += f"🏷️ *Pengeluaran per Kategori:*\n"
+        for name, amount in sorted(category_expenses.items(), key=lambda item: item[1], reverse=True):
+            report += f"• {name}: {format_currency_idr(amount)} ({amount / total_expense * 100:.1f}%)\n"
+        report += "\n"
+    
+    # Savings rate
+    if total_income > 0:
+        savings_rate = (net_flow / total_income) * 100
+        report += f"💳 *Tingkat Tabungan:* {savings_rate:.1f}%\n\n"
+    
+    # Average daily expense
+    days_in_month = (end_date - start_date).days + 1
+    avg_daily = total_expense / days_in_month if total_expense > 0 else 0
+    report += f"📈 *Rata-rata Pengeluaran Harian:* {format_currency_idr(avg_daily)}\n"
+    
+    # Spending projection
+    days_passed = (local_now(user.timezone) - start_date).days + 1
+    if days_passed > 0 and total_expense > 0:
+        projected_monthly = (total_expense / days_passed) * days_in_month
+        report += f"🔮 *Proyeksi Pengeluaran Bulanan:* {format_currency_idr(projected_monthly)}"
+    return report
 
 def generate_wow_analysis(user_id: int) -> str:
     """Generate Week over Week analysis"""
-    try:
-        db = SessionLocal()
-        
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
-            return "❌ User tidak ditemukan"
-        
-        # Get this week and last week data
-        this_week_start, this_week_end = get_date_range('week')
-        last_week_start, last_week_end = get_date_range('last_week')
-        
-        # This week transactions
-        this_week_transactions = db.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date.between(this_week_start, this_week_end)
-        ).all()
-        
-        # Last week transactions
-        last_week_transactions = db.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date.between(last_week_start, last_week_end)
-        ).all()
-        
-        # Calculate totals
-        this_week_income = sum(t.amount for t in this_week_transactions if t.type == 'income')
-        this_week_expense = sum(t.amount for t in this_week_transactions if t.type == 'expense')
-        
-        last_week_income = sum(t.amount for t in last_week_transactions if t.type == 'income')
-        last_week_expense = sum(t.amount for t in last_week_transactions if t.type == 'expense')
-        
-        # Calculate percentage changes
-        income_change, income_trend = calculate_percentage_change(this_week_income, last_week_income)
-        expense_change, expense_trend = calculate_percentage_change(this_week_expense, last_week_expense)
-        
-        report = f"📈 *Analisis Week over Week*\n\n"
-        
-        report += f"💰 *Pemasukan:*\n"
-        report += f"• Minggu ini: {format_currency_idr(this_week_income)}\n"
-        report += f"• Minggu lalu: {format_currency_idr(last_week_income)}\n"
-        if income_change != float('inf') and income_change != float('-inf'):
-            report += f"• Perubahan: {income_trend} {abs(income_change):.1f}%\n\n"
-        else:
-            report += f"• Perubahan: {income_trend} Baru ada data\n\n"
-        
-        report += f"💸 *Pengeluaran:*\n"
-        report += f"• Minggu ini: {format_currency_idr(this_week_expense)}\n"
-        report += f"• Minggu lalu: {format_currency_idr(last_week_expense)}\n"
-        if expense_change != float('inf') and expense_change != float('-inf'):
-            report += f"• Perubahan: {expense_trend} {abs(expense_change):.1f}%\n\n"
-        else:
-            report += f"• Perubahan: {expense_trend} Baru ada data\n\n"
-        
-        # Insights
-        report += f"💡 *Insight:*\n"
-        if expense_change > 10:
-            report += f"⚠️ Pengeluaran naik signifikan ({expense_change:.1f}%)\n"
-        elif expense_change < -10:
-            report += f"✅ Pengeluaran turun signifikan ({abs(expense_change):.1f}%)\n"
-        else:
-            report += f"➡️ Pengeluaran relatif stabil\n"
-        
-        db.close()
-        return report
-        
-    except Exception as e:
-        logger.error(f"Error generating WoW analysis: {e}")
-        return "❌ Terjadi kesalahan saat membuat analisis"
+    return _cached_report(user_id, 'analysis_wow', _render_wow_analysis, "❌ Terjadi kesalahan saat membuat analisis")
+
+def _render_wow_analysis(db, user) -> str:
+    """Week over Week analysis text for an already loaded user"""
+    # Both weeks in one grouped query
+    comparison = ReportQueryService(db).get_period_reports(user.id, ('week', 'last_week'), timezone=user.timezone)
+    
+    # Calculate totals
+    this_week_income = comparison['week']['income']
+    this_week_expense = comparison['week']['expense']
+    
+    last_week_income = comparison['last_week']['income']
+    last_week_expense = comparison['last_week']['expense']
+    
+    # Calculate percentage changes
+    income_change, income_trend = calculate_percentage_change(this_week_income, last_week_income)
+    expense_change, expense_trend = calculate_percentage_change(this_week_expense, last_week_expense)
+    
+    report = f"📈 *Analisis Week over Week*\n\n"
+    
+    report += f"💰 *Pemasukan:*\n"
+    report += f"• Minggu ini: {format_currency_idr(this_week_income)}\n"
+    report += f"• Minggu lalu: {format_currency_idr(last_week_income)}\n"
+    if income_change != float('inf') and income_change != float('-inf'):
+        report += f"• Perubahan: {income_trend} {abs(income_change):.1f}%\n\n"
+    else:
+        report += f"• Perubahan: {income_trend} Baru ada data\n\n"
+    
+    report += f"💸 *Pengeluaran:*\n"
+    report += f"• Minggu ini: {format_currency_idr(this_week_expense)}\n"
+    report += f"• Minggu lalu: {format_currency_idr(last_week_expense)}\n"
+    if expense_change != float('inf') and expense_change != float('-inf'):
+        report += f"• Perubahan: {expense_trend} {abs(expense_change):.1f}%\n\n"
+    else:
+        report += f"• Perubahan: {expense_trend} Baru ada data\n\n"
+    
+    # Insights
+    report += f"💡 *Insight:*\n"
+    if expense_change > 10:
+        report += f"⚠️ Pengeluaran naik signifikan ({expense_change:.1f}%)\n"
+    elif expense_change < -10:
+        report += f"✅ Pengeluaran turun signifikan ({abs(expense_change):.1f}%)\n"
+    else:
+        report += f"➡️ Pengeluaran relatif stabil\n"
+    return report
 
 def generate_mom_analysis(user_id: int) -> str:
     """Generate Month over Month analysis"""
-    try:
-        db = SessionLocal()
-        
-        user = db.query(User).filter(User.telegram_id == user_id).first()
-        if not user:
-            return "❌ User tidak ditemukan"
-        
-        # Get this month and last month data
-        this_month_start, this_month_end = get_date_range('month')
-        last_month_start, last_month_end = get_date_range('last_month')
-        
-        # This month transactions
-        this_month_transactions = db.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date.between(this_month_start, this_month_end)
-        ).all()
-        
-        # Last month transactions
-        last_month_transactions = db.query(Transaction).filter(
-            Transaction.user_id == user.id,
-            Transaction.transaction_date.between(last_month_start, last_month_end)
-        ).all()
-        
-        # Calculate totals
-        this_month_income = sum(t.amount for t in this_month_transactions if t.type == 'income')
-        this_month_expense = sum(t.amount for t in this_month_transactions if t.type == 'expense')
-        
-        last_month_income = sum(t.amount for t in last_month_transactions if t.type == 'income')
-        last_month_expense = sum(t.amount for t in last_month_transactions if t.type == 'expense')
-        
-        # Calculate percentage changes
-        income_change, income_trend = calculate_percentage_change(this_month_income, last_month_income)
-        expense_change, expense_trend = calculate_percentage_change(this_month_expense, last_month_expense)
-        
-        report = f"📊 *Analisis Month over Month*\n\n"
-        
-        report += f"💰 *Pemasukan:*\n"
-        report += f"• Bulan ini: {format_currency_idr(this_month_income)}\n"
-        report += f"• Bulan lalu: {format_currency_idr(last_month_income)}\n"
-        if income_change != float('inf') and income_change != float('-inf'):
-            report += f"• Perubahan: {income_trend} {abs(income_change):.1f}%\n\n"
-        else:
-            report += f"• Perubahan: {income_trend} Baru ada data\n\n"
-        
-        report += f"💸 *Pengeluaran:*\n"
-        report += f"• Bulan ini: {format_currency_idr(this_month_expense)}\n"
-        report += f"• Bulan lalu: {format_currency_idr(last_month_expense)}\n"
-        if expense_change != float('inf') and expense_change != float('-inf'):
-            report += f"• Perubahan: {expense_trend} {abs(expense_change):.1f}%\n\n"
-        else:
-            report += f"• Perubahan: {expense_trend} Baru ada data\n\n"
-        
-        # Net flow comparison
-        this_month_net = this_month_income - this_month_expense
-        last_month_net = last_month_income - last_month_expense
-        net_change, net_trend = calculate_percentage_change(this_month_net, last_month_net)
-        
-        report += f"📊 *Net Flow:*\n"
-        report += f"• Bulan ini: {format_currency_idr(this_month_net)}\n"
-        report += f"• Bulan lalu: {format_currency_idr(last_month_net)}\n"
-        if net_change != float('inf') and net_change != float('-inf'):
-            report += f"• Perubahan: {net_trend} {abs(net_change):.1f}%\n\n"
-        else:
-            report += f"• Perubahan: {net_trend} Baru ada data\n\n"
-        
-        # Insights
-        report += f"💡 *Insight:*\n"
-        if expense_change > 15:
-            report += f"⚠️ Pengeluaran naik signifikan bulan ini\n"
-        elif expense_change < -15:
-            report += f"✅ Pengeluaran turun signifikan bulan ini\n"
-        
-        if this_month_net > last_month_net:
-            report += f"📈 Net flow membaik dari bulan lalu\n"
-        elif this_month_net < last_month_net:
-            report += f"📉 Net flow menurun dari bulan lalu\n"
-        
-        db.close()
-        return report
-        
-    except Exception as e:
-        logger.error(f"Error generating MoM analysis: {e}")
-        return "❌ Terjadi kesalahan saat membuat analisis"
+    return _cached_report(user_id, 'analysis_mom', _render_mom_analysis, "❌ Terjadi kesalahan saat membuat analisis")
+
+def _render_mom_analysis(db, user) -> str:
+    """Month over Month analysis text for an already loaded user"""
+    # Both months in one grouped query
+    comparison = ReportQueryService(db).get_period_reports(user.id, ('month', 'last_month'), timezone=user.timezone)
+    
+    # Calculate totals
+    this_month_income = comparison['month']['income']
+    this_month_expense = comparison['month']['expense']
+    
+    last_month_income = comparison['last_month']['income']
+    last_month_expense = comparison['last_month']['expense']
+    
+    # Calculate percentage changes
+    income_change, income_trend = calculate_percentage_change(this_month_income, last_month_income)
+    expense_change, expense_trend = calculate_percentage_change(this_month_expense, last_month_expense)
+    
+    report = f"📊 *Analisis Month over Month*\n\n"
+    
+    report += f"💰 *Pemasukan:*\n"
+    report += f"• Bulan ini: {format_currency_idr(this_month_income)}\n"
+    report += f"• Bulan lalu: {format_currency_idr(last_month_income)}\n"
+    if income_change != float('inf') and income_change != float('-inf'):
+        report += f"• Perubahan: {income_trend} {abs(income_change):.1f}%\n\n"
+    else:
+        report += f"• Perubahan: {income_trend} Baru ada data\n\n"
+    
+    report += f"💸 *Pengeluaran:*\n"
+    report += f"• Bulan ini: {format_currency_idr(this_month_expense)}\n"
+    report += f"• Bulan lalu: {format_currency_idr(last_month_expense)}\n"
+    if expense_change != float('inf') and expense_change != float('-inf'):
+        report += f"• Perubahan: {expense_trend} {abs(expense_change):.1f}%\n\n"
+    else:
+        report += f"• Perubahan: {expense_trend} Baru ada data\n\n"
+    
+    # Net flow comparison
+    this_month_net = this_month_income - this_month_expense
+    last_month_net = last_month_income - last_month_expense
+    net_change, net_trend = calculate_percentage_change(this_month_net, last_month_net)
+    
+    report += f"📊 *Net Flow:*\n"
+    report += f"• Bulan ini: {format_currency_idr(this_month_net)}\n"
+    report += f"• Bulan lalu: {format_currency_idr(last_month_net)}\n"
+    if net_change != float('inf') and net_change != float('-inf'):
+        report += f"• Perubahan: {net_trend} {abs(net_change):.1f}%\n\n"
+    else:
+        report += f"• Perubahan: {net_trend} Baru ada data\n\n"
+    
+    # Insights
+    report += f"💡 *Insight:*\n"
+    if expense_change > 15:
+        report += f"⚠️ Pengeluaran naik signifikan bulan ini\n"
+    elif expense_change < -15:
+        report += f"✅ Pengeluaran turun signifikan bulan ini\n"
+    
+    if this_month_net > last_month_net:
+        report += f"📈 Net flow membaik dari bulan lalu\n"
+    elif this_month_net < last_month_net:
+        report += f"📉 Net flow menurun dari bulan lalu\n"
+    return report
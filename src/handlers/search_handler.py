@@ -0,0 +1,143 @@
+from src.models.database import ReadSessionLocal, get_user_by_telegram_id
+from src.services.search_service import TransactionSearchService
+from src.handlers.history_handler import format_transaction_lines
+from src.utils.keyboards import create_search_keyboard
+from src.utils.time_buckets import period_bounds
+from src.utils.helpers import (
+    format_currency_idr, escape_markdown_legacy,
+    encode_history_cursor, decode_history_cursor,
+    safe_answer_callback_query
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PAGE_SIZE = 10
+
+# Callback period codes -> period_bounds period (None = all time)
+SEARCH_PERIOD_CODES = {
+    'a': None,
+    'y': 'year',
+    'm': 'month'
+}
+
+SEARCH_PERIOD_LABELS = {
+    'a': 'Semua waktu',
+    'y': 'Tahun ini',
+    'm': 'Bulan ini'
+}
+
+# Last search phrase per user; callback_data (64 bytes) only carries period + cursor
+search_states = {}
+
+def register_search_handlers(bot):
+    """Register transaction search handlers"""
+
+    @bot.message_handler(commands=['cari', 'search'])
+    def search_command(message):
+        """Handle /cari <kata kunci> command"""
+        try:
+            parts = message.text.split(maxsplit=1)
+            if len(parts) < 2 or not parts[1].strip():
+                bot.reply_to(
+                    message,
+                    "🔍 *Cari Transaksi*\n\n"
+                    "Format: `/cari [kata kunci]`\n"
+                    "Contoh: `/cari bensin`, `/cari makan siang`\n\n"
+                    "Mencari di deskripsi dan catatan transaksi.",
+                    parse_mode='Markdown'
+                )
+                return
+
+            search_states[message.from_user.id] = parts[1].strip()
+            text, markup = build_search_page(message.from_user.id, parts[1].strip())
+            bot.send_message(message.chat.id, text, reply_markup=markup, parse_mode='Markdown')
+        except Exception as e:
+            logger.error(f"Error in search command: {e}")
+            bot.send_message(message.chat.id, "❌ Terjadi kesalahan")
+
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('cari_'))
+    def search_page_callback(call):
+        """Handle search period and paging buttons: cari_<f|n|p>_<period>_<cursor>"""
+        try:
+            _, action, period_code, token = call.data.split('_', 3)
+        except ValueError:
+            safe_answer_callback_query(bot, call.id, "❌ Data tidak valid")
+            return
+
+        query_text = search_states.get(call.from_user.id)
+        if not query_text:
+            safe_answer_callback_query(bot, call.id, "⌛ Pencarian kedaluwarsa, kirim /cari lagi")
+            return
+
+        cursor = decode_history_cursor(token) if action in ('n', 'p') else None
+        direction = 'prev' if action == 'p' else 'next'
+        try:
+            text, markup = build_search_page(call.from_user.id, query_text, period_code, cursor, direction)
+            bot.edit_message_text(
+                text,
+                call.message.chat.id,
+                call.message.message_id,
+                reply_markup=markup,
+                parse_mode='Markdown'
+            )
+            safe_answer_callback_query(bot, call.id)
+        except Exception as e:
+            logger.error(f"Error in search paging: {e}")
+            safe_answer_callback_query(bot, call.id, "❌ Terjadi kesalahan")
+
+def build_search_page(telegram_id: int, query_text: str, period_code: str = 'a',
+                      cursor=None, direction: str = 'next'):
+    """Build search result text (totals + one keyset page) and keyboard"""
+    if period_code not in SEARCH_PERIOD_CODES:
+        period_code = 'a'
+
+    db = ReadSessionLocal()
+    try:
+        user = get_user_by_telegram_id(db, telegram_id)
+        if not user:
+            return "❌ User tidak ditemukan", None
+
+        start_date = end_date = None
+        if SEARCH_PERIOD_CODES[period_code]:
+            # Local periods of the user, as UTC bounds on transaction_date
+            bounds = period_bounds(user.timezone, SEARCH_PERIOD_CODES[period_code])
+            start_date, end_date = bounds.utc_start, bounds.utc_end
+
+        page = TransactionSearchService(db).search(
+            user.id,
+            query_text,
+            start_date=start_date,
+            end_date=end_date,
+            limit=SEARCH_PAGE_SIZE,
+            cursor=cursor,
+            direction=direction
+        )
+    finally:
+        db.close()
+
+    text = f"🔍 *Hasil pencarian:* {escape_markdown_legacy(' '.join(page['tokens']) or query_text)}\n"
+    text += f"📅 Periode: {SEARCH_PERIOD_LABELS[period_code]}\n\n"
+
+    totals = page['totals']
+    if not totals or not totals['count']:
+        text += "📭 Tidak ada transaksi yang cocok"
+        return text, create_search_keyboard(period_code)
+
+    text += f"🧾 {totals['count']} transaksi\n"
+    if totals['expense']:
+        text += f"💸 Pengeluaran: {format_currency_idr(totals['expense'])}\n"
+    if totals['income']:
+        text += f"💰 Pemasukan: {format_currency_idr(totals['income'])}\n"
+    if totals['transfer']:
+        text += f"🔄 Transfer: {format_currency_idr(totals['transfer'])}\n"
+    text += "\n"
+
+    text += format_transaction_lines(page['items'])
+
+    markup = create_search_keyboard(
+        period_code,
+        prev_token=encode_history_cursor(page['prev_cursor']),
+        next_token=encode_history_cursor(page['next_cursor'])
+    )
+    return text, markup
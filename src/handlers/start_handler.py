@@ -2,7 +2,7 @@ import telebot
 from telebot import types
 from datetime import datetime
 from sqlalchemy.orm import sessionmaker
-from src.models.database import SessionLocal
+from src.models.database import SessionLocal, ReadSessionLocal
 from src.services.user_service import UserService
 from src.services.registration_service import UserRegistrationService
 from src.services.report_service import ReportService
@@ -125,11 +125,14 @@ Pilih menu di bawah untuk memulai:"""
 • `/in [jumlah] [deskripsi] [dari kantong]` - Catat pemasukan
 • `/out [jumlah] [deskripsi] [dari kantong]` - Catat pengeluaran  
 • `/transfer [jumlah] [dari] [ke]` - Transfer antar kantong
+• `/history` - Riwayat transaksi
+• `/cari [kata kunci]` - Cari transaksi + totalnya
 
 *Contoh:*
 • `/in 500000 gaji dari BCA`
 • `/out 25000 makan siang dari Dompet`
 • `/transfer 100000 BCA Dana`
+• `/cari bensin`
 
 *📊 Laporan:*
 • Laporan harian, mingguan, bulanan
@@ -171,12 +174,14 @@ Gunakan menu untuk navigasi yang mudah!"""
         
         try:
             db = SessionLocal()
+            read_db = ReadSessionLocal()
             try:
                 user_service = UserService(db)
                 registration_service = UserRegistrationService(db)
                 
                 user = user_service.get_or_create_user(message.from_user)
-                stats = registration_service.get_user_statistics(user)
+                # Summary aggregates run on the read-only pool
+                stats = UserRegistrationService(read_db).get_user_statistics(user)
                 
                 status_text = f"""📊 *Status Akun Anda*
 
@@ -212,6 +217,7 @@ Gunakan menu untuk navigasi yang mudah!"""
                 message_logger.log_command_execution(message.from_user.id, "/status", True)
                 
             finally:
+                read_db.close()
                 db.close()
                 
         except Exception as e:
@@ -2,7 +2,7 @@ import telebot
 from telebot import types
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
-from src.models.database import SessionLocal, User, Wallet, Transaction, Category
+from src.models.database import SessionLocal, Wallet, Transaction, Category, get_user_by_telegram_id
 from src.utils.keyboards import (
     create_transaction_menu, create_wallet_selection_keyboard,
     create_category_keyboard, create_confirmation_keyboard, 
@@ -14,6 +14,11 @@ from src.utils.helpers import (
     get_category_name, parse_amount,
     safe_answer_callback_query
 )
+from src.services.user_service import UserService
+from src.services.category_service import CategoryService
+from src.services.wallet_resolver_service import WalletNameResolver
+from src.services.optimistic_lock_service import run_with_retry
+from src.services.write_queue_service import write_queue_enabled, get_write_queue, WRITE_QUEUE_RESULT_TIMEOUT
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,6 +26,91 @@ logger = logging.getLogger(__name__)
 # Store user states for multi-step processes
 transaction_states = {}
 
+def _save_transaction_job(db, owner_id, state):
+    """Insert an income/expense transaction and apply it to the wallet; returns (wallet name, new balance)"""
+    transaction = Transaction(
+        user_id=owner_id,
+        type=state['type'],
+        amount=state['amount'],
+        description=state['description'],
+        category_id=state.get('category_id')
+    )
+    
+    if state['type'] == 'income':
+        transaction.to_wallet_id = state['to_wallet_id']
+        # Update wallet balance
+        wallet = db.query(Wallet).filter(Wallet.id == state['to_wallet_id']).first()
+        wallet.balance += state['amount']
+    else:  # expense
+        transaction.from_wallet_id = state['from_wallet_id']
+        # Update wallet balance
+        wallet = db.query(Wallet).filter(Wallet.id == state['from_wallet_id']).first()
+        wallet.balance -= state['amount']
+    
+    db.add(transaction)
+    db.commit()
+    return wallet.name, wallet.balance
+
+def _transfer_job(db, owner_id, from_wallet_id, to_wallet_id, amount, description):
+    """Write-queue job for a wallet-to-wallet transfer"""
+    UserService(db).create_transaction(
+        user_id=owner_id,
+        transaction_type='transfer',
+        amount=amount,
+        description=description,
+        from_wallet_id=from_wallet_id,
+        to_wallet_id=to_wallet_id
+    )
+    return amount
+
+def _record_quick_transaction(bot, message, trans_type, amount, description, wallet_name):
+    """Save a /in or /out entry once its wallet resolves to exactly one of the user's wallets"""
+    db = SessionLocal()
+    try:
+        user = UserService(db).get_or_create_user(message.from_user)
+        resolved = WalletNameResolver(db).resolve(user.id, wallet_name)
+        candidates = resolved['candidates']
+        wallet_id = resolved['wallet_id']
+        if not wallet_name and len(candidates) == 1:
+            # No "dari ..." part is only unambiguous with a single wallet
+            wallet_id = candidates[0][0]
+        
+        if not wallet_id:
+            if not candidates:
+                bot.send_message(message.chat.id, "❌ Belum ada kantong. Buat dulu lewat menu 🏦 Kantong.")
+                return
+            if not wallet_name:
+                hint = "Sebutkan kantongnya."
+            elif resolved['match']:
+                hint = f"'{wallet_name}' cocok dengan beberapa kantong."
+            else:
+                hint = f"Kantong '{wallet_name}' tidak ditemukan."
+            names = ', '.join(name for _, name in candidates)
+            bot.send_message(
+                message.chat.id,
+                f"❓ {hint}\nPilihan: {names}\n\nContoh: {message.text.split()[0]} {int(amount)} {description} dari {candidates[0][1]}"
+            )
+            return
+        
+        state = {'type': trans_type, 'amount': amount, 'description': description,
+                 'category_id': CategoryService(db).category_id_for(trans_type)}
+        state['to_wallet_id' if trans_type == 'income' else 'from_wallet_id'] = wallet_id
+        if write_queue_enabled():
+            wallet_name, wallet_balance = get_write_queue().submit(
+                _save_transaction_job, user.id, state
+            ).result(WRITE_QUEUE_RESULT_TIMEOUT)
+        else:
+            wallet_name, wallet_balance = run_with_retry(db, 'save_transaction', _save_transaction_job, user.id, state)
+        
+        label = "Pemasukan" if trans_type == 'income' else "Pengeluaran"
+        bot.send_message(
+            message.chat.id,
+            f"✅ {label} {format_currency_idr(amount)} untuk '{description}' berhasil dicatat!\n"
+            f"🏦 Saldo {wallet_name}: {format_currency_idr(wallet_balance)}"
+        )
+    finally:
+        db.close()
+
 def register_transaction_handlers(bot):
     @bot.callback_query_handler(func=lambda call: call.data == 'transaction_transfer')
     def transaction_transfer_callback(call):
@@ -29,7 +119,7 @@ def register_transaction_handlers(bot):
             user_id = call.from_user.id
             db = SessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     safe_answer_callback_query(bot, call.id, "❌ User tidak ditemukan")
                     return
@@ -80,7 +170,7 @@ def register_transaction_handlers(bot):
         state['step'] = 'to_wallet'
         db = SessionLocal()
         try:
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             wallets = db.query(Wallet).filter(Wallet.user_id == user.id, Wallet.is_active == True, Wallet.id != from_wallet_id).all()
             markup = create_wallet_selection_keyboard(wallets, 'transfer_to')
             bot.edit_message_text(
@@ -148,19 +238,25 @@ def register_transaction_handlers(bot):
         db = SessionLocal()
         try:
             user_service = UserService(db)
-            user = db.query(User).filter(User.telegram_id == user_id).first()
+            user = get_user_by_telegram_id(db, user_id)
             from_wallet = db.query(Wallet).filter(Wallet.id == state['from_wallet_id']).first()
             to_wallet = db.query(Wallet).filter(Wallet.id == state['to_wallet_id']).first()
             amount = state['amount']
             # Eksekusi transfer
-            user_service.create_transaction(
-                user_id=user.id,
-                transaction_type='transfer',
-                amount=amount,
-                description=f"Transfer dari {from_wallet.name} ke {to_wallet.name}",
-                from_wallet_id=from_wallet.id,
-                to_wallet_id=to_wallet.id
-            )
+            description = f"Transfer dari {from_wallet.name} ke {to_wallet.name}"
+            if write_queue_enabled():
+                get_write_queue().submit(
+                    _transfer_job, user.id, from_wallet.id, to_wallet.id, amount, description
+                ).result(WRITE_QUEUE_RESULT_TIMEOUT)
+            else:
+                user_service.create_transaction(
+                    user_id=user.id,
+                    transaction_type='transfer',
+                    amount=amount,
+                    description=description,
+                    from_wallet_id=from_wallet.id,
+                    to_wallet_id=to_wallet.id
+                )
             bot.edit_message_text(
                 f"✅ Transfer berhasil!\n\n{format_currency_idr(amount)} dari *{from_wallet.name}* ke *{to_wallet.name}*.",
                 call.message.chat.id,
@@ -205,7 +301,7 @@ def register_transaction_handlers(bot):
             db = SessionLocal()
             
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     safe_answer_callback_query(bot, call.id, "❌ User tidak ditemukan")
                     return
@@ -262,7 +358,7 @@ def register_transaction_handlers(bot):
             db = SessionLocal()
             
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
+                user = get_user_by_telegram_id(db, user_id)
                 if not user:
                     safe_answer_callback_query(bot, call.id, "❌ User tidak ditemukan")
                     return
@@ -474,6 +570,7 @@ def register_transaction_handlers(bot):
             # Show confirmation
             db = SessionLocal()
             try:
+                state['category_id'] = CategoryService(db).category_id_for(state['type'], category_code)
                 if state['type'] == 'income':
                     wallet = db.query(Wallet).filter(Wallet.id == state['to_wallet_id']).first()
                     wallet_name = wallet.name if wallet else "Unknown"
@@ -522,35 +619,21 @@ def register_transaction_handlers(bot):
             
             db = SessionLocal()
             try:
-                user = db.query(User).filter(User.telegram_id == user_id).first()
-                
-                # Create transaction
-                transaction = Transaction(
-                    user_id=user.id,
-                    type=state['type'],
-                    amount=state['amount'],
-                    description=state['description']
-                )
-                
-                if state['type'] == 'income':
-                    transaction.to_wallet_id = state['to_wallet_id']
-                    # Update wallet balance
-                    wallet = db.query(Wallet).filter(Wallet.id == state['to_wallet_id']).first()
-                    wallet.balance += state['amount']
-                else:  # expense
-                    transaction.from_wallet_id = state['from_wallet_id']
-                    # Update wallet balance
-                    wallet = db.query(Wallet).filter(Wallet.id == state['from_wallet_id']).first()
-                    wallet.balance -= state['amount']
+                user = get_user_by_telegram_id(db, user_id)
                 
-                db.add(transaction)
-                db.commit()
+                if write_queue_enabled():
+                    # Serialized on the writer thread and group-committed with other writes
+                    wallet_name, wallet_balance = get_write_queue().submit(
+                        _save_transaction_job, user.id, dict(state)
+                    ).result(WRITE_QUEUE_RESULT_TIMEOUT)
+                else:
+                    wallet_name, wallet_balance = run_with_retry(db, 'save_transaction', _save_transaction_job, user.id, state)
                 
                 emoji = "💰" if state['type'] == 'income' else "💸"
                 success_text = f"✅ *Transaksi Berhasil Disimpan!*\n\n"
                 success_text += f"{emoji} {format_currency_idr(state['amount'])}\n"
                 success_text += f"📝 {state['description']}\n"
-                success_text += f"🏦 Saldo {wallet.name}: {format_currency_idr(wallet.balance)}"
+                success_text += f"🏦 Saldo {wallet_name}: {format_currency_idr(wallet_balance)}"
                 
                 markup = create_back_button('transaction_menu')
                 bot.edit_message_text(
@@ -591,11 +674,11 @@ def register_transaction_handlers(bot):
                 )
                 return
             
-            # Quick save logic here...
-            bot.send_message(
-                message.chat.id,
-                f"✅ Pemasukan {format_currency_idr(amount)} untuk '{description}' berhasil dicatat!"
-            )
+            if not validate_transaction_amount(amount):
+                bot.send_message(message.chat.id, "❌ Jumlah tidak valid")
+                return
+            
+            _record_quick_transaction(bot, message, 'income', amount, description, wallet_name)
             
         except Exception as e:
             logger.error(f"Error in income command: {e}")
@@ -620,11 +703,11 @@ def register_transaction_handlers(bot):
                 )
                 return
             
-            # Quick save logic here...
-            bot.send_message(
-                message.chat.id,
-                f"✅ Pengeluaran {format_currency_idr(amount)} untuk '{description}' berhasil dicatat!"
-            )
+            if not validate_transaction_amount(amount):
+                bot.send_message(message.chat.id, "❌ Jumlah tidak valid")
+                return
+            
+            _record_quick_transaction(bot, message, 'expense', amount, description, wallet_name)
             
         except Exception as e:
             logger.error(f"Error in expense command: {e}")
@@ -1,7 +1,7 @@
 import telebot
 from telebot import types
 from sqlalchemy.orm import sessionmaker
-from src.models.database import SessionLocal, User, Wallet
+from src.models.database import SessionLocal, Wallet, get_user_by_telegram_id, normalize_name
 from src.services.user_service import UserService
 from src.utils.keyboards import (
     create_wallet_menu, create_wallet_types_keyboard, 
@@ -262,10 +262,10 @@ def register_wallet_handlers(bot):
                 # Check if wallet name already exists
                 db = SessionLocal()
                 try:
-                    user_obj = db.query(User).filter(User.telegram_id == user_id).first()
+                    user_obj = get_user_by_telegram_id(db, user_id)
                     existing_wallet = db.query(Wallet).filter(
                         Wallet.user_id == user_obj.id,
-                        Wallet.name.ilike(wallet_name),
+                        Wallet.name_normalized == normalize_name(wallet_name),
                         Wallet.is_active == True
                     ).first()
                     
@@ -312,7 +312,7 @@ def register_wallet_handlers(bot):
                 # Create wallet
                 db = SessionLocal()
                 try:
-                    user_obj = db.query(User).filter(User.telegram_id == user_id).first()
+                    user_obj = get_user_by_telegram_id(db, user_id)
                     
                     new_wallet = Wallet(
                         user_id=user_obj.id,
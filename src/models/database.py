@@ -1,19 +1,40 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index, text, event
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Float, Date, DateTime, Boolean, ForeignKey, Index, Text, text, event, inspect, select, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
-from datetime import datetime
+from sqlalchemy.orm import relationship, sessionmaker, validates, object_session
+from datetime import datetime, date
+from urllib.parse import quote
 import os
+import json
+import re
+import unicodedata
+import threading
 from dotenv import load_dotenv
+from src.utils.time_buckets import local_day, user_timezone, forget_user_timezone
 
 load_dotenv()
 
 Base = declarative_base()
 
+# Partial-index predicate for soft-deleted tables: queries filter `is_active == True`
+# (rendered as `is_active = 1` / `= true`), so inactive rows stay out of these indexes
+ACTIVE_ONLY = {
+    'sqlite_where': text('is_active = 1'),
+    'postgresql_where': text('is_active = true'),
+}
+
+_NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+
+def normalize_name(name: str) -> str:
+    """Lookup key for user-typed names: accents stripped, casefolded, punctuation as single spaces"""
+    decomposed = unicodedata.normalize('NFKD', name or '')
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_ALNUM_RE.sub(' ', stripped.casefold()).strip()
+
 class User(Base):
     __tablename__ = 'users'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    telegram_id = Column(Integer, unique=True, nullable=False, index=True)
+    telegram_id = Column(BigInteger, unique=True, nullable=False, index=True)  # ids exceed int4 on PostgreSQL
     username = Column(String(100), index=True)
     first_name = Column(String(100))
     last_name = Column(String(100))
@@ -22,7 +43,9 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_activity = Column(DateTime, default=datetime.utcnow)
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
+    # Bumped with every wallet, transaction or asset write (see record_outbox_event); keys cached reports
+    data_version = Column(Integer, nullable=False, default=0, server_default='0')
     
     # Relationships with lazy loading for performance
     wallets = relationship("Wallet", back_populates="user", cascade="all, delete-orphan", lazy='dynamic')
@@ -30,8 +53,7 @@ class User(Base):
     
     # Indexes for performance
     __table_args__ = (
-        Index('idx_user_telegram_active', 'telegram_id', 'is_active'),
-        Index('idx_user_activity', 'last_activity', 'is_active'),
+        Index('idx_user_active_activity', 'last_activity', **ACTIVE_ONLY),
     )
     
     def __repr__(self):
@@ -51,30 +73,41 @@ class Wallet(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
     name = Column(String(100), nullable=False)
+    name_normalized = Column(String(100))  # normalize_name(name), kept in sync by the validator below
     type = Column(String(50), nullable=False, index=True)  # cash, bank, e-wallet, investment, debt, etc.
     balance = Column(Float, default=0.0, index=True)
     initial_balance = Column(Float, default=0.0)
     currency = Column(String(10), default='IDR')
     description = Column(String(255))
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Optimistic concurrency: every ORM UPDATE checks and bumps it (see OptimisticLockService)
+    version_id = Column(Integer, nullable=False, default=1, server_default=text('1'))
     
     # Relationships
     user = relationship("User", back_populates="wallets")
     transactions_from = relationship("Transaction", foreign_keys="Transaction.from_wallet_id", back_populates="from_wallet", lazy='dynamic')
     transactions_to = relationship("Transaction", foreign_keys="Transaction.to_wallet_id", back_populates="to_wallet", lazy='dynamic')
     
-    # Composite indexes for performance
+    __mapper_args__ = {'version_id_col': version_id}
+    
+    # Partial indexes over active wallets only (lists order by name, breakdowns by balance)
     __table_args__ = (
-        Index('idx_wallet_user_active', 'user_id', 'is_active'),
-        Index('idx_wallet_user_type', 'user_id', 'type', 'is_active'),
-        Index('idx_wallet_balance', 'user_id', 'balance', 'is_active'),
+        Index('idx_wallet_active_user_name', 'user_id', 'name', **ACTIVE_ONLY),
+        Index('idx_wallet_active_user_name_norm', 'user_id', 'name_normalized', **ACTIVE_ONLY),
+        Index('idx_wallet_active_user_type', 'user_id', 'type', **ACTIVE_ONLY),
+        Index('idx_wallet_active_user_balance', 'user_id', 'balance', **ACTIVE_ONLY),
     )
     
     def __repr__(self):
         return f"<Wallet(name={self.name}, balance={self.balance})>"
     
+    @validates('name')
+    def _sync_name_normalized(self, key, name):
+        self.name_normalized = normalize_name(name)
+        return name
+    
     def update_balance(self, amount, operation='add'):
         """Update wallet balance with proper validation"""
         if operation == 'add':
@@ -94,7 +127,7 @@ class Category(Base):
     icon = Column(String(10))  # emoji icon
     parent_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'))  # for subcategories
     is_system = Column(Boolean, default=False, index=True)  # system categories cannot be deleted
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
@@ -103,8 +136,8 @@ class Category(Base):
     
     # Indexes for performance
     __table_args__ = (
-        Index('idx_category_type_active', 'type', 'is_active'),
-        Index('idx_category_system_active', 'is_system', 'is_active'),
+        Index('idx_category_active_type', 'type', 'name', **ACTIVE_ONLY),
+        Index('idx_category_active_system', 'is_system', **ACTIVE_ONLY),
     )
     
     def __repr__(self):
@@ -114,16 +147,18 @@ class Transaction(Base):
     __tablename__ = 'transactions'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
-    type = Column(String(20), nullable=False, index=True)  # income, expense, transfer
-    amount = Column(Float, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    type = Column(String(20), nullable=False)  # income, expense, transfer
+    amount = Column(Float, nullable=False)
     description = Column(String(255))
-    category_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'), index=True)
+    category_id = Column(Integer, ForeignKey('categories.id', ondelete='SET NULL'))
     from_wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='SET NULL'), index=True)  # for expense and transfer
     to_wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='SET NULL'), index=True)    # for income and transfer
-    transaction_date = Column(DateTime, default=datetime.utcnow, index=True)
-    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    transaction_date = Column(DateTime, default=datetime.utcnow)  # naive UTC
+    created_at = Column(DateTime, default=datetime.utcnow)
     notes = Column(String(500))
+    # Local calendar day of transaction_date in the user's timezone, set on write (see time_buckets)
+    local_date = Column(Date)
     
     # Relationships
     user = relationship("User", back_populates="transactions")
@@ -131,24 +166,277 @@ class Transaction(Base):
     from_wallet = relationship("Wallet", foreign_keys=[from_wallet_id])
     to_wallet = relationship("Wallet", foreign_keys=[to_wallet_id])
     
-    # Composite indexes for performance
+    # Every report, listing and history query filters user_id + transaction_date range
+    # and reads type/amount/category_id (reports also group by local_date), so one
+    # covering index serves them all (see scripts/index_audit.py). Wallet indexes
+    # back per-wallet lookups and FKs.
     __table_args__ = (
-        Index('idx_transaction_user_date', 'user_id', 'transaction_date'),
-        Index('idx_transaction_user_type', 'user_id', 'type'),
-        Index('idx_transaction_user_amount', 'user_id', 'amount'),
-        Index('idx_transaction_date_type', 'transaction_date', 'type'),
-        Index('idx_transaction_wallets', 'from_wallet_id', 'to_wallet_id'),
-        Index('idx_transaction_category', 'user_id', 'category_id'),
+        Index('idx_transaction_user_date', 'user_id', 'transaction_date', 'type', 'amount', 'category_id', 'local_date'),
     )
     
     def __repr__(self):
         return f"<Transaction(type={self.type}, amount={self.amount}, description={self.description})>"
 
+class Posting(Base):
+    """
+    Append-only double-entry journal: each transaction posts one leg per account
+    it touches and its legs sum to zero. Wallet legs carry the signed effect on
+    the wallet balance; income/expense legs are the external counter-side
+    """
+    __tablename__ = 'postings'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_id = Column(Integer, nullable=True)  # no FK: reversal legs outlive a deleted transaction
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    wallet_id = Column(Integer, ForeignKey('wallets.id'))  # NULL for external accounts
+    account = Column(String(20), nullable=False)  # wallet, income, expense, suspense (wallet missing)
+    amount = Column(Float, nullable=False)
+    posted_at = Column(DateTime, nullable=False)  # the transaction's date, not insert time
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Balance-at-date sums one wallet's legs over a posted_at range; late legs
+    # (posted into an already checkpointed range) are found by id. Both covering
+    __table_args__ = (
+        Index('idx_posting_wallet_date', 'wallet_id', 'posted_at', 'amount'),
+        Index('idx_posting_wallet_id', 'wallet_id', 'id', 'posted_at', 'amount'),
+        Index('idx_posting_transaction', 'transaction_id'),
+    )
+
+class WalletCheckpoint(Base):
+    """
+    Wallet balance as of `as_of`: initial_balance plus every leg dated at or
+    before as_of that existed when it was taken (id <= last_posting_id)
+    """
+    __tablename__ = 'wallet_balance_checkpoints'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='CASCADE'), nullable=False)
+    as_of = Column(DateTime, nullable=False)
+    balance = Column(Float, nullable=False)
+    last_posting_id = Column(Integer, nullable=False, default=0)  # highest posting id included
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_checkpoint_wallet_as_of', 'wallet_id', 'as_of', unique=True),
+    )
+
+class ReconciliationCheckpoint(Base):
+    """Where the last reconciliation left a wallet: journal position, running sum and drift seen"""
+    __tablename__ = 'reconciliation_checkpoints'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='CASCADE'), nullable=False, unique=True)
+    last_posting_id = Column(Integer, nullable=False, default=0)
+    last_transaction_id = Column(Integer, nullable=False, default=0)
+    running_sum = Column(Float, nullable=False, default=0.0)  # sum of the wallet's legs up to last_posting_id
+    drift = Column(Float, nullable=False, default=0.0)  # balance - (initial_balance + running_sum) at checked_at
+    checked_at = Column(DateTime, default=datetime.utcnow)
+
+class ReconciliationIssue(Base):
+    """A change in a wallet's drift, narrowed to the journal range it appeared in"""
+    __tablename__ = 'reconciliation_issues'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    wallet_id = Column(Integer, ForeignKey('wallets.id', ondelete='CASCADE'), nullable=False)
+    drift_change = Column(Float, nullable=False)
+    drift = Column(Float, nullable=False)
+    first_posting_id = Column(Integer)  # exclusive lower bound: the previous checkpoint
+    last_posting_id = Column(Integer)
+    first_transaction_id = Column(Integer)  # NULL when no transaction touched the wallet in range
+    last_transaction_id = Column(Integer)
+    detected_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class TransactionArchive(Base):
+    """One closed year whose transactions moved to their own SQLite file"""
+    __tablename__ = 'transaction_archives'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    year = Column(Integer, nullable=False, unique=True)
+    path = Column(String(500), nullable=False)
+    row_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0.0)  # sum(amount), checked on unarchive
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class ArchivedMonthlySummary(Base):
+    """Per-month totals of archived transactions, kept in the main DB so whole archived months need no ATTACH"""
+    __tablename__ = 'archived_transaction_summaries'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    type = Column(String(20), nullable=False)
+    category_id = Column(Integer)  # no FK: categories may be removed after archiving
+    total_amount = Column(Float, nullable=False, default=0.0)
+    transaction_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('idx_archived_summary_user_month', 'user_id', 'year', 'month', 'type', 'category_id'),
+    )
+
+class OutboxEvent(Base):
+    """
+    One change to a wallet, transaction or asset, written in the same database
+    transaction as the change itself. The id is the stream offset
+    """
+    __tablename__ = 'outbox_events'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    aggregate_type = Column(String(20), nullable=False)  # wallet, transaction, asset
+    aggregate_id = Column(Integer, nullable=False)
+    user_id = Column(Integer)  # no FK: events outlive deleted users until pruned
+    event_type = Column(String(20), nullable=False)  # created, updated, deleted
+    payload = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_outbox_created', 'created_at'),
+    )
+
+class OutboxCursor(Base):
+    """Last event id a durable outbox subscriber has handled"""
+    __tablename__ = 'outbox_cursors'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    subscriber = Column(String(100), nullable=False, unique=True)
+    last_event_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+def journal_legs(trans_type, amount, from_wallet_id, to_wallet_id):
+    """[(wallet_id, account, signed amount)] for one transaction; legs sum to zero"""
+    amount = float(amount or 0.0)
+    def wallet_leg(wallet_id, signed):
+        return (wallet_id, 'wallet' if wallet_id else 'suspense', signed)
+    
+    if trans_type == 'income':
+        return [wallet_leg(to_wallet_id, amount), (None, 'income', -amount)]
+    if trans_type == 'expense':
+        return [wallet_leg(from_wallet_id, -amount), (None, 'expense', amount)]
+    if trans_type == 'transfer':
+        return [wallet_leg(from_wallet_id, -amount), wallet_leg(to_wallet_id, amount)]
+    return []
+
+def posting_rows(transaction_id, user_id, legs, posted_at, sign=1):
+    """Insert parameters for `legs`; sign=-1 writes the reversal"""
+    now = datetime.utcnow()
+    return [{
+        'transaction_id': transaction_id,
+        'user_id': user_id,
+        'wallet_id': wallet_id,
+        'account': account,
+        'amount': sign * signed,
+        'posted_at': posted_at or now,
+        'created_at': now,
+    } for wallet_id, account, signed in legs]
+
+JOURNALED_FIELDS = ('type', 'amount', 'from_wallet_id', 'to_wallet_id', 'transaction_date')
+
+# The journal is written from mapper events on the flush connection, so every ORM
+# path (handlers, services, the write queue) posts in the same database transaction.
+# Core bulk inserts bypass it: LedgerService.backfill_postings() covers those.
+@event.listens_for(Transaction, 'after_insert')
+def _journal_inserted_transaction(mapper, connection, target):
+    rows = posting_rows(
+        target.id, target.user_id,
+        journal_legs(target.type, target.amount, target.from_wallet_id, target.to_wallet_id),
+        target.transaction_date
+    )
+    if rows:
+        connection.execute(Posting.__table__.insert(), rows)
+
+def _reverse_open_legs(connection, transaction_id):
+    """Reversal rows for whatever the transaction's legs currently net to, per leg date"""
+    postings = Posting.__table__
+    open_legs = connection.execute(
+        select(postings.c.user_id, postings.c.wallet_id, postings.c.account,
+               postings.c.posted_at, func.sum(postings.c.amount))
+        .where(postings.c.transaction_id == transaction_id)
+        .group_by(postings.c.user_id, postings.c.wallet_id, postings.c.account, postings.c.posted_at)
+    ).all()
+    rows = []
+    for user_id, wallet_id, account, posted_at, net in open_legs:
+        if abs(net) > 1e-9:
+            rows += posting_rows(transaction_id, user_id, [(wallet_id, account, net)], posted_at, sign=-1)
+    return rows
+
+# Old values come from the journal, not attribute history: an expired instance
+# that is edited or deleted after a commit has no old values loaded
+@event.listens_for(Transaction, 'after_update')
+def _journal_updated_transaction(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[field].history.has_changes() for field in JOURNALED_FIELDS):
+        return
+    # Never rewrite history: reverse the open legs, then post the new ones
+    rows = _reverse_open_legs(connection, target.id)
+    rows += posting_rows(
+        target.id, target.user_id,
+        journal_legs(target.type, target.amount, target.from_wallet_id, target.to_wallet_id),
+        target.transaction_date
+    )
+    if rows:
+        connection.execute(Posting.__table__.insert(), rows)
+
+@event.listens_for(Transaction, 'after_delete')
+def _journal_deleted_transaction(mapper, connection, target):
+    rows = _reverse_open_legs(connection, target.id)
+    if rows:
+        connection.execute(Posting.__table__.insert(), rows)
+
 # Database engine and session with optimizations
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///finance_bot.db')
 
+# Pool settings for server databases (ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+# Per-statement limit on PostgreSQL; 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '15000'))
+
+def _server_pool_args():
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+    }
+
+DB_READ_POOL_SIZE = int(os.getenv('DB_READ_POOL_SIZE', '8'))
+DB_READ_MAX_OVERFLOW = int(os.getenv('DB_READ_MAX_OVERFLOW', '8'))
+
+def create_sqlite_read_engine(url):
+    """
+    Read-only engine (mode=ro, query_only) over the same SQLite file as `url`,
+    or None for in-memory databases. Writes through it raise OperationalError
+    """
+    if not url.database or url.database == ':memory:':
+        return None
+
+    read_engine = create_engine(
+        f"sqlite:///file:{quote(url.database)}?mode=ro&uri=true",
+        echo=False,
+        pool_pre_ping=True,
+        pool_size=DB_READ_POOL_SIZE,
+        max_overflow=DB_READ_MAX_OVERFLOW,
+        connect_args={
+            "check_same_thread": False,
+            "timeout": 30
+        }
+    )
+
+    @event.listens_for(read_engine, "connect")
+    def set_sqlite_read_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA query_only=ON")
+        cursor.execute("PRAGMA cache_size=10000")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
+        cursor.close()
+
+    return read_engine
+
 # SQLite optimizations
-if 'sqlite' in DATABASE_URL:
+if DATABASE_URL.startswith('sqlite'):
     engine = create_engine(
         DATABASE_URL, 
         echo=False,
@@ -162,16 +450,97 @@ if 'sqlite' in DATABASE_URL:
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
+        # Only takes effect on a new file; existing ones are converted in the maintenance window
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
         cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute("PRAGMA synchronous=NORMAL")
         cursor.execute("PRAGMA cache_size=10000")
         cursor.execute("PRAGMA temp_store=MEMORY")
         cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
         cursor.close()
+
+    # Reports and listings read through their own read-only pool, so long reads
+    # never queue behind (or hold connections needed by) the write paths
+    read_engine = create_sqlite_read_engine(engine.url) or engine
+elif DATABASE_URL.startswith('postgresql'):
+    # Timeouts are session settings sent at connect time, so they survive pool recycling
+    options = "-c idle_in_transaction_session_timeout=60000"
+    if DB_STATEMENT_TIMEOUT_MS:
+        options += f" -c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        pool_pre_ping=True,
+        connect_args={
+            "options": options,
+            "application_name": "monman-bot",
+            "connect_timeout": 10
+        },
+        **_server_pool_args()
+    )
 else:
-    engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
+    # Partial indexes, the ledger and backups are built for these two only
+    raise ValueError(
+        f"Unsupported DATABASE_URL backend '{DATABASE_URL.split(':', 1)[0]}': use sqlite:/// or postgresql://"
+    )
+
+if not DATABASE_URL.startswith('sqlite'):
+    # Server databases handle concurrent readers themselves; share the pool
+    read_engine = engine
+
+DB_BACKEND = engine.dialect.name
+
+class PoolMetrics:
+    """Checkout counters for one engine's connection pool"""
+
+    def __init__(self, name, target_engine):
+        self.name = name
+        self.engine = target_engine
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        event.listen(target_engine, "connect", self._on_connect)
+        event.listen(target_engine, "checkout", self._on_checkout)
+        event.listen(target_engine, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self):
+        pool = self.engine.pool
+        return {
+            'connects': self.connects,
+            'checkouts': self.checkouts,
+            'checked_out': self.checked_out,
+            'peak_checked_out': self.peak_checked_out,
+            'pool_size': pool.size() if hasattr(pool, 'size') else None,
+            'overflow': pool.overflow() if hasattr(pool, 'overflow') else None,
+        }
+
+pool_metrics = {'write': PoolMetrics('write', engine)}
+if read_engine is not engine:
+    pool_metrics['read'] = PoolMetrics('read', read_engine)
+
+def get_pool_metrics():
+    """{'write': {...}, 'read': {...}}; 'read' is absent when reads share the write pool"""
+    return {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only sessions for reports, listings and portfolio views; any write raises
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 def create_tables():
     """Create all tables with indexes"""
@@ -185,12 +554,19 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Get read-only database session with proper cleanup"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def get_user_by_telegram_id(db, telegram_id: int):
     """Get user by telegram ID with optimized query"""
-    return db.query(User).filter(
-        User.telegram_id == telegram_id,
-        User.is_active == True
-    ).first()
+    # Imported here: queries.py builds its statements from the models above
+    from src.models.queries import fetch_user_by_telegram_id
+    return fetch_user_by_telegram_id(db, telegram_id)
 
 def create_or_update_user(db, telegram_user):
     """Create new user or update existing user info"""
@@ -230,20 +606,23 @@ class Asset(Base):
     return_value = Column(Float, default=0.0)  # Calculated return
     return_percent = Column(Float, default=0.0)  # Return percentage
     last_sync = Column(DateTime)  # Last price sync
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version_id = Column(Integer, nullable=False, default=1, server_default=text('1'))  # optimistic concurrency
     
     # Relationships
     user = relationship("User", backref="assets")
     wallet = relationship("Wallet", backref="assets")
     
+    __mapper_args__ = {'version_id_col': version_id}
+    
     # Indexes for performance
     __table_args__ = (
-        Index('idx_asset_user_active', 'user_id', 'is_active'),
-        Index('idx_asset_wallet_active', 'wallet_id', 'is_active'),
+        Index('idx_asset_active_user_name', 'user_id', 'name', **ACTIVE_ONLY),
+        Index('idx_asset_active_wallet', 'wallet_id', **ACTIVE_ONLY),
         Index('idx_asset_type_symbol', 'asset_type', 'symbol'),
-        Index('idx_asset_user_type', 'user_id', 'asset_type', 'is_active'),
+        Index('idx_asset_active_user_type', 'user_id', 'asset_type', 'name', **ACTIVE_ONLY),
     )
     
     def __repr__(self):
@@ -276,3 +655,106 @@ class Asset(Base):
         """Get total purchase cost"""
         actual_quantity = self.get_actual_quantity()
         return self.buy_price * actual_quantity
+
+# Columns carried in each outbox event payload; bookkeeping columns are left out
+OUTBOX_FIELDS = {
+    'wallet': ('name', 'type', 'balance', 'is_active'),
+    'transaction': ('type', 'amount', 'category_id', 'from_wallet_id', 'to_wallet_id', 'transaction_date'),
+    'asset': ('wallet_id', 'asset_type', 'symbol', 'quantity', 'buy_price', 'last_price', 'is_active'),
+}
+
+def _outbox_value(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+def record_outbox_event(connection, aggregate_type, aggregate_id, user_id, event_type, payload):
+    """
+    Append one outbox event on `connection`, i.e. inside the caller's transaction.
+    Mapper events below cover ORM writes; Core/bulk writes to wallets,
+    transactions or assets must call this themselves
+    """
+    connection.execute(OutboxEvent.__table__.insert(), [{
+        'aggregate_type': aggregate_type,
+        'aggregate_id': aggregate_id,
+        'user_id': user_id,
+        'event_type': event_type,
+        'payload': json.dumps({key: _outbox_value(value) for key, value in payload.items()}),
+        'created_at': datetime.utcnow(),
+    }])
+    _bump_data_version(connection, user_id)
+
+# Plain SQL so users.updated_at (onupdate) is left alone
+BUMP_DATA_VERSION = text("UPDATE users SET data_version = data_version + 1 WHERE id = :user_id")
+
+def _bump_data_version(connection, user_id):
+    """
+    Bump users.data_version once per user per (sub)transaction: a save that
+    writes a transaction and its wallet balance costs one UPDATE, not two.
+    A rolled-back savepoint takes its bump with it, so later writes bump again
+    """
+    if user_id is None:
+        return
+    transaction = connection.get_nested_transaction() or connection.get_transaction()
+    bumped = connection.info.get('data_version_bumped')
+    if bumped is None or bumped[0] is not transaction:
+        bumped = (transaction, set())
+        connection.info['data_version_bumped'] = bumped
+    if user_id not in bumped[1]:
+        connection.execute(BUMP_DATA_VERSION, {'user_id': user_id})
+        bumped[1].add(user_id)
+
+def _mark_outbox_pending(target):
+    # Lets the dispatcher wake on commit instead of waiting for its next poll
+    session = object_session(target)
+    if session is not None:
+        session.info['outbox_pending'] = True
+
+def _outbox_listeners(model, aggregate_type):
+    fields = OUTBOX_FIELDS[aggregate_type]
+
+    def payload(target):
+        return {field: getattr(target, field) for field in fields}
+
+    @event.listens_for(model, 'after_insert')
+    def _outbox_created(mapper, connection, target):
+        record_outbox_event(connection, aggregate_type, target.id, target.user_id, 'created', payload(target))
+        _mark_outbox_pending(target)
+
+    @event.listens_for(model, 'after_update')
+    def _outbox_updated(mapper, connection, target):
+        # after_update also fires for objects that were dirty but had no net change
+        state = inspect(target)
+        changed = [field for field in fields if state.attrs[field].history.has_changes()]
+        if not changed:
+            return
+        record_outbox_event(connection, aggregate_type, target.id, target.user_id, 'updated',
+                            dict(payload(target), changed=changed))
+        _mark_outbox_pending(target)
+
+    # before_delete: an expired instance can still load its columns here, the row is gone afterwards
+    @event.listens_for(model, 'before_delete')
+    def _outbox_deleted(mapper, connection, target):
+        record_outbox_event(connection, aggregate_type, target.id, target.user_id, 'deleted', payload(target))
+        _mark_outbox_pending(target)
+
+_outbox_listeners(Wallet, 'wallet')
+_outbox_listeners(Transaction, 'transaction')
+_outbox_listeners(Asset, 'asset')
+
+@event.listens_for(Transaction, 'before_insert')
+def _set_local_date(mapper, connection, target):
+    # The column default would only fill transaction_date after this point
+    if target.transaction_date is None:
+        target.transaction_date = datetime.utcnow()
+    if target.local_date is None:
+        target.local_date = local_day(target.transaction_date, user_timezone(connection, target.user_id))
+
+@event.listens_for(Transaction, 'before_update')
+def _update_local_date(mapper, connection, target):
+    if inspect(target).attrs.transaction_date.history.has_changes():
+        target.local_date = local_day(target.transaction_date, user_timezone(connection, target.user_id))
+
+@event.listens_for(User, 'after_update')
+def _forget_changed_timezone(mapper, connection, target):
+    # Existing local_date keys are re-derived by TimeBucketService.set_user_timezone
+    if inspect(target).attrs.timezone.history.has_changes():
+        forget_user_timezone(target.id)
@@ -0,0 +1,55 @@
+"""
+Pre-built statements for the hottest lookups (run on nearly every tap).
+
+Each statement is constructed once at import with bindparam() placeholders, so
+a call only binds values: no Query/select() construction per call, and the
+compiled SQL comes straight from SQLAlchemy's cache for the same statement
+object. scripts/benchmark_hot_queries.py measures the difference.
+"""
+from sqlalchemy import select, func, bindparam
+from src.models.database import User, Wallet, Transaction
+
+USER_BY_TELEGRAM_ID = select(User).where(
+    User.telegram_id == bindparam('telegram_id'),
+    User.is_active == True
+).limit(1)
+
+ACTIVE_WALLETS_BY_USER = select(Wallet).where(
+    Wallet.user_id == bindparam('user_id'),
+    Wallet.is_active == True
+).order_by(Wallet.name)
+
+ACTIVE_WALLET_BY_ID = select(Wallet).where(
+    Wallet.id == bindparam('wallet_id'),
+    Wallet.user_id == bindparam('user_id'),
+    Wallet.is_active == True
+).limit(1)
+
+PERIOD_TOTALS_BY_TYPE = select(
+    Transaction.type,
+    func.sum(Transaction.amount),
+    func.count(Transaction.id)
+).where(
+    Transaction.user_id == bindparam('user_id'),
+    Transaction.transaction_date >= bindparam('start_date'),
+    Transaction.transaction_date <= bindparam('end_date')
+).group_by(Transaction.type)
+
+def fetch_user_by_telegram_id(db, telegram_id: int):
+    """Active user for a Telegram id, or None"""
+    return db.execute(USER_BY_TELEGRAM_ID, {'telegram_id': telegram_id}).scalars().first()
+
+def fetch_active_wallets(db, user_id: int):
+    """User's active wallets ordered by name"""
+    return db.execute(ACTIVE_WALLETS_BY_USER, {'user_id': user_id}).scalars().all()
+
+def fetch_active_wallet(db, user_id: int, wallet_id: int):
+    """One active wallet owned by the user, or None"""
+    return db.execute(ACTIVE_WALLET_BY_ID, {'user_id': user_id, 'wallet_id': wallet_id}).scalars().first()
+
+def fetch_period_totals_by_type(db, user_id: int, start_date, end_date):
+    """[(type, sum(amount), count)] for the user's transactions in [start_date, end_date]"""
+    return db.execute(
+        PERIOD_TOTALS_BY_TYPE,
+        {'user_id': user_id, 'start_date': start_date, 'end_date': end_date}
+    ).all()
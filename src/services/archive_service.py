@@ -0,0 +1,490 @@
+"""
+Yearly transaction archives (SQLite): a closed year moves out of the main file
+into archive/transactions_<year>.db, leaving per-month summaries behind.
+Reports that reach into an archived year add the archived part to what the
+main tables return: whole months from the summaries, anything finer from the
+archive files ATTACHed read-only to a separate reader engine, so the hot pools
+never carry the attachments
+"""
+from sqlalchemy import Table, Column, Integer, MetaData, Index, create_engine, event, select, func, cast, and_, not_, desc
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker, aliased
+from src.models.database import (
+    Transaction, Category, Wallet, TransactionArchive, ArchivedMonthlySummary, create_sqlite_read_engine
+)
+from src.utils.time_buckets import local_day, to_local, user_timezone
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import quote, unquote
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Default: an archive/ directory next to the main database file
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', '')
+# How long a process trusts its copy of the archive manifest
+ARCHIVE_MANIFEST_TTL = float(os.getenv('ARCHIVE_MANIFEST_TTL', '60'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '5000'))
+
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Derived from transaction_date and users.timezone: not stored in archive files
+# (older files predate it) and re-derived when a year is restored
+ARCHIVE_SKIPPED_COLUMNS = {'local_date'}
+
+# main database path -> (loaded_at, {year: archive path})
+_manifests = {}
+_manifests_lock = threading.Lock()
+
+# The reader engine is rebuilt whenever the set of archives changes
+_reader = {'key': None, 'engine': None, 'sessionmaker': None}
+_reader_lock = threading.Lock()
+
+def archive_schema(year: int) -> str:
+    return f"archive_{year}"
+
+@lru_cache(maxsize=None)
+def archive_table(year: int = None):
+    """
+    The transactions table inside an archive file: same columns, no foreign keys
+    (the referenced tables stay in the main file). With a year it is qualified
+    with that archive's ATTACH schema
+    """
+    table = Table(
+        'transactions',
+        MetaData(schema=archive_schema(year) if year else None),
+        *[Column(column.name, column.type, primary_key=column.primary_key)
+          for column in Transaction.__table__.columns if column.name not in ARCHIVE_SKIPPED_COLUMNS]
+    )
+    Index('idx_archive_user_date', table.c.user_id, table.c.transaction_date,
+          table.c.type, table.c.amount, table.c.category_id)
+    return table
+
+def year_bounds(year: int):
+    """[start, end) of a calendar year"""
+    return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+
+def _next_month(moment: datetime) -> datetime:
+    if moment.month == 12:
+        return datetime(moment.year + 1, 1, 1)
+    return datetime(moment.year, moment.month + 1, 1)
+
+def _whole_months(start: datetime, end: datetime):
+    """[first, stop): the span of whole months inside the closed range [start, end], or None"""
+    first = start if (start.day, start.time()) == (1, datetime.min.time()) else _next_month(start)
+    stop = datetime(end.year, end.month, 1)
+    # Report ranges end at the last instant of a month (next month - 1us)
+    if end >= _next_month(stop) - ONE_MICROSECOND:
+        stop = _next_month(stop)
+    return (first, stop) if first < stop else None
+
+def _database_path(bind) -> str:
+    """File path behind an engine, including read-only 'file:...?mode=ro' URIs"""
+    database = bind.url.database or ''
+    if database.startswith('file:'):
+        database = unquote(database[len('file:'):].split('?', 1)[0])
+    return os.path.abspath(database)
+
+def invalidate_archive_manifest():
+    """Forget cached manifests (after archiving or unarchiving in this process)"""
+    with _manifests_lock:
+        _manifests.clear()
+
+def _reader_sessionmaker(main_path: str, archives: dict):
+    """Sessions on the main file (read-only) with every archive ATTACHed read-only"""
+    key = (main_path, tuple(sorted(archives.items())))
+    with _reader_lock:
+        if _reader['key'] != key:
+            if _reader['engine'] is not None:
+                _reader['engine'].dispose()
+            engine = create_sqlite_read_engine(make_url(f"sqlite:///{main_path}"))
+
+            @event.listens_for(engine, "connect")
+            def attach_archives(dbapi_connection, connection_record):
+                cursor = dbapi_connection.cursor()
+                for year, path in key[1]:
+                    cursor.execute(
+                        f"ATTACH DATABASE ? AS {archive_schema(year)}",
+                        (f"file:{quote(path)}?mode=ro",)
+                    )
+                cursor.close()
+
+            _reader.update(key=key, engine=engine, sessionmaker=sessionmaker(
+                autocommit=False, autoflush=False, bind=engine
+            ))
+        return _reader['sessionmaker']
+
+class ArchiveService:
+    """Move closed years to archive files and read them back for reports"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.bind = db.get_bind()
+
+    @property
+    def supported(self) -> bool:
+        return self.bind.dialect.name == 'sqlite' and bool(self.bind.url.database) \
+            and self.bind.url.database != ':memory:'
+
+    def archive_dir(self) -> Path:
+        if ARCHIVE_DIR:
+            return Path(ARCHIVE_DIR).resolve()
+        return Path(_database_path(self.bind)).parent / 'archive'
+
+    def archive_path(self, year: int) -> Path:
+        return self.archive_dir() / f"transactions_{year}.db"
+
+    def archived_years(self):
+        """{year: archive path} from the manifest, cached for ARCHIVE_MANIFEST_TTL"""
+        if not self.supported:
+            return {}
+        main_path = _database_path(self.bind)
+        now = time.monotonic()
+        with _manifests_lock:
+            cached = _manifests.get(main_path)
+            if cached and now - cached[0] < ARCHIVE_MANIFEST_TTL:
+                return cached[1]
+        try:
+            years = {row.year: row.path for row in self.db.query(TransactionArchive.year, TransactionArchive.path).all()}
+        except OperationalError:
+            # Manifest table not created yet (migration pending): nothing is archived
+            self.db.rollback()
+            years = {}
+        with _manifests_lock:
+            _manifests[main_path] = (now, years)
+        return years
+
+    def overlapping_years(self, start_date: datetime, end_date: datetime):
+        """Archived years that intersect [start_date, end_date]"""
+        archived = self.archived_years()
+        if not archived:
+            return []
+        return [year for year in sorted(archived) if start_date.year <= year <= end_date.year]
+
+    def reader(self) -> Session:
+        """Read-only session with the archives attached; the caller closes it"""
+        return _reader_sessionmaker(_database_path(self.bind), self.archived_years())()
+
+    def _split(self, start_date: datetime, end_date: datetime, years):
+        """
+        ([(year, month)] served by the summaries, [(year, condition)] to read from
+        the archive files) for the archived part of [start_date, end_date]
+        """
+        summary_months = []
+        raw = []
+        for year in years:
+            year_start, year_end = year_bounds(year)
+            clip_start = max(start_date, year_start)
+            clip_end = min(end_date, year_end - ONE_MICROSECOND)
+            table = archive_table(year)
+            in_range = and_(table.c.transaction_date >= clip_start, table.c.transaction_date <= clip_end)
+            months = _whole_months(clip_start, clip_end)
+            if months is None:
+                raw.append((year, in_range))
+                continue
+            first, stop = months
+            month = first
+            while month < stop:
+                summary_months.append((month.year, month.month))
+                month = _next_month(month)
+            if clip_start < first or clip_end >= stop:
+                raw.append((year, and_(in_range, not_(and_(
+                    table.c.transaction_date >= first, table.c.transaction_date < stop
+                )))))
+        return summary_months, raw
+
+    def period_rows(self, user_id: int, start_date: datetime, end_date: datetime):
+        """[(category_id, type, sum(amount), count)] of archived transactions in [start_date, end_date]"""
+        years = self.overlapping_years(start_date, end_date)
+        if not years:
+            return []
+        summary_months, raw = self._split(start_date, end_date, years)
+
+        rows = []
+        if summary_months:
+            month_key = ArchivedMonthlySummary.year * 100 + ArchivedMonthlySummary.month
+            rows += self.db.query(
+                ArchivedMonthlySummary.category_id,
+                ArchivedMonthlySummary.type,
+                func.sum(ArchivedMonthlySummary.total_amount),
+                func.sum(ArchivedMonthlySummary.transaction_count)
+            ).filter(
+                ArchivedMonthlySummary.user_id == user_id,
+                month_key.in_([year * 100 + month for year, month in summary_months])
+            ).group_by(ArchivedMonthlySummary.category_id, ArchivedMonthlySummary.type).all()
+
+        if raw:
+            reader = self.reader()
+            try:
+                for year, condition in raw:
+                    table = archive_table(year)
+                    rows += reader.execute(
+                        select(table.c.category_id, table.c.type, func.sum(table.c.amount), func.count(table.c.id))
+                        .where(table.c.user_id == user_id, condition)
+                        .group_by(table.c.category_id, table.c.type)
+                    ).all()
+            finally:
+                reader.close()
+        return rows
+
+    def day_rows(self, user_id: int, start_date: datetime, end_date: datetime):
+        """[(day, type, sum(amount), count)] of archived transactions in [start_date, end_date]"""
+        years = self.overlapping_years(start_date, end_date)
+        if not years:
+            return []
+        rows = []
+        reader = self.reader()
+        try:
+            for year in years:
+                table = archive_table(year)
+                day = func.date(table.c.transaction_date)
+                rows += reader.execute(
+                    select(day, table.c.type, func.sum(table.c.amount), func.count(table.c.id))
+                    .where(table.c.user_id == user_id,
+                           table.c.transaction_date >= start_date,
+                           table.c.transaction_date <= end_date)
+                    .group_by(day, table.c.type)
+                ).all()
+        finally:
+            reader.close()
+        return rows
+
+    def day_category_rows(self, user_id: int, start_date: datetime, end_date: datetime, zone_name: str = None):
+        """
+        [(local day, category_id, type, sum(amount), count)] of archived transactions
+        in [start_date, end_date]. Archive files carry no local_date: when the
+        zone's UTC offset is the same over the whole range the day is shifted in
+        SQL, otherwise (a DST change inside the range) rows are grouped per UTC
+        minute and each minute is mapped to its day in zone_name
+        """
+        years = self.overlapping_years(start_date, end_date)
+        if not years:
+            return []
+        offset = to_local(start_date, zone_name) - start_date
+        fixed_offset = to_local(end_date, zone_name) - end_date == offset
+        buckets = {}
+        reader = self.reader()
+        try:
+            for year in years:
+                table = archive_table(year)
+                if fixed_offset:
+                    group = func.date(table.c.transaction_date, f"{int(offset.total_seconds() // 60):+d} minutes")
+                else:
+                    group = func.strftime('%Y-%m-%d %H:%M', table.c.transaction_date)
+                for group_value, category_id, trans_type, amount, count in reader.execute(
+                    select(group, table.c.category_id, table.c.type, func.sum(table.c.amount), func.count(table.c.id))
+                    .where(table.c.user_id == user_id,
+                           table.c.transaction_date >= start_date,
+                           table.c.transaction_date <= end_date)
+                    .group_by(group, table.c.category_id, table.c.type)
+                ):
+                    if fixed_offset:
+                        day = date.fromisoformat(group_value)
+                    else:
+                        day = local_day(datetime.strptime(group_value, '%Y-%m-%d %H:%M'), zone_name)
+                    bucket = buckets.setdefault((day, category_id, trans_type), [0.0, 0])
+                    bucket[0] += float(amount or 0.0)
+                    bucket[1] += count
+        finally:
+            reader.close()
+        return [(day, category_id, trans_type, amount, count)
+                for (day, category_id, trans_type), (amount, count) in buckets.items()]
+
+    def latest_rows(self, user_id: int, start_date: datetime, end_date: datetime, limit: int):
+        """Newest archived (type, amount, description, transaction_date, id) rows in range, newest first"""
+        years = self.overlapping_years(start_date, end_date)
+        rows = []
+        if not years:
+            return rows
+        reader = self.reader()
+        try:
+            # Newest year first; stop once a whole page came from later years
+            for year in reversed(years):
+                table = archive_table(year)
+                rows += reader.execute(
+                    select(table.c.type, table.c.amount, table.c.description, table.c.transaction_date, table.c.id)
+                    .where(table.c.user_id == user_id,
+                           table.c.transaction_date >= start_date,
+                           table.c.transaction_date <= end_date)
+                    .order_by(desc(table.c.transaction_date), desc(table.c.id))
+                    .limit(limit)
+                ).all()
+                if len(rows) >= limit:
+                    break
+        finally:
+            reader.close()
+        return rows[:limit]
+
+    def iter_export_rows(self, user_id: int, batch_size: int = 1000):
+        """
+        Archived transactions oldest first, shaped like
+        ReportQueryService.iter_export_rows (names joined from the main file)
+        """
+        years = sorted(self.archived_years())
+        if not years:
+            return
+        from_wallet = aliased(Wallet.__table__, name='from_wallet')
+        to_wallet = aliased(Wallet.__table__, name='to_wallet')
+        reader = self.reader()
+        try:
+            for year in years:
+                table = archive_table(year)
+                statement = select(
+                    table.c.id, table.c.type, table.c.amount, table.c.description, table.c.transaction_date,
+                    Category.__table__.c.name.label('category_name'),
+                    from_wallet.c.name.label('from_wallet_name'),
+                    to_wallet.c.name.label('to_wallet_name'),
+                    table.c.notes
+                ).select_from(
+                    table.outerjoin(Category.__table__, table.c.category_id == Category.__table__.c.id)
+                    .outerjoin(from_wallet, table.c.from_wallet_id == from_wallet.c.id)
+                    .outerjoin(to_wallet, table.c.to_wallet_id == to_wallet.c.id)
+                ).where(table.c.user_id == user_id).order_by(table.c.transaction_date, table.c.id)
+                yield from reader.execute(statement.execution_options(yield_per=batch_size))
+        finally:
+            reader.close()
+
+    def archive_year(self, year: int, batch_size: int = None):
+        """
+        Move every transaction dated in `year` into its archive file and replace
+        them with monthly summaries. Only closed years; re-running a year appends
+        rows added (backdated) since. Returns {'year', 'moved', 'row_count', 'path'}
+        """
+        if not self.supported:
+            raise ValueError("Arsip hanya didukung untuk database SQLite berbasis file")
+        if year >= datetime.now().year:
+            raise ValueError(f"{year} belum ditutup; hanya tahun yang sudah lewat yang bisa diarsipkan")
+        batch_size = batch_size or ARCHIVE_BATCH_SIZE
+
+        source = Transaction.__table__
+        year_start, year_end = year_bounds(year)
+        # Never move the newest row: SQLite (no AUTOINCREMENT) would hand its id
+        # out again, and the postings journal keys legs by transaction id
+        newest_id = self.db.query(func.max(source.c.id)).scalar() or 0
+        in_year = and_(source.c.transaction_date >= year_start, source.c.transaction_date < year_end,
+                       source.c.id < newest_id)
+        max_id = self.db.execute(select(func.max(source.c.id)).where(in_year)).scalar()
+        path = self.archive_path(year)
+        if max_id is None:
+            return {'year': year, 'moved': 0, 'row_count': 0, 'path': str(path)}
+
+        manifest = self.db.query(TransactionArchive).filter(TransactionArchive.year == year).first()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        archive_engine = create_engine(f"sqlite:///{path}")
+        table = archive_table()
+        try:
+            table.metadata.create_all(archive_engine)
+            moved = 0
+            with archive_engine.begin() as archive_conn:
+                if manifest is None:
+                    # Leftovers of an interrupted first run
+                    archive_conn.execute(table.delete())
+                after_id = 0
+                while True:
+                    rows = self.db.execute(
+                        select(*[source.c[column.name] for column in table.columns])
+                        .where(in_year, source.c.id > after_id, source.c.id <= max_id)
+                        .order_by(source.c.id).limit(batch_size)
+                    ).mappings().all()
+                    if not rows:
+                        break
+                    archive_conn.execute(table.insert().prefix_with('OR REPLACE'), [dict(row) for row in rows])
+                    moved += len(rows)
+                    after_id = rows[-1]['id']
+
+            with archive_engine.connect() as archive_conn:
+                row_count, total_amount = archive_conn.execute(
+                    select(func.count(table.c.id), func.coalesce(func.sum(table.c.amount), 0.0))
+                ).one()
+                month = cast(func.strftime('%m', table.c.transaction_date), Integer)
+                summaries = archive_conn.execute(
+                    select(table.c.user_id, month, table.c.type, table.c.category_id,
+                           func.sum(table.c.amount), func.count(table.c.id))
+                    .group_by(table.c.user_id, month, table.c.type, table.c.category_id)
+                ).all()
+        finally:
+            archive_engine.dispose()
+
+        copied_count, copied_total = self.db.execute(
+            select(func.count(source.c.id), func.coalesce(func.sum(source.c.amount), 0.0))
+            .where(in_year, source.c.id <= max_id)
+        ).one()
+        previous_count = manifest.row_count if manifest else 0
+        previous_total = manifest.total_amount if manifest else 0.0
+        if copied_count != moved or row_count != previous_count + moved or \
+                abs(total_amount - previous_total - copied_total) > 0.005:
+            raise ValueError(f"Arsip {year} tidak cocok dengan data sumber; tidak ada yang dihapus")
+
+        # One main-file transaction: summaries, manifest and the delete land together
+        self.db.query(ArchivedMonthlySummary).filter(ArchivedMonthlySummary.year == year).delete(synchronize_session=False)
+        self.db.execute(ArchivedMonthlySummary.__table__.insert(), [{
+            'user_id': user_id, 'year': year, 'month': month_number, 'type': trans_type,
+            'category_id': category_id, 'total_amount': float(amount or 0.0), 'transaction_count': count
+        } for user_id, month_number, trans_type, category_id, amount, count in summaries])
+        if manifest is None:
+            manifest = TransactionArchive(year=year)
+            self.db.add(manifest)
+        manifest.path = str(path)
+        manifest.row_count = row_count
+        manifest.total_amount = float(total_amount)
+        manifest.archived_at = datetime.utcnow()
+        # Core delete: the postings journal keeps the legs, balances are unchanged
+        self.db.execute(source.delete().where(in_year, source.c.id <= max_id))
+        self.db.commit()
+        invalidate_archive_manifest()
+        logger.info(f"Archived {moved} transactions of {year} to {path}")
+        return {'year': year, 'moved': moved, 'row_count': row_count, 'path': str(path)}
+
+    def unarchive_year(self, year: int, batch_size: int = None):
+        """Move an archived year back into the main tables and delete its archive file. Returns rows restored"""
+        batch_size = batch_size or ARCHIVE_BATCH_SIZE
+        manifest = self.db.query(TransactionArchive).filter(TransactionArchive.year == year).first()
+        if manifest is None:
+            raise ValueError(f"Tahun {year} tidak ada di arsip")
+        path = Path(manifest.path)
+        if not path.exists():
+            raise ValueError(f"File arsip {path} tidak ditemukan")
+
+        archive_engine = create_engine(f"sqlite:///file:{quote(str(path))}?mode=ro&uri=true")
+        table = archive_table()
+        restored = 0
+        try:
+            with archive_engine.connect() as archive_conn:
+                row_count, total_amount = archive_conn.execute(
+                    select(func.count(table.c.id), func.coalesce(func.sum(table.c.amount), 0.0))
+                ).one()
+                if row_count != manifest.row_count or abs(total_amount - manifest.total_amount) > 0.005:
+                    raise ValueError(f"File arsip {path} tidak cocok dengan manifest")
+                after_id = 0
+                while True:
+                    rows = archive_conn.execute(
+                        select(table).where(table.c.id > after_id).order_by(table.c.id).limit(batch_size)
+                    ).mappings().all()
+                    if not rows:
+                        break
+                    # Core insert: the legs of these transactions are still in the journal
+                    self.db.execute(Transaction.__table__.insert(), [
+                        dict(row, local_date=local_day(row['transaction_date'], user_timezone(self.db, row['user_id'])))
+                        for row in rows
+                    ])
+                    restored += len(rows)
+                    after_id = rows[-1]['id']
+        finally:
+            archive_engine.dispose()
+
+        self.db.query(ArchivedMonthlySummary).filter(ArchivedMonthlySummary.year == year).delete(synchronize_session=False)
+        self.db.delete(manifest)
+        self.db.commit()
+        invalidate_archive_manifest()
+        with _reader_lock:
+            if _reader['engine'] is not None:
+                _reader['engine'].dispose()
+            _reader.update(key=None, engine=None, sessionmaker=None)
+        path.unlink()
+        logger.info(f"Restored {restored} transactions of {year} from {path}")
+        return restored
@@ -2,21 +2,50 @@ import requests
 import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
-from src.models.database import Asset
+from sqlalchemy.orm.attributes import set_committed_value
+from src.models.database import Asset, OUTBOX_FIELDS, record_outbox_event
+from src.services.write_queue_service import write_queue_enabled, get_write_queue, WRITE_QUEUE_RESULT_TIMEOUT
+from src.services.optimistic_lock_service import run_with_retry
 
 logger = logging.getLogger(__name__)
 
+def _apply_asset_values(session, asset_id, values, user_id=None, event_payload=None):
+    """Write-queue job: store synced price fields for one asset"""
+    # Bulk UPDATE skips the ORM version check, so bump the version by hand:
+    # a concurrent edit of this asset then sees a conflict instead of overwriting
+    versioned = dict(values, version_id=Asset.version_id + 1)
+    session.query(Asset).filter(Asset.id == asset_id).update(versioned, synchronize_session=False)
+    # ...and skips the mapper events, so write the outbox event here, in the same transaction
+    if event_payload is not None:
+        record_outbox_event(session.connection(), 'asset', asset_id, user_id, 'updated', event_payload)
+        session.info['outbox_pending'] = True
+    return asset_id
+
+def _price_values(asset, new_price):
+    """Synced price fields for an asset at `new_price`"""
+    return {
+        'last_price': new_price,
+        'last_sync': datetime.utcnow(),
+        'return_value': (new_price - asset.buy_price) * asset.quantity,
+        'return_percent': ((new_price - asset.buy_price) / asset.buy_price) * 100 if asset.buy_price > 0 else 0.0
+    }
+
 class AssetService:
     def update_asset(self, asset_id, user_id, **kwargs):
-        asset = self.db.query(Asset).filter(Asset.id == asset_id, Asset.user_id == user_id, Asset.is_active == True).first()
-        if not asset:
-            return None
-        for k, v in kwargs.items():
-            if hasattr(asset, k):
-                setattr(asset, k, v)
-        asset.updated_at = datetime.utcnow()
-        self.db.commit()
-        self.db.refresh(asset)
+        def job(db):
+            asset = db.query(Asset).filter(Asset.id == asset_id, Asset.user_id == user_id, Asset.is_active == True).first()
+            if not asset:
+                return None
+            for k, v in kwargs.items():
+                if hasattr(asset, k):
+                    setattr(asset, k, v)
+            asset.updated_at = datetime.utcnow()
+            db.commit()
+            return asset
+        
+        asset = run_with_retry(self.db, 'update_asset', job)
+        if asset:
+            self.db.refresh(asset)
         return asset
 
     def delete_asset(self, asset_id, user_id):
@@ -64,14 +93,27 @@ class AssetService:
         return q.order_by(Asset.name).all()
 
     def update_asset_price(self, asset: Asset, new_price: float):
-        asset.last_price = new_price
-        asset.last_sync = datetime.utcnow()
-        asset.return_value = (new_price - asset.buy_price) * asset.quantity
-        if asset.buy_price > 0:
-            asset.return_percent = ((new_price - asset.buy_price) / asset.buy_price) * 100
-        else:
-            asset.return_percent = 0.0
-        self.db.commit()
+        if write_queue_enabled():
+            values = _price_values(asset, new_price)
+            event_payload = {field: values.get(field, getattr(asset, field)) for field in OUTBOX_FIELDS['asset']}
+            event_payload['changed'] = [field for field in OUTBOX_FIELDS['asset'] if field in values]
+            # Price syncs from many users share the writer's group commits
+            get_write_queue().submit(
+                _apply_asset_values, asset.id, values, asset.user_id, event_payload
+            ).result(WRITE_QUEUE_RESULT_TIMEOUT)
+            values['version_id'] = asset.version_id + 1
+            for key, value in values.items():
+                set_committed_value(asset, key, value)
+            return asset
+        
+        def job(db):
+            # After a conflict `asset` is expired, so this recomputes from the fresh row
+            for key, value in _price_values(asset, new_price).items():
+                setattr(asset, key, value)
+            db.commit()
+            return asset
+        
+        run_with_retry(self.db, 'update_asset_price', job)
         self.db.refresh(asset)
         return asset
 
@@ -0,0 +1,198 @@
+"""
+Category codes from the transaction keyboard ("food", "salary", ...) mapped to
+categories rows, served from one process-wide in-memory cache: every active
+category is loaded once and reloaded after a commit that changed one (which
+also bumps data_version of the users whose cached reports show it)
+"""
+from typing import NamedTuple
+from sqlalchemy import event, bindparam, inspect, select, text
+from sqlalchemy.orm import Session
+from src.models.database import Category, Transaction, BUMP_DATA_VERSION
+from src.utils.helpers import get_category_name
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keyboard code -> (type, icon, other accepted names). The row's name is
+# get_category_name(code); the aliases match the default categories created
+# by migrations/init_db_enhanced.py
+CATEGORY_CODES = {
+    'salary': ('income', '💰', ()),
+    'business': ('income', '💼', ()),
+    'gift': ('income', '🎁', ()),
+    'investment_income': ('income', '📈', ('Investasi',)),
+    'rental': ('income', '🏠', ()),
+    'other_income': ('income', '🎯', ('Lainnya',)),
+    'food': ('expense', '🍽️', ()),
+    'housing': ('expense', '🏠', ()),
+    'transport': ('expense', '🚗', ()),
+    'shopping': ('expense', '👕', ()),
+    'health': ('expense', '🏥', ()),
+    'education': ('expense', '📚', ()),
+    'entertainment': ('expense', '🎬', ()),
+    'other_expense': ('expense', '🎯', ('Lainnya',)),
+}
+
+# Entries made without the category keyboard (/in, /out) and legacy rows
+DEFAULT_CATEGORY_CODES = {'income': 'other_income', 'expense': 'other_expense'}
+
+class CategoryInfo(NamedTuple):
+    name: str
+    icon: str
+    type: str
+
+# Loaded lazily; None until the first lookup and after every invalidation
+_categories = {'by_id': None, 'by_code': None}
+_categories_lock = threading.Lock()
+
+def invalidate_category_cache():
+    with _categories_lock:
+        _categories.update(by_id=None, by_code=None)
+
+# Report screens cached by data_version show category names: a renamed,
+# re-iconed or deactivated category makes them stale for every user with
+# rows in it, and for everyone when it is a system category
+_REPORTED_FIELDS = ('name', 'icon', 'type', 'is_active')
+# Plain SQL, like BUMP_DATA_VERSION, so users.updated_at is left alone
+BUMP_ALL_DATA_VERSIONS = text("UPDATE users SET data_version = data_version + 1")
+BUMP_CATEGORY_DATA_VERSIONS = text(
+    "UPDATE users SET data_version = data_version + 1 WHERE id IN ("
+    " SELECT user_id FROM transactions WHERE category_id = :category_id"
+    " UNION SELECT user_id FROM archived_transaction_summaries WHERE category_id = :category_id)"
+)
+
+def _bump_category_users(connection, category):
+    if category.is_system:
+        connection.execute(BUMP_ALL_DATA_VERSIONS)
+    else:
+        connection.execute(BUMP_CATEGORY_DATA_VERSIONS, {'category_id': category.id})
+
+@event.listens_for(Category, 'after_insert')
+@event.listens_for(Category, 'after_update')
+@event.listens_for(Category, 'after_delete')
+def _category_changed(mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info['categories_dirty'] = True
+
+@event.listens_for(Category, 'after_update')
+def _category_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _REPORTED_FIELDS):
+        _bump_category_users(connection, target)
+
+@event.listens_for(Category, 'before_delete')
+def _category_deleted(mapper, connection, target):
+    # Before: the transactions still point at the row (ON DELETE SET NULL)
+    _bump_category_users(connection, target)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_categories(session):
+    # After commit, not at flush: a reload in between would cache the old rows
+    if session.info.pop('categories_dirty', False):
+        invalidate_category_cache()
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_categories_dirty(session, previous_transaction):
+    session.info.pop('categories_dirty', None)
+
+def _code_names(code):
+    return (get_category_name(code),) + CATEGORY_CODES[code][2]
+
+_transactions = Transaction.__table__
+SET_CATEGORY = _transactions.update().where(
+    _transactions.c.id == bindparam('row_id')
+).values(category_id=bindparam('category'))
+
+class CategoryService:
+    """Keyboard codes to category ids and category names for reports, from the shared cache"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _load(self):
+        """(by_id, by_code), reading every active category on a cold cache"""
+        with _categories_lock:
+            if _categories['by_id'] is not None:
+                return _categories['by_id'], _categories['by_code']
+        rows = self.db.query(Category.id, Category.name, Category.icon, Category.type).filter(
+            Category.is_active == True
+        ).order_by(Category.is_system.desc(), Category.id).all()
+        by_id = {row.id: CategoryInfo(row.name, row.icon, row.type) for row in rows}
+        by_name = {}
+        for row in rows:
+            by_name.setdefault((row.type, row.name), row.id)
+        by_code = {}
+        for code, (trans_type, _, _) in CATEGORY_CODES.items():
+            for name in _code_names(code):
+                if (trans_type, name) in by_name:
+                    by_code[code] = by_name[(trans_type, name)]
+                    break
+        with _categories_lock:
+            _categories.update(by_id=by_id, by_code=by_code)
+        return by_id, by_code
+
+    def category_id(self, code: str):
+        """Category id for a keyboard code (None for unknown codes); creates a missing row once"""
+        if code not in CATEGORY_CODES:
+            return None
+        _, by_code = self._load()
+        if code not in by_code:
+            self.ensure_code_categories()
+            _, by_code = self._load()
+        return by_code.get(code)
+
+    def category_id_for(self, trans_type: str, code: str = None):
+        """Category id for an income/expense entry; without a code its type's 'other' category"""
+        code = code if code in CATEGORY_CODES else DEFAULT_CATEGORY_CODES.get(trans_type)
+        return self.category_id(code) if code else None
+
+    def names(self, category_ids):
+        """{id: CategoryInfo} for the given ids that exist and are active"""
+        by_id, _ = self._load()
+        return {category_id: by_id[category_id] for category_id in category_ids if category_id in by_id}
+
+    def ensure_code_categories(self):
+        """Create a system category for every keyboard code without one. Returns created names"""
+        _, by_code = self._load()
+        created = []
+        for code, (trans_type, icon, _) in CATEGORY_CODES.items():
+            if code not in by_code:
+                self.db.add(Category(name=get_category_name(code), type=trans_type, icon=icon, is_system=True))
+                created.append(get_category_name(code))
+        if created:
+            self.db.commit()
+            logger.info(f"Created categories for keyboard codes: {', '.join(created)}")
+        return created
+
+    def backfill_transaction_categories(self, batch_size: int = 5000) -> int:
+        """
+        Give income and expense rows saved without a category their type's
+        'other' category (the chosen code was never stored, so nothing finer is
+        recoverable). One committed batch at a time. Returns rows updated
+        """
+        defaults = {trans_type: self.category_id(code) for trans_type, code in DEFAULT_CATEGORY_CODES.items()}
+        condition = _transactions.c.category_id.is_(None) & _transactions.c.type.in_(list(defaults))
+        updated = 0
+        touched_users = set()
+        after_id = 0
+        while True:
+            rows = self.db.execute(
+                select(_transactions.c.id, _transactions.c.user_id, _transactions.c.type)
+                .where(condition, _transactions.c.id > after_id)
+                .order_by(_transactions.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            self.db.execute(SET_CATEGORY, [{'row_id': row.id, 'category': defaults[row.type]} for row in rows])
+            # Category breakdowns changed: cached reports of these users are stale
+            for user_id in {row.user_id for row in rows} - touched_users:
+                self.db.execute(BUMP_DATA_VERSION, {'user_id': user_id})
+                touched_users.add(user_id)
+            self.db.commit()
+            updated += len(rows)
+            after_id = rows[-1].id
+        if updated:
+            logger.info(f"Backfilled category_id on {updated} transactions")
+        return updated
@@ -0,0 +1,267 @@
+"""
+Chart rendering off the handler threads: charts are drawn by a small process
+pool (src/utils/chart_renderer, which is the only place matplotlib is
+imported) and the PNG bytes are cached by a hash of the chart's input data,
+so identical requests - the same screen tapped again with no new
+transactions - reuse the image. Concurrent identical requests share one
+render. A pool broken by a dead worker is replaced on the next render.
+CHART_CACHE_DIR optionally keeps the images on disk across restarts
+"""
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHART_WORKERS = int(os.getenv('CHART_WORKERS', '2'))
+CHART_CACHE_SIZE = int(os.getenv('CHART_CACHE_SIZE', '200'))
+# Empty: memory only
+CHART_CACHE_DIR = os.getenv('CHART_CACHE_DIR', '')
+# How long a handler waits for its chart before falling back to text
+CHART_RENDER_TIMEOUT = float(os.getenv('CHART_RENDER_TIMEOUT', '20'))
+
+RENDERER_MODULE = 'src.utils.chart_renderer'
+# Kept in step with chart_renderer.RENDERER_VERSION without importing it here
+RENDERER_VERSION = 2
+
+def charts_available() -> bool:
+    """matplotlib is installed (checked without importing it)"""
+    return importlib.util.find_spec('matplotlib') is not None
+
+def chart_key(kind: str, title: str, data: dict) -> str:
+    """sha256 of the renderer version, chart kind, title and input data"""
+    payload = json.dumps([RENDERER_VERSION, kind, title, data], sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _render_in_worker(kind, title, data):
+    # Runs in a worker process; the renderer module was imported by the initializer
+    from src.utils.chart_renderer import render_chart
+
+    start = time.perf_counter()
+    png = render_chart(kind, title, data)
+    return png, (time.perf_counter() - start) * 1000
+
+def _init_worker():
+    from src.utils.chart_renderer import warm_up
+
+    warm_up()
+
+def _pool_context():
+    """
+    forkserver where available: workers fork from a clean server process that
+    preloads only the renderer, never from the bot process (its threads, DB
+    connections and imports). spawn elsewhere
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload([RENDERER_MODULE])
+        return context
+    return multiprocessing.get_context('spawn')
+
+class ChartMetrics:
+    """Cache hits (memory and disk), misses, shared in-flight renders, render time, failures and pool restarts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+            self.coalesced = 0
+            self.renders = 0
+            self.render_ms = 0.0
+            self.wait_ms = 0.0
+            self.timeouts = 0
+            self.errors = 0
+            self.bytes_rendered = 0
+            self.pool_restarts = 0
+
+    def record(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+                'coalesced': self.coalesced,
+                'renders': self.renders,
+                'avg_render_ms': round(self.render_ms / self.renders, 2) if self.renders else 0.0,
+                'avg_wait_ms': round(self.wait_ms / self.misses, 2) if self.misses else 0.0,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+                'bytes_rendered': self.bytes_rendered,
+                'pool_restarts': self.pool_restarts,
+            }
+
+_metrics = ChartMetrics()
+
+class ChartService:
+    """Process pool plus a bounded LRU of PNG bytes keyed by chart_key"""
+
+    def __init__(self, workers: int = CHART_WORKERS, cache_size: int = CHART_CACHE_SIZE,
+                 cache_dir: str = CHART_CACHE_DIR, metrics: ChartMetrics = None):
+        self.workers = workers
+        self.cache_size = cache_size
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.metrics = metrics or _metrics
+        self._images = OrderedDict()  # key -> png bytes
+        self._in_flight = {}          # key -> Future
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        # Called with self._lock held
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context(),
+                                             initializer=_init_worker)
+        return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        # Called with self._lock held. A worker died (OOM kill, segfault in the
+        # renderer): the executor is unusable, so drop it and let _executor()
+        # start a new one
+        if self._pool is pool:
+            self._pool = None
+            self.metrics.record(pool_restarts=1)
+            logger.warning("Chart pool broken, starting a new one on the next render")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.png"
+
+    def _remember(self, key: str, png: bytes):
+        # Called with self._lock held
+        self._images[key] = png
+        self._images.move_to_end(key)
+        while len(self._images) > self.cache_size:
+            self._images.popitem(last=False)
+
+    def cached(self, key: str):
+        """Cached PNG for a key (memory, then disk), or None"""
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+                self.metrics.record(hits=1)
+                return png
+        if self.cache_dir is not None:
+            try:
+                png = self._disk_path(key).read_bytes()
+            except OSError:
+                png = None
+            if png is not None:
+                with self._lock:
+                    self._remember(key, png)
+                self.metrics.record(disk_hits=1)
+                return png
+        return None
+
+    def render(self, kind: str, title: str, data: dict, timeout: float = CHART_RENDER_TIMEOUT) -> bytes:
+        """
+        PNG bytes of a chart, from the cache or rendered by the pool. Raises
+        concurrent.futures.TimeoutError or the worker's exception; the caller
+        falls back to text
+        """
+        key = chart_key(kind, title, data)
+        png = self.cached(key)
+        if png is not None:
+            return png
+
+        self.metrics.record(misses=1)
+        with self._lock:
+            future = self._in_flight.get(key)
+            submitted = future is None
+            if submitted:
+                pool = self._executor()
+                try:
+                    future = pool.submit(_render_in_worker, kind, title, data)
+                except BrokenProcessPool:
+                    self._discard_pool(pool)
+                    pool = self._executor()
+                    future = pool.submit(_render_in_worker, kind, title, data)
+                self._in_flight[key] = future
+        if submitted:
+            # Outside the lock: a callback on an already finished future runs right here
+            future.add_done_callback(lambda done, key=key, pool=pool: self._finished(key, done, pool))
+        else:
+            self.metrics.record(coalesced=1)
+
+        start = time.perf_counter()
+        try:
+            png, _ = future.result(timeout)
+        except FutureTimeoutError:
+            self.metrics.record(timeouts=1)
+            raise
+        finally:
+            self.metrics.record(wait_ms=(time.perf_counter() - start) * 1000)
+        return png
+
+    def _finished(self, key: str, future, pool: ProcessPoolExecutor):
+        """Pool callback: cache a successful render (every waiter sees the same bytes)"""
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+                    self._discard_pool(pool)
+            self.metrics.record(errors=1)
+            if not future.cancelled():
+                logger.error(f"Chart render failed: {future.exception()}")
+            return
+        png, render_ms = future.result()
+        self.metrics.record(renders=1, render_ms=render_ms, bytes_rendered=len(png))
+        # Cached before leaving in-flight, so a concurrent request finds one or the other
+        with self._lock:
+            self._remember(key, png)
+            self._in_flight.pop(key, None)
+        if self.cache_dir is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                temp_path = self._disk_path(key).with_suffix('.tmp')
+                temp_path.write_bytes(png)
+                temp_path.replace(self._disk_path(key))
+            except OSError as e:
+                logger.warning(f"Chart cache write failed: {e}")
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_chart_service() -> ChartService:
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ChartService()
+        return _service
+
+def shutdown_chart_service():
+    global _service
+    with _service_lock:
+        service, _service = _service, None
+    if service is not None:
+        service.close()
+
+def get_chart_metrics():
+    return _metrics.snapshot()
@@ -0,0 +1,38 @@
+"""
+CSV export of a user's full transaction history (archive included). Rows are
+read in batches, so write_transactions_csv streaming to a file (the export
+script) stays small however long the history is; transactions_csv holds the
+whole CSV in memory, since the bot sends and hashes it as one document
+"""
+from sqlalchemy.orm import Session
+from src.services.report_query_service import ReportQueryService
+import csv
+import io
+
+EXPORT_COLUMNS = ['id', 'transaction_date', 'type', 'amount', 'category', 'from_wallet', 'to_wallet', 'description', 'notes']
+
+class ExportService:
+    """Transaction listings as CSV"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def write_transactions_csv(self, user_id: int, f, batch_size: int = 1000) -> int:
+        """Write the user's transactions oldest first to the text file `f`; returns the row count"""
+        writer = csv.writer(f)
+        writer.writerow(EXPORT_COLUMNS)
+        count = 0
+        for row in ReportQueryService(self.db).iter_export_rows(user_id, batch_size):
+            writer.writerow([
+                row.id, row.transaction_date.isoformat(sep=' ') if row.transaction_date else '',
+                row.type, row.amount, row.category_name or '', row.from_wallet_name or '',
+                row.to_wallet_name or '', row.description or '', row.notes or ''
+            ])
+            count += 1
+        return count
+
+    def transactions_csv(self, user_id: int, batch_size: int = 1000):
+        """(UTF-8 CSV bytes, row count) for sending as a document; the full file is built in memory"""
+        buffer = io.StringIO(newline='')
+        count = self.write_transactions_csv(user_id, buffer, batch_size)
+        return buffer.getvalue().encode('utf-8'), count
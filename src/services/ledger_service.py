@@ -0,0 +1,182 @@
+"""
+Ledger queries over the postings journal: balance at any date from the nearest
+wallet checkpoint plus a small posting delta, checkpoint creation, journal
+balance checks and backfill for transactions written outside the ORM
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, func, desc
+from src.models.database import (
+    Wallet, Transaction, Posting, WalletCheckpoint, journal_legs, posting_rows
+)
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Legs of one transaction should cancel exactly; allow float rounding
+BALANCE_TOLERANCE = 0.005
+MAX_POSTING_ID = 2 ** 62
+
+@contextmanager
+def read_snapshot(db: Session):
+    """
+    Run the reads inside the block against one snapshot. pysqlite sends no
+    BEGIN before a SELECT, so on SQLite every read would be its own autocommit
+    transaction: the block gets an explicit BEGIN ... COMMIT, ended before the
+    caller writes (a WAL read snapshot that fell behind cannot become a write
+    transaction). PostgreSQL gets a REPEATABLE READ transaction the caller
+    commits as usual
+    """
+    db.commit()
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        db.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+        yield
+    elif dialect == 'sqlite':
+        connection = db.connection()
+        connection.exec_driver_sql("BEGIN")
+        try:
+            yield
+        finally:
+            connection.exec_driver_sql("COMMIT")
+    else:
+        yield
+
+class LedgerService:
+    """Balance history and integrity checks over the postings journal"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def latest_checkpoint(self, wallet_id: int, at: datetime = None):
+        """Newest checkpoint at or before `at` (any checkpoint when `at` is None)"""
+        query = self.db.query(WalletCheckpoint).filter(WalletCheckpoint.wallet_id == wallet_id)
+        if at is not None:
+            query = query.filter(WalletCheckpoint.as_of <= at)
+        return query.order_by(desc(WalletCheckpoint.as_of)).first()
+
+    def _posting_sum(self, *conditions):
+        return float(self.db.query(func.coalesce(func.sum(Posting.amount), 0.0)).filter(*conditions).scalar() or 0.0)
+
+    def balance_at(self, wallet_id: int, at: datetime = None):
+        """
+        Wallet balance after every leg posted at or before `at` (now by default).
+        Starts from the nearest earlier checkpoint and adds (a) legs dated after it
+        and (b) backdated legs inserted since it was taken (id > last_posting_id)
+        """
+        at = at or datetime.utcnow()
+        checkpoint = self.latest_checkpoint(wallet_id, at)
+        if checkpoint is None:
+            initial = self.db.query(Wallet.initial_balance).filter(Wallet.id == wallet_id).scalar() or 0.0
+            return float(initial) + self._posting_sum(Posting.wallet_id == wallet_id, Posting.posted_at <= at)
+
+        dated_after = self._posting_sum(
+            Posting.wallet_id == wallet_id,
+            Posting.posted_at > checkpoint.as_of,
+            Posting.posted_at <= at
+        )
+        # Two-sided id range so the planner takes the covering idx_posting_wallet_id;
+        # with only "id >" it walks idx_posting_wallet_date back to the first leg
+        late = self._posting_sum(
+            Posting.wallet_id == wallet_id,
+            Posting.id.between(checkpoint.last_posting_id + 1, MAX_POSTING_ID),
+            Posting.posted_at <= checkpoint.as_of
+        )
+        return checkpoint.balance + dated_after + late
+
+    def create_checkpoints(self, as_of: datetime = None, wallet_ids=None):
+        """
+        Store balance_at(as_of) for each wallet (all wallets by default). Each is
+        derived from the wallet's previous checkpoint, so only legs since then
+        are read. Returns the number of checkpoints written
+        """
+        as_of = as_of or datetime.utcnow()
+        query = self.db.query(Wallet.id)
+        if wallet_ids is not None:
+            query = query.filter(Wallet.id.in_(list(wallet_ids)))
+
+        # The posting cap and every balance from one snapshot: a leg committed in
+        # between would be in the balance and again past last_posting_id
+        balances = {}
+        with read_snapshot(self.db):
+            last_posting_id = self.db.query(func.coalesce(func.max(Posting.id), 0)).scalar()
+            for (wallet_id,) in query.all():
+                existing = self.db.query(WalletCheckpoint.id).filter(
+                    WalletCheckpoint.wallet_id == wallet_id,
+                    WalletCheckpoint.as_of == as_of
+                ).first()
+                if not existing:
+                    balances[wallet_id] = self.balance_at(wallet_id, as_of)
+
+        for wallet_id, balance in balances.items():
+            # Legs with id <= last_posting_id dated after as_of are still picked up
+            # by the posted_at range of later balance_at() calls
+            self.db.add(WalletCheckpoint(
+                wallet_id=wallet_id,
+                as_of=as_of,
+                balance=balance,
+                last_posting_id=last_posting_id
+            ))
+        self.db.commit()
+        return len(balances)
+
+    def prune_checkpoints(self, keep: int = 90):
+        """Keep the newest `keep` checkpoints per wallet"""
+        removed = 0
+        for (wallet_id,) in self.db.query(WalletCheckpoint.wallet_id).distinct().all():
+            stale = self.db.query(WalletCheckpoint.id).filter(
+                WalletCheckpoint.wallet_id == wallet_id
+            ).order_by(desc(WalletCheckpoint.as_of)).offset(keep).all()
+            if stale:
+                removed += self.db.query(WalletCheckpoint).filter(
+                    WalletCheckpoint.id.in_([row.id for row in stale])
+                ).delete(synchronize_session=False)
+        self.db.commit()
+        return removed
+
+    def unbalanced_transactions(self, limit: int = 100):
+        """[(transaction_id, sum of legs)] whose legs do not cancel out"""
+        total = func.sum(Posting.amount)
+        return self.db.query(Posting.transaction_id, total).group_by(
+            Posting.transaction_id
+        ).having(or_(total > BALANCE_TOLERANCE, total < -BALANCE_TOLERANCE)).limit(limit).all()
+
+    def wallet_drift(self, wallet_id: int):
+        """Stored Wallet.balance minus the journal balance now (0.0 when they agree)"""
+        stored = self.db.query(Wallet.balance).filter(Wallet.id == wallet_id).scalar() or 0.0
+        # Future-dated legs count too: the stored balance already includes them
+        return float(stored) - self.balance_at(wallet_id, datetime.max)
+
+    def backfill_postings(self, batch_size: int = 5000, after_id: int = 0):
+        """
+        Journal transactions that have no legs yet (history, Core bulk inserts),
+        looking only at ids above after_id. Returns rows journaled
+        """
+        journaled = 0
+        while True:
+            batch = self.db.query(
+                Transaction.id, Transaction.user_id, Transaction.type, Transaction.amount,
+                Transaction.from_wallet_id, Transaction.to_wallet_id, Transaction.transaction_date
+            ).filter(
+                Transaction.id > after_id,
+                ~self.db.query(Posting.id).filter(Posting.transaction_id == Transaction.id).exists()
+            ).order_by(Transaction.id).limit(batch_size).all()
+            if not batch:
+                break
+
+            rows = []
+            for t in batch:
+                rows += posting_rows(
+                    t.id, t.user_id,
+                    journal_legs(t.type, t.amount, t.from_wallet_id, t.to_wallet_id),
+                    t.transaction_date
+                )
+            if rows:
+                self.db.execute(Posting.__table__.insert(), rows)
+            self.db.commit()
+            journaled += len(batch)
+            after_id = batch[-1].id
+        if journaled:
+            logger.info(f"Journaled {journaled} transactions without postings")
+        return journaled
@@ -0,0 +1,369 @@
+"""
+Backend-neutral database maintenance and backup hooks (SQLite and PostgreSQL),
+plus the SQLite housekeeping the bot schedules itself: WAL checkpoints sized
+by the -wal file, PRAGMA optimize / ANALYZE and incremental vacuum
+"""
+from sqlalchemy import inspect, text
+from datetime import datetime, time as dt_time
+from pathlib import Path
+import os
+import shutil
+import subprocess
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_TABLES = ['users', 'wallets', 'transactions', 'assets']
+
+# PASSIVE checkpoint once the WAL passes this; TRUNCATE (waits for readers,
+# shrinks the file) in the quiet window or once it passes the hard limit
+SQLITE_WAL_PASSIVE_BYTES = int(os.getenv('SQLITE_WAL_PASSIVE_BYTES', str(8 * 1024 * 1024)))
+SQLITE_WAL_TRUNCATE_BYTES = int(os.getenv('SQLITE_WAL_TRUNCATE_BYTES', str(64 * 1024 * 1024)))
+# Incremental vacuum only when at least this many pages are free
+SQLITE_VACUUM_MIN_FREE_PAGES = int(os.getenv('SQLITE_VACUUM_MIN_FREE_PAGES', '256'))
+# Low-traffic window (local time) for TRUNCATE, optimize and vacuum
+SQLITE_MAINTENANCE_WINDOW = os.getenv('SQLITE_MAINTENANCE_WINDOW', '02:30-05:00')
+
+def in_maintenance_window(now: datetime = None, window: str = None) -> bool:
+    """True when `now` falls inside an 'HH:MM-HH:MM' window (may wrap midnight)"""
+    now = now or datetime.now()
+    start_text, end_text = (window or SQLITE_MAINTENANCE_WINDOW).split('-')
+    start = dt_time.fromisoformat(start_text.strip())
+    end = dt_time.fromisoformat(end_text.strip())
+    current = now.time()
+    if start <= end:
+        return start <= current < end
+    return current >= start or current < end
+
+class MaintenanceMetrics:
+    """WAL size, checkpoint lag and counts of each housekeeping step"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.wal_bytes = 0
+            self.peak_wal_bytes = 0
+            self.lag_frames = 0
+            self.last_checkpoint_at = None
+            self.last_optimize_at = None
+            self.checkpoints = {}
+            self.busy_checkpoints = 0
+            self.pages_vacuumed = 0
+
+    def record_wal(self, wal_bytes: int):
+        with self._lock:
+            self.wal_bytes = wal_bytes
+            self.peak_wal_bytes = max(self.peak_wal_bytes, wal_bytes)
+
+    def record_checkpoint(self, mode: str, busy: bool, log_frames: int, checkpointed_frames: int):
+        with self._lock:
+            self.checkpoints[mode] = self.checkpoints.get(mode, 0) + 1
+            self.lag_frames = max(log_frames - checkpointed_frames, 0)
+            if busy:
+                self.busy_checkpoints += 1
+            else:
+                self.last_checkpoint_at = time.time()
+
+    def record_optimize(self):
+        with self._lock:
+            self.last_optimize_at = time.time()
+
+    def record_vacuum(self, pages: int):
+        with self._lock:
+            self.pages_vacuumed += pages
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'wal_bytes': self.wal_bytes,
+                'peak_wal_bytes': self.peak_wal_bytes,
+                # Frames written to the WAL but not yet copied into the database file
+                'lag_frames': self.lag_frames,
+                'seconds_since_checkpoint': round(time.time() - self.last_checkpoint_at, 1) if self.last_checkpoint_at else None,
+                'seconds_since_optimize': round(time.time() - self.last_optimize_at, 1) if self.last_optimize_at else None,
+                'checkpoints': dict(self.checkpoints),
+                'busy_checkpoints': self.busy_checkpoints,
+                'pages_vacuumed': self.pages_vacuumed,
+            }
+
+maintenance_metrics = MaintenanceMetrics()
+
+def get_maintenance_metrics():
+    """{'wal_bytes', 'peak_wal_bytes', 'lag_frames', 'seconds_since_checkpoint', ...}"""
+    return maintenance_metrics.snapshot()
+
+class MaintenanceService:
+    """Integrity check, statistics, vacuum and backup for the bot database"""
+
+    def __init__(self, engine=None):
+        if engine is None:
+            from src.models.database import engine
+        self.engine = engine
+
+    @property
+    def backend(self):
+        return self.engine.dialect.name
+
+    def _autocommit(self):
+        # VACUUM cannot run inside a transaction block on either backend
+        return self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+
+    def table_names(self):
+        return inspect(self.engine).get_table_names()
+
+    def integrity_check(self):
+        """Return (ok, detail). SQLite runs PRAGMA integrity_check; others check connectivity and tables"""
+        try:
+            with self.engine.connect() as conn:
+                if self.backend == 'sqlite':
+                    result = conn.exec_driver_sql("PRAGMA integrity_check").scalar()
+                    if result != 'ok':
+                        return False, result
+                else:
+                    conn.execute(text("SELECT 1"))
+            missing = [table for table in REQUIRED_TABLES if table not in self.table_names()]
+            if missing:
+                logger.warning(f"Missing tables: {missing}")
+            return True, 'ok'
+        except Exception as e:
+            logger.error(f"Integrity check failed: {e}")
+            return False, str(e)
+
+    def table_counts(self):
+        """Row count per table"""
+        counts = {}
+        with self.engine.connect() as conn:
+            for table in self.table_names():
+                counts[table] = conn.execute(
+                    text(f'SELECT COUNT(*) FROM {self.engine.dialect.identifier_preparer.quote(table)}')
+                ).scalar()
+        return counts
+
+    def metadata(self):
+        """Schema and row counts in the shape stored next to each backup"""
+        inspector = inspect(self.engine)
+        metadata = {
+            "backup_time": datetime.now().isoformat(),
+            "database_name": self.engine.url.render_as_string(hide_password=True),
+            "backend": self.backend,
+            "tables": {},
+            "record_counts": self.table_counts()
+        }
+        if self.backend == 'sqlite' and self.engine.url.database:
+            metadata["file_size"] = os.path.getsize(self.engine.url.database)
+        for table in inspector.get_table_names():
+            primary_keys = set(inspector.get_pk_constraint(table).get('constrained_columns') or [])
+            metadata["tables"][table] = [
+                {"name": col['name'], "type": str(col['type']), "not_null": not col['nullable'],
+                 "primary_key": col['name'] in primary_keys}
+                for col in inspector.get_columns(table)
+            ]
+        return metadata
+
+    def analyze(self):
+        """Refresh planner statistics"""
+        with self._autocommit() as conn:
+            conn.exec_driver_sql("ANALYZE")
+        logger.info(f"ANALYZE completed on {self.backend}")
+
+    def vacuum(self):
+        """Reclaim free space (SQLite rewrites the file; PostgreSQL marks dead tuples reusable)"""
+        with self._autocommit() as conn:
+            conn.exec_driver_sql("VACUUM")
+        logger.info(f"VACUUM completed on {self.backend}")
+
+    def _sqlite_path(self):
+        database = self.engine.url.database
+        if self.backend != 'sqlite' or not database or database == ':memory:':
+            return None
+        return database
+
+    def wal_status(self):
+        """SQLite only: {'wal_bytes', 'page_size', 'free_pages', 'auto_vacuum'}, or None"""
+        path = self._sqlite_path()
+        if path is None:
+            return None
+        wal_path = f"{path}-wal"
+        wal_bytes = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        with self.engine.connect() as conn:
+            status = {
+                'wal_bytes': wal_bytes,
+                'page_size': conn.exec_driver_sql("PRAGMA page_size").scalar(),
+                'free_pages': conn.exec_driver_sql("PRAGMA freelist_count").scalar(),
+                # 0 = none, 1 = full, 2 = incremental
+                'auto_vacuum': conn.exec_driver_sql("PRAGMA auto_vacuum").scalar(),
+            }
+        maintenance_metrics.record_wal(wal_bytes)
+        return status
+
+    def checkpoint(self, mode: str = 'PASSIVE'):
+        """
+        Run PRAGMA wal_checkpoint(mode). Returns {'mode', 'busy', 'log_frames',
+        'checkpointed_frames', 'wal_bytes_after'}; busy means readers kept it from finishing
+        """
+        mode = mode.upper()
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode {mode}")
+        if self._sqlite_path() is None:
+            return None
+        with self._autocommit() as conn:
+            busy, log_frames, checkpointed_frames = conn.exec_driver_sql(f"PRAGMA wal_checkpoint({mode})").one()
+        maintenance_metrics.record_checkpoint(mode, bool(busy), log_frames, checkpointed_frames)
+        result = {
+            'mode': mode,
+            'busy': bool(busy),
+            'log_frames': log_frames,
+            'checkpointed_frames': checkpointed_frames,
+            'wal_bytes_after': self.wal_status()['wal_bytes'],
+        }
+        logger.info(f"WAL checkpoint {mode}: {checkpointed_frames}/{log_frames} frames{' (busy)' if busy else ''}")
+        return result
+
+    def optimize(self):
+        """
+        PRAGMA optimize (re-analyzes only tables whose statistics look stale);
+        a full ANALYZE the first time, when there are no statistics at all
+        """
+        if self.backend != 'sqlite':
+            self.analyze()
+            return 'ANALYZE'
+        with self._autocommit() as conn:
+            has_stats = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+            ).scalar()
+            statement = "PRAGMA optimize" if has_stats else "ANALYZE"
+            conn.exec_driver_sql(statement)
+        maintenance_metrics.record_optimize()
+        logger.info(f"{statement} completed")
+        return statement
+
+    def incremental_vacuum(self, max_pages: int = None):
+        """Return up to max_pages free pages (all by default) to the OS. Needs auto_vacuum=INCREMENTAL"""
+        status = self.wal_status()
+        if status is None or status['auto_vacuum'] != 2 or not status['free_pages']:
+            return 0
+        pages = min(status['free_pages'], max_pages) if max_pages else status['free_pages']
+        with self._autocommit() as conn:
+            # The driver steps a statement once and SQLite frees one page per
+            # step, so step page by page inside a single write transaction
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                for _ in range(pages):
+                    conn.exec_driver_sql("PRAGMA incremental_vacuum(1)")
+                conn.exec_driver_sql("COMMIT")
+            except Exception:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            free_after = conn.exec_driver_sql("PRAGMA freelist_count").scalar()
+        freed = status['free_pages'] - free_after
+        maintenance_metrics.record_vacuum(freed)
+        logger.info(f"Incremental vacuum freed {freed} pages")
+        return freed
+
+    def enable_incremental_vacuum(self):
+        """
+        One-time switch of a file created without auto_vacuum=INCREMENTAL. The
+        mode only changes with a VACUUM, which rewrites the whole file and
+        needs up to twice its size on disk, so it belongs in the quiet window.
+        Returns True when converted, False when not needed or not enough disk
+        """
+        path = self._sqlite_path()
+        if path is None or self.wal_status()['auto_vacuum'] == 2:
+            return False
+        needed = os.path.getsize(path) * 2
+        free = shutil.disk_usage(Path(path).resolve().parent).free
+        if free < needed:
+            logger.warning(f"auto_vacuum conversion postponed: {free:,} bytes free, {needed:,} needed")
+            return False
+        start = time.perf_counter()
+        with self._autocommit() as conn:
+            conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.exec_driver_sql("VACUUM")
+        logger.info(f"auto_vacuum set to INCREMENTAL ({(time.perf_counter() - start) * 1000:.0f}ms VACUUM)")
+        return True
+
+    def run_wal_check(self, now: datetime = None):
+        """
+        Frequent, cheap job: checkpoint according to WAL size. TRUNCATE only in
+        the quiet window or past the hard limit; PASSIVE never waits on anyone
+        """
+        status = self.wal_status()
+        if status is None:
+            return None
+        wal_bytes = status['wal_bytes']
+        if wal_bytes >= SQLITE_WAL_TRUNCATE_BYTES or (wal_bytes >= SQLITE_WAL_PASSIVE_BYTES and in_maintenance_window(now)):
+            return self.checkpoint('TRUNCATE')
+        if wal_bytes >= SQLITE_WAL_PASSIVE_BYTES:
+            return self.checkpoint('PASSIVE')
+        return None
+
+    def run_scheduled_maintenance(self):
+        """
+        Low-traffic housekeeping: TRUNCATE checkpoint, optimize, incremental vacuum
+        (after the one-time auto_vacuum conversion of an older file). Returns what
+        was done; PostgreSQL only gets ANALYZE (autovacuum does the rest)
+        """
+        if self._sqlite_path() is None:
+            return {'optimize': self.optimize()}
+        result = {
+            'checkpoint': self.checkpoint('TRUNCATE'),
+            'optimize': self.optimize(),
+        }
+        status = self.wal_status()
+        if status['auto_vacuum'] != 2:
+            # The full VACUUM also returns every free page
+            result['auto_vacuum_converted'] = self.enable_incremental_vacuum()
+        elif status['free_pages'] >= SQLITE_VACUUM_MIN_FREE_PAGES:
+            result['vacuumed_pages'] = self.incremental_vacuum()
+        result['status'] = self.wal_status()
+        return result
+
+    def backup(self, destination):
+        """
+        Write a consistent online backup to `destination` and return its path.
+        SQLite uses the backup API (safe with WAL, unlike a file copy);
+        PostgreSQL uses pg_dump in custom format
+        """
+        destination = Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if self.backend == 'sqlite':
+            return self._backup_sqlite(destination)
+        if self.backend == 'postgresql':
+            return self._backup_postgresql(destination)
+        raise NotImplementedError(f"Backup not supported for backend {self.backend}")
+
+    def _backup_sqlite(self, destination):
+        import sqlite3
+
+        raw = self.engine.raw_connection()
+        try:
+            target = sqlite3.connect(str(destination))
+            try:
+                raw.driver_connection.backup(target)
+            finally:
+                target.close()
+        finally:
+            raw.close()
+        return destination
+
+    def _backup_postgresql(self, destination):
+        pg_dump = shutil.which('pg_dump')
+        if not pg_dump:
+            raise RuntimeError("pg_dump tidak ditemukan di PATH")
+
+        url = self.engine.url
+        env = dict(os.environ)
+        if url.password:
+            # Keep the password off the command line
+            env['PGPASSWORD'] = url.password
+        dsn = url.set(drivername='postgresql', password=None).render_as_string(hide_password=False)
+        subprocess.run(
+            [pg_dump, '--format=custom', '--no-owner', f'--file={destination}', f'--dbname={dsn}'],
+            check=True, env=env
+        )
+        return destination
@@ -0,0 +1,78 @@
+"""
+Optimistic concurrency for versioned rows (Wallet, Asset): an ORM UPDATE that
+finds the row's version_id changed since it was read raises StaleDataError
+instead of silently overwriting; these helpers roll back, re-read and retry
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+import os
+import random
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+OPTIMISTIC_RETRY_ATTEMPTS = int(os.getenv('OPTIMISTIC_RETRY_ATTEMPTS', '8'))
+# Upper bound of the random pause before a retry, doubled per attempt
+OPTIMISTIC_RETRY_BACKOFF_MS = float(os.getenv('OPTIMISTIC_RETRY_BACKOFF_MS', '10'))
+
+class ConflictMetrics:
+    """Per-operation counts of attempts, version conflicts and exhausted retries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def record(self, operation: str, conflicts: int, succeeded: bool):
+        with self._lock:
+            stats = self._operations.setdefault(
+                operation, {'calls': 0, 'conflicts': 0, 'retried_ok': 0, 'exhausted': 0}
+            )
+            stats['calls'] += 1
+            stats['conflicts'] += conflicts
+            if not succeeded:
+                stats['exhausted'] += 1
+            elif conflicts:
+                stats['retried_ok'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for operation, stats in self._operations.items():
+                result[operation] = dict(stats)
+                result[operation]['conflict_rate'] = round(stats['conflicts'] / stats['calls'], 4) if stats['calls'] else 0.0
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+conflict_metrics = ConflictMetrics()
+
+def get_conflict_metrics():
+    """{operation: {'calls', 'conflicts', 'retried_ok', 'exhausted', 'conflict_rate'}}"""
+    return conflict_metrics.snapshot()
+
+def run_with_retry(db: Session, operation: str, func, *args, attempts: int = None, **kwargs):
+    """
+    Run func(db, *args, **kwargs), which must re-read what it changes and commit,
+    retrying on a version conflict. Raises StaleDataError once attempts run out
+    """
+    attempts = attempts or OPTIMISTIC_RETRY_ATTEMPTS
+    conflicts = 0
+    while True:
+        try:
+            result = func(db, *args, **kwargs)
+        except StaleDataError:
+            db.rollback()
+            conflicts += 1
+            if conflicts >= attempts:
+                conflict_metrics.record(operation, conflicts, succeeded=False)
+                logger.warning(f"{operation}: gave up after {conflicts} version conflicts")
+                raise
+            # Jittered backoff so the same writers don't collide again in lockstep
+            time.sleep(random.uniform(0, OPTIMISTIC_RETRY_BACKOFF_MS * (2 ** (conflicts - 1))) / 1000.0)
+            continue
+        conflict_metrics.record(operation, conflicts, succeeded=True)
+        return result
@@ -0,0 +1,348 @@
+"""
+Transactional outbox: every ORM write to a wallet, transaction or asset also
+appends an OutboxEvent in the same database transaction (see the mapper
+events in src/models/database.py). The dispatcher streams those events, in id
+order, to in-process subscribers such as caches and aggregates. Durable
+subscribers keep their offset in outbox_cursors, so they resume after a
+restart and can be replayed from any offset
+"""
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+import json
+import os
+import threading
+import time
+import weakref
+import logging
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_POLL_MS = float(os.getenv('OUTBOX_POLL_MS', '1000'))
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '500'))
+# A failing handler gets this many tries per event before the event is skipped
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+# Server databases hand out ids before commit, so a lower id can become visible
+# after a higher one; only read events at least this old there
+OUTBOX_VISIBILITY_GRACE_MS = float(os.getenv('OUTBOX_VISIBILITY_GRACE_MS', '2000'))
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+
+# Started dispatchers, woken by any commit that wrote outbox events
+_running_dispatchers = weakref.WeakSet()
+
+class ChangeEvent(NamedTuple):
+    """What subscribers receive: a detached copy of one outbox row"""
+    id: int
+    aggregate_type: str
+    aggregate_id: int
+    user_id: Optional[int]
+    event_type: str
+    payload: dict
+    created_at: datetime
+
+def _session_factory():
+    from src.models.database import SessionLocal
+    return SessionLocal
+
+def iter_events(db: Session, after_id: int = 0, limit: int = OUTBOX_BATCH_SIZE, aggregate_types=None):
+    """Up to `limit` events with id > after_id, oldest first"""
+    from src.models.database import OutboxEvent
+
+    query = db.query(OutboxEvent).filter(OutboxEvent.id > after_id)
+    if aggregate_types:
+        query = query.filter(OutboxEvent.aggregate_type.in_(aggregate_types))
+    if db.get_bind().dialect.name != 'sqlite':
+        visible_before = datetime.utcnow() - timedelta(milliseconds=OUTBOX_VISIBILITY_GRACE_MS)
+        query = query.filter(OutboxEvent.created_at <= visible_before)
+    for row in query.order_by(OutboxEvent.id).limit(limit).all():
+        yield ChangeEvent(row.id, row.aggregate_type, row.aggregate_id, row.user_id, row.event_type,
+                          json.loads(row.payload) if row.payload else {}, row.created_at)
+
+def head_event_id(db: Session) -> int:
+    from src.models.database import OutboxEvent
+    return db.query(func.coalesce(func.max(OutboxEvent.id), 0)).scalar()
+
+class OutboxSubscriber:
+    """One consumer of the stream and its position in it"""
+
+    def __init__(self, name, handler, aggregate_types=None, durable=True):
+        self.name = name
+        self.handler = handler
+        self.aggregate_types = tuple(aggregate_types) if aggregate_types else None
+        self.durable = durable
+        self.last_event_id = 0
+        self.delivered = 0
+        self.failures = 0
+        self.skipped = 0
+        self.attempts = 0  # consecutive failures on the event at last_event_id + 1
+        self.last_error = None
+        self.last_delivered_at = None
+
+    def wants(self, change: ChangeEvent) -> bool:
+        return self.aggregate_types is None or change.aggregate_type in self.aggregate_types
+
+class OutboxDispatcher:
+    """
+    Polls outbox_events and hands each subscriber the events past its offset,
+    in order, at least once. A commit that wrote events wakes it early; writes
+    from other processes (scripts) are picked up by the poll
+    """
+
+    def __init__(self, session_factory=None, poll_ms: float = OUTBOX_POLL_MS, batch_size: int = OUTBOX_BATCH_SIZE):
+        self.session_factory = session_factory or _session_factory()
+        self.poll_interval = poll_ms / 1000.0
+        self.batch_size = batch_size
+        self._subscribers = {}
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.head_id = 0
+
+    def subscribe(self, name, handler, aggregate_types=None, durable=True, from_start=False):
+        """
+        Register handler(ChangeEvent) under `name`. A durable subscriber resumes
+        from its stored offset; a new one starts at the current head (only
+        future events) unless from_start, which replays the retained history
+        """
+        subscriber = OutboxSubscriber(name, handler, aggregate_types, durable)
+        db = self.session_factory()
+        try:
+            stored = self._stored_offsets(db).get(name) if durable else None
+            if stored is not None:
+                subscriber.last_event_id = stored
+            else:
+                subscriber.last_event_id = 0 if from_start else head_event_id(db)
+                if durable:
+                    self._save_offset(db, subscriber)
+        finally:
+            db.close()
+        with self._lock:
+            self._subscribers[name] = subscriber
+        self.notify()
+        return subscriber
+
+    def unsubscribe(self, name):
+        with self._lock:
+            self._subscribers.pop(name, None)
+
+    def replay(self, name, after_id: int = 0):
+        """Move a subscriber back (or forward) so delivery restarts after event `after_id`"""
+        with self._lock:
+            subscriber = self._subscribers[name]
+            subscriber.last_event_id = after_id
+            subscriber.attempts = 0
+        if subscriber.durable:
+            db = self.session_factory()
+            try:
+                self._save_offset(db, subscriber)
+            finally:
+                db.close()
+        self.notify()
+
+    def notify(self):
+        self._wake.set()
+
+    def _stored_offsets(self, db):
+        from src.models.database import OutboxCursor
+        return dict(db.query(OutboxCursor.subscriber, OutboxCursor.last_event_id).all())
+
+    def _save_offset(self, db, subscriber):
+        from src.models.database import OutboxCursor
+
+        cursor = db.query(OutboxCursor).filter(OutboxCursor.subscriber == subscriber.name).first()
+        if cursor is None:
+            cursor = OutboxCursor(subscriber=subscriber.name)
+            db.add(cursor)
+        cursor.last_event_id = subscriber.last_event_id
+        cursor.updated_at = datetime.utcnow()
+        db.commit()
+
+    def dispatch_once(self) -> int:
+        """Deliver every pending event to every subscriber; returns events delivered"""
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        delivered = 0
+        db = self.session_factory()
+        try:
+            self.polls += 1
+            self.head_id = head_event_id(db)
+            # `scripts/outbox.py replay` moves durable offsets from outside the process
+            stored = self._stored_offsets(db)
+            for subscriber in subscribers:
+                if subscriber.durable and stored.get(subscriber.name, subscriber.last_event_id) != subscriber.last_event_id:
+                    subscriber.last_event_id = stored[subscriber.name]
+                    subscriber.attempts = 0
+                if subscriber.last_event_id < self.head_id:
+                    delivered += self._deliver(db, subscriber)
+        finally:
+            db.close()
+        return delivered
+
+    def _deliver(self, db, subscriber) -> int:
+        """Feed one subscriber everything past its offset; returns events handled"""
+        start_offset = subscriber.last_event_id
+        handled = 0
+        blocked = False
+        while not blocked and not self._stopping.is_set():
+            # The offset also moves past events the subscriber filters out, so read the whole stream
+            batch = list(iter_events(db, subscriber.last_event_id, self.batch_size))
+            for change in batch:
+                if subscriber.wants(change):
+                    if not self._handle(subscriber, change):
+                        blocked = True
+                        break
+                    handled += 1
+                subscriber.last_event_id = change.id
+            if len(batch) < self.batch_size:
+                break
+        if subscriber.durable and subscriber.last_event_id != start_offset:
+            self._save_offset(db, subscriber)
+        return handled
+
+    def _handle(self, subscriber, change) -> bool:
+        """Run the handler; False stops this subscriber until the next round"""
+        try:
+            subscriber.handler(change)
+        except Exception as e:
+            subscriber.failures += 1
+            subscriber.attempts += 1
+            subscriber.last_error = f"event {change.id}: {e}"
+            if subscriber.attempts < OUTBOX_MAX_ATTEMPTS:
+                logger.warning(f"Outbox subscriber {subscriber.name} failed on event {change.id} "
+                               f"(attempt {subscriber.attempts}): {e}")
+                return False
+            logger.error(f"Outbox subscriber {subscriber.name} skipped event {change.id} "
+                         f"after {subscriber.attempts} attempts: {e}")
+            subscriber.skipped += 1
+        else:
+            subscriber.delivered += 1
+            subscriber.last_delivered_at = time.time()
+        subscriber.attempts = 0
+        return True
+
+    def has_subscribers(self) -> bool:
+        with self._lock:
+            return bool(self._subscribers)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if not self.has_subscribers():
+                # Nothing to deliver to: no polling until subscribe() or stop() wakes us
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            try:
+                self.dispatch_once()
+            except Exception as e:
+                logger.error(f"Error in outbox dispatcher: {e}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True)
+            self._thread.start()
+            _running_dispatchers.add(self)
+        return self
+
+    def stop(self, timeout: float = 10):
+        _running_dispatchers.discard(self)
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def metrics(self):
+        """Head offset and, per subscriber, offset, events and seconds behind, delivery counts"""
+        from src.models.database import OutboxEvent
+
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        result = {'head_id': self.head_id, 'polls': self.polls, 'subscribers': {}}
+        db = self.session_factory()
+        try:
+            result['head_id'] = self.head_id = head_event_id(db)
+            for subscriber in subscribers:
+                oldest_pending = db.query(OutboxEvent.created_at).filter(
+                    OutboxEvent.id > subscriber.last_event_id
+                ).order_by(OutboxEvent.id).limit(1).scalar()
+                result['subscribers'][subscriber.name] = {
+                    'offset': subscriber.last_event_id,
+                    'events_behind': max(self.head_id - subscriber.last_event_id, 0),
+                    'seconds_behind': round((datetime.utcnow() - oldest_pending).total_seconds(), 1) if oldest_pending else 0.0,
+                    'delivered': subscriber.delivered,
+                    'failures': subscriber.failures,
+                    'skipped': subscriber.skipped,
+                    'last_error': subscriber.last_error,
+                }
+        finally:
+            db.close()
+        return result
+
+def prune_outbox(db: Session, retention_days: int = OUTBOX_RETENTION_DAYS) -> int:
+    """
+    Delete events older than the retention window that every durable
+    subscriber has already handled. Returns rows deleted
+    """
+    from src.models.database import OutboxEvent, OutboxCursor
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    query = db.query(OutboxEvent).filter(OutboxEvent.created_at < cutoff)
+    slowest = db.query(func.min(OutboxCursor.last_event_id)).scalar()
+    if slowest is not None:
+        query = query.filter(OutboxEvent.id <= slowest)
+    removed = query.delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    """Process-wide dispatcher bound to SessionLocal; started by start_outbox_dispatcher()"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = OutboxDispatcher()
+        return _dispatcher
+
+def start_outbox_dispatcher():
+    """
+    Start polling for the subscribers registered so far. Without any there is
+    nothing to deliver, so no thread is started (events are still written and
+    kept for OUTBOX_RETENTION_DAYS, so a later subscriber can replay them)
+    """
+    dispatcher = get_outbox_dispatcher()
+    if not dispatcher.has_subscribers():
+        logger.info("Outbox dispatcher not started: no subscribers")
+        return dispatcher
+    dispatcher.start()
+    logger.info(f"Outbox dispatcher started (poll={OUTBOX_POLL_MS:g}ms, batch={dispatcher.batch_size})")
+    return dispatcher
+
+def shutdown_outbox_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher, _dispatcher = _dispatcher, None
+    if dispatcher and dispatcher._thread is not None:
+        dispatcher.stop()
+        logger.info(f"Outbox dispatcher stopped: {dispatcher.metrics()}")
+
+def get_outbox_metrics():
+    """{'head_id', 'polls', 'subscribers': {name: {'offset', 'events_behind', 'seconds_behind', ...}}}"""
+    return get_outbox_dispatcher().metrics()
+
+@event.listens_for(Session, 'after_commit')
+def _wake_dispatcher(session):
+    if session.info.pop('outbox_pending', False):
+        for dispatcher in list(_running_dispatchers):
+            dispatcher.notify()
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_pending(session):
+    session.info.pop('outbox_pending', None)
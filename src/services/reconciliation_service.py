@@ -0,0 +1,133 @@
+"""
+Incremental balance reconciliation: Wallet.balance must equal initial_balance
+plus the wallet's legs in the postings journal. The journal is append-only
+(edits and deletes post reversals), so each run only reads the legs past the
+wallet's checkpoint and compares the new drift with the one seen last time
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from src.models.database import (
+    Wallet, Transaction, Posting, ReconciliationCheckpoint, ReconciliationIssue
+)
+from src.services.ledger_service import LedgerService, BALANCE_TOLERANCE, read_snapshot
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ReconciliationService:
+    """Check wallet balances against the journal, reading only what changed since the last run"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reset(self):
+        """Forget every checkpoint; the next run re-reads the whole journal"""
+        removed = self.db.query(ReconciliationCheckpoint).delete(synchronize_session=False)
+        self.db.commit()
+        return removed
+
+    def reconcile(self):
+        """
+        Run one pass over every wallet. Returns {'wallets', 'postings_read',
+        'journaled', 'issues': [ReconciliationIssue]} where issues are the drift
+        changes first seen in this run
+        """
+        # Transactions written outside the ORM have no legs yet
+        last_transaction_id = self.db.query(func.coalesce(func.max(ReconciliationCheckpoint.last_transaction_id), 0)).scalar()
+        journaled = LedgerService(self.db).backfill_postings(after_id=last_transaction_id)
+
+        # Balances, checkpoints and journal from one snapshot: a transaction
+        # committing between these reads would otherwise show up as drift
+        with read_snapshot(self.db):
+            max_posting_id = self.db.query(func.coalesce(func.max(Posting.id), 0)).scalar()
+            max_transaction_id = self.db.query(func.coalesce(func.max(Transaction.id), 0)).scalar()
+            checkpoints = {cp.wallet_id: cp for cp in self.db.query(ReconciliationCheckpoint).all()}
+            wallets = self.db.query(Wallet.id, Wallet.balance, Wallet.initial_balance).all()
+
+            # Legs past each wallet's own checkpoint. The shared low-water mark turns
+            # this into a primary-key range scan over just the new legs
+            low_water = min((cp.last_posting_id for cp in checkpoints.values()), default=max_posting_id)
+            deltas = {}
+            postings_read = 0
+            for wallet_id, amount, count in self.db.query(
+                Posting.wallet_id, func.sum(Posting.amount), func.count(Posting.id)
+            ).join(
+                ReconciliationCheckpoint, ReconciliationCheckpoint.wallet_id == Posting.wallet_id
+            ).filter(
+                Posting.id > low_water,
+                Posting.id > ReconciliationCheckpoint.last_posting_id,
+                Posting.id <= max_posting_id
+            ).group_by(Posting.wallet_id).all():
+                deltas[wallet_id] = float(amount or 0.0)
+                postings_read += count
+
+            # First run for a wallet: its whole history is the delta
+            new_wallet_ids = [wallet.id for wallet in wallets if wallet.id not in checkpoints]
+            for start in range(0, len(new_wallet_ids), 500):
+                for wallet_id, amount, count in self.db.query(
+                    Posting.wallet_id, func.sum(Posting.amount), func.count(Posting.id)
+                ).filter(
+                    Posting.wallet_id.in_(new_wallet_ids[start:start + 500]),
+                    Posting.id <= max_posting_id
+                ).group_by(Posting.wallet_id).all():
+                    deltas[wallet_id] = float(amount or 0.0)
+                    postings_read += count
+
+        now = datetime.utcnow()
+        issues = []
+        for wallet in wallets:
+            checkpoint = checkpoints.get(wallet.id)
+            if checkpoint is None:
+                checkpoint = ReconciliationCheckpoint(wallet_id=wallet.id, last_posting_id=0, running_sum=0.0, drift=0.0)
+                self.db.add(checkpoint)
+            running_sum = checkpoint.running_sum + deltas.get(wallet.id, 0.0)
+            drift = float(wallet.balance or 0.0) - (float(wallet.initial_balance or 0.0) + running_sum)
+            if abs(drift - checkpoint.drift) > BALANCE_TOLERANCE:
+                issues.append(self._flag(wallet.id, checkpoint, drift, max_posting_id, now))
+
+            checkpoint.last_posting_id = max_posting_id
+            checkpoint.last_transaction_id = max_transaction_id
+            checkpoint.running_sum = running_sum
+            checkpoint.drift = drift
+            checkpoint.checked_at = now
+
+        for issue in issues:
+            logger.warning(
+                f"Balance drift on wallet {issue.wallet_id}: {issue.drift_change:+,.2f} (now {issue.drift:+,.2f}) "
+                f"in postings ({issue.first_posting_id}, {issue.last_posting_id}], "
+                f"transactions {issue.first_transaction_id}..{issue.last_transaction_id}"
+            )
+        self.db.commit()
+        return {'wallets': len(wallets), 'postings_read': postings_read, 'journaled': journaled, 'issues': issues}
+
+    def _flag(self, wallet_id, checkpoint, drift, max_posting_id, now):
+        """Record a drift change with the transaction range that moved the wallet since the checkpoint"""
+        first_transaction_id, last_transaction_id = self.db.query(
+            func.min(Posting.transaction_id), func.max(Posting.transaction_id)
+        ).filter(
+            Posting.wallet_id == wallet_id,
+            Posting.id > checkpoint.last_posting_id,
+            Posting.id <= max_posting_id
+        ).one()
+        issue = ReconciliationIssue(
+            wallet_id=wallet_id,
+            drift_change=drift - checkpoint.drift,
+            drift=drift,
+            first_posting_id=checkpoint.last_posting_id,
+            last_posting_id=max_posting_id,
+            first_transaction_id=first_transaction_id,
+            last_transaction_id=last_transaction_id,
+            detected_at=now
+        )
+        self.db.add(issue)
+        return issue
+
+    def open_drift(self):
+        """[(wallet_id, drift)] for wallets whose last checked balance disagrees with the journal"""
+        return self.db.query(ReconciliationCheckpoint.wallet_id, ReconciliationCheckpoint.drift).filter(
+            (ReconciliationCheckpoint.drift > BALANCE_TOLERANCE) | (ReconciliationCheckpoint.drift < -BALANCE_TOLERANCE)
+        ).order_by(ReconciliationCheckpoint.wallet_id).all()
+
+    def recent_issues(self, limit: int = 20):
+        return self.db.query(ReconciliationIssue).order_by(ReconciliationIssue.id.desc()).limit(limit).all()
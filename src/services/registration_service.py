@@ -3,6 +3,7 @@ User registration service with comprehensive onboarding flow
 """
 from sqlalchemy.orm import Session
 from src.models.database import User, get_user_by_telegram_id, SessionLocal
+from src.services.write_queue_service import write_queue_enabled, queue_user_touch
 from datetime import datetime
 import logging
 
@@ -82,8 +83,7 @@ Mari mulai perjalanan finansial Anda! 🎯"""
         name = user.first_name or "User"
         
         # Update last activity
-        user.last_activity = datetime.utcnow()
-        self.db.commit()
+        self._touch(user)
         
         # Calculate days since registration
         days_registered = (datetime.utcnow() - user.created_at).days
@@ -100,10 +100,17 @@ Silakan pilih menu di bawah untuk melanjutkan pengelolaan keuangan Anda."""
 
         return return_message
     
+    def _touch(self, user: User):
+        """Bump last_activity, through the write queue when it is enabled"""
+        if write_queue_enabled():
+            queue_user_touch(user)
+        else:
+            user.last_activity = datetime.utcnow()
+            self.db.commit()
+    
     def log_user_activity(self, user: User, activity: str, details: str = None):
         """Log user activity for analytics and debugging"""
-        user.last_activity = datetime.utcnow()
-        self.db.commit()
+        self._touch(user)
         
         log_message = f"👤 User Activity - ID: {user.telegram_id}, Activity: {activity}"
         if details:
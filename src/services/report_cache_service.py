@@ -0,0 +1,249 @@
+"""
+Versioned report cache: rendered report and analysis screens keyed by
+(user_id, report kind, period, locale, data version). users.data_version is
+bumped in the same transaction as every wallet, transaction or asset write,
+so a new version is the invalidation and nothing is purged explicitly.
+Entries live in a bounded in-memory LRU; evicted entries can spill to a small
+SQLite file (REPORT_CACHE_SPILL_PATH) and survive restarts there
+"""
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+from src.utils.time_buckets import local_now
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_SIZE = int(os.getenv('REPORT_CACHE_SIZE', '1000'))
+# Empty: memory only
+REPORT_CACHE_SPILL_PATH = os.getenv('REPORT_CACHE_SPILL_PATH', '')
+REPORT_CACHE_SPILL_MAX_ROWS = int(os.getenv('REPORT_CACHE_SPILL_MAX_ROWS', '20000'))
+
+class ReportCacheKey(NamedTuple):
+    user_id: int
+    kind: str
+    period: str
+    locale: str
+    version: int
+
+    @property
+    def slot(self):
+        """Everything but the version: one entry per slot, an older version is simply stale"""
+        return self[:4]
+
+def report_cache_key(user, kind: str, now: datetime = None) -> ReportCacheKey:
+    """
+    Key for `user`'s `kind` screen. The period is the user's local calendar day
+    at `now` (naive UTC): every screen's date ranges and wording follow from it
+    """
+    day = local_now(user.timezone, now).date()
+    return ReportCacheKey(user.id, kind, day.isoformat(), user.language or 'id', user.data_version or 0)
+
+class ReportCacheMetrics:
+    """Hits (memory and spill), misses, stale versions and evictions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.spill_hits = 0
+            self.misses = 0
+            self.stale = 0
+            self.stores = 0
+            self.evictions = 0
+            self.spilled = 0
+            self.spill_errors = 0
+            self.render_ms = 0.0
+
+    def record(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            lookups = self.hits + self.spill_hits + self.misses
+            return {
+                'hits': self.hits,
+                'spill_hits': self.spill_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.spill_hits) / lookups, 3) if lookups else 0.0,
+                'stale': self.stale,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'spilled': self.spilled,
+                'spill_errors': self.spill_errors,
+                'avg_render_ms': round(self.render_ms / self.misses, 2) if self.misses else 0.0,
+            }
+
+_metrics = ReportCacheMetrics()
+
+class ReportCache:
+    """Bounded LRU of rendered reports with an optional SQLite spill"""
+
+    # Trim the spill table back to its limit every this many spilled rows
+    SPILL_TRIM_EVERY = 500
+
+    def __init__(self, max_entries: int = REPORT_CACHE_SIZE, spill_path: str = REPORT_CACHE_SPILL_PATH,
+                 spill_max_rows: int = REPORT_CACHE_SPILL_MAX_ROWS, metrics: ReportCacheMetrics = None):
+        self.max_entries = max_entries
+        self.spill_path = spill_path
+        self.spill_max_rows = spill_max_rows
+        self.metrics = metrics or _metrics
+        self._entries = OrderedDict()  # slot -> (version, text)
+        self._lock = threading.Lock()
+        self._spill = None
+        self._spill_lock = threading.Lock()
+        self._spill_writes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: ReportCacheKey):
+        """Cached text for exactly this key, or None"""
+        with self._lock:
+            entry = self._entries.get(key.slot)
+            if entry is not None:
+                if entry[0] == key.version:
+                    self._entries.move_to_end(key.slot)
+                    self.metrics.record(hits=1)
+                    return entry[1]
+                del self._entries[key.slot]
+                self.metrics.record(stale=1)
+
+        value = self._spill_get(key)
+        if value is not None:
+            self.metrics.record(spill_hits=1)
+            self._remember(key, value)
+            return value
+        self.metrics.record(misses=1)
+        return None
+
+    def put(self, key: ReportCacheKey, value: str):
+        self.metrics.record(stores=1)
+        self._remember(key, value)
+
+    def get_or_render(self, key: ReportCacheKey, render):
+        """Cached text, or render() it and cache the result; exceptions are not cached"""
+        value = self.get(key)
+        if value is None:
+            start = time.perf_counter()
+            value = render()
+            self.metrics.record(render_ms=(time.perf_counter() - start) * 1000)
+            self.put(key, value)
+        return value
+
+    def _remember(self, key, value):
+        evicted = []
+        with self._lock:
+            self._entries[key.slot] = (key.version, value)
+            self._entries.move_to_end(key.slot)
+            while len(self._entries) > self.max_entries:
+                slot, (version, text) = self._entries.popitem(last=False)
+                evicted.append((*slot, version, text))
+        if evicted:
+            self.metrics.record(evictions=len(evicted))
+            self._spill_put(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # SQLite spill: best effort, any error only costs a re-render
+
+    def _spill_connection(self):
+        if self._spill is None:
+            Path(self.spill_path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.spill_path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS report_cache ("
+                " user_id INTEGER NOT NULL, kind TEXT NOT NULL, period TEXT NOT NULL, locale TEXT NOT NULL,"
+                " version INTEGER NOT NULL, body TEXT NOT NULL, stored_at REAL NOT NULL,"
+                " PRIMARY KEY (user_id, kind, period, locale))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_report_cache_stored ON report_cache (stored_at)")
+            self._spill = connection
+        return self._spill
+
+    def _spill_get(self, key):
+        if not self.spill_path:
+            return None
+        try:
+            with self._spill_lock:
+                row = self._spill_connection().execute(
+                    "SELECT version, body FROM report_cache WHERE user_id = ? AND kind = ? AND period = ? AND locale = ?",
+                    key.slot
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Report cache spill read failed: {e}")
+            self.metrics.record(spill_errors=1)
+            return None
+        if row is None or row[0] != key.version:
+            return None
+        return row[1]
+
+    def _spill_put(self, entries):
+        """entries: (user_id, kind, period, locale, version, text) tuples"""
+        if not self.spill_path:
+            return
+        now = time.time()
+        try:
+            with self._spill_lock:
+                connection = self._spill_connection()
+                connection.executemany(
+                    "INSERT OR REPLACE INTO report_cache (user_id, kind, period, locale, version, body, stored_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [entry + (now,) for entry in entries]
+                )
+                self._spill_writes += len(entries)
+                if self._spill_writes >= self.SPILL_TRIM_EVERY:
+                    self._spill_writes = 0
+                    connection.execute(
+                        "DELETE FROM report_cache WHERE rowid IN (SELECT rowid FROM report_cache ORDER BY stored_at"
+                        " LIMIT max((SELECT count(*) FROM report_cache) - ?, 0))",
+                        (self.spill_max_rows,)
+                    )
+            self.metrics.record(spilled=len(entries))
+        except sqlite3.Error as e:
+            logger.warning(f"Report cache spill write failed: {e}")
+            self.metrics.record(spill_errors=1)
+
+    def close(self):
+        """Spill everything still in memory (so a restart starts warm) and close the file"""
+        with self._lock:
+            entries = [(*slot, version, text) for slot, (version, text) in self._entries.items()]
+        self._spill_put(entries)
+        with self._spill_lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_report_cache() -> ReportCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+        return _cache
+
+def shutdown_report_cache():
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
+
+def get_report_cache_metrics():
+    return _metrics.snapshot()
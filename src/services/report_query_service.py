@@ -0,0 +1,284 @@
+"""
+Report query layer: aggregates transactions in SQL instead of loading ORM rows
+"""
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, func, case, desc
+from src.models.database import Transaction, Wallet, Category
+from src.models.queries import fetch_period_totals_by_type
+from src.services.archive_service import ArchiveService
+from src.utils.time_buckets import period_bounds, to_utc, user_timezone
+from datetime import datetime, date, time, timedelta
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Wallet aliases for listing joins; built once because aliasing is costly per call
+FromWallet = aliased(Wallet, name='from_wallet')
+ToWallet = aliased(Wallet, name='to_wallet')
+
+# Periods the report and analysis screens are built from; all are whole days
+REPORT_PERIODS = ('today', 'week', 'last_week', 'month', 'last_month')
+
+class ReportQueryService:
+    """
+    Shared grouped queries used by report and analysis screens. Archived years
+    are no longer in the main tables, so their part of a range is added from
+    ArchiveService; ranges that miss every archived year never touch it
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.archive = ArchiveService(db)
+
+    def _range_filter(self, user_id: int, start_date: datetime, end_date: datetime):
+        """Filter on (user_id, transaction_date) served by idx_transaction_user_date"""
+        return and_(
+            Transaction.user_id == user_id,
+            Transaction.transaction_date >= start_date,
+            Transaction.transaction_date <= end_date
+        )
+
+    @staticmethod
+    def _empty_totals():
+        return {'income': 0.0, 'expense': 0.0, 'transfer': 0.0, 'count': 0}
+
+    @staticmethod
+    def _add_to_totals(totals, trans_type, amount, count):
+        if trans_type in ('income', 'expense', 'transfer'):
+            totals[trans_type] += float(amount or 0.0)
+        totals['count'] += int(count or 0)
+
+    @staticmethod
+    def _to_date(value):
+        """func.date() returns a string on SQLite and a date on PostgreSQL"""
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return date.fromisoformat(str(value)[:10])
+
+    def get_period_totals(self, user_id: int, start_date: datetime, end_date: datetime):
+        """Income, expense, transfer totals and transaction count in one grouped query"""
+        totals = self._empty_totals()
+        for trans_type, amount, count in fetch_period_totals_by_type(self.db, user_id, start_date, end_date):
+            self._add_to_totals(totals, trans_type, amount, count)
+        for _, trans_type, amount, count in self.archive.period_rows(user_id, start_date, end_date):
+            self._add_to_totals(totals, trans_type, amount, count)
+        return totals
+
+    def get_daily_buckets(self, user_id: int, start_date: datetime, end_date: datetime):
+        """Totals plus per-day buckets, grouped by (day, type) in one query"""
+        day = func.date(Transaction.transaction_date)
+        rows = self.db.query(
+            day.label('day'),
+            Transaction.type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).filter(
+            self._range_filter(user_id, start_date, end_date)
+        ).group_by(day, Transaction.type).all()
+        rows += self.archive.day_rows(user_id, start_date, end_date)
+
+        totals = self._empty_totals()
+        days = {}
+        for day_value, trans_type, amount, count in rows:
+            self._add_to_totals(totals, trans_type, amount, count)
+            bucket = days.setdefault(self._to_date(day_value), self._empty_totals())
+            self._add_to_totals(bucket, trans_type, amount, count)
+
+        totals['days'] = dict(sorted(days.items()))
+        return totals
+
+    def get_category_buckets(self, user_id: int, start_date: datetime, end_date: datetime):
+        """Totals plus per-category buckets, grouped by (category_id, type) in one query"""
+        rows = self.db.query(
+            Transaction.category_id,
+            Transaction.type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).filter(
+            self._range_filter(user_id, start_date, end_date)
+        ).group_by(Transaction.category_id, Transaction.type).all()
+        rows += self.archive.period_rows(user_id, start_date, end_date)
+
+        totals = self._empty_totals()
+        categories = {}
+        for category_id, trans_type, amount, count in rows:
+            self._add_to_totals(totals, trans_type, amount, count)
+            bucket = categories.setdefault(category_id, self._empty_totals())
+            self._add_to_totals(bucket, trans_type, amount, count)
+
+        totals['categories'] = categories
+        return totals
+
+    def get_comparison_totals(self, user_id: int, current_range, previous_range):
+        """
+        Totals for two periods (e.g. this week vs last week) in one grouped query.
+        Each range is a (start, end) tuple; returns {'current': totals, 'previous': totals}
+        """
+        current_start, current_end = current_range
+        previous_start, previous_end = previous_range
+
+        period = case(
+            (and_(Transaction.transaction_date >= current_start,
+                  Transaction.transaction_date <= current_end), 'current'),
+            else_='previous'
+        )
+        rows = self.db.query(
+            period.label('period'),
+            Transaction.type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).filter(
+            self._range_filter(user_id, min(current_start, previous_start), max(current_end, previous_end)),
+            # Skip any gap between the two ranges
+            ((Transaction.transaction_date >= current_start) & (Transaction.transaction_date <= current_end)) |
+            ((Transaction.transaction_date >= previous_start) & (Transaction.transaction_date <= previous_end))
+        ).group_by(period, Transaction.type).all()
+
+        result = {'current': self._empty_totals(), 'previous': self._empty_totals()}
+        for period_name, trans_type, amount, count in rows:
+            self._add_to_totals(result[period_name], trans_type, amount, count)
+        for period_name, (start, end) in (('current', current_range), ('previous', previous_range)):
+            for _, trans_type, amount, count in self.archive.period_rows(user_id, start, end):
+                self._add_to_totals(result[period_name], trans_type, amount, count)
+        return result
+
+    @staticmethod
+    def period_ranges(periods=REPORT_PERIODS, now: datetime = None, timezone: str = None):
+        """{period: PeriodBounds} in `timezone`, all relative to the same UTC instant"""
+        return {period: period_bounds(timezone, period, now) for period in periods}
+
+    def get_period_reports(self, user_id: int, periods=REPORT_PERIODS, now: datetime = None, timezone: str = None):
+        """
+        Totals with per-day and per-category buckets for several named periods
+        (see REPORT_PERIODS) from one (local day, category_id, type) grouped query
+        over their combined span. Periods are whole local days of the user's
+        timezone: the span is filtered on its UTC bounds and rows are grouped by
+        the precomputed local_date, so each group falls entirely inside or outside
+        every period and is added to each one it belongs to. `now` is naive UTC.
+        Returns {period: totals + start, end (local), utc_start, utc_end, days, categories}
+        """
+        timezone = timezone or user_timezone(self.db, user_id)
+        ranges = self.period_ranges(periods, now, timezone)
+        span_start = min(bounds.utc_start for bounds in ranges.values())
+        span_end = max(bounds.utc_end for bounds in ranges.values())
+        rows = self._local_day_rows(user_id, span_start, span_end, timezone)
+
+        reports = {}
+        buckets = []
+        for period, bounds in ranges.items():
+            report = self._empty_totals()
+            report.update(start=bounds.start, end=bounds.end, utc_start=bounds.utc_start, utc_end=bounds.utc_end,
+                          days={}, categories={})
+            reports[period] = report
+            buckets.append((report, bounds.first_day, bounds.last_day))
+
+        for day_date, category_id, trans_type, amount, count in rows:
+            for report, first_day, last_day in buckets:
+                if first_day <= day_date <= last_day:
+                    self._add_to_totals(report, trans_type, amount, count)
+                    self._add_to_totals(report['days'].setdefault(day_date, self._empty_totals()), trans_type, amount, count)
+                    self._add_to_totals(report['categories'].setdefault(category_id, self._empty_totals()), trans_type, amount, count)
+
+        for report in reports.values():
+            report['days'] = dict(sorted(report['days'].items()))
+        return reports
+
+    def _local_day_rows(self, user_id: int, utc_start: datetime, utc_end: datetime, timezone: str):
+        """
+        [(local date, category_id, type, sum(amount), count)] in [utc_start, utc_end]
+        from one grouped query on the main table plus the archived part
+        """
+        # Rows written without local_date (Core inserts before a backfill) fall back to the UTC day
+        day = func.coalesce(Transaction.local_date, func.date(Transaction.transaction_date))
+        rows = self.db.query(
+            day.label('day'),
+            Transaction.category_id,
+            Transaction.type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).filter(
+            self._range_filter(user_id, utc_start, utc_end)
+        ).group_by(day, Transaction.category_id, Transaction.type).all()
+        rows += self.archive.day_category_rows(user_id, utc_start, utc_end, timezone)
+        return [(self._to_date(day_value), category_id, trans_type, amount, count)
+                for day_value, category_id, trans_type, amount, count in rows]
+
+    def get_local_day_totals(self, user_id: int, first_day: date, last_day: date, timezone: str = None):
+        """{local date: totals} for every day in [first_day, last_day] of the user's timezone, empty days included"""
+        timezone = timezone or user_timezone(self.db, user_id)
+        utc_start = to_utc(datetime.combine(first_day, time.min), timezone)
+        utc_end = to_utc(datetime.combine(last_day + timedelta(days=1), time.min), timezone) - timedelta(microseconds=1)
+        days = {first_day + timedelta(days=offset): self._empty_totals()
+                for offset in range((last_day - first_day).days + 1)}
+        for day_date, _, trans_type, amount, count in self._local_day_rows(user_id, utc_start, utc_end, timezone):
+            if day_date in days:
+                self._add_to_totals(days[day_date], trans_type, amount, count)
+        return days
+
+    def get_latest_transactions(self, user_id: int, start_date: datetime, end_date: datetime, limit: int = 5):
+        """Most recent transactions in range, newest last (matches report listing order)"""
+        rows = self.db.query(
+            Transaction.type,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.transaction_date,
+            Transaction.id
+        ).filter(
+            self._range_filter(user_id, start_date, end_date)
+        ).order_by(desc(Transaction.transaction_date), desc(Transaction.id)).limit(limit).all()
+        if self.archive.overlapping_years(start_date, end_date):
+            rows = sorted(
+                rows + self.archive.latest_rows(user_id, start_date, end_date, limit),
+                key=lambda row: (row.transaction_date or datetime.min, row.id), reverse=True
+            )[:limit]
+        return list(reversed(rows))
+
+    def transaction_listing_query(self, user_id: int):
+        """
+        Flat projection of transactions with category and wallet names joined in,
+        so listings never lazy-load relationships row by row
+        """
+        return self.db.query(
+            Transaction.id,
+            Transaction.type,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.transaction_date,
+            Category.name.label('category_name'),
+            FromWallet.name.label('from_wallet_name'),
+            ToWallet.name.label('to_wallet_name')
+        ).outerjoin(
+            Category, Transaction.category_id == Category.id
+        ).outerjoin(
+            FromWallet, Transaction.from_wallet_id == FromWallet.id
+        ).outerjoin(
+            ToWallet, Transaction.to_wallet_id == ToWallet.id
+        ).filter(Transaction.user_id == user_id)
+
+    def get_total_balance(self, user_id: int):
+        """Sum of active wallet balances"""
+        return self.db.query(func.sum(Wallet.balance)).filter(
+            and_(Wallet.user_id == user_id, Wallet.is_active == True)
+        ).scalar() or 0.0
+
+    def iter_export_rows(self, user_id: int, batch_size: int = 1000):
+        """
+        Stream a user's full transaction listing oldest first for exports.
+        yield_per() opens a server-side cursor on PostgreSQL (stream_results),
+        so memory stays bounded by batch_size instead of the whole history
+        """
+        query = self.transaction_listing_query(user_id).add_columns(
+            Transaction.notes
+        ).order_by(Transaction.transaction_date, Transaction.id)
+        if not self.archive.archived_years():
+            yield from query.yield_per(batch_size)
+            return
+        # Backdated rows can sit in the main file next to an archived year: merge by date
+        yield from heapq.merge(
+            self.archive.iter_export_rows(user_id, batch_size),
+            query.yield_per(batch_size),
+            key=lambda row: (row.transaction_date or datetime.min, row.id)
+        )
@@ -2,8 +2,11 @@
 Report service layer for optimized financial reporting per user
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc, extract
-from src.models.database import User, Wallet, Transaction, Category
+from sqlalchemy import and_, func, desc
+from src.models.database import User, Wallet, Transaction, Asset
+from src.services.report_query_service import ReportQueryService
+from src.services.category_service import CategoryService
+from src.utils.time_buckets import period_bounds, user_timezone
 from datetime import datetime, timedelta
 import logging
 
@@ -16,225 +19,121 @@ class ReportService:
         self.db = db
     
     def get_daily_report(self, user_id: int, target_date: datetime = None):
-        """Generate daily financial report for user"""
-        if not target_date:
-            target_date = datetime.now()
-        
-        start_of_day = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
-        
-        # Get daily transactions
-        daily_income = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'income',
-                Transaction.transaction_date >= start_of_day,
-                Transaction.transaction_date < end_of_day
-            )
-        ).scalar() or 0.0
-        
-        daily_expense = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_of_day,
-                Transaction.transaction_date < end_of_day
-            )
-        ).scalar() or 0.0
-        
-        # Get transaction count
-        transaction_count = self.db.query(func.count(Transaction.id)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.transaction_date >= start_of_day,
-                Transaction.transaction_date < end_of_day
-            )
-        ).scalar() or 0
-        
-        # Get current total balance
-        total_balance = self.db.query(func.sum(Wallet.balance)).filter(
-            and_(Wallet.user_id == user_id, Wallet.is_active == True)
-        ).scalar() or 0.0
+        """Generate daily financial report for user; target_date is naive UTC, the day is the user's local day"""
+        queries = ReportQueryService(self.db)
+        today = queries.get_period_reports(user_id, ('today',), now=target_date)['today']
         
         return {
-            'date': target_date.strftime('%Y-%m-%d'),
-            'daily_income': daily_income,
-            'daily_expense': daily_expense,
-            'daily_net': daily_income - daily_expense,
-            'transaction_count': transaction_count,
-            'total_balance': total_balance
+            'date': today['start'].strftime('%Y-%m-%d'),
+            'daily_income': today['income'],
+            'daily_expense': today['expense'],
+            'daily_net': today['income'] - today['expense'],
+            'transaction_count': today['count'],
+            'total_balance': queries.get_total_balance(user_id)
         }
     
     def get_weekly_report(self, user_id: int, target_date: datetime = None):
-        """Generate weekly financial report for user"""
-        if not target_date:
-            target_date = datetime.now()
-        
-        # Get start of week (Monday)
-        start_of_week = target_date - timedelta(days=target_date.weekday())
-        start_of_week = start_of_week.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_week = start_of_week + timedelta(days=7)
-        
-        weekly_income = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'income',
-                Transaction.transaction_date >= start_of_week,
-                Transaction.transaction_date < end_of_week
-            )
-        ).scalar() or 0.0
-        
-        weekly_expense = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_of_week,
-                Transaction.transaction_date < end_of_week
-            )
-        ).scalar() or 0.0
-        
-        # Get previous week for comparison
-        prev_start = start_of_week - timedelta(days=7)
-        prev_end = start_of_week
-        
-        prev_weekly_expense = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= prev_start,
-                Transaction.transaction_date < prev_end
-            )
-        ).scalar() or 0.0
+        """Generate weekly financial report for user (this and last week in one query)"""
+        reports = ReportQueryService(self.db).get_period_reports(
+            user_id, ('week', 'last_week'), now=target_date
+        )
+        week, prev_week = reports['week'], reports['last_week']
         
         # Calculate WoW change
         wow_change = 0.0
-        if prev_weekly_expense > 0:
-            wow_change = ((weekly_expense - prev_weekly_expense) / prev_weekly_expense) * 100
+        if prev_week['expense'] > 0:
+            wow_change = ((week['expense'] - prev_week['expense']) / prev_week['expense']) * 100
         
         return {
-            'week_start': start_of_week.strftime('%Y-%m-%d'),
-            'week_end': (end_of_week - timedelta(days=1)).strftime('%Y-%m-%d'),
-            'weekly_income': weekly_income,
-            'weekly_expense': weekly_expense,
-            'weekly_net': weekly_income - weekly_expense,
-            'prev_weekly_expense': prev_weekly_expense,
+            'week_start': week['start'].strftime('%Y-%m-%d'),
+            'week_end': week['end'].strftime('%Y-%m-%d'),
+            'weekly_income': week['income'],
+            'weekly_expense': week['expense'],
+            'weekly_net': week['income'] - week['expense'],
+            'prev_weekly_expense': prev_week['expense'],
             'wow_change': wow_change
         }
     
     def get_monthly_report(self, user_id: int, target_date: datetime = None):
-        """Generate monthly financial report for user"""
-        if not target_date:
-            target_date = datetime.now()
-        
-        start_of_month = target_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Calculate end of month
-        if target_date.month == 12:
-            end_of_month = start_of_month.replace(year=target_date.year + 1, month=1)
-        else:
-            end_of_month = start_of_month.replace(month=target_date.month + 1)
-        
-        monthly_income = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'income',
-                Transaction.transaction_date >= start_of_month,
-                Transaction.transaction_date < end_of_month
-            )
-        ).scalar() or 0.0
-        
-        monthly_expense = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_of_month,
-                Transaction.transaction_date < end_of_month
-            )
-        ).scalar() or 0.0
-        
-        # Get previous month for comparison
-        if start_of_month.month == 1:
-            prev_start = start_of_month.replace(year=start_of_month.year - 1, month=12)
-        else:
-            prev_start = start_of_month.replace(month=start_of_month.month - 1)
-        
-        prev_monthly_expense = self.db.query(func.sum(Transaction.amount)).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= prev_start,
-                Transaction.transaction_date < start_of_month
-            )
-        ).scalar() or 0.0
+        """Generate monthly financial report for user (this and last month in one query)"""
+        reports = ReportQueryService(self.db).get_period_reports(
+            user_id, ('month', 'last_month'), now=target_date
+        )
+        month, prev_month = reports['month'], reports['last_month']
+        monthly_expense = month['expense']
         
         # Calculate MoM change
         mom_change = 0.0
-        if prev_monthly_expense > 0:
-            mom_change = ((monthly_expense - prev_monthly_expense) / prev_monthly_expense) * 100
+        if prev_month['expense'] > 0:
+            mom_change = ((monthly_expense - prev_month['expense']) / prev_month['expense']) * 100
         
-        # Get spending by category for current month
-        category_breakdown = self.db.query(
-            Category.name,
-            Category.icon,
-            func.sum(Transaction.amount).label('total_amount')
-        ).join(
-            Transaction, Transaction.category_id == Category.id
-        ).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_of_month,
-                Transaction.transaction_date < end_of_month
-            )
-        ).group_by(Category.id, Category.name, Category.icon).order_by(desc('total_amount')).limit(10).all()
+        # Top spending categories of the month; names and icons from the category cache
+        top_categories = sorted(
+            ((category_id, bucket['expense']) for category_id, bucket in month['categories'].items()
+             if category_id is not None and bucket['expense'] > 0),
+            key=lambda item: item[1], reverse=True
+        )[:10]
+        names = CategoryService(self.db).names(category_id for category_id, _ in top_categories)
         
         return {
-            'month': start_of_month.strftime('%Y-%m'),
-            'monthly_income': monthly_income,
+            'month': month['start'].strftime('%Y-%m'),
+            'monthly_income': month['income'],
             'monthly_expense': monthly_expense,
-            'monthly_net': monthly_income - monthly_expense,
-            'prev_monthly_expense': prev_monthly_expense,
+            'monthly_net': month['income'] - monthly_expense,
+            'prev_monthly_expense': prev_month['expense'],
             'mom_change': mom_change,
             'category_breakdown': [
                 {
-                    'name': cat.name,
-                    'icon': cat.icon,
-                    'amount': float(cat.total_amount),
-                    'percentage': (float(cat.total_amount) / monthly_expense * 100) if monthly_expense > 0 else 0
+                    'name': names[category_id].name,
+                    'icon': names[category_id].icon,
+                    'amount': amount,
+                    'percentage': (amount / monthly_expense * 100) if monthly_expense > 0 else 0
                 }
-                for cat in category_breakdown
+                for category_id, amount in top_categories if category_id in names
             ]
         }
     
-    def get_spending_trends(self, user_id: int, months: int = 6):
-        """Get spending trends over specified months"""
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=months * 30)
-        
-        # Get monthly spending data
-        monthly_data = self.db.query(
-            extract('year', Transaction.transaction_date).label('year'),
-            extract('month', Transaction.transaction_date).label('month'),
-            func.sum(Transaction.amount).label('total_expense')
-        ).filter(
-            and_(
-                Transaction.user_id == user_id,
-                Transaction.type == 'expense',
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date
-            )
-        ).group_by(
-            extract('year', Transaction.transaction_date),
-            extract('month', Transaction.transaction_date)
-        ).order_by('year', 'month').all()
-        
-        return [
-            {
-                'period': f"{int(data.year)}-{int(data.month):02d}",
-                'amount': float(data.total_expense)
-            }
-            for data in monthly_data
-        ]
+    def get_spending_trends(self, user_id: int, months: int = 6, now: datetime = None):
+        """Income and expense per local calendar month, oldest first, the current month included"""
+        timezone = user_timezone(self.db, user_id)
+        month = period_bounds(timezone, 'month', now)
+        first_day = month.first_day
+        for _ in range(months - 1):
+            first_day = (first_day - timedelta(days=1)).replace(day=1)
+        
+        totals = {}
+        for day, bucket in ReportQueryService(self.db).get_local_day_totals(
+            user_id, first_day, month.last_day, timezone
+        ).items():
+            period = totals.setdefault(day.strftime('%Y-%m'), {'income': 0.0, 'amount': 0.0})
+            period['income'] += bucket['income']
+            period['amount'] += bucket['expense']
+        
+        return [{'period': period, **values} for period, values in totals.items()]
+    
+    def get_net_worth_history(self, user_id: int, days: int = 30, now: datetime = None):
+        """
+        Net worth (active wallet balances plus assets at their current value) at the
+        end of each of the last `days` local days, oldest first. Wallet balances
+        are walked back from today through each day's income minus expense;
+        assets have no price history, so they count at today's value throughout
+        """
+        timezone = user_timezone(self.db, user_id)
+        today = period_bounds(timezone, 'today', now).first_day
+        queries = ReportQueryService(self.db)
+        # get_current_value(): lots of 100 shares for saham, buy price until a price sync
+        asset_value = sum(asset.get_current_value() for asset in self.db.query(Asset).filter(
+            and_(Asset.user_id == user_id, Asset.is_active == True)
+        ))
+        balance = queries.get_total_balance(user_id) + asset_value
+        
+        history = []
+        day_totals = queries.get_local_day_totals(user_id, today - timedelta(days=days - 1), today, timezone)
+        for day in sorted(day_totals, reverse=True):
+            history.append({'date': day, 'net_worth': balance})
+            balance -= day_totals[day]['income'] - day_totals[day]['expense']
+        history.reverse()
+        return history
     
     def get_wallet_breakdown(self, user_id: int):
         """Get current wallet balance breakdown"""
@@ -258,10 +157,10 @@ class ReportService:
         }
     
     def get_recent_transactions(self, user_id: int, limit: int = 10):
-        """Get recent transactions for user"""
-        transactions = self.db.query(Transaction).filter(
-            Transaction.user_id == user_id
-        ).order_by(desc(Transaction.transaction_date)).limit(limit).all()
+        """Get recent transactions for user (single query, names joined in)"""
+        transactions = ReportQueryService(self.db).transaction_listing_query(user_id).order_by(
+            desc(Transaction.transaction_date), desc(Transaction.id)
+        ).limit(limit).all()
         
         result = []
         for trans in transactions:
@@ -271,9 +170,9 @@ class ReportService:
                 'amount': trans.amount,
                 'description': trans.description,
                 'date': trans.transaction_date.strftime('%Y-%m-%d %H:%M'),
-                'category': trans.category.name if trans.category else None,
-                'from_wallet': trans.from_wallet.name if trans.from_wallet else None,
-                'to_wallet': trans.to_wallet.name if trans.to_wallet else None
+                'category': trans.category_name,
+                'from_wallet': trans.from_wallet_name,
+                'to_wallet': trans.to_wallet_name
             }
             result.append(transaction_data)
         
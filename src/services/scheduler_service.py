@@ -1,7 +1,7 @@
 import schedule
 import time
 import threading
-from datetime import datetime
+from datetime import datetime, time as dt_time
 import os
 from dotenv import load_dotenv
 from src.models.database import SessionLocal, User
@@ -31,6 +31,25 @@ class SchedulerService:
         weekly_day = os.getenv('WEEKLY_REPORT_DAY', 'monday')
         schedule.every().monday.at(daily_time).do(self.send_weekly_reports)
         
+        # Daily wallet balance checkpoints for the postings journal
+        checkpoint_time = os.getenv('LEDGER_CHECKPOINT_TIME', '02:00')
+        schedule.every().day.at(checkpoint_time).do(self.create_ledger_checkpoints)
+        
+        # Incremental balance reconciliation (reads only the journal since the last run)
+        reconcile_minutes = int(os.getenv('RECONCILE_INTERVAL_MINUTES', '60'))
+        if reconcile_minutes > 0:
+            schedule.every(reconcile_minutes).minutes.do(self.reconcile_balances)
+        
+        # Drop outbox events every subscriber has handled, once past retention
+        schedule.every().day.at(os.getenv('OUTBOX_PRUNE_TIME', '02:15')).do(self.prune_outbox_events)
+        
+        # SQLite housekeeping: a cheap WAL-size check often, the heavy pass in the quiet hours
+        wal_check_minutes = int(os.getenv('SQLITE_WAL_CHECK_MINUTES', '5'))
+        if wal_check_minutes > 0:
+            schedule.every(wal_check_minutes).minutes.do(self.check_sqlite_wal)
+        maintenance_time = os.getenv('SQLITE_MAINTENANCE_TIME', '03:30')
+        schedule.every().day.at(maintenance_time).do(self.run_sqlite_maintenance)
+        
         # Monthly reports (1st day of month)
         # Note: schedule library doesn't support monthly directly
         # This would need a more sophisticated approach
@@ -71,6 +90,71 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Error in weekly report job: {e}")
     
+    def create_ledger_checkpoints(self):
+        """Checkpoint every wallet's balance as of midnight and prune old checkpoints"""
+        from src.services.ledger_service import LedgerService
+        try:
+            db = SessionLocal()
+            try:
+                ledger = LedgerService(db)
+                as_of = datetime.combine(datetime.utcnow().date(), dt_time.min)
+                written = ledger.create_checkpoints(as_of)
+                pruned = ledger.prune_checkpoints(int(os.getenv('LEDGER_CHECKPOINT_KEEP', '90')))
+                logger.info(f"Ledger checkpoints as of {as_of}: {written} written, {pruned} pruned")
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error in ledger checkpoint job: {e}")
+    
+    def reconcile_balances(self):
+        """Check wallet balances against the postings journal since the last run"""
+        from src.services.reconciliation_service import ReconciliationService
+        try:
+            db = SessionLocal()
+            try:
+                result = ReconciliationService(db).reconcile()
+                logger.info(
+                    f"Reconciliation: {result['wallets']} wallets, {result['postings_read']} postings read, "
+                    f"{len(result['issues'])} new drift"
+                )
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error in reconciliation job: {e}")
+    
+    def prune_outbox_events(self):
+        """Delete handled outbox events older than OUTBOX_RETENTION_DAYS"""
+        from src.services.outbox_service import prune_outbox
+        try:
+            db = SessionLocal()
+            try:
+                removed = prune_outbox(db)
+                logger.info(f"Outbox pruned: {removed} events")
+            finally:
+                db.close()
+        except Exception as e:
+            logger.error(f"Error in outbox prune job: {e}")
+    
+    def check_sqlite_wal(self):
+        """Checkpoint the WAL when it has grown past its thresholds"""
+        from src.services.maintenance_service import MaintenanceService
+        try:
+            result = MaintenanceService().run_wal_check()
+            if result and result['busy']:
+                logger.warning(f"WAL checkpoint {result['mode']} blocked by readers: "
+                               f"{result['checkpointed_frames']}/{result['log_frames']} frames")
+        except Exception as e:
+            logger.error(f"Error in WAL check job: {e}")
+    
+    def run_sqlite_maintenance(self):
+        """TRUNCATE checkpoint, PRAGMA optimize and incremental vacuum in the quiet window"""
+        from src.services.maintenance_service import MaintenanceService
+        try:
+            result = MaintenanceService().run_scheduled_maintenance()
+            logger.info(f"Database maintenance: {result}")
+        except Exception as e:
+            logger.error(f"Error in database maintenance job: {e}")
+    
     def run_scheduler(self):
         """Run the scheduler in a loop"""
         while self.running:
@@ -0,0 +1,132 @@
+"""
+Transaction search over description and notes: SQLite FTS5 index
+(migrations/add_transaction_search.py) with an ILIKE fallback elsewhere
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, or_, func, select, text, table, column
+from src.models.database import Transaction
+from src.services.report_query_service import ReportQueryService
+from src.services.user_service import UserService
+from datetime import datetime
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'transactions_fts'
+TransactionFTS = table(FTS_TABLE, column('rowid'))
+
+# Up to this many matches a page is read straight from the FTS hits (rowid
+# lookups + sort); above it, walking idx_transaction_user_date newest-first and
+# probing the match set reaches a full page sooner
+FTS_DRIVEN_MAX_MATCHES = int(os.getenv('SEARCH_FTS_DRIVEN_MAX_MATCHES', '5000'))
+
+# Search terms are reduced to word tokens, so user input never reaches the
+# FTS5 query syntax (quotes, NEAR, column filters) or LIKE wildcards raw
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_SEARCH_TOKENS = 5
+
+# FTS availability per database URL, checked once
+_fts_available = {}
+
+def search_tokens(query_text: str):
+    """Lowercased word tokens of a search phrase (at most MAX_SEARCH_TOKENS)"""
+    return _TOKEN_RE.findall((query_text or '').lower())[:MAX_SEARCH_TOKENS]
+
+def build_fts_query(tokens) -> str:
+    """FTS5 MATCH string: every token as a quoted prefix term, all required"""
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+class TransactionSearchService:
+    """Search a user's transactions and total what matched"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def fts_available(self) -> bool:
+        bind = self.db.get_bind()
+        key = str(bind.url)
+        if key not in _fts_available:
+            available = False
+            if bind.dialect.name == 'sqlite':
+                available = self.db.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                    {'name': FTS_TABLE}
+                ).first() is not None
+            _fts_available[key] = available
+        return _fts_available[key]
+
+    def match_filter(self, tokens, fts_driven: bool = True):
+        """
+        SQL condition selecting transactions whose description/notes match every token.
+        With FTS, `fts_driven` joins the FTS hits in (the planner starts from the
+        matches); otherwise it is an IN probe evaluated along the user's index scan.
+        """
+        if self.fts_available():
+            match = text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=build_fts_query(tokens))
+            if fts_driven:
+                # `+ 0` hides rowid from FTS5's xBestIndex, so the planner cannot
+                # probe the index once per scanned transaction row
+                return and_(TransactionFTS.c.rowid + 0 == Transaction.id, match)
+            return Transaction.id.in_(select(TransactionFTS.c.rowid).where(match))
+
+        conditions = []
+        for token in tokens:
+            pattern = '%' + token.replace('\\', '\\\\').replace('_', '\\_') + '%'
+            conditions.append(or_(
+                Transaction.description.ilike(pattern, escape='\\'),
+                Transaction.notes.ilike(pattern, escape='\\')
+            ))
+        return and_(*conditions)
+
+    def _search_filter(self, tokens, start_date: datetime = None, end_date: datetime = None, fts_driven: bool = True):
+        conditions = [self.match_filter(tokens, fts_driven)]
+        if start_date:
+            conditions.append(Transaction.transaction_date >= start_date)
+        if end_date:
+            conditions.append(Transaction.transaction_date <= end_date)
+        return and_(*conditions)
+
+    def get_totals(self, user_id: int, tokens, start_date: datetime = None, end_date: datetime = None):
+        """{'income', 'expense', 'transfer', 'count'} over every match, not just one page"""
+        totals = ReportQueryService._empty_totals()
+        rows = self.db.query(
+            Transaction.type,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).filter(
+            Transaction.user_id == user_id,
+            self._search_filter(tokens, start_date, end_date)
+        ).group_by(Transaction.type).all()
+
+        for trans_type, amount, count in rows:
+            ReportQueryService._add_to_totals(totals, trans_type, amount, count)
+        return totals
+
+    def search(self, user_id: int, query_text: str, start_date: datetime = None, end_date: datetime = None,
+               limit: int = 10, cursor: tuple = None, direction: str = 'next'):
+        """
+        One keyset page of matches, newest first, plus totals over all matches.
+        Returns get_transaction_page()'s dict with 'tokens' and 'totals' added.
+        """
+        tokens = search_tokens(query_text)
+        if not tokens:
+            return {'items': [], 'next_cursor': None, 'prev_cursor': None, 'tokens': [], 'totals': None}
+
+        totals = self.get_totals(user_id, tokens, start_date, end_date)
+        if not totals['count']:
+            return {'items': [], 'next_cursor': None, 'prev_cursor': None, 'tokens': tokens, 'totals': totals}
+
+        page = UserService(self.db).get_transaction_page(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            direction=direction,
+            extra_filter=self._search_filter(
+                tokens, start_date, end_date, fts_driven=totals['count'] <= FTS_DRIVEN_MAX_MATCHES
+            )
+        )
+        page['tokens'] = tokens
+        page['totals'] = totals
+        return page
@@ -0,0 +1,257 @@
+"""
+Slow-query log: statements slower than SLOW_QUERY_MS are written as JSON lines
+(normalized SQL, parameter shapes, duration, calling handler and the query
+plan) to a size-rotated file that scripts/slow_queries.py ranks
+"""
+from sqlalchemy import event
+from logging.handlers import RotatingFileHandler
+from datetime import datetime, date
+from pathlib import Path
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 0 disables the recorder
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '0'))
+SLOW_QUERY_LOG_PATH = os.getenv('SLOW_QUERY_LOG_PATH', 'logs/slow_queries.jsonl')
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', '3'))
+
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent.parent)
+HANDLERS_DIR = os.path.join(PROJECT_ROOT, 'src', 'handlers')
+_SKIPPED_CALLERS = tuple(os.path.join(PROJECT_ROOT, 'src', *parts) for parts in (
+    ('services', 'slow_query_service.py'), ('models', 'database.py'), ('models', 'queries.py')
+))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|:\w+|\?")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and replace literals, placeholders and IN lists with ?"""
+    sql = _STRING_LITERAL.sub('?', statement)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('(?, ...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()[:12]
+
+def _shape(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, datetime):
+        return 'datetime'
+    if isinstance(value, date):
+        return 'date'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return 'bytes'
+    return type(value).__name__
+
+def parameter_shapes(parameters, executemany: bool = False):
+    """Types only, never values: transaction amounts and descriptions stay out of the log"""
+    if executemany:
+        rows = list(parameters or [])
+        return {'rows': len(rows), 'row': parameter_shapes(rows[0]) if rows else []}
+    if isinstance(parameters, dict):
+        return {key: _shape(value) for key, value in parameters.items()}
+    return [_shape(value) for value in (parameters or ())]
+
+def find_callers():
+    """(handler, caller): the innermost src/handlers frame and the innermost project frame outside the model layer"""
+    handler = caller = None
+    frame = sys._getframe(1)
+    while frame is not None and handler is None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(PROJECT_ROOT) and filename not in _SKIPPED_CALLERS:
+            location = f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_code.co_name}:{frame.f_lineno}"
+            if caller is None:
+                caller = location
+            if filename.startswith(HANDLERS_DIR):
+                handler = location
+        frame = frame.f_back
+    return handler, caller
+
+def explain_plan(dialect_name, dbapi_connection, statement, parameters):
+    """
+    SQLite EXPLAIN QUERY PLAN detail lines, run on the raw DBAPI connection so
+    it neither fires engine events nor touches the caller's cursor. Other
+    backends return None: a failed EXPLAIN would abort their open transaction
+    """
+    if dialect_name != 'sqlite' or not statement.lstrip().upper().startswith(('SELECT', 'WITH', 'UPDATE', 'DELETE')):
+        return None
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+class SlowQueryMetrics:
+    """Statements timed and recorded since startup"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timed = 0
+        self.recorded = 0
+        self.recorded_ms = 0.0
+
+    def record(self, duration_ms: float, slow: bool):
+        with self._lock:
+            self.timed += 1
+            if slow:
+                self.recorded += 1
+                self.recorded_ms += duration_ms
+
+    def snapshot(self):
+        with self._lock:
+            return {'timed': self.timed, 'recorded': self.recorded, 'recorded_ms': round(self.recorded_ms, 1)}
+
+slow_query_metrics = SlowQueryMetrics()
+
+def get_slow_query_metrics():
+    """{'timed', 'recorded', 'recorded_ms'}"""
+    return slow_query_metrics.snapshot()
+
+class SlowQueryRecorder:
+    """Times every cursor execution on the given engines and logs the slow ones"""
+
+    def __init__(self, threshold_ms: float = None, path: str = None,
+                 max_bytes: int = None, backups: int = None):
+        self.threshold_ms = SLOW_QUERY_MS if threshold_ms is None else threshold_ms
+        self.path = path or SLOW_QUERY_LOG_PATH
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # A private logger so the JSON lines never reach the bot's own log handlers
+        self._store = logging.getLogger(f"{__name__}.store.{id(self)}")
+        self._store.propagate = False
+        self._store.setLevel(logging.INFO)
+        self._handler = RotatingFileHandler(
+            self.path,
+            maxBytes=SLOW_QUERY_LOG_MAX_BYTES if max_bytes is None else max_bytes,
+            backupCount=SLOW_QUERY_LOG_BACKUPS if backups is None else backups,
+            encoding='utf-8'
+        )
+        self._store.addHandler(self._handler)
+        self._engines = []
+
+    def install(self, *engines):
+        for target in engines:
+            if target in self._engines:
+                continue
+            event.listen(target, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(target, "after_cursor_execute", self._after_cursor_execute)
+            self._engines.append(target)
+        return self
+
+    def remove(self):
+        for target in self._engines:
+            event.remove(target, "before_cursor_execute", self._before_cursor_execute)
+            event.remove(target, "after_cursor_execute", self._after_cursor_execute)
+        self._engines = []
+        self._store.removeHandler(self._handler)
+        self._handler.close()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # On the execution context, not conn.info: a failing statement never
+        # reaches after_cursor_execute and would leave a stale start behind
+        context._slow_query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_slow_query_start', None)
+        if started is None:
+            return
+        duration_ms = (time.perf_counter() - started) * 1000
+        slow = duration_ms >= self.threshold_ms
+        slow_query_metrics.record(duration_ms, slow)
+        if not slow:
+            return
+        try:
+            self._record(conn, statement, parameters, executemany, duration_ms)
+        except Exception as e:
+            # The log must never break the query that triggered it
+            logger.warning(f"Could not record slow query: {e}")
+
+    def _record(self, conn, statement, parameters, executemany, duration_ms):
+        normalized = normalize_sql(statement)
+        handler, caller = find_callers()
+        plan = None if executemany else explain_plan(
+            conn.dialect.name, conn.connection.dbapi_connection, statement, parameters
+        )
+        self._store.info(json.dumps({
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'fingerprint': fingerprint(normalized),
+            'sql': normalized,
+            'params': parameter_shapes(parameters, executemany),
+            'duration_ms': round(duration_ms, 2),
+            'handler': handler,
+            'caller': caller,
+            'database': conn.engine.url.database if conn.dialect.name == 'sqlite' else conn.engine.url.render_as_string(hide_password=True),
+            'plan': plan,
+        }, ensure_ascii=False))
+
+_recorder = None
+
+def install_slow_query_log(*engines):
+    """Start recording on the given engines when SLOW_QUERY_MS > 0; returns the recorder or None"""
+    global _recorder
+    if SLOW_QUERY_MS <= 0:
+        return None
+    if _recorder is None:
+        _recorder = SlowQueryRecorder()
+        logger.info(f"Slow query log enabled: >= {SLOW_QUERY_MS:g}ms to {_recorder.path}")
+    return _recorder.install(*engines)
+
+def iter_slow_queries(path: str = None):
+    """Every recorded entry, oldest rotated file first"""
+    current = Path(path or SLOW_QUERY_LOG_PATH)
+    rotated = [p for p in current.parent.glob(current.name + '.*') if p.suffix[1:].isdigit()]
+    rotated.sort(key=lambda p: int(p.suffix[1:]), reverse=True)
+    for file in [*rotated, current]:
+        if not file.exists():
+            continue
+        with open(file, encoding='utf-8') as handle:
+            for line in handle:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+def rank_slow_queries(entries, limit: int = 20):
+    """
+    Group entries by fingerprint, worst total time first. Each group carries
+    count, total/avg/max ms, the callers seen and the slowest entry (with its plan)
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'], 'sql': entry['sql'], 'count': 0,
+            'total_ms': 0.0, 'max_ms': 0.0, 'callers': {}, 'slowest': entry,
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        if entry['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = entry['duration_ms']
+            group['slowest'] = entry
+        caller = entry.get('handler') or entry.get('caller') or '?'
+        group['callers'][caller] = group['callers'].get(caller, 0) + 1
+    ranked = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+    for group in ranked:
+        group['avg_ms'] = group['total_ms'] / group['count']
+    return ranked[:limit] if limit else ranked
@@ -0,0 +1,251 @@
+"""
+Telegram file_id reuse: once a photo or document is uploaded, Telegram
+returns a file_id that resends the same file without uploading it again. The
+send layer maps a sha256 of the file's bytes to that file_id (a bounded
+in-memory LRU in front of a small SQLite file, TELEGRAM_FILE_CACHE_PATH, that
+survives restarts), so a repeated chart or an unchanged export goes out by
+file_id. A file_id that Telegram rejects (another bot token, a purged file)
+is forgotten and the bytes are uploaded again
+"""
+from collections import OrderedDict
+from pathlib import Path
+from telebot.apihelper import ApiTelegramException
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Empty: memory only (file_ids are lost on restart, so every chart and export is uploaded again)
+TELEGRAM_FILE_CACHE_PATH = os.getenv('TELEGRAM_FILE_CACHE_PATH', os.path.join('data', 'telegram_files.db'))
+TELEGRAM_FILE_CACHE_SIZE = int(os.getenv('TELEGRAM_FILE_CACHE_SIZE', '2000'))
+TELEGRAM_FILE_CACHE_MAX_ROWS = int(os.getenv('TELEGRAM_FILE_CACHE_MAX_ROWS', '50000'))
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+class TelegramFileMetrics:
+    """Sends by file_id vs uploads, rejected file_ids, bytes and time per send"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.reused = 0
+            self.uploads = 0
+            self.stale = 0
+            self.bytes_uploaded = 0
+            self.bytes_saved = 0
+            self.upload_ms = 0.0
+            self.reuse_ms = 0.0
+            self.store_errors = 0
+
+    def record(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self):
+        with self._lock:
+            sends = self.reused + self.uploads
+            avg_upload_ms = self.upload_ms / self.uploads if self.uploads else 0.0
+            avg_reuse_ms = self.reuse_ms / self.reused if self.reused else 0.0
+            return {
+                'reused': self.reused,
+                'uploads': self.uploads,
+                'reuse_rate': round(self.reused / sends, 3) if sends else 0.0,
+                'stale': self.stale,
+                'bytes_uploaded': self.bytes_uploaded,
+                'bytes_saved': self.bytes_saved,
+                'avg_upload_ms': round(avg_upload_ms, 2),
+                'avg_reuse_ms': round(avg_reuse_ms, 2),
+                # Each reuse would otherwise have cost an average upload
+                'ms_saved': round(max(avg_upload_ms - avg_reuse_ms, 0.0) * self.reused, 1) if self.uploads else 0.0,
+                'store_errors': self.store_errors,
+            }
+
+_metrics = TelegramFileMetrics()
+
+class TelegramFileCache:
+    """(content hash, media type) -> file_id: bounded LRU over an optional SQLite file"""
+
+    # Trim the table back to its limit every this many stored rows
+    TRIM_EVERY = 500
+
+    def __init__(self, path: str = TELEGRAM_FILE_CACHE_PATH, max_entries: int = TELEGRAM_FILE_CACHE_SIZE,
+                 max_rows: int = TELEGRAM_FILE_CACHE_MAX_ROWS, metrics: TelegramFileMetrics = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.metrics = metrics or _metrics
+        self._entries = OrderedDict()  # (hash, media) -> file_id
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+
+    def _remember(self, slot, file_id):
+        with self._lock:
+            self._entries[slot] = file_id
+            self._entries.move_to_end(slot)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, digest: str, media: str):
+        """file_id last returned for these bytes sent as `media`, or None"""
+        slot = (digest, media)
+        with self._lock:
+            file_id = self._entries.get(slot)
+            if file_id is not None:
+                self._entries.move_to_end(slot)
+        if file_id is None:
+            file_id = self._db_get(slot)
+            if file_id is not None:
+                self._remember(slot, file_id)
+        if file_id is not None:
+            self._db_touch(slot)
+        return file_id
+
+    def put(self, digest: str, media: str, file_id: str, size: int):
+        self._remember((digest, media), file_id)
+        self._db_put((digest, media), file_id, size)
+
+    def forget(self, digest: str, media: str):
+        with self._lock:
+            self._entries.pop((digest, media), None)
+        self._db_execute("DELETE FROM telegram_files WHERE content_hash = ? AND media = ?", (digest, media))
+
+    # SQLite file: best effort, any error only costs an upload
+
+    def _connection(self):
+        if self._db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS telegram_files ("
+                " content_hash TEXT NOT NULL, media TEXT NOT NULL, file_id TEXT NOT NULL, size INTEGER NOT NULL,"
+                " uploaded_at REAL NOT NULL, last_used_at REAL NOT NULL, sends INTEGER NOT NULL DEFAULT 1,"
+                " PRIMARY KEY (content_hash, media))"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_telegram_files_used ON telegram_files (last_used_at)")
+            self._db = connection
+        return self._db
+
+    def _db_execute(self, statement, params=()):
+        if not self.path:
+            return None
+        try:
+            with self._db_lock:
+                return self._connection().execute(statement, params).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Telegram file cache query failed: {e}")
+            self.metrics.record(store_errors=1)
+            return None
+
+    def _db_get(self, slot):
+        row = self._db_execute("SELECT file_id FROM telegram_files WHERE content_hash = ? AND media = ?", slot)
+        return row[0] if row else None
+
+    def _db_touch(self, slot):
+        self._db_execute(
+            "UPDATE telegram_files SET last_used_at = ?, sends = sends + 1 WHERE content_hash = ? AND media = ?",
+            (time.time(), *slot)
+        )
+
+    def _db_put(self, slot, file_id, size):
+        now = time.time()
+        self._db_execute(
+            "INSERT OR REPLACE INTO telegram_files (content_hash, media, file_id, size, uploaded_at, last_used_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (*slot, file_id, size, now, now)
+        )
+        with self._lock:
+            self._writes += 1
+            trim = self._writes >= self.TRIM_EVERY
+            if trim:
+                self._writes = 0
+        if trim:
+            self._db_execute(
+                "DELETE FROM telegram_files WHERE rowid IN (SELECT rowid FROM telegram_files ORDER BY last_used_at"
+                " LIMIT max((SELECT count(*) FROM telegram_files) - ?, 0))",
+                (self.max_rows,)
+            )
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+def _is_rejected_file_id(error: ApiTelegramException) -> bool:
+    # "Bad Request: wrong file identifier/HTTP URL specified", "wrong remote file identifier ..."
+    return error.error_code == 400 and 'file' in str(error.description).lower()
+
+def _sent_file_id(message, media: str):
+    if media == 'photo':
+        # Largest size; resending it lets Telegram derive the smaller ones again
+        return message.photo[-1].file_id if message.photo else None
+    return message.document.file_id if message.document else None
+
+def send_cached_file(bot, chat_id: int, content: bytes, filename: str, media: str = 'photo', **kwargs):
+    """
+    Send `content` as a photo or document, by file_id when the same bytes were
+    uploaded before. kwargs go to bot.send_photo / bot.send_document (caption,
+    reply_markup, parse_mode...). Returns the sent message
+    """
+    send = getattr(bot, f"send_{media}")  # send_photo / send_document
+    cache = get_telegram_file_cache()
+    digest = content_hash(content)
+
+    file_id = cache.get(digest, media)
+    if file_id is not None:
+        start = time.perf_counter()
+        try:
+            message = send(chat_id, file_id, **kwargs)
+        except ApiTelegramException as e:
+            if not _is_rejected_file_id(e):
+                raise
+            logger.info(f"Telegram rejected cached file_id for {filename}, uploading again: {e.description}")
+            cache.forget(digest, media)
+            cache.metrics.record(stale=1)
+        else:
+            cache.metrics.record(reused=1, bytes_saved=len(content), reuse_ms=(time.perf_counter() - start) * 1000)
+            return message
+
+    upload = io.BytesIO(content)
+    upload.name = filename
+    start = time.perf_counter()
+    message = send(chat_id, upload, **kwargs)
+    cache.metrics.record(uploads=1, bytes_uploaded=len(content), upload_ms=(time.perf_counter() - start) * 1000)
+    file_id = _sent_file_id(message, media)
+    if file_id:
+        cache.put(digest, media, file_id, len(content))
+    return message
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_telegram_file_cache() -> TelegramFileCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TelegramFileCache()
+        return _cache
+
+def shutdown_telegram_file_cache():
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
+
+def get_telegram_file_metrics():
+    return _metrics.snapshot()
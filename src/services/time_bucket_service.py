@@ -0,0 +1,75 @@
+"""
+Maintains transactions.local_date, the per-user local-day key reports group by:
+backfills rows written without it (older rows, Core inserts) and re-derives a
+user's keys when their timezone changes
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, select
+from src.models.database import Transaction, User, BUMP_DATA_VERSION
+from src.utils.time_buckets import get_zone, local_day, user_timezone, forget_user_timezone
+import pytz
+import logging
+
+logger = logging.getLogger(__name__)
+
+_transactions = Transaction.__table__
+SET_LOCAL_DATE = _transactions.update().where(
+    _transactions.c.id == bindparam('row_id')
+).values(local_date=bindparam('day'))
+
+class TimeBucketService:
+    """Keeps local_date keys in line with transaction_date and users.timezone"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _rekey(self, condition, batch_size: int) -> int:
+        """Recompute local_date for rows matching `condition`, one committed batch at a time"""
+        updated = 0
+        touched_users = set()
+        after_id = 0
+        while True:
+            rows = self.db.execute(
+                select(_transactions.c.id, _transactions.c.user_id, _transactions.c.transaction_date)
+                .where(condition, _transactions.c.id > after_id)
+                .order_by(_transactions.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            keys = [
+                {'row_id': row.id, 'day': local_day(row.transaction_date, user_timezone(self.db, row.user_id))}
+                for row in rows if row.transaction_date is not None
+            ]
+            if keys:
+                self.db.execute(SET_LOCAL_DATE, keys)
+            # Day buckets moved: cached reports of these users are stale
+            for user_id in {row.user_id for row in rows} - touched_users:
+                self.db.execute(BUMP_DATA_VERSION, {'user_id': user_id})
+                touched_users.add(user_id)
+            self.db.commit()
+            updated += len(rows)
+            after_id = rows[-1].id
+        return updated
+
+    def backfill_local_dates(self, batch_size: int = 5000) -> int:
+        """Fill local_date where it is missing. Returns rows updated"""
+        updated = self._rekey(_transactions.c.local_date.is_(None), batch_size)
+        if updated:
+            logger.info(f"Backfilled local_date on {updated} transactions")
+        return updated
+
+    def set_user_timezone(self, user_id: int, zone_name: str, batch_size: int = 5000) -> int:
+        """Change a user's timezone and re-derive all their local_date keys. Returns rows updated"""
+        try:
+            pytz.timezone(zone_name)
+        except pytz.UnknownTimeZoneError:
+            raise ValueError(f"Zona waktu {zone_name} tidak dikenal")
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if user is None:
+            raise ValueError(f"User {user_id} tidak ditemukan")
+        user.timezone = get_zone(zone_name).zone
+        self.db.commit()
+        forget_user_timezone(user_id)
+        updated = self._rekey(_transactions.c.user_id == user_id, batch_size)
+        logger.info(f"User {user_id} timezone set to {user.timezone}, {updated} local_date keys re-derived")
+        return updated
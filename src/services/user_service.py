@@ -2,13 +2,25 @@
 User service layer for optimized user management and data isolation
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
-from src.models.database import User, Wallet, Transaction, Category, get_user_by_telegram_id, create_or_update_user
+from sqlalchemy import and_, or_, func, desc, tuple_
+from src.models.database import User, Wallet, Transaction, Category, get_user_by_telegram_id, create_or_update_user, normalize_name
+from src.models.queries import fetch_active_wallets, fetch_active_wallet
+from src.services.report_query_service import ReportQueryService
+from src.services.write_queue_service import write_queue_enabled, queue_user_touch
+from src.services.optimistic_lock_service import run_with_retry
+from src.utils.time_buckets import period_bounds, user_timezone
 from datetime import datetime, timedelta
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _apply_wallet_balance(db, wallet_id: int, amount: float, operation: str):
+    """Change one wallet's balance in the session (version-checked at flush); no commit"""
+    wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
+    if wallet:
+        wallet.update_balance(amount, operation)
+    return wallet
+
 class UserService:
     """Service class for user-related operations with performance optimizations"""
     
@@ -17,36 +29,52 @@ class UserService:
     
     def get_or_create_user(self, telegram_user) -> User:
         """Get existing user or create new one"""
+        if write_queue_enabled():
+            user = get_user_by_telegram_id(self.db, telegram_user.id)
+            if user:
+                # Profile refresh + last_activity are group-committed by the writer
+                queue_user_touch(
+                    user,
+                    username=telegram_user.username,
+                    first_name=telegram_user.first_name,
+                    last_name=telegram_user.last_name
+                )
+                return user
         return create_or_update_user(self.db, telegram_user)
     
     def get_user_wallets(self, user_id: int, active_only: bool = True):
         """Get user's wallets with optimized query"""
-        query = self.db.query(Wallet).filter(Wallet.user_id == user_id)
-        
         if active_only:
-            query = query.filter(Wallet.is_active == True)
+            return fetch_active_wallets(self.db, user_id)
         
-        return query.order_by(Wallet.name).all()
+        return self.db.query(Wallet).filter(Wallet.user_id == user_id).order_by(Wallet.name).all()
     
     def get_user_wallet_by_id(self, user_id: int, wallet_id: int):
         """Get specific wallet for user with validation"""
-        return self.db.query(Wallet).filter(
-            and_(
-                Wallet.id == wallet_id,
-                Wallet.user_id == user_id,
-                Wallet.is_active == True
-            )
-        ).first()
+        return fetch_active_wallet(self.db, user_id, wallet_id)
     
     def get_user_wallet_by_name(self, user_id: int, wallet_name: str):
-        """Get wallet by name for specific user"""
-        return self.db.query(Wallet).filter(
-            and_(
-                Wallet.user_id == user_id,
-                Wallet.name.ilike(f"%{wallet_name}%"),
-                Wallet.is_active == True
-            )
-        ).first()
+        """
+        Active wallet whose normalized name equals, or else uniquely starts with,
+        `wallet_name`; None when nothing or several wallets match. Both lookups
+        are range scans on idx_wallet_active_user_name_norm. Typo-tolerant
+        resolution lives in WalletNameResolver
+        """
+        key = normalize_name(wallet_name)
+        if not key:
+            return None
+        
+        base = self.db.query(Wallet).filter(Wallet.user_id == user_id, Wallet.is_active == True)
+        wallet = base.filter(Wallet.name_normalized == key).first()
+        if wallet:
+            return wallet
+        
+        # Prefix as a range (not LIKE), so the index serves it on every backend
+        matches = base.filter(
+            Wallet.name_normalized >= key,
+            Wallet.name_normalized < key + '\uffff'
+        ).limit(2).all()
+        return matches[0] if len(matches) == 1 else None
     
     def create_wallet(self, user_id: int, name: str, wallet_type: str, initial_balance: float = 0.0, description: str = None):
         """Create new wallet for user"""
@@ -65,17 +93,22 @@ class UserService:
         return wallet
     
     def update_wallet_balance(self, wallet_id: int, amount: float, operation: str = 'add'):
-        """Update wallet balance with proper validation"""
-        wallet = self.db.query(Wallet).filter(Wallet.id == wallet_id).first()
-        if wallet:
-            wallet.update_balance(amount, operation)
-            self.db.commit()
+        """Update wallet balance with proper validation; retried if another writer got there first"""
+        def job(db):
+            wallet = _apply_wallet_balance(db, wallet_id, amount, operation)
+            db.commit()
             return wallet
-        return None
+        
+        return run_with_retry(self.db, 'update_wallet_balance', job)
     
     def get_user_transactions(self, user_id: int, limit: int = 50, offset: int = 0, 
-                            transaction_type: str = None, start_date: datetime = None, end_date: datetime = None):
-        """Get user's transactions with filtering and pagination"""
+                            transaction_type: str = None, start_date: datetime = None, end_date: datetime = None,
+                            before: tuple = None):
+        """
+        Get user's transactions with filtering and pagination.
+        Pass `before=(transaction_date, id)` from the last row of the previous page
+        to use keyset pagination instead of `offset`.
+        """
         query = self.db.query(Transaction).filter(Transaction.user_id == user_id)
         
         if transaction_type:
@@ -87,40 +120,93 @@ class UserService:
         if end_date:
             query = query.filter(Transaction.transaction_date <= end_date)
         
-        return query.order_by(desc(Transaction.transaction_date)).offset(offset).limit(limit).all()
+        if before:
+            query = query.filter(tuple_(Transaction.transaction_date, Transaction.id) < tuple(before))
+            offset = 0
+        
+        return query.order_by(desc(Transaction.transaction_date), desc(Transaction.id)).offset(offset).limit(limit).all()
+    
+    def get_transaction_page(self, user_id: int, limit: int = 10, cursor: tuple = None, direction: str = 'next',
+                             transaction_type: str = None, wallet_id: int = None, extra_filter=None):
+        """
+        Keyset-paginated transaction history, newest first.
+        
+        `cursor` is the (transaction_date, id) key of the row the page starts after
+        ('next') or before ('prev'). Rows are walked in idx_transaction_user_date
+        order; type and wallet filters are applied on that same index scan.
+        `extra_filter` is an optional SQL condition ANDed in (search matches).
+        Returns {'items', 'next_cursor', 'prev_cursor'}.
+        """
+        query = ReportQueryService(self.db).transaction_listing_query(user_id)
+        
+        if extra_filter is not None:
+            query = query.filter(extra_filter)
+        
+        if transaction_type:
+            query = query.filter(Transaction.type == transaction_type)
+        
+        if wallet_id:
+            query = query.filter(or_(Transaction.from_wallet_id == wallet_id, Transaction.to_wallet_id == wallet_id))
+        
+        key = tuple_(Transaction.transaction_date, Transaction.id)
+        if direction == 'prev' and cursor:
+            rows = query.filter(key > tuple(cursor)).order_by(
+                Transaction.transaction_date, Transaction.id
+            ).limit(limit + 1).all()
+            has_prev = len(rows) > limit
+            items = list(reversed(rows[:limit]))
+            has_next = True
+        else:
+            if cursor:
+                query = query.filter(key < tuple(cursor))
+            rows = query.order_by(
+                desc(Transaction.transaction_date), desc(Transaction.id)
+            ).limit(limit + 1).all()
+            has_next = len(rows) > limit
+            items = rows[:limit]
+            has_prev = cursor is not None
+        
+        return {
+            'items': items,
+            'next_cursor': (items[-1].transaction_date, items[-1].id) if items and has_next else None,
+            'prev_cursor': (items[0].transaction_date, items[0].id) if items and has_prev else None
+        }
     
     def create_transaction(self, user_id: int, transaction_type: str, amount: float, 
                           description: str = None, category_id: int = None,
                           from_wallet_id: int = None, to_wallet_id: int = None,
                           transaction_date: datetime = None):
-        """Create new transaction with wallet balance updates"""
+        """Create new transaction with wallet balance updates, retried on a concurrent wallet edit"""
         if not transaction_date:
             transaction_date = datetime.utcnow()
         
-        # Create transaction record
-        transaction = Transaction(
-            user_id=user_id,
-            type=transaction_type,
-            amount=amount,
-            description=description,
-            category_id=category_id,
-            from_wallet_id=from_wallet_id,
-            to_wallet_id=to_wallet_id,
-            transaction_date=transaction_date
-        )
-        
-        self.db.add(transaction)
-        
-        # Update wallet balances
-        if transaction_type == 'income' and to_wallet_id:
-            self.update_wallet_balance(to_wallet_id, amount, 'add')
-        elif transaction_type == 'expense' and from_wallet_id:
-            self.update_wallet_balance(from_wallet_id, amount, 'subtract')
-        elif transaction_type == 'transfer' and from_wallet_id and to_wallet_id:
-            self.update_wallet_balance(from_wallet_id, amount, 'subtract')
-            self.update_wallet_balance(to_wallet_id, amount, 'add')
+        def job(db):
+            # Rebuilt per attempt: a rollback expunges the pending row
+            transaction = Transaction(
+                user_id=user_id,
+                type=transaction_type,
+                amount=amount,
+                description=description,
+                category_id=category_id,
+                from_wallet_id=from_wallet_id,
+                to_wallet_id=to_wallet_id,
+                transaction_date=transaction_date
+            )
+            db.add(transaction)
+            
+            # Update wallet balances
+            if transaction_type == 'income' and to_wallet_id:
+                _apply_wallet_balance(db, to_wallet_id, amount, 'add')
+            elif transaction_type == 'expense' and from_wallet_id:
+                _apply_wallet_balance(db, from_wallet_id, amount, 'subtract')
+            elif transaction_type == 'transfer' and from_wallet_id and to_wallet_id:
+                _apply_wallet_balance(db, from_wallet_id, amount, 'subtract')
+                _apply_wallet_balance(db, to_wallet_id, amount, 'add')
+            
+            db.commit()
+            return transaction
         
-        self.db.commit()
+        transaction = run_with_retry(self.db, 'create_transaction', job)
         self.db.refresh(transaction)
         return transaction
     
@@ -137,7 +223,7 @@ class UserService:
         ).scalar() or 0
         
         # Get this month's transactions
-        start_of_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        start_of_month = period_bounds(user_timezone(self.db, user_id), 'month').utc_start
         
         monthly_income = self.db.query(func.sum(Transaction.amount)).filter(
             and_(
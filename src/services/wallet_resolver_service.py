@@ -0,0 +1,124 @@
+"""
+Wallet name resolution for typed commands ("/out 25000 kopi dari bca"):
+exact, then prefix, then edit-distance match on normalized names, served from
+a per-user in-memory cache of active wallets that the outbox dispatcher
+invalidates when a wallet changes
+"""
+from sqlalchemy.orm import Session
+from src.models.database import Wallet, normalize_name
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+WALLET_NAME_CACHE_TTL = float(os.getenv('WALLET_NAME_CACHE_TTL', '300'))
+
+# user_id -> (loaded_at, [(wallet_id, name, normalized)])
+_wallet_names = {}
+_wallet_names_lock = threading.Lock()
+
+def invalidate_wallet_names(user_id: int = None):
+    """Drop cached wallet names for one user (or everyone)"""
+    with _wallet_names_lock:
+        if user_id is None:
+            _wallet_names.clear()
+        else:
+            _wallet_names.pop(user_id, None)
+
+def _wallet_changed(change):
+    """Outbox handler: a wallet created, deleted, renamed or (de)activated drops its user's names"""
+    # Balance updates on every transaction leave the cached names alone
+    if change.event_type == 'updated' and not {'name', 'is_active'} & set(change.payload.get('changed', ())):
+        return
+    invalidate_wallet_names(change.user_id)
+
+def subscribe_wallet_names(dispatcher):
+    """
+    Keep the cache in step with committed wallet changes, from this process
+    (delivered right after the commit) or any other. Not durable: the cache
+    starts empty, so only events after startup matter
+    """
+    return dispatcher.subscribe('wallet_names', _wallet_changed, aggregate_types=['wallet'], durable=False)
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Levenshtein distance, or max_distance + 1 as soon as it is known to exceed it"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+class WalletNameResolver:
+    """Resolve a typed wallet name to one of the user's active wallets"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _entries(self, user_id: int):
+        now = time.monotonic()
+        with _wallet_names_lock:
+            cached = _wallet_names.get(user_id)
+            if cached and now - cached[0] < WALLET_NAME_CACHE_TTL:
+                return cached[1]
+
+        rows = self.db.query(Wallet.id, Wallet.name, Wallet.name_normalized).filter(
+            Wallet.user_id == user_id,
+            Wallet.is_active == True
+        ).order_by(Wallet.name).all()
+        entries = [(row.id, row.name, row.name_normalized or normalize_name(row.name)) for row in rows]
+
+        with _wallet_names_lock:
+            _wallet_names[user_id] = (now, entries)
+        return entries
+
+    def resolve(self, user_id: int, typed_name: str):
+        """
+        Returns {'wallet_id', 'match', 'candidates'}: wallet_id is set only for an
+        unambiguous match ('exact', 'prefix' or 'fuzzy'); otherwise candidates
+        lists the (wallet_id, name) pairs the user has to choose between
+        """
+        key = normalize_name(typed_name)
+        entries = self._entries(user_id)
+        if not key or not entries:
+            return {'wallet_id': None, 'match': None, 'candidates': [(e[0], e[1]) for e in entries]}
+
+        exact = [e for e in entries if e[2] == key]
+        if exact:
+            return self._result(exact, 'exact')
+
+        # Whole name or any word of it ("bca" -> "bank bca")
+        prefix = [e for e in entries if e[2].startswith(key) or any(w.startswith(key) for w in e[2].split())]
+        if prefix:
+            return self._result(prefix, 'prefix')
+
+        # Typos: one edit for short names, roughly one per four characters beyond that
+        max_distance = max(1, len(key) // 4)
+        scored = []
+        for entry in entries:
+            distance = min([edit_distance(key, entry[2], max_distance)] +
+                           [edit_distance(key, word, max_distance) for word in entry[2].split()])
+            if distance <= max_distance:
+                scored.append((distance, entry))
+        if scored:
+            best = min(distance for distance, _ in scored)
+            return self._result([entry for distance, entry in scored if distance == best], 'fuzzy')
+
+        return {'wallet_id': None, 'match': None, 'candidates': [(e[0], e[1]) for e in entries]}
+
+    @staticmethod
+    def _result(matches, kind):
+        if len(matches) == 1:
+            return {'wallet_id': matches[0][0], 'match': kind, 'candidates': [(matches[0][0], matches[0][1])]}
+        return {'wallet_id': None, 'match': kind, 'candidates': [(e[0], e[1]) for e in matches]}
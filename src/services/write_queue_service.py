@@ -0,0 +1,264 @@
+"""
+Single-writer queue for SQLite: all queued mutations run on one dedicated
+connection and are group-committed, so many small writes share one fsync
+instead of contending for the database lock (opt-in via DB_WRITE_QUEUE)
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from concurrent.futures import Future
+from datetime import datetime
+import os
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+WRITE_QUEUE_MAX_BATCH = int(os.getenv('DB_WRITE_QUEUE_MAX_BATCH', '64'))
+# 0 = batch whatever queued up during the previous commit, never delay a lone write
+WRITE_QUEUE_MAX_WAIT_MS = float(os.getenv('DB_WRITE_QUEUE_MAX_WAIT_MS', '0'))
+# How long a caller waits for its write before giving up
+WRITE_QUEUE_RESULT_TIMEOUT = float(os.getenv('DB_WRITE_QUEUE_RESULT_TIMEOUT', '30'))
+
+# Upper bounds of the commit batch-size histogram buckets
+BATCH_SIZE_BUCKETS = (1, 4, 16, 64)
+
+def write_queue_enabled() -> bool:
+    """Queue is opt-in and only meaningful for SQLite's single-writer lock"""
+    from src.models.database import DB_BACKEND
+
+    return DB_BACKEND == 'sqlite' and os.getenv('DB_WRITE_QUEUE', 'false').lower() in ('1', 'true', 'yes')
+
+class _GroupCommitSession(Session):
+    """
+    Writer-thread session. While a batch is open, commit() from service code only
+    flushes, so the whole batch lands in one transaction; rollback() marks the
+    batch so it gets replayed job by job
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_batch = False
+        self.batch_poisoned = False
+
+    def commit(self):
+        if self.in_batch:
+            self.flush()
+        else:
+            super().commit()
+
+    def rollback(self):
+        if self.in_batch:
+            self.batch_poisoned = True
+        super().rollback()
+
+class _WriteJob:
+    __slots__ = ('func', 'args', 'kwargs', 'future')
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+class WriteQueue:
+    """
+    Serializes writes onto one connection and commits them in groups.
+    submit(func, ...) runs func(session, ...) on the writer thread and returns a
+    Future with its result. Return plain values (ids, numbers), not ORM objects
+    """
+
+    def __init__(self, engine, max_batch: int = WRITE_QUEUE_MAX_BATCH, max_wait_ms: float = WRITE_QUEUE_MAX_WAIT_MS):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        # Submitting threads, the writer and metrics() readers all touch the counters
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'jobs': 0,
+            'failed_jobs': 0,
+            'batches': 0,
+            'replayed_batches': 0,
+            'max_batch_size': 0,
+            'peak_queue_depth': 0,
+            'commit_ms_total': 0.0,
+            'batch_sizes': {bucket: 0 for bucket in BATCH_SIZE_BUCKETS + ('more',)},
+        }
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10.0):
+        """Drain queued writes, then stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+        if thread:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def submit(self, func, *args, **kwargs) -> Future:
+        if self._stopping or self._thread is None:
+            raise RuntimeError("Write queue is not running")
+        job = _WriteJob(func, args, kwargs)
+        self._queue.put(job)
+        depth = self._queue.qsize()
+        with self._metrics_lock:
+            if depth > self._metrics['peak_queue_depth']:
+                self._metrics['peak_queue_depth'] = depth
+        return job.future
+
+    def metrics(self):
+        with self._metrics_lock:
+            metrics = dict(self._metrics)
+            metrics['batch_sizes'] = dict(self._metrics['batch_sizes'])
+        metrics['queue_depth'] = self._queue.qsize()
+        batches = metrics['batches'] or 1
+        metrics['avg_batch_size'] = round(metrics['jobs'] / batches, 2)
+        metrics['avg_commit_ms'] = round(metrics['commit_ms_total'] / batches, 3)
+        return metrics
+
+    def _next_batch(self):
+        """Block for the first job, then collect more until max_batch or max_wait"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # Stop sentinel: finish this batch, then exit
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        connection = self.engine.connect()
+        session = _GroupCommitSession(bind=connection, autoflush=False, expire_on_commit=False)
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    break
+                self._execute_batch(session, batch)
+        finally:
+            session.close()
+            connection.close()
+            # Fail anything submitted after the stop sentinel
+            while True:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job.future.set_exception(RuntimeError("Write queue stopped"))
+
+    def _execute_batch(self, session, batch):
+        results = []
+        started = time.perf_counter()
+        session.in_batch = True
+        session.batch_poisoned = False
+        try:
+            for job in batch:
+                results.append(job.func(session, *job.args, **job.kwargs))
+            session.flush()
+            if session.batch_poisoned and len(batch) > 1:
+                # A job's own rollback also discarded its neighbours' writes
+                raise RuntimeError("job rolled back inside group commit")
+            session.in_batch = False
+            session.commit()
+        except Exception as e:
+            session.in_batch = False
+            session.rollback()
+            session.expunge_all()
+            if len(batch) == 1:
+                self._record_batch(1, started, failed=1)
+                batch[0].future.set_exception(e)
+                return
+            # One bad job must not fail its neighbours: replay each on its own
+            logger.warning(f"Group commit of {len(batch)} writes failed ({e}); replaying individually")
+            with self._metrics_lock:
+                self._metrics['replayed_batches'] += 1
+            for job in batch:
+                self._execute_batch(session, [job])
+            return
+        finally:
+            session.in_batch = False
+
+        session.expunge_all()
+        self._record_batch(len(batch), started)
+        for job, result in zip(batch, results):
+            job.future.set_result(result)
+
+    def _record_batch(self, size, started, failed=0):
+        commit_ms = (time.perf_counter() - started) * 1000
+        with self._metrics_lock:
+            metrics = self._metrics
+            metrics['batches'] += 1
+            metrics['jobs'] += size
+            metrics['failed_jobs'] += failed
+            metrics['max_batch_size'] = max(metrics['max_batch_size'], size)
+            metrics['commit_ms_total'] += commit_ms
+            for bucket in BATCH_SIZE_BUCKETS:
+                if size <= bucket:
+                    metrics['batch_sizes'][bucket] += 1
+                    break
+            else:
+                metrics['batch_sizes']['more'] += 1
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue() -> WriteQueue:
+    """Process-wide writer bound to the main engine, started on first use"""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            from src.models.database import engine
+
+            _write_queue = WriteQueue(engine).start()
+            logger.info(f"SQLite write queue started (max_batch={_write_queue.max_batch}, "
+                        f"max_wait={WRITE_QUEUE_MAX_WAIT_MS}ms)")
+        return _write_queue
+
+def shutdown_write_queue():
+    """Drain and stop the shared writer, logging its final metrics"""
+    global _write_queue
+    with _write_queue_lock:
+        writer, _write_queue = _write_queue, None
+    if writer:
+        writer.stop()
+        logger.info(f"SQLite write queue stopped: {writer.metrics()}")
+
+def _touch_user_job(session, user_id, values):
+    from src.models.database import User
+
+    session.query(User).filter(User.id == user_id).update(values, synchronize_session=False)
+    return user_id
+
+def queue_user_touch(user, **values) -> Future:
+    """
+    Queue a last_activity (plus profile fields) update without waiting for it.
+    The caller's `user` object shows the new values but stays clean, so the
+    caller's own session never writes them a second time
+    """
+    values['last_activity'] = datetime.utcnow()
+    for key, value in values.items():
+        set_committed_value(user, key, value)
+    return get_write_queue().submit(_touch_user_job, user.id, values)
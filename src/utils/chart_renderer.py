@@ -0,0 +1,101 @@
+"""
+Chart drawing for the chart worker processes (see chart_service). Importing
+this module pulls in matplotlib, so only the workers import it; the bot
+process only ever sends them plain data and gets PNG bytes back
+"""
+import io
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+# Bump when the drawing changes: it is part of every cache key
+RENDERER_VERSION = 2
+
+FIGURE_SIZE = (8, 4.5)
+DPI = 110
+INCOME_COLOR = '#2e7d32'
+EXPENSE_COLOR = '#c62828'
+LINE_COLOR = '#1565c0'
+# Pie wedge for small slices; also the name of the default 'other' category
+OTHER_LABEL = 'Lainnya'
+
+def _short_idr(value, _position=None) -> str:
+    """Axis label: Rp 1,5jt / Rp 250rb"""
+    if abs(value) >= 1e9:
+        return f"Rp {value / 1e9:.1f}M".replace('.', ',')
+    if abs(value) >= 1e6:
+        return f"Rp {value / 1e6:.1f}jt".replace('.', ',')
+    if abs(value) >= 1e3:
+        return f"Rp {value / 1e3:.0f}rb"
+    return f"Rp {value:.0f}"
+
+def _spending_trend(ax, data):
+    """data: {'periods': [label], 'income': [amount], 'expense': [amount]}"""
+    positions = range(len(data['periods']))
+    width = 0.4
+    ax.bar([p - width / 2 for p in positions], data['income'], width, label='Pemasukan', color=INCOME_COLOR)
+    ax.bar([p + width / 2 for p in positions], data['expense'], width, label='Pengeluaran', color=EXPENSE_COLOR)
+    ax.set_xticks(list(positions), data['periods'])
+    ax.yaxis.set_major_formatter(FuncFormatter(_short_idr))
+    ax.grid(axis='y', alpha=0.3)
+    ax.legend()
+
+def _category_pie(ax, data):
+    """
+    data: {'labels': [name], 'values': [amount]}; slices under 3% are merged into
+    'Lainnya', together with an existing 'Lainnya' entry (the default other
+    category, uncategorized expenses) so the pie has one such wedge
+    """
+    total = sum(data['values']) or 1.0
+    labels, values = [], []
+    other = other_index = None
+    for label, value in zip(data['labels'], data['values']):
+        if label == OTHER_LABEL or value / total < 0.03:
+            other = (other or 0.0) + value
+            if label == OTHER_LABEL and other_index is None:
+                other_index = len(labels)
+        else:
+            labels.append(label)
+            values.append(value)
+    if other:
+        # Where an existing 'Lainnya' was ranked, else last
+        position = len(labels) if other_index is None else other_index
+        labels.insert(position, OTHER_LABEL)
+        values.insert(position, other)
+    ax.pie(values, labels=labels, autopct='%1.0f%%', startangle=90, counterclock=False,
+           wedgeprops={'linewidth': 1, 'edgecolor': 'white'})
+    ax.axis('equal')
+
+def _net_worth_line(ax, data):
+    """data: {'dates': [label], 'values': [amount]}"""
+    positions = list(range(len(data['dates'])))
+    ax.plot(positions, data['values'], color=LINE_COLOR, linewidth=2)
+    ax.fill_between(positions, data['values'], min(data['values'] or [0]), color=LINE_COLOR, alpha=0.1)
+    step = max(1, len(positions) // 6)
+    ax.set_xticks(positions[::step], data['dates'][::step])
+    ax.yaxis.set_major_formatter(FuncFormatter(_short_idr))
+    ax.grid(alpha=0.3)
+
+CHART_KINDS = {
+    'spending_trend': _spending_trend,
+    'category_pie': _category_pie,
+    'net_worth': _net_worth_line,
+}
+
+def warm_up():
+    """Process-pool initializer: pay the font and backend setup once per worker"""
+    render_chart('net_worth', '', {'dates': ['a', 'b'], 'values': [0.0, 1.0]})
+
+def render_chart(kind: str, title: str, data: dict) -> bytes:
+    """PNG bytes of one chart"""
+    # A Figure without pyplot: no global figure registry, nothing to close
+    figure = Figure(figsize=FIGURE_SIZE, dpi=DPI)
+    ax = figure.add_subplot()
+    CHART_KINDS[kind](ax, data)
+    if title:
+        ax.set_title(title)
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    return buffer.getvalue()
@@ -62,14 +62,13 @@ def parse_transaction_text(text: str) -> Tuple[Optional[float], str, str]:
         # Remove amount from text
         remaining_text = text.replace(amount_match.group(0), '', 1).strip()
         
-        # Look for wallet indicators
-        wallet_indicators = r'\b(?:dari|to|ke|untuk|pakai|via|lewat|with|from)\s+([^\s]+(?:\s+[^\s]+)*?)(?:\s|$)'
-        wallet_match = re.search(wallet_indicators, remaining_text, re.IGNORECASE)
+        # The last wallet indicator starts the wallet name, which may span words ("dari bank bri")
+        wallet_indicators = r'\b(?:dari|to|ke|untuk|pakai|via|lewat|with|from)\s+'
+        wallet_matches = list(re.finditer(wallet_indicators, remaining_text, re.IGNORECASE))
         
-        if wallet_match:
-            wallet_name = wallet_match.group(1).strip()
-            # Remove wallet part from description
-            description = re.sub(wallet_indicators, '', remaining_text, flags=re.IGNORECASE).strip()
+        if wallet_matches and remaining_text[wallet_matches[-1].end():].strip():
+            wallet_name = remaining_text[wallet_matches[-1].end():].strip()
+            description = remaining_text[:wallet_matches[-1].start()].strip()
         else:
             description = remaining_text
     
@@ -106,9 +105,10 @@ def parse_transfer_text(text: str) -> Tuple[Optional[float], str, str]:
     
     return amount, from_wallet, to_wallet
 
-def get_date_range(period: str, custom_date: Optional[datetime] = None) -> Tuple[datetime, datetime]:
-    """Get date range for reports"""
-    now = datetime.now()
+def get_date_range(period: str, custom_date: Optional[datetime] = None,
+                   now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Get date range for reports, relative to now (default: the current time)"""
+    now = now or datetime.now()
     
     if period == 'today':
         start = now.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -143,6 +143,10 @@ def get_date_range(period: str, custom_date: Optional[datetime] = None) -> Tuple
         else:
             start = now.replace(month=now.month-1, day=1, hour=0, minute=0, second=0, microsecond=0)
             end = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(microseconds=1)
+    elif period == 'year':
+        # Current calendar year
+        start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = now.replace(year=now.year+1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0) - timedelta(microseconds=1)
     else:
         # Custom date or fallback to today
         if custom_date:
@@ -273,8 +277,46 @@ def get_category_name(category_code: str) -> str:
     }
     return categories.get(category_code, 'Tidak Dikenal')
 
+EPOCH = datetime(1970, 1, 1)
+
+def _to_base36(number: int) -> str:
+    """Encode non-negative integer as base36"""
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    if number == 0:
+        return '0'
+    result = ''
+    while number:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+    return result
+
+def encode_history_cursor(cursor: Optional[Tuple[datetime, int]]) -> str:
+    """Encode (transaction_date, id) keyset cursor compactly for callback_data"""
+    if not cursor:
+        return ''
+    transaction_date, transaction_id = cursor
+    micros = (transaction_date - EPOCH) // timedelta(microseconds=1)
+    return f"{_to_base36(micros)}.{_to_base36(transaction_id)}"
+
+def decode_history_cursor(token: str) -> Optional[Tuple[datetime, int]]:
+    """Decode cursor produced by encode_history_cursor, None if empty/invalid"""
+    try:
+        micros, transaction_id = token.split('.')
+        return EPOCH + timedelta(microseconds=int(micros, 36)), int(transaction_id, 36)
+    except (ValueError, AttributeError):
+        return None
+
 def truncate_text(text: str, max_length: int = 30) -> str:
     """Truncate text if too long"""
     if len(text) <= max_length:
         return text
     return text[:max_length-3] + "..."
+
+# Reserved characters of Telegram's legacy Markdown (parse_mode='Markdown');
+# telebot.formatting.escape_markdown targets MarkdownV2, whose extra escapes
+# legacy Markdown shows as literal backslashes
+_LEGACY_MARKDOWN_RE = re.compile(r'([_*`\[])')
+
+def escape_markdown_legacy(text: str) -> str:
+    """Escape user text for a parse_mode='Markdown' message"""
+    return _LEGACY_MARKDOWN_RE.sub(r'\\\1', text)
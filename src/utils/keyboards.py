@@ -84,6 +84,9 @@ def create_analysis_menu():
     btn_trend = types.InlineKeyboardButton("📉 Trend", callback_data="analysis_trend")
     markup.add(btn_category, btn_trend)
     
+    btn_networth = types.InlineKeyboardButton("💎 Kekayaan Bersih", callback_data="analysis_networth")
+    markup.add(btn_networth)
+    
     btn_back = types.InlineKeyboardButton("🔙 Kembali", callback_data="main_menu")
     markup.add(btn_back)
     
@@ -280,3 +283,70 @@ def create_category_keyboard(transaction_type):
     markup.add(btn_back)
     
     return markup
+
+def create_history_keyboard(type_code, wallet_id, prev_token=None, next_token=None):
+    """Create keyboard for transaction history with filters and keyset paging"""
+    markup = types.InlineKeyboardMarkup(row_width=4)
+    wallet_part = wallet_id or 0
+    
+    filters = [
+        ("Semua", "a"),
+        ("Masuk", "i"),
+        ("Keluar", "e"),
+        ("Transfer", "t")
+    ]
+    filter_buttons = []
+    for name, code in filters:
+        label = f"✅ {name}" if code == type_code else name
+        filter_buttons.append(
+            types.InlineKeyboardButton(label, callback_data=f"hist_f_{code}_{wallet_part}_")
+        )
+    markup.add(*filter_buttons)
+    
+    nav_buttons = []
+    if prev_token:
+        nav_buttons.append(types.InlineKeyboardButton(
+            "⬅️ Sebelumnya", callback_data=f"hist_p_{type_code}_{wallet_part}_{prev_token}"
+        ))
+    if next_token:
+        nav_buttons.append(types.InlineKeyboardButton(
+            "Berikutnya ➡️", callback_data=f"hist_n_{type_code}_{wallet_part}_{next_token}"
+        ))
+    if nav_buttons:
+        markup.add(*nav_buttons)
+    
+    back_data = f"wallet_detail_{wallet_id}" if wallet_id else "transaction_menu"
+    btn_back = types.InlineKeyboardButton("🔙 Kembali", callback_data=back_data)
+    markup.add(btn_back)
+    
+    return markup
+
+def create_search_keyboard(period_code, prev_token=None, next_token=None):
+    """Create keyboard for /cari results with period filters and keyset paging"""
+    markup = types.InlineKeyboardMarkup(row_width=3)
+    
+    periods = [
+        ("Semua", "a"),
+        ("Tahun ini", "y"),
+        ("Bulan ini", "m")
+    ]
+    period_buttons = []
+    for name, code in periods:
+        label = f"✅ {name}" if code == period_code else name
+        period_buttons.append(types.InlineKeyboardButton(label, callback_data=f"cari_f_{code}_"))
+    markup.add(*period_buttons)
+    
+    nav_buttons = []
+    if prev_token:
+        nav_buttons.append(types.InlineKeyboardButton(
+            "⬅️ Sebelumnya", callback_data=f"cari_p_{period_code}_{prev_token}"
+        ))
+    if next_token:
+        nav_buttons.append(types.InlineKeyboardButton(
+            "Berikutnya ➡️", callback_data=f"cari_n_{period_code}_{next_token}"
+        ))
+    if nav_buttons:
+        markup.add(*nav_buttons)
+    
+    markup.add(types.InlineKeyboardButton("🔙 Kembali", callback_data="transaction_menu"))
+    return markup
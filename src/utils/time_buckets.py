@@ -0,0 +1,97 @@
+"""
+Per-user time bucketing. Transactions are stored in naive UTC; report periods
+are local calendar days of the user's timezone (users.timezone). Period
+boundaries are converted to UTC once per (timezone, period, local day) and
+cached, so range filters keep hitting idx_transaction_user_date, and every
+transaction carries a precomputed local_date key for per-day grouping
+"""
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+from sqlalchemy import text
+import os
+import threading
+import pytz
+import logging
+
+from src.utils.helpers import get_date_range
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = os.getenv('TIMEZONE', 'Asia/Jakarta')
+TIME_BUCKET_CACHE_SIZE = int(os.getenv('TIME_BUCKET_CACHE_SIZE', '4096'))
+
+ONE_MICROSECOND = timedelta(microseconds=1)
+
+class PeriodBounds(NamedTuple):
+    """A period in the user's local time and the UTC range to query it with"""
+    start: datetime       # local, naive
+    end: datetime         # local, naive, last microsecond of the period
+    utc_start: datetime   # naive UTC, like transactions.transaction_date
+    utc_end: datetime
+    first_day: date       # local dates, matching transactions.local_date
+    last_day: date
+
+@lru_cache(maxsize=None)
+def get_zone(name: str = None):
+    """pytz zone for a users.timezone value; unknown names fall back to DEFAULT_TIMEZONE"""
+    try:
+        return pytz.timezone(name or DEFAULT_TIMEZONE)
+    except pytz.UnknownTimeZoneError:
+        logger.warning(f"Unknown timezone {name!r}, using {DEFAULT_TIMEZONE}")
+        return pytz.timezone(DEFAULT_TIMEZONE)
+
+def to_local(utc_dt: datetime, zone_name: str = None) -> datetime:
+    """Naive UTC -> naive local time"""
+    return pytz.utc.localize(utc_dt).astimezone(get_zone(zone_name)).replace(tzinfo=None)
+
+def to_utc(local_dt: datetime, zone_name: str = None) -> datetime:
+    """Naive local time -> naive UTC (times skipped or repeated by DST resolve to standard time)"""
+    return get_zone(zone_name).localize(local_dt, is_dst=False).astimezone(pytz.utc).replace(tzinfo=None)
+
+def local_day(utc_dt: datetime, zone_name: str = None) -> date:
+    """The local calendar day a UTC timestamp falls on: the transactions.local_date key"""
+    return to_local(utc_dt, zone_name).date()
+
+def local_now(zone_name: str = None, utc_now: datetime = None) -> datetime:
+    return to_local(utc_now or datetime.utcnow(), zone_name)
+
+@lru_cache(maxsize=TIME_BUCKET_CACHE_SIZE)
+def _period_bounds(zone_name: str, period: str, today: date) -> PeriodBounds:
+    # Every period get_date_range knows is whole local days, so noon stands in for "now"
+    start, end = get_date_range(period, now=datetime.combine(today, time(12)))
+    # The end is converted via the next period's start: the last local microsecond may not exist under DST
+    return PeriodBounds(start, end, to_utc(start, zone_name), to_utc(end + ONE_MICROSECOND, zone_name) - ONE_MICROSECOND,
+                        start.date(), end.date())
+
+def period_bounds(zone_name: str, period: str, utc_now: datetime = None) -> PeriodBounds:
+    """Bounds of a named period (today, week, last_week, month, ...) for a timezone at utc_now"""
+    zone_name = zone_name or DEFAULT_TIMEZONE
+    return _period_bounds(zone_name, period, local_now(zone_name, utc_now).date())
+
+def period_cache_info():
+    return _period_bounds.cache_info()
+
+# users.timezone per user id; write paths need it for every transaction they store
+_user_zones = {}
+_user_zones_lock = threading.Lock()
+
+USER_TIMEZONE = text("SELECT timezone FROM users WHERE id = :user_id")
+
+def user_timezone(executor, user_id: int) -> str:
+    """Timezone name of a user; `executor` is a Session or Connection, used only on a cache miss"""
+    with _user_zones_lock:
+        zone_name = _user_zones.get(user_id)
+    if zone_name is None:
+        zone_name = executor.execute(USER_TIMEZONE, {'user_id': user_id}).scalar() or DEFAULT_TIMEZONE
+        with _user_zones_lock:
+            _user_zones[user_id] = zone_name
+    return zone_name
+
+def forget_user_timezone(user_id: int = None):
+    """Drop one cached user timezone (or all) after users.timezone changed"""
+    with _user_zones_lock:
+        if user_id is None:
+            _user_zones.clear()
+        else:
+            _user_zones.pop(user_id, None)